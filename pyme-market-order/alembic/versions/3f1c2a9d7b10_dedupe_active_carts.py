@@ -0,0 +1,48 @@
+"""dedupe active carts and enforce one active cart per user
+
+Revision ID: 3f1c2a9d7b10
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7b10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Conservar por usuario el carrito activo con items más reciente; el resto pasa a abandonado
+    op.execute("""
+        UPDATE carts SET status = 'abandoned', updated_at = now()
+        WHERE cart_id IN (
+            SELECT cart_id FROM (
+                SELECT cart_id,
+                       row_number() OVER (
+                           PARTITION BY user_id
+                           ORDER BY (total_items > 0) DESC, updated_at DESC, created_at DESC
+                       ) AS position
+                FROM carts
+                WHERE status = 'active' AND is_active
+            ) ranked
+            WHERE ranked.position > 1
+        )
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_carts_user_active
+        ON carts (user_id)
+        WHERE status = 'active' AND is_active = true
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS uq_carts_user_active")
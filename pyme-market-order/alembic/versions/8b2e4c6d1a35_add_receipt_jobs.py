@@ -0,0 +1,53 @@
+"""add receipt_jobs queue for background receipt generation
+
+Revision ID: 8b2e4c6d1a35
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4c6d1a35'
+down_revision: Union[str, None] = '3f1c2a9d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'receipt_jobs',
+        sa.Column('job_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('purchase_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_error', sa.String(length=1000), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['purchase_id'], ['purchases.purchase_id']),
+        sa.PrimaryKeyConstraint('job_id'),
+        sa.UniqueConstraint('job_id'),
+        sa.UniqueConstraint('purchase_id'),
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_receipt_jobs_claimable', 'receipt_jobs', ['next_attempt_at'],
+        postgresql_where=sa.text("status IN ('pending', 'processing')"),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_receipt_jobs_claimable', table_name='receipt_jobs', if_exists=True)
+    op.drop_table('receipt_jobs', if_exists=True)
@@ -0,0 +1,58 @@
+"""convert receipts.receipt_data to JSONB and index items and payment method
+
+Revision ID: a3c5e7f9b214
+Revises: f2a6d8c4b793
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f9b214'
+down_revision: Union[str, None] = 'f2a6d8c4b793'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Reescribe la tabla bajo ACCESS EXCLUSIVE: ejecutar en una ventana de mantenimiento
+    op.alter_column(
+        'receipts', 'receipt_data',
+        type_=postgresql.JSONB(),
+        existing_type=postgresql.JSON(),
+        existing_nullable=False,
+        postgresql_using='receipt_data::jsonb'
+    )
+
+    # CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        # Contención sobre items: receipt_data -> 'items' @> '[{"product_sku": "..."}]'
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_receipts_items
+            ON receipts USING gin ((receipt_data -> 'items') jsonb_path_ops)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_receipts_payment_method
+            ON receipts ((receipt_data ->> 'payment_method'))
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_receipts_payment_method")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_receipts_items")
+
+    op.alter_column(
+        'receipts', 'receipt_data',
+        type_=postgresql.JSON(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=False,
+        postgresql_using='receipt_data::json'
+    )
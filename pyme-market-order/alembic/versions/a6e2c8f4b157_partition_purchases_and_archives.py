@@ -0,0 +1,287 @@
+"""partition purchases by month and add partitioned cart archives
+
+Revision ID: a6e2c8f4b157
+Revises: d4f7b1c8a925
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e2c8f4b157'
+down_revision: Union[str, None] = 'd4f7b1c8a925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses creados por delante del actual; después los crea el job partition-maintenance
+PARTITION_MONTHS_AHEAD = 3
+
+PURCHASE_COLUMNS = (
+    "purchase_id, cart_id, user_id, purchase_number, total_amount, tax_amount, discount_amount, "
+    "final_amount, payment_method, status, items_count, total_quantity, purchased_at"
+)
+CART_COLUMNS = (
+    "cart_id, user_id, status, total_amount, total_items, is_active, created_at, updated_at, "
+    "completed_at"
+)
+CART_ITEM_COLUMNS = (
+    "cart_item_id, cart_id, product_id, product_name, product_sku, unit_price, quantity, "
+    "subtotal, added_at, updated_at"
+)
+
+
+def _create_monthly_partitions(table: str, column: str, source: str) -> None:
+    """Crear particiones mensuales (UTC) desde el dato más antiguo de source hasta
+    PARTITION_MONTHS_AHEAD meses por delante, más la partición DEFAULT"""
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month_start timestamp := date_trunc('month',
+                COALESCE((SELECT min({column}) FROM {source}), now()) AT TIME ZONE 'UTC');
+            last_month timestamp := date_trunc('month',
+                (now() + interval '{PARTITION_MONTHS_AHEAD} months') AT TIME ZONE 'UTC');
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_p' || to_char(month_start, 'YYYY_MM'),
+                    month_start::text || '+00',
+                    (month_start + interval '1 month')::text || '+00');
+                month_start := month_start + interval '1 month';
+            END LOOP;
+        END $$;
+    """)
+    op.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+
+
+def _rename_unique_constraints(table: str) -> None:
+    """Renombrar PK y UNIQUE de una tabla que se va a reemplazar (sus índices ocupan los nombres)"""
+    op.execute(f"""
+        DO $$
+        DECLARE
+            constraint_name text;
+        BEGIN
+            FOR constraint_name IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = '{table}'::regclass AND contype IN ('p', 'u')
+            LOOP
+                EXECUTE format('ALTER TABLE {table} RENAME CONSTRAINT %I TO %I',
+                               constraint_name, constraint_name || '_old');
+            END LOOP;
+        END $$;
+    """)
+
+
+def _create_purchases_indexes(with_cart_id: bool = True) -> None:
+    op.create_index('ix_purchases_user_id_purchased_at', 'purchases',
+                    ['user_id', sa.text('purchased_at DESC'), sa.text('purchase_id DESC')])
+    op.create_index('ix_purchases_purchased_at', 'purchases', ['purchased_at', 'purchase_id'])
+    if with_cart_id:
+        # Sin pruning por cart_id: evita recorrer cada partición en purchase_exists_for_cart
+        op.create_index('ix_purchases_cart_id', 'purchases', ['cart_id'])
+    op.create_index('ix_purchases_item_counters_pending', 'purchases', ['purchase_id'],
+                    postgresql_where=sa.text('items_count IS NULL'))
+
+
+def _drop_purchases_indexes() -> None:
+    for index_name in ('ix_purchases_user_id_purchased_at', 'ix_purchases_purchased_at',
+                       'ix_purchases_cart_id', 'ix_purchases_item_counters_pending'):
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Reescribe purchases y cart_items_archive bajo ACCESS EXCLUSIVE: correr en una ventana de
+    # mantenimiento. Desde PostgreSQL 12 una tabla particionada puede ser destino de FKs, pero sólo
+    # hacia una clave única que incluya la columna de partición: la clave pasa a ser (purchase_id,
+    # purchased_at) y receipts, receipt_jobs y checkout_sagas no guardan purchased_at. Esas tablas
+    # referencian la compra sólo por valor y la aplicación garantiza que exista (se crean en la misma
+    # transacción que la compra). Por lo mismo purchase_number es único sólo junto con purchased_at:
+    # la unicidad global depende de que el número incluya la fecha y parte del purchase_id
+    op.execute("ALTER TABLE receipts DROP CONSTRAINT IF EXISTS receipts_purchase_id_fkey")
+    op.execute("ALTER TABLE receipt_jobs DROP CONSTRAINT IF EXISTS receipt_jobs_purchase_id_fkey")
+    op.execute("ALTER TABLE checkout_sagas DROP CONSTRAINT IF EXISTS checkout_sagas_purchase_id_fkey")
+
+    # purchases: particionada por mes de purchased_at. Las claves únicas incluyen purchased_at
+    op.rename_table('purchases', 'purchases_unpartitioned')
+    _rename_unique_constraints('purchases_unpartitioned')
+    _drop_purchases_indexes()
+
+    op.create_table(
+        'purchases',
+        sa.Column('purchase_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('cart_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', sa.String(length=255), nullable=False),
+        sa.Column('purchase_number', sa.String(length=100), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('tax_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('discount_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('final_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('payment_method', sa.String(length=50), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('items_count', sa.Integer(), nullable=True),
+        sa.Column('total_quantity', sa.Integer(), nullable=True),
+        sa.Column('purchased_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('purchase_id', 'purchased_at'),
+        sa.UniqueConstraint('purchase_number', 'purchased_at',
+                            name='uq_purchases_purchase_number'),
+        postgresql_partition_by='RANGE (purchased_at)'
+    )
+    _create_monthly_partitions('purchases', 'purchased_at', 'purchases_unpartitioned')
+    op.execute(f"""
+        INSERT INTO purchases ({PURCHASE_COLUMNS})
+        SELECT {PURCHASE_COLUMNS} FROM purchases_unpartitioned
+    """)
+    op.drop_table('purchases_unpartitioned')
+    _create_purchases_indexes()
+
+    # cart_items_archive: pasa a particionarse por mes de archived_at
+    op.rename_table('cart_items_archive', 'cart_items_archive_unpartitioned')
+    _rename_unique_constraints('cart_items_archive_unpartitioned')
+    op.execute("DROP INDEX IF EXISTS ix_cart_items_archive_cart_id")
+
+    op.create_table(
+        'cart_items_archive',
+        sa.Column('cart_item_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('cart_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('product_name', sa.String(length=255), nullable=False),
+        sa.Column('product_sku', sa.String(length=100), nullable=False),
+        sa.Column('unit_price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('added_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('cart_item_id', 'archived_at'),
+        postgresql_partition_by='RANGE (archived_at)'
+    )
+    _create_monthly_partitions(
+        'cart_items_archive', 'archived_at', 'cart_items_archive_unpartitioned')
+    op.execute(f"""
+        INSERT INTO cart_items_archive ({CART_ITEM_COLUMNS}, archived_at)
+        SELECT {CART_ITEM_COLUMNS}, archived_at FROM cart_items_archive_unpartitioned
+    """)
+    op.drop_table('cart_items_archive_unpartitioned')
+    op.create_index('ix_cart_items_archive_cart_id', 'cart_items_archive', ['cart_id'])
+
+    # carts_archive: carritos completados o abandonados movidos fuera de carts
+    op.create_table(
+        'carts_archive',
+        sa.Column('cart_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('total_items', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('cart_id', 'archived_at'),
+        postgresql_partition_by='RANGE (archived_at)'
+    )
+    _create_monthly_partitions('carts_archive', 'archived_at', 'carts_archive')
+    op.create_index('ix_carts_archive_user_id', 'carts_archive', ['user_id'])
+
+    # Carritos cerrados pendientes de archivar
+    op.create_index(
+        'ix_carts_closed_at', 'carts', [sa.text('coalesce(completed_at, updated_at)')],
+        postgresql_where=sa.text("status IN ('completed', 'abandoned')")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_carts_closed_at', table_name='carts')
+
+    # Los carritos archivados vuelven a carts con sus items (las sagas borradas no se recuperan)
+    op.execute(f"""
+        INSERT INTO carts ({CART_COLUMNS})
+        SELECT {CART_COLUMNS} FROM carts_archive
+        ON CONFLICT (cart_id) DO NOTHING
+    """)
+    op.execute(f"""
+        INSERT INTO cart_items ({CART_ITEM_COLUMNS})
+        SELECT {CART_ITEM_COLUMNS} FROM cart_items_archive
+        WHERE cart_id IN (SELECT cart_id FROM carts_archive)
+        ON CONFLICT (cart_item_id) DO NOTHING
+    """)
+    op.execute("""
+        DELETE FROM cart_items_archive
+        WHERE cart_id IN (SELECT cart_id FROM carts_archive)
+    """)
+    op.drop_table('carts_archive')
+
+    op.rename_table('cart_items_archive', 'cart_items_archive_partitioned')
+    _rename_unique_constraints('cart_items_archive_partitioned')
+    op.execute("DROP INDEX IF EXISTS ix_cart_items_archive_cart_id")
+    op.create_table(
+        'cart_items_archive',
+        sa.Column('cart_item_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('cart_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('product_name', sa.String(length=255), nullable=False),
+        sa.Column('product_sku', sa.String(length=100), nullable=False),
+        sa.Column('unit_price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('added_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('cart_item_id')
+    )
+    op.execute(f"""
+        INSERT INTO cart_items_archive ({CART_ITEM_COLUMNS}, archived_at)
+        SELECT {CART_ITEM_COLUMNS}, archived_at FROM cart_items_archive_partitioned
+        ON CONFLICT (cart_item_id) DO NOTHING
+    """)
+    op.drop_table('cart_items_archive_partitioned')
+    op.create_index('ix_cart_items_archive_cart_id', 'cart_items_archive', ['cart_id'])
+
+    op.rename_table('purchases', 'purchases_partitioned')
+    _rename_unique_constraints('purchases_partitioned')
+    _drop_purchases_indexes()
+    op.create_table(
+        'purchases',
+        sa.Column('purchase_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('cart_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', sa.String(length=255), nullable=False),
+        sa.Column('purchase_number', sa.String(length=100), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('tax_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('discount_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('final_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('payment_method', sa.String(length=50), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('items_count', sa.Integer(), nullable=True),
+        sa.Column('total_quantity', sa.Integer(), nullable=True),
+        sa.Column('purchased_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['cart_id'], ['carts.cart_id']),
+        sa.PrimaryKeyConstraint('purchase_id'),
+        sa.UniqueConstraint('purchase_id'),
+        sa.UniqueConstraint('purchase_number')
+    )
+    op.execute(f"""
+        INSERT INTO purchases ({PURCHASE_COLUMNS})
+        SELECT {PURCHASE_COLUMNS} FROM purchases_partitioned
+    """)
+    op.drop_table('purchases_partitioned')
+    _create_purchases_indexes(with_cart_id=False)
+
+    op.create_foreign_key('receipts_purchase_id_fkey', 'receipts', 'purchases',
+                          ['purchase_id'], ['purchase_id'])
+    op.create_foreign_key('receipt_jobs_purchase_id_fkey', 'receipt_jobs', 'purchases',
+                          ['purchase_id'], ['purchase_id'])
+    op.create_foreign_key('checkout_sagas_purchase_id_fkey', 'checkout_sagas', 'purchases',
+                          ['purchase_id'], ['purchase_id'])
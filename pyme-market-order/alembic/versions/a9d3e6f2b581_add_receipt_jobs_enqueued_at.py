@@ -0,0 +1,29 @@
+"""track when receipt jobs were last enqueued
+
+Revision ID: a9d3e6f2b581
+Revises: f6c2d9e3a418
+Create Date: 2026-10-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d3e6f2b581'
+down_revision: Union[str, None] = 'f6c2d9e3a418'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Con DEFAULT constante (now() se evalúa una vez) no reescribe la tabla
+    op.execute(
+        "ALTER TABLE receipt_jobs ADD COLUMN IF NOT EXISTS enqueued_at timestamptz NOT NULL DEFAULT now()")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE receipt_jobs DROP COLUMN IF EXISTS enqueued_at")
@@ -0,0 +1,52 @@
+"""add per-user order stats table
+
+Revision ID: b3d9e1f6a274
+Revises: a6e2c8f4b157
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9e1f6a274'
+down_revision: Union[str, None] = 'a6e2c8f4b157'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_order_stats',
+        sa.Column('user_id', sa.String(length=255), nullable=False),
+        sa.Column('orders_count', sa.Integer(), nullable=False),
+        sa.Column('total_spent', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('first_order_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_order_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_purchase_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('user_id'),
+        if_not_exists=True
+    )
+
+    # Carga inicial; después se mantiene en cada compra (o con scripts/rebuild_user_order_stats.py)
+    op.execute("""
+        INSERT INTO user_order_stats (user_id, orders_count, total_spent, first_order_at,
+                                      last_order_at, last_purchase_id)
+        SELECT user_id, count(purchase_id), sum(final_amount), min(purchased_at), max(purchased_at),
+               (array_agg(purchase_id ORDER BY purchased_at DESC, purchase_id DESC))[1]
+        FROM purchases
+        GROUP BY user_id
+        ON CONFLICT (user_id) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_order_stats', if_exists=True)
@@ -0,0 +1,35 @@
+"""track sales rollup days to recompute after purchases change
+
+Revision ID: b5e8c2a7d934
+Revises: a9d3e6f2b581
+Create Date: 2026-10-20 01:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8c2a7d934'
+down_revision: Union[str, None] = 'a9d3e6f2b581'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'sales_rollup_dirty_days',
+        sa.Column('sales_date', sa.Date(), nullable=False),
+        sa.Column('marked_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('sales_date'),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sales_rollup_dirty_days', if_exists=True)
@@ -0,0 +1,74 @@
+"""add compact receipt storage (receipts.storage_format and receipt_lines)
+
+Revision ID: b8d1f4a6c327
+Revises: a3c5e7f9b214
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d1f4a6c327'
+down_revision: Union[str, None] = 'a3c5e7f9b214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Con default constante no se reescribe la tabla; los recibos existentes quedan como 'json'
+    op.add_column(
+        'receipts',
+        sa.Column('storage_format', sa.String(length=10),
+                  server_default='json', nullable=False)
+    )
+
+    op.create_table(
+        'receipt_lines',
+        sa.Column('receipt_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('line_no', sa.SmallInteger(), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('product_sku', sa.String(length=100), nullable=False),
+        sa.Column('product_name', sa.String(length=255), nullable=False),
+        sa.Column('unit_price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['receipt_id'], ['receipts.receipt_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('receipt_id', 'line_no'),
+        if_not_exists=True
+    )
+    # Búsqueda de recibos compactos por producto (rama receipt_lines de /receipts/search)
+    op.create_index('ix_receipt_lines_product_sku', 'receipt_lines', ['product_sku'],
+                    if_not_exists=True)
+    op.create_index('ix_receipt_lines_product_id', 'receipt_lines', ['product_id'],
+                    if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Devolver los items de los recibos compactos al documento antes de eliminar las líneas
+    op.execute("""
+        UPDATE receipts SET receipt_data = receipts.receipt_data || jsonb_build_object('items', lines.items)
+        FROM (
+            SELECT receipt_id, jsonb_agg(jsonb_build_object(
+                'product_id', product_id::text,
+                'product_name', product_name,
+                'product_sku', product_sku,
+                'unit_price', unit_price::float8,
+                'quantity', quantity,
+                'subtotal', subtotal::float8
+            ) ORDER BY line_no) AS items
+            FROM receipt_lines
+            GROUP BY receipt_id
+        ) AS lines
+        WHERE receipts.receipt_id = lines.receipt_id AND receipts.storage_format = 'compact'
+    """)
+    op.drop_index('ix_receipt_lines_product_id', table_name='receipt_lines', if_exists=True)
+    op.drop_index('ix_receipt_lines_product_sku', table_name='receipt_lines', if_exists=True)
+    op.drop_table('receipt_lines', if_exists=True)
+    op.drop_column('receipts', 'storage_format')
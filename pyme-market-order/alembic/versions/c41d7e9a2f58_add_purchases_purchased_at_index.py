@@ -0,0 +1,39 @@
+"""index purchases by purchased_at for date-range exports
+
+Revision ID: c41d7e9a2f58
+Revises: 8b2e4c6d1a35
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e9a2f58'
+down_revision: Union[str, None] = '8b2e4c6d1a35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_purchases_purchased_at
+            ON purchases (purchased_at, purchase_id)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cart_items_cart_id
+            ON cart_items (cart_id)
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_cart_items_cart_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_purchases_purchased_at")
@@ -0,0 +1,35 @@
+"""track product replica sync time and relax sku uniqueness
+
+Revision ID: c7f1a3e5d829
+Revises: b3d9e1f6a274
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f1a3e5d829'
+down_revision: Union[str, None] = 'b3d9e1f6a274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # products la crea create_all al iniciar; la migración sólo ajusta lo que la réplica necesita
+    op.execute(
+        "ALTER TABLE products ADD COLUMN IF NOT EXISTS synced_at timestamptz NOT NULL DEFAULT now()")
+    # El SKU es del servicio de productos: la réplica no puede rechazar un cambio por un SKU
+    # reutilizado que llega antes que el evento del producto que lo liberó
+    op.execute("DROP INDEX IF EXISTS ix_products_sku")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_products_sku ON products (sku)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_products_sku")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_products_sku ON products (sku)")
+    op.execute("ALTER TABLE products DROP COLUMN IF EXISTS synced_at")
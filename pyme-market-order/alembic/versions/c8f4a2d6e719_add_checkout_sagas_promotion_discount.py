@@ -0,0 +1,33 @@
+"""store the evaluated promotion discount on checkout sagas
+
+Revision ID: c8f4a2d6e719
+Revises: b5e8c2a7d934
+Create Date: 2026-10-20 02:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f4a2d6e719'
+down_revision: Union[str, None] = 'b5e8c2a7d934'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('checkout_sagas', sa.Column(
+        'discount_amount', sa.Numeric(10, 2), nullable=True))
+    op.add_column('checkout_sagas', sa.Column(
+        'promotion_ids', postgresql.ARRAY(postgresql.UUID(as_uuid=True)), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('checkout_sagas', 'promotion_ids')
+    op.drop_column('checkout_sagas', 'discount_amount')
@@ -0,0 +1,42 @@
+"""add items_count and total_quantity to purchases
+
+Revision ID: c9e2a5b7d416
+Revises: b8d1f4a6c327
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e2a5b7d416'
+down_revision: Union[str, None] = 'b8d1f4a6c327'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Columnas nulables sin default: no reescribe la tabla. Las compras existentes se
+    # completan por lotes con el job purchase-counters-backfill
+    op.add_column('purchases', sa.Column('items_count', sa.Integer(), nullable=True))
+    op.add_column('purchases', sa.Column('total_quantity', sa.Integer(), nullable=True))
+
+    # CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_purchases_item_counters_pending
+            ON purchases (purchase_id) WHERE items_count IS NULL
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_purchases_item_counters_pending")
+
+    op.drop_column('purchases', 'total_quantity')
+    op.drop_column('purchases', 'items_count')
@@ -0,0 +1,56 @@
+"""add promotions rules table
+
+Revision ID: d4f7b1c8a925
+Revises: c9e2a5b7d416
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f7b1c8a925'
+down_revision: Union[str, None] = 'c9e2a5b7d416'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tabla pequeña que se lee completa al compilar el conjunto de reglas: sin índices extra
+    op.create_table(
+        'promotions',
+        sa.Column('promotion_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('rule_type', sa.String(length=20), nullable=False),
+        sa.Column('product_sku', sa.String(length=100), nullable=True),
+        sa.Column('value', sa.Numeric(10, 2), nullable=True),
+        sa.Column('buy_quantity', sa.Integer(), nullable=True),
+        sa.Column('get_quantity', sa.Integer(), nullable=True),
+        sa.Column('min_subtotal', sa.Numeric(10, 2), nullable=True),
+        sa.Column('min_quantity', sa.Integer(), nullable=True),
+        sa.Column('stackable', sa.Boolean(), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('starts_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('ends_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.CheckConstraint(
+            "rule_type IN ('percentage_off', 'fixed_off', 'buy_x_get_y')",
+            name='ck_promotions_rule_type'),
+        sa.PrimaryKeyConstraint('promotion_id'),
+        sa.UniqueConstraint('promotion_id'),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('promotions', if_exists=True)
@@ -0,0 +1,74 @@
+"""add daily sales rollup tables and rollup watermarks
+
+Revision ID: d5a8f3b0c912
+Revises: c41d7e9a2f58
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8f3b0c912'
+down_revision: Union[str, None] = 'c41d7e9a2f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'sales_daily',
+        sa.Column('sales_date', sa.Date(), nullable=False),
+        sa.Column('purchases_count', sa.Integer(), nullable=False),
+        sa.Column('units_sold', sa.Integer(), nullable=False),
+        sa.Column('gross_amount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('discount_amount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('tax_amount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('net_amount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('sales_date'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'sales_daily_products',
+        sa.Column('sales_date', sa.Date(), nullable=False),
+        sa.Column('product_sku', sa.String(length=100), nullable=False),
+        sa.Column('product_name', sa.String(length=255), nullable=False),
+        sa.Column('units_sold', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(14, 2), nullable=False),
+        sa.PrimaryKeyConstraint('sales_date', 'product_sku'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'sales_daily_payment_methods',
+        sa.Column('sales_date', sa.Date(), nullable=False),
+        sa.Column('payment_method', sa.String(length=50), nullable=False),
+        sa.Column('purchases_count', sa.Integer(), nullable=False),
+        sa.Column('net_amount', sa.Numeric(14, 2), nullable=False),
+        sa.PrimaryKeyConstraint('sales_date', 'payment_method'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'rollup_watermarks',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('last_purchased_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_purchase_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rollup_watermarks', if_exists=True)
+    op.drop_table('sales_daily_payment_methods', if_exists=True)
+    op.drop_table('sales_daily_products', if_exists=True)
+    op.drop_table('sales_daily', if_exists=True)
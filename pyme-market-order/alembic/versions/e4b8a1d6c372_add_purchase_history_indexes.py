@@ -0,0 +1,68 @@
+"""index purchases by user for history pages and cart_items by cart
+
+Revision ID: e4b8a1d6c372
+Revises: c7f1a3e5d829
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8a1d6c372'
+down_revision: Union[str, None] = 'c7f1a3e5d829'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_index_concurrently(name: str, table: str, columns: str) -> None:
+    """Crear el índice sin bloquear escrituras. En una tabla particionada CONCURRENTLY no está
+    soportado: se crea inválido sobre la tabla padre (ON ONLY), concurrentemente en cada
+    partición y se engancha; queda válido al enganchar todas las particiones"""
+    bind = op.get_bind()
+    relkind = bind.execute(sa.text(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}).scalar()
+
+    if relkind != 'p':
+        op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})")
+        return
+
+    valid = bind.execute(sa.text(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}).scalar()
+    if valid:
+        return
+
+    op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} ({columns})")
+    partitions = bind.execute(sa.text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(:table)
+    """), {"table": table}).scalars().all()
+
+    for partition in partitions:
+        partition_index = f"{partition}_{name.removeprefix(f'ix_{table}_')}_idx"
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} ({columns})")
+        op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_all no agrega índices a tablas existentes: las bases creadas antes del historial
+    # paginado no tienen estos índices del modelo
+    with op.get_context().autocommit_block():
+        _create_index_concurrently(
+            'ix_purchases_user_id_purchased_at', 'purchases',
+            'user_id, purchased_at DESC, purchase_id DESC')
+        _create_index_concurrently('ix_cart_items_cart_id', 'cart_items', 'cart_id')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Sin cambios: c41d7e9a2f58 y a6e2c8f4b157 también crean estos índices y sus downgrades
+    # los eliminan; borrarlos aquí dejaría esas revisiones sin sus índices
+    pass
@@ -0,0 +1,73 @@
+"""add checkout_sagas to track stock reservations of each checkout
+
+Revision ID: e7b3c9d2a461
+Revises: d5a8f3b0c912
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3c9d2a461'
+down_revision: Union[str, None] = 'd5a8f3b0c912'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'checkout_sagas',
+        sa.Column('saga_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('cart_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('payment_method', sa.String(length=50), nullable=True),
+        sa.Column('discount_percentage', sa.Numeric(5, 2), nullable=True),
+        sa.Column('tax_percentage', sa.Numeric(5, 2), nullable=True),
+        sa.Column('lines', postgresql.JSONB(), nullable=False),
+        sa.Column('purchase_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.String(length=1000), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['cart_id'], ['carts.cart_id']),
+        sa.ForeignKeyConstraint(['purchase_id'], ['purchases.purchase_id']),
+        sa.PrimaryKeyConstraint('saga_id'),
+        sa.UniqueConstraint('saga_id'),
+        if_not_exists=True
+    )
+    op.create_index(
+        op.f('ix_checkout_sagas_cart_id'), 'checkout_sagas', ['cart_id'],
+        if_not_exists=True
+    )
+    # Un solo checkout en curso por carrito: evita reservar stock dos veces por doble clic
+    op.create_index(
+        'uq_checkout_sagas_cart_in_flight', 'checkout_sagas', ['cart_id'], unique=True,
+        postgresql_where=sa.text("status IN ('started', 'reserved', 'compensating')"),
+        if_not_exists=True
+    )
+    # Búsqueda de checkouts interrumpidos por el job de recuperación
+    op.create_index(
+        'ix_checkout_sagas_in_flight_updated_at', 'checkout_sagas', ['updated_at'],
+        postgresql_where=sa.text("status IN ('started', 'reserved', 'compensating')"),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_checkout_sagas_in_flight_updated_at',
+                  table_name='checkout_sagas', if_exists=True)
+    op.drop_index('uq_checkout_sagas_cart_in_flight',
+                  table_name='checkout_sagas', if_exists=True)
+    op.drop_index(op.f('ix_checkout_sagas_cart_id'),
+                  table_name='checkout_sagas', if_exists=True)
+    op.drop_table('checkout_sagas', if_exists=True)
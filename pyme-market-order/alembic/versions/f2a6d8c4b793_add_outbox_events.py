@@ -0,0 +1,71 @@
+"""add outbox_events for order domain events
+
+Revision ID: f2a6d8c4b793
+Revises: e7b3c9d2a461
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6d8c4b793'
+down_revision: Union[str, None] = 'e7b3c9d2a461'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'outbox_events',
+        sa.Column('event_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('sequence', sa.BigInteger(), sa.Identity(always=True), nullable=False),
+        sa.Column('aggregate_type', sa.String(length=50), nullable=False),
+        sa.Column('aggregate_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_error', sa.String(length=1000), nullable=True),
+        sa.PrimaryKeyConstraint('event_id'),
+        sa.UniqueConstraint('event_id'),
+        sa.UniqueConstraint('sequence'),
+        if_not_exists=True
+    )
+    # Eventos pendientes en orden de publicación
+    op.create_index(
+        'ix_outbox_events_unpublished', 'outbox_events', ['sequence'],
+        postgresql_where=sa.text('published_at IS NULL'),
+        if_not_exists=True
+    )
+    # Comprobación de eventos anteriores pendientes del mismo agregado (orden por agregado)
+    op.create_index(
+        'ix_outbox_events_unpublished_aggregate', 'outbox_events',
+        ['aggregate_type', 'aggregate_id', 'sequence'],
+        postgresql_where=sa.text('published_at IS NULL'),
+        if_not_exists=True
+    )
+    # Retención de eventos publicados
+    op.create_index(
+        'ix_outbox_events_published_at', 'outbox_events', ['published_at'],
+        postgresql_where=sa.text('published_at IS NOT NULL'),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_events_published_at', table_name='outbox_events', if_exists=True)
+    op.drop_index('ix_outbox_events_unpublished_aggregate',
+                  table_name='outbox_events', if_exists=True)
+    op.drop_index('ix_outbox_events_unpublished', table_name='outbox_events', if_exists=True)
+    op.drop_table('outbox_events', if_exists=True)
@@ -0,0 +1,34 @@
+"""index active carts by updated_at for the abandoned cart sweeper
+
+Revision ID: f6c2d9e3a418
+Revises: e4b8a1d6c372
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6c2d9e3a418'
+down_revision: Union[str, None] = 'e4b8a1d6c372'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_carts_active_updated_at
+            ON carts (updated_at)
+            WHERE status = 'active'
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_carts_active_updated_at")
@@ -9,6 +9,9 @@ from app.schemas.cart_item_schema import (
 from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
 from app.infrastructure.db.repositories.cart_repository import CartRepository
 from app.domain.services.cart_item_service import get_cart_item_service
+from app.infrastructure.clients.products_client import get_products_client
+from app.infrastructure.db.repositories.product_replica_repository import get_product_replica
+from app.infrastructure.cache.cart_store import get_cart_store
 from app.domain.exceptions.cart_item_exception import (
     CartItemNotFoundException, InvalidQuantityException, ProductAlreadyInCartException,
     InvalidPriceException, ProductDataIncompleteException
@@ -16,6 +19,10 @@ from app.domain.exceptions.cart_item_exception import (
 from app.domain.exceptions.cart_exception import (
     CartNotFoundException, CartInactiveException, CartAlreadyCompletedException
 )
+from app.domain.exceptions.product_exception import (
+    ProductNotFoundException, ProductInactiveException, ProductsServiceUnavailableException
+)
+from app.domain.exceptions.purchase_exception import InsufficientStockException
 
 router = APIRouter(prefix="/cart-items", tags=["cart-items"])
 
@@ -31,7 +38,8 @@ async def add_item_to_cart(
         cart_item_repository = CartItemRepository(db)
         cart_repository = CartRepository(db)
         cart_item_service = get_cart_item_service(
-            cart_item_repository, cart_repository)
+            cart_item_repository, cart_repository, get_products_client(), get_cart_store(),
+            get_product_replica(db))
 
         cart_item = await cart_item_service.add_item_to_cart(cart_id, item_data)
         return cart_item
@@ -47,6 +55,21 @@ async def add_item_to_cart(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=e.status.description
         )
+    except ProductNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.status.description
+        )
+    except (ProductInactiveException, InsufficientStockException) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except ProductsServiceUnavailableException as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.status.description
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -64,7 +87,7 @@ async def get_cart_item(
         cart_item_repository = CartItemRepository(db)
         cart_repository = CartRepository(db)
         cart_item_service = get_cart_item_service(
-            cart_item_repository, cart_repository)
+            cart_item_repository, cart_repository, cart_store=get_cart_store())
 
         cart_item = await cart_item_service.get_cart_item_by_id(cart_item_id)
         return cart_item
@@ -91,7 +114,7 @@ async def get_cart_items(
         cart_item_repository = CartItemRepository(db)
         cart_repository = CartRepository(db)
         cart_item_service = get_cart_item_service(
-            cart_item_repository, cart_repository)
+            cart_item_repository, cart_repository, cart_store=get_cart_store())
 
         cart_items = await cart_item_service.get_cart_items(cart_id)
         return CartItemListResponse(cart_items=cart_items, total=len(cart_items))
@@ -119,7 +142,8 @@ async def update_item_quantity(
         cart_item_repository = CartItemRepository(db)
         cart_repository = CartRepository(db)
         cart_item_service = get_cart_item_service(
-            cart_item_repository, cart_repository)
+            cart_item_repository, cart_repository, get_products_client(), get_cart_store(),
+            get_product_replica(db))
 
         cart_item = await cart_item_service.update_item_quantity(cart_item_id, new_quantity)
         return cart_item
@@ -139,6 +163,21 @@ async def update_item_quantity(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=e.status.description
         )
+    except ProductNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.status.description
+        )
+    except (ProductInactiveException, InsufficientStockException) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except ProductsServiceUnavailableException as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.status.description
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -157,7 +196,8 @@ async def update_cart_item(
         cart_item_repository = CartItemRepository(db)
         cart_repository = CartRepository(db)
         cart_item_service = get_cart_item_service(
-            cart_item_repository, cart_repository)
+            cart_item_repository, cart_repository, get_products_client(), get_cart_store(),
+            get_product_replica(db))
 
         cart_item = await cart_item_service.update_cart_item(cart_item_id, update_data)
         return cart_item
@@ -177,6 +217,21 @@ async def update_cart_item(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=e.status.description
         )
+    except ProductNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.status.description
+        )
+    except (ProductInactiveException, InsufficientStockException) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except ProductsServiceUnavailableException as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.status.description
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -194,7 +249,7 @@ async def remove_item_from_cart(
         cart_item_repository = CartItemRepository(db)
         cart_repository = CartRepository(db)
         cart_item_service = get_cart_item_service(
-            cart_item_repository, cart_repository)
+            cart_item_repository, cart_repository, cart_store=get_cart_store())
 
         success = await cart_item_service.remove_item_from_cart(cart_item_id)
         if success:
@@ -233,7 +288,7 @@ async def remove_product_from_cart(
         cart_item_repository = CartItemRepository(db)
         cart_repository = CartRepository(db)
         cart_item_service = get_cart_item_service(
-            cart_item_repository, cart_repository)
+            cart_item_repository, cart_repository, cart_store=get_cart_store())
 
         success = await cart_item_service.remove_product_from_cart(cart_id, product_id)
         if success:
@@ -272,7 +327,7 @@ async def clear_cart_items(
         cart_item_repository = CartItemRepository(db)
         cart_repository = CartRepository(db)
         cart_item_service = get_cart_item_service(
-            cart_item_repository, cart_repository)
+            cart_item_repository, cart_repository, cart_store=get_cart_store())
 
         success = await cart_item_service.clear_cart_items(cart_id)
         if success:
@@ -310,7 +365,7 @@ async def get_cart_summary(
         cart_item_repository = CartItemRepository(db)
         cart_repository = CartRepository(db)
         cart_item_service = get_cart_item_service(
-            cart_item_repository, cart_repository)
+            cart_item_repository, cart_repository, cart_store=get_cart_store())
 
         summary = await cart_item_service.get_cart_summary(cart_id)
         return summary
@@ -1,14 +1,15 @@
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.api.dependencies.database import get_db_session
+from app.api.dependencies.database import get_db_session, get_primary_db_session
 from app.schemas.cart_schema import (
     CartCreate, CartUpdate, CartResponse, CartWithItemsResponse, CartListResponse
 )
 from app.infrastructure.db.repositories.cart_repository import CartRepository
 from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
 from app.domain.services.cart_service import get_cart_service
+from app.infrastructure.cache.cart_store import get_cart_store
 from app.domain.exceptions.cart_exception import (
     CartNotFoundException, CartAlreadyCompletedException, CartIsEmptyException,
     CartInactiveException, CartAbandonedException, InvalidCartStatusException
@@ -26,7 +27,8 @@ async def create_cart(
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
         cart = await cart_service.create_cart(cart_data)
         return cart
@@ -47,7 +49,8 @@ async def get_cart(
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
         cart = await cart_service.get_cart_by_id(cart_id)
         return cart
@@ -73,7 +76,8 @@ async def get_cart_with_items(
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
         cart = await cart_service.get_cart_with_items(cart_id)
         return cart
@@ -100,7 +104,8 @@ async def get_user_carts(
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
         carts = await cart_service.get_carts_by_user(user_id, include_inactive)
         return CartListResponse(carts=carts, total=len(carts))
@@ -112,18 +117,21 @@ async def get_user_carts(
         )
 
 
-@router.get("/user/{user_id}/active", response_model=CartResponse)
+@router.get("/user/{user_id}/active", response_model=Union[CartResponse, CartWithItemsResponse])
 async def get_or_create_active_cart(
     user_id: str,
-    db: AsyncSession = Depends(get_db_session)
+    include: Optional[str] = Query(
+        None, pattern="^items$", description="Use 'items' to embed the cart items"),
+    db: AsyncSession = Depends(get_primary_db_session)
 ):
     """Obtener carrito activo del usuario o crear uno nuevo"""
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
-        cart = await cart_service.get_or_create_active_cart(user_id)
+        cart = await cart_service.get_or_create_active_cart(user_id, include_items=include == "items")
         return cart
 
     except Exception as e:
@@ -143,7 +151,8 @@ async def update_cart(
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
         cart = await cart_service.update_cart(cart_id, update_data)
         return cart
@@ -175,7 +184,8 @@ async def refresh_cart_totals(
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
         cart = await cart_service.refresh_cart_totals(cart_id)
         return cart
@@ -201,7 +211,8 @@ async def clear_cart(
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
         cart = await cart_service.clear_cart(cart_id)
         return cart
@@ -223,6 +234,33 @@ async def clear_cart(
         )
 
 
+@router.delete("/abandoned/items")
+async def purge_abandoned_cart_items(
+    older_than_days: int = Query(
+        0, ge=0, description="Only carts abandoned at least this many days ago"),
+    chunk_size: int = Query(500, ge=1, le=5000,
+                            description="Carts processed per transaction"),
+    max_chunks: int = Query(10, ge=1, le=100,
+                            description="Maximum transactions per call; call again while has_more"),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Eliminar (admin) los items de carritos abandonados, por lotes y con un tope por llamada"""
+    try:
+        cart_repository = CartRepository(db)
+        cart_item_repository = CartItemRepository(db)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
+
+        return await cart_service.purge_abandoned_cart_items(
+            older_than_days, chunk_size, max_chunks)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
 @router.patch("/{cart_id}/complete", response_model=CartResponse)
 async def complete_cart(
     cart_id: UUID,
@@ -232,7 +270,8 @@ async def complete_cart(
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
         cart = await cart_service.complete_cart(cart_id)
         return cart
@@ -263,7 +302,8 @@ async def abandon_cart(
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
         cart = await cart_service.abandon_cart(cart_id)
         return cart
@@ -294,7 +334,8 @@ async def delete_cart(
     try:
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        cart_service = get_cart_service(cart_repository, cart_item_repository)
+        cart_service = get_cart_service(
+            cart_repository, cart_item_repository, get_cart_store())
 
         success = await cart_service.delete_cart(cart_id)
         if success:
@@ -1,11 +1,68 @@
+import math
+import time
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import AsyncGenerator
-from app.core.database_config import AsyncSessionLocal
+from typing import AsyncGenerator, Optional
+from fastapi import Request, Response
+from app.core.database_config import AsyncSessionLocal, AsyncReplicaSessionLocal, database_settings
 
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Momento (epoch, segundos) de la última escritura del cliente: cookie o cabecera equivalente
+LAST_WRITE_COOKIE = "last_write_at"
+LAST_WRITE_HEADER = "X-Last-Write-At"
 
-async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
+
+async def get_db_session(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None]:
+    """Sesión de la petición: las lecturas van a la réplica salvo dentro de la ventana
+    read-your-writes del cliente; las escrituras van al primario y abren esa ventana"""
+    if database_settings.replica_enabled and request.method not in READ_ONLY_METHODS:
+        _mark_write(response)
+
+    session_factory = AsyncReplicaSessionLocal if _use_replica(
+        request) else AsyncSessionLocal
+
+    async with session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_primary_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """Sesión siempre en el primario, para rutas GET que también escriben"""
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
+
+
+def _use_replica(request: Request) -> bool:
+    if not database_settings.replica_enabled or request.method not in READ_ONLY_METHODS:
+        return False
+
+    last_write_at = _parse_timestamp(
+        request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE))
+    if last_write_at is None:
+        return True
+
+    # No se consulta el retraso real de la réplica: uno mayor que la ventana deja leer datos viejos
+    return time.time() - last_write_at >= database_settings.DB_READ_YOUR_WRITES_SECONDS
+
+
+def _mark_write(response: Response) -> None:
+    """Abrir la ventana read-your-writes (sólo llega al cliente si la petición termina bien)"""
+    last_write_at = f"{time.time():.3f}"
+    response.set_cookie(
+        LAST_WRITE_COOKIE, last_write_at,
+        max_age=math.ceil(database_settings.DB_READ_YOUR_WRITES_SECONDS),
+        httponly=True, samesite="lax")
+    response.headers[LAST_WRITE_HEADER] = last_write_at
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
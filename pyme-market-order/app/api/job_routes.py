@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, status
+from app.infrastructure.jobs import background_jobs
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/metrics")
+async def get_jobs_metrics():
+    """Obtener métricas de los jobs en segundo plano"""
+    return {"jobs": [job.get_metrics() for job in background_jobs]}
+
+
+@router.post("/{job_name}/run")
+async def run_job(job_name: str):
+    """Ejecutar manualmente una pasada de un job"""
+    for job in background_jobs:
+        if job.name == job_name:
+            counters = await job.run_and_record()
+            return {"job": job.name, "result": counters, "metrics": job.get_metrics()}
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Job {job_name} not found"
+    )
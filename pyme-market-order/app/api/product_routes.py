@@ -0,0 +1,84 @@
+import hashlib
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Header
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.dependencies.database import get_db_session
+from app.core.products_service_config import products_service_settings
+from app.schemas.product_schema import ProductChangeEventBatch, ProductChangeEventsResult
+from app.infrastructure.db.repositories.product_replica_repository import ProductReplicaRepository
+from app.domain.services.product_replica_service import get_product_replica_service
+
+router = APIRouter(prefix="/products", tags=["products"])
+
+SIGNATURE_PREFIX = "sha256="
+
+
+@router.post("/events", response_model=ProductChangeEventsResult)
+async def receive_product_events(
+    request: Request,
+    x_products_signature: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Recibir cambios del servicio de productos (product.created|updated|deleted) y aplicarlos a
+    la réplica local. El cuerpo debe venir firmado con PRODUCTS_EVENTS_SECRET:
+    X-Products-Signature: sha256=<HMAC-SHA256 hex del cuerpo>. Sin secreto configurado no se
+    aceptan eventos"""
+    secret = products_service_settings.PRODUCTS_EVENTS_SECRET
+    if not secret:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Products events are disabled: PRODUCTS_EVENTS_SECRET is not set"
+        )
+
+    body = await request.body()
+    expected = SIGNATURE_PREFIX + hmac.new(
+        secret.encode(), body, hashlib.sha256).hexdigest()
+    if not x_products_signature or not hmac.compare_digest(x_products_signature, expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid products event signature"
+        )
+
+    try:
+        batch = ProductChangeEventBatch.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid products event batch: {e.errors(include_url=False)}"
+        )
+
+    if len(batch.events) > products_service_settings.PRODUCTS_EVENTS_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch exceeds {products_service_settings.PRODUCTS_EVENTS_MAX_BATCH} events"
+        )
+
+    try:
+        product_replica_repository = ProductReplicaRepository(db)
+        product_replica_service = get_product_replica_service(product_replica_repository)
+
+        return await product_replica_service.apply_events(batch.events)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.get("/replica/metrics")
+async def get_product_replica_metrics(db: AsyncSession = Depends(get_db_session)):
+    """Obtener el retraso de la réplica local de productos y los contadores de eventos y reconciliaciones"""
+    try:
+        product_replica_repository = ProductReplicaRepository(db)
+        product_replica_service = get_product_replica_service(product_replica_repository)
+
+        return await product_replica_service.get_sync_metrics()
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
@@ -0,0 +1,164 @@
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.dependencies.database import get_db_session
+from app.schemas.promotion_schema import (
+    PromotionCreate, PromotionUpdate, PromotionResponse, PromotionListResponse, CartPromotionsResponse
+)
+from app.infrastructure.db.repositories.promotion_repository import PromotionRepository
+from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.domain.services.promotion_service import get_promotion_service
+from app.domain.exceptions.promotion_exception import PromotionNotFoundException, InvalidPromotionException
+
+router = APIRouter(prefix="/promotions", tags=["promotions"])
+
+
+@router.post("/", response_model=PromotionResponse, status_code=status.HTTP_201_CREATED)
+async def create_promotion(
+    promotion_data: PromotionCreate,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Crear una nueva promoción"""
+    try:
+        promotion_repository = PromotionRepository(db)
+        promotion_service = get_promotion_service(promotion_repository)
+
+        return await promotion_service.create_promotion(promotion_data)
+
+    except InvalidPromotionException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.get("/", response_model=PromotionListResponse)
+async def get_promotions(
+    active_only: bool = Query(False, description="Only active promotions"),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Obtener todas las promociones"""
+    try:
+        promotion_repository = PromotionRepository(db)
+        promotion_service = get_promotion_service(promotion_repository)
+
+        promotions = await promotion_service.get_promotions(active_only)
+        return PromotionListResponse(promotions=promotions, total=len(promotions))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.get("/cart/{cart_id}", response_model=CartPromotionsResponse)
+async def evaluate_cart_promotions(
+    cart_id: UUID,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Evaluar las promociones vigentes sobre el contenido actual de un carrito"""
+    try:
+        promotion_repository = PromotionRepository(db)
+        cart_item_repository = CartItemRepository(db)
+        promotion_service = get_promotion_service(
+            promotion_repository, cart_item_repository)
+
+        evaluation = await promotion_service.evaluate_cart(cart_id)
+        return CartPromotionsResponse(
+            cart_id=cart_id,
+            subtotal=evaluation.subtotal,
+            discount_amount=evaluation.discount_amount,
+            applied=[applied._asdict() for applied in evaluation.applied],
+            rule_set_version=evaluation.rule_set_version
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.get("/{promotion_id}", response_model=PromotionResponse)
+async def get_promotion(
+    promotion_id: UUID,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Obtener promoción por ID"""
+    try:
+        promotion_repository = PromotionRepository(db)
+        promotion_service = get_promotion_service(promotion_repository)
+
+        return await promotion_service.get_promotion_by_id(promotion_id)
+
+    except PromotionNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.put("/{promotion_id}", response_model=PromotionResponse)
+async def update_promotion(
+    promotion_id: UUID,
+    promotion_data: PromotionUpdate,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Reemplazar una promoción (los cambios se aplican al recargar el conjunto de reglas)"""
+    try:
+        promotion_repository = PromotionRepository(db)
+        promotion_service = get_promotion_service(promotion_repository)
+
+        return await promotion_service.update_promotion(promotion_id, promotion_data)
+
+    except PromotionNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.status.description
+        )
+    except InvalidPromotionException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.delete("/{promotion_id}")
+async def delete_promotion(
+    promotion_id: UUID,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Eliminar una promoción"""
+    try:
+        promotion_repository = PromotionRepository(db)
+        promotion_service = get_promotion_service(promotion_repository)
+
+        await promotion_service.delete_promotion(promotion_id)
+        return {"message": "Promotion deleted successfully"}
+
+    except PromotionNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
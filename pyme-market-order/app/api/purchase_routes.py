@@ -1,23 +1,46 @@
-from typing import List, Optional
+from typing import List, Optional, AsyncIterator
 from uuid import UUID
 from decimal import Decimal
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.dependencies.database import get_db_session
+from app.core.database_config import AsyncReplicaSessionLocal
 from app.schemas.purchase_schema import (
-    PurchaseCreate, PurchaseResponse, PurchaseWithReceiptResponse, PurchaseListResponse
+    PurchaseCreate, PurchaseResponse, PurchaseWithReceiptResponse, PurchaseListResponse,
+    PurchaseHistoryItem, PurchaseHistoryResponse, PurchaseTaxRepriceRequest, PurchaseTaxRepriceResponse,
+    UserOrderStatsResponse
 )
+from app.schemas.checkout_schema import CheckoutSagaResponse, BatchCheckoutRequest, BatchCheckoutResponse
 from app.infrastructure.db.repositories.purchase_repository import PurchaseRepository
 from app.infrastructure.db.repositories.cart_repository import CartRepository
 from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.infrastructure.db.repositories.checkout_saga_repository import CheckoutSagaRepository
+from app.infrastructure.db.repositories.promotion_repository import PromotionRepository
 from app.domain.services.purchase_service import get_purchase_service
+from app.domain.services.checkout_service import get_checkout_service
+from app.domain.services.promotion_service import get_promotion_service
+from app.core.promotion_config import promotion_settings
+from app.infrastructure.clients.products_client import get_products_client
+from app.infrastructure.db.repositories.product_replica_repository import get_product_replica
 from app.domain.exceptions.purchase_exception import (
     PurchaseNotFoundException, PurchaseAlreadyExistsException, InvalidAmountException,
-    InvalidDiscountException, InvalidPaymentMethodException, PurchaseProcessingException
+    InvalidDiscountException, InvalidPaymentMethodException, PurchaseProcessingException,
+    InvalidHistoryCursorException, InvalidExportRangeException, InsufficientStockException,
+    InvalidRepriceRequestException
+)
+from app.domain.exceptions.product_exception import (
+    ProductNotFoundException, ProductInactiveException, ProductsServiceUnavailableException,
+    ProductChangedException
 )
 from app.domain.exceptions.cart_exception import (
     CartNotFoundException, CartIsEmptyException, CartInactiveException, InvalidCartStatusException
 )
+from app.domain.exceptions.checkout_exception import (
+    CheckoutInProgressException, CheckoutSagaNotFoundException, StockReservationException,
+    InvalidBatchCheckoutException
+)
 
 router = APIRouter(prefix="/purchases", tags=["purchases"])
 
@@ -33,7 +56,8 @@ async def create_purchase(
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
         purchase_service = get_purchase_service(
-            purchase_repository, cart_repository, cart_item_repository)
+            purchase_repository, cart_repository, cart_item_repository, get_products_client(),
+            get_product_replica(db))
 
         purchase = await purchase_service.create_purchase(purchase_data)
         return purchase
@@ -54,6 +78,21 @@ async def create_purchase(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=e.status.description
         )
+    except ProductNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.status.description
+        )
+    except (ProductInactiveException, InsufficientStockException) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except ProductsServiceUnavailableException as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.status.description
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -72,20 +111,25 @@ async def process_cart_purchase(
         None, ge=0, description="Tax percentage"),
     db: AsyncSession = Depends(get_db_session)
 ):
-    """Procesar compra completa de un carrito"""
+    """Procesar compra completa de un carrito (reserva stock y completa el carrito en un solo paso)"""
     try:
         purchase_repository = PurchaseRepository(db)
         cart_repository = CartRepository(db)
         cart_item_repository = CartItemRepository(db)
-        purchase_service = get_purchase_service(
-            purchase_repository, cart_repository, cart_item_repository)
+        checkout_saga_repository = CheckoutSagaRepository(db)
+        promotion_service = get_promotion_service(
+            PromotionRepository(db), cart_item_repository) if promotion_settings.PROMOTIONS_ENABLED else None
+        checkout_service = get_checkout_service(
+            purchase_repository, cart_repository, cart_item_repository,
+            checkout_saga_repository, get_products_client(), promotion_service,
+            get_product_replica(db))
 
         discount_decimal = Decimal(
             str(discount_percentage)) if discount_percentage is not None else None
         tax_decimal = Decimal(
             str(tax_percentage)) if tax_percentage is not None else None
 
-        purchase = await purchase_service.process_cart_purchase(
+        purchase = await checkout_service.checkout(
             cart_id, payment_method, discount_decimal, tax_decimal
         )
         return purchase
@@ -96,16 +140,157 @@ async def process_cart_purchase(
                 e, CartNotFoundException) else status.HTTP_400_BAD_REQUEST,
             detail=e.status.description
         )
-    except PurchaseAlreadyExistsException as e:
+    except (PurchaseAlreadyExistsException, CheckoutInProgressException, StockReservationException,
+            ProductChangedException) as e:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=e.status.description
         )
+    except PurchaseProcessingException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
     except (InvalidAmountException, InvalidDiscountException, InvalidPaymentMethodException) as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=e.status.description
         )
+    except ProductNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.status.description
+        )
+    except (ProductInactiveException, InsufficientStockException) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except ProductsServiceUnavailableException as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.post("/batch", response_model=BatchCheckoutResponse)
+async def process_batch_checkout(
+    batch_data: BatchCheckoutRequest,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Procesar la compra de muchos carritos a la vez (pedidos mayoristas), con el resultado de cada carrito"""
+    try:
+        purchase_repository = PurchaseRepository(db)
+        cart_repository = CartRepository(db)
+        cart_item_repository = CartItemRepository(db)
+        checkout_saga_repository = CheckoutSagaRepository(db)
+        promotion_service = get_promotion_service(
+            PromotionRepository(db), cart_item_repository) if promotion_settings.PROMOTIONS_ENABLED else None
+        checkout_service = get_checkout_service(
+            purchase_repository, cart_repository, cart_item_repository,
+            checkout_saga_repository, get_products_client(), promotion_service,
+            get_product_replica(db))
+
+        return await checkout_service.checkout_batch(
+            batch_data.cart_ids, batch_data.payment_method,
+            batch_data.discount_percentage, batch_data.tax_percentage
+        )
+
+    except (InvalidBatchCheckoutException, InvalidPaymentMethodException) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.get("/cart/{cart_id}/checkout", response_model=CheckoutSagaResponse)
+async def get_cart_checkout(
+    cart_id: UUID,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Obtener el estado del último checkout de un carrito (reserva de stock, compensación, compra creada)"""
+    try:
+        purchase_repository = PurchaseRepository(db)
+        cart_repository = CartRepository(db)
+        cart_item_repository = CartItemRepository(db)
+        checkout_saga_repository = CheckoutSagaRepository(db)
+        checkout_service = get_checkout_service(
+            purchase_repository, cart_repository, cart_item_repository, checkout_saga_repository)
+
+        return await checkout_service.get_cart_checkout(cart_id)
+
+    except CheckoutSagaNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+async def _stream_purchase_export(date_from: datetime, date_to: datetime,
+                                  export_format: str) -> AsyncIterator[str]:
+    """Generar la exportación con una sesión propia (de la réplica) que vive mientras dura el streaming"""
+    async with AsyncReplicaSessionLocal() as session:
+        purchase_service = get_purchase_service(
+            PurchaseRepository(session), CartRepository(session), CartItemRepository(session))
+
+        async for chunk in purchase_service.export_purchases(date_from, date_to, export_format):
+            yield chunk
+
+
+@router.get("/export")
+async def export_purchases(
+    date_from: datetime = Query(..., alias="from",
+                                description="Start of the range (inclusive)"),
+    date_to: datetime = Query(..., alias="to",
+                              description="End of the range (exclusive)"),
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$",
+                               description="csv (one row per line item) or ndjson (one line per purchase)"),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Exportar (streaming) compras con items y recibo en un rango de fechas para contabilidad"""
+    try:
+        purchase_repository = PurchaseRepository(db)
+        cart_repository = CartRepository(db)
+        cart_item_repository = CartItemRepository(db)
+        purchase_service = get_purchase_service(
+            purchase_repository, cart_repository, cart_item_repository)
+
+        date_from, date_to = purchase_service.validate_export_range(
+            date_from, date_to)
+
+        filename = f"purchases_{date_from:%Y%m%d}_{date_to:%Y%m%d}.{export_format}"
+        return StreamingResponse(
+            _stream_purchase_export(date_from, date_to, export_format),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    except InvalidExportRangeException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -220,6 +405,104 @@ async def get_user_purchases(
         )
 
 
+@router.get("/user/{user_id}/stats", response_model=UserOrderStatsResponse)
+async def get_user_order_stats(
+    user_id: str,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Obtener pedidos realizados, total gastado y última compra de un usuario"""
+    try:
+        purchase_repository = PurchaseRepository(db)
+        cart_repository = CartRepository(db)
+        cart_item_repository = CartItemRepository(db)
+        purchase_service = get_purchase_service(
+            purchase_repository, cart_repository, cart_item_repository)
+
+        stats = await purchase_service.get_user_order_stats(user_id)
+        return UserOrderStatsResponse(**stats)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.get("/user/{user_id}/history", response_model=PurchaseHistoryResponse)
+async def get_user_purchase_history(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor returned as nextCursor by the previous page"),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Obtener historial paginado de compras con resumen de recibo e items"""
+    try:
+        purchase_repository = PurchaseRepository(db)
+        cart_repository = CartRepository(db)
+        cart_item_repository = CartItemRepository(db)
+        purchase_service = get_purchase_service(
+            purchase_repository, cart_repository, cart_item_repository)
+
+        rows, next_cursor = await purchase_service.get_purchase_history(user_id, limit, cursor)
+
+        purchases = [
+            PurchaseHistoryItem(
+                **row["purchase"].model_dump(exclude={"cart", "receipt", "items_count", "total_quantity"}),
+                items_count=row["items_count"],
+                total_quantity=row["total_quantity"],
+                receipt=row["receipt"]
+            )
+            for row in rows
+        ]
+        return PurchaseHistoryResponse(
+            purchases=purchases,
+            limit=limit,
+            has_more=next_cursor is not None,
+            next_cursor=next_cursor
+        )
+
+    except InvalidHistoryCursorException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.patch("/tax", response_model=PurchaseTaxRepriceResponse)
+async def reprice_purchases_tax(
+    reprice_data: PurchaseTaxRepriceRequest,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Recalcular el impuesto de muchas compras con una nueva tasa (un solo UPDATE masivo)"""
+    try:
+        purchase_repository = PurchaseRepository(db)
+        cart_repository = CartRepository(db)
+        cart_item_repository = CartItemRepository(db)
+        purchase_service = get_purchase_service(
+            purchase_repository, cart_repository, cart_item_repository)
+
+        result = await purchase_service.reprice_purchases_tax(
+            reprice_data.purchase_ids, reprice_data.tax_percentage)
+        return PurchaseTaxRepriceResponse(**result)
+
+    except (InvalidRepriceRequestException, InvalidAmountException) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
 @router.patch("/{purchase_id}/discount", response_model=PurchaseResponse)
 async def apply_discount(
     purchase_id: UUID,
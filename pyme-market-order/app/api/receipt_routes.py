@@ -1,21 +1,44 @@
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import PlainTextResponse
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from fastapi.responses import PlainTextResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.api.dependencies.database import get_db_session
-from app.schemas.receipt_schema import ReceiptResponse
+from app.api.dependencies.database import get_db_session, get_primary_db_session
+from app.schemas.receipt_schema import ReceiptResponse, ReceiptSearchItem, ReceiptSearchResponse
 from app.infrastructure.db.repositories.receipt_repository import ReceiptRepository
 from app.infrastructure.db.repositories.purchase_repository import PurchaseRepository
 from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.infrastructure.db.repositories.receipt_job_repository import ReceiptJobRepository
 from app.domain.services.receipt_service import get_receipt_service
 from app.domain.exceptions.receipt_exception import (
     ReceiptNotFoundException, ReceiptAlreadyExistsException, ReceiptGenerationException,
-    InvalidReceiptDataException
+    InvalidReceiptDataException, ReceiptPendingException, InvalidReceiptSearchException
 )
 from app.domain.exceptions.purchase_exception import PurchaseNotFoundException
 
 router = APIRouter(prefix="/receipts", tags=["receipts"])
 
+RECEIPT_RETRY_AFTER_SECONDS = 2
+
+RECEIPT_MEDIA_TYPES = {
+    "text": "text/plain; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+    "thermal": "text/plain; charset=utf-8",
+}
+# Con ?v=<hash> la URL identifica un contenido inmutable; sin él, el cliente revalida con If-None-Match
+RECEIPT_IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+RECEIPT_REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def _receipt_pending_response(e: ReceiptPendingException) -> JSONResponse:
+    """Respuesta 202 mientras el worker genera el recibo"""
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": "pending", "detail": e.status.description},
+        headers={"Retry-After": str(RECEIPT_RETRY_AFTER_SECONDS)}
+    )
+
 
 @router.post("/purchase/{purchase_id}", response_model=ReceiptResponse, status_code=status.HTTP_201_CREATED)
 async def generate_receipt(
@@ -55,6 +78,53 @@ async def generate_receipt(
         )
 
 
+@router.get("/search", response_model=ReceiptSearchResponse)
+async def search_receipts(
+    sku: Optional[str] = Query(None, min_length=1, max_length=100,
+                               description="Receipts containing this product SKU"),
+    product_id: Optional[UUID] = Query(
+        None, description="Receipts containing this product"),
+    payment_method: Optional[str] = Query(
+        None, pattern="^(cash|card|transfer|not_specified)$"),
+    date_from: Optional[datetime] = Query(
+        None, alias="from", description="Purchase date, inclusive (ISO 8601)"),
+    date_to: Optional[datetime] = Query(
+        None, alias="to", description="Purchase date, exclusive (ISO 8601)"),
+    limit: int = Query(50, ge=1, le=200, description="Page size"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor returned as nextCursor by the previous page"),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Buscar recibos por SKU, producto, método de pago y fecha (proyección ligera, paginada)"""
+    try:
+        receipt_repository = ReceiptRepository(db)
+        purchase_repository = PurchaseRepository(db)
+        cart_item_repository = CartItemRepository(db)
+        receipt_service = get_receipt_service(
+            receipt_repository, purchase_repository, cart_item_repository)
+
+        rows, next_cursor = await receipt_service.search_receipts(
+            limit, sku, product_id, payment_method, date_from, date_to, cursor)
+
+        return ReceiptSearchResponse(
+            receipts=[ReceiptSearchItem(**row) for row in rows],
+            limit=limit,
+            has_more=next_cursor is not None,
+            next_cursor=next_cursor
+        )
+
+    except InvalidReceiptSearchException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
 @router.get("/{receipt_id}", response_model=ReceiptResponse)
 async def get_receipt(
     receipt_id: UUID,
@@ -93,8 +163,9 @@ async def get_receipt_by_purchase(
         receipt_repository = ReceiptRepository(db)
         purchase_repository = PurchaseRepository(db)
         cart_item_repository = CartItemRepository(db)
+        receipt_job_repository = ReceiptJobRepository(db)
         receipt_service = get_receipt_service(
-            receipt_repository, purchase_repository, cart_item_repository)
+            receipt_repository, purchase_repository, cart_item_repository, receipt_job_repository)
 
         receipt = await receipt_service.get_receipt_by_purchase_id(purchase_id)
         return receipt
@@ -104,6 +175,8 @@ async def get_receipt_by_purchase(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=e.status.description
         )
+    except ReceiptPendingException as e:
+        return _receipt_pending_response(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -114,15 +187,16 @@ async def get_receipt_by_purchase(
 @router.get("/purchase/{purchase_id}/get-or-generate", response_model=ReceiptResponse)
 async def get_or_generate_receipt(
     purchase_id: UUID,
-    db: AsyncSession = Depends(get_db_session)
+    db: AsyncSession = Depends(get_primary_db_session)
 ):
     """Obtener recibo existente o generar uno nuevo"""
     try:
         receipt_repository = ReceiptRepository(db)
         purchase_repository = PurchaseRepository(db)
         cart_item_repository = CartItemRepository(db)
+        receipt_job_repository = ReceiptJobRepository(db)
         receipt_service = get_receipt_service(
-            receipt_repository, purchase_repository, cart_item_repository)
+            receipt_repository, purchase_repository, cart_item_repository, receipt_job_repository)
 
         receipt = await receipt_service.get_or_generate_receipt(purchase_id)
         return receipt
@@ -137,6 +211,8 @@ async def get_or_generate_receipt(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=e.status.description
         )
+    except ReceiptPendingException as e:
+        return _receipt_pending_response(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -180,24 +256,42 @@ async def regenerate_receipt(
 @router.get("/purchase/{purchase_id}/formatted", response_class=PlainTextResponse)
 async def get_formatted_receipt(
     purchase_id: UUID,
+    render_format: str = Query("text", alias="format", pattern="^(text|html|thermal)$",
+                               description="Rendered layout: text, html or thermal"),
+    v: Optional[str] = Query(
+        None, description="Content hash from a previous ETag; pins the version and enables long-lived caching"),
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db_session)
 ):
-    """Obtener recibo formateado como texto para impresión"""
+    """Obtener recibo renderizado (texto, HTML o térmico) con ETag fuerte"""
     try:
         receipt_repository = ReceiptRepository(db)
         purchase_repository = PurchaseRepository(db)
         cart_item_repository = CartItemRepository(db)
+        receipt_job_repository = ReceiptJobRepository(db)
         receipt_service = get_receipt_service(
-            receipt_repository, purchase_repository, cart_item_repository)
+            receipt_repository, purchase_repository, cart_item_repository, receipt_job_repository)
 
-        formatted_receipt = await receipt_service.get_formatted_receipt(purchase_id)
-        return formatted_receipt
+        rendered, content_hash = await receipt_service.get_rendered_receipt(purchase_id, render_format)
+
+        etag = f'"{content_hash}-{render_format}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": RECEIPT_IMMUTABLE_CACHE_CONTROL if v == content_hash else RECEIPT_REVALIDATE_CACHE_CONTROL
+        }
+
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response(content=rendered, media_type=RECEIPT_MEDIA_TYPES[render_format], headers=headers)
 
     except ReceiptNotFoundException as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=e.status.description
         )
+    except ReceiptPendingException as e:
+        return _receipt_pending_response(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -215,8 +309,9 @@ async def get_receipt_summary(
         receipt_repository = ReceiptRepository(db)
         purchase_repository = PurchaseRepository(db)
         cart_item_repository = CartItemRepository(db)
+        receipt_job_repository = ReceiptJobRepository(db)
         receipt_service = get_receipt_service(
-            receipt_repository, purchase_repository, cart_item_repository)
+            receipt_repository, purchase_repository, cart_item_repository, receipt_job_repository)
 
         summary = await receipt_service.get_receipt_summary(purchase_id)
         return summary
@@ -226,6 +321,8 @@ async def get_receipt_summary(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=e.status.description
         )
+    except ReceiptPendingException as e:
+        return _receipt_pending_response(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
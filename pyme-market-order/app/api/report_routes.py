@@ -0,0 +1,42 @@
+from typing import Optional
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.dependencies.database import get_db_session
+from app.schemas.report_schema import SalesReportResponse
+from app.infrastructure.db.repositories.sales_rollup_repository import SalesRollupRepository
+from app.domain.services.report_service import get_report_service
+from app.domain.exceptions.report_exception import InvalidReportRangeException
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+
+@router.get("/sales", response_model=SalesReportResponse)
+async def get_sales_report(
+    granularity: str = Query("day", pattern="^(day|week|month)$",
+                             description="Bucket size: day, week or month"),
+    date_from: Optional[date] = Query(
+        None, alias="from", description="First day included (defaults depend on granularity)"),
+    date_to: Optional[date] = Query(
+        None, alias="to", description="First day excluded (defaults to tomorrow, UTC)"),
+    products_limit: int = Query(
+        10, ge=0, le=100, description="Number of top products by units sold"),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Obtener reporte de ventas por día, semana o mes desde los rollups"""
+    try:
+        sales_rollup_repository = SalesRollupRepository(db)
+        report_service = get_report_service(sales_rollup_repository)
+
+        return await report_service.get_sales_report(granularity, date_from, date_to, products_limit)
+
+    except InvalidReportRangeException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.status.description
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
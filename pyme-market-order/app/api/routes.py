@@ -3,6 +3,10 @@ from app.api.cart_routes import router as cart_router
 from app.api.cart_item_routes import router as cart_item_router
 from app.api.purchase_routes import router as purchase_router
 from app.api.receipt_routes import router as receipt_router
+from app.api.job_routes import router as job_router
+from app.api.report_routes import router as report_router
+from app.api.promotion_routes import router as promotion_router
+from app.api.product_routes import router as product_router
 from app.core.api_config import APIConfig
 
 
@@ -13,6 +17,10 @@ def register_routes(app: FastAPI) -> None:
     app.include_router(cart_item_router, prefix=APIConfig.API_VERSION_PREFIX)
     app.include_router(purchase_router, prefix=APIConfig.API_VERSION_PREFIX)
     app.include_router(receipt_router, prefix=APIConfig.API_VERSION_PREFIX)
+    app.include_router(job_router, prefix=APIConfig.API_VERSION_PREFIX)
+    app.include_router(report_router, prefix=APIConfig.API_VERSION_PREFIX)
+    app.include_router(promotion_router, prefix=APIConfig.API_VERSION_PREFIX)
+    app.include_router(product_router, prefix=APIConfig.API_VERSION_PREFIX)
 
 
 def get_registered_routes() -> dict:
@@ -22,9 +30,10 @@ def get_registered_routes() -> dict:
             "prefix": f"{APIConfig.API_VERSION_PREFIX}/carts",
             "endpoints": [
                 "POST /", "GET /{cart_id}", "GET /{cart_id}/with-items",
-                "GET /user/{user_id}", "GET /user/{user_id}/active",
+                "GET /user/{user_id}", "GET /user/{user_id}/active?include=items",
                 "PUT /{cart_id}", "PATCH /{cart_id}/refresh-totals",
-                "DELETE /{cart_id}/clear", "PATCH /{cart_id}/complete",
+                "DELETE /{cart_id}/clear", "DELETE /abandoned/items",
+                "PATCH /{cart_id}/complete",
                 "PATCH /{cart_id}/abandon", "DELETE /{cart_id}"
             ]
         },
@@ -41,9 +50,10 @@ def get_registered_routes() -> dict:
         "purchase_routes": {
             "prefix": f"{APIConfig.API_VERSION_PREFIX}/purchases",
             "endpoints": [
-                "POST /", "POST /cart/{cart_id}/process",
+                "POST /", "POST /cart/{cart_id}/process", "POST /batch", "GET /cart/{cart_id}/checkout",
                 "GET /{purchase_id}", "GET /cart/{cart_id}",
                 "GET /number/{purchase_number}", "GET /user/{user_id}",
+                "GET /user/{user_id}/history", "GET /export", "PATCH /tax",
                 "PATCH /{purchase_id}/discount", "PATCH /{purchase_id}/tax",
                 "PATCH /{purchase_id}/payment-method", "GET /{purchase_id}/summary"
             ]
@@ -51,10 +61,35 @@ def get_registered_routes() -> dict:
         "receipt_routes": {
             "prefix": f"{APIConfig.API_VERSION_PREFIX}/receipts",
             "endpoints": [
-                "POST /purchase/{purchase_id}", "GET /{receipt_id}",
+                "POST /purchase/{purchase_id}", "GET /search", "GET /{receipt_id}",
                 "GET /purchase/{purchase_id}", "GET /purchase/{purchase_id}/get-or-generate",
                 "POST /purchase/{purchase_id}/regenerate", "GET /purchase/{purchase_id}/formatted",
                 "GET /purchase/{purchase_id}/summary", "DELETE /{receipt_id}"
             ]
+        },
+        "job_routes": {
+            "prefix": f"{APIConfig.API_VERSION_PREFIX}/jobs",
+            "endpoints": [
+                "GET /metrics", "POST /{job_name}/run"
+            ]
+        },
+        "report_routes": {
+            "prefix": f"{APIConfig.API_VERSION_PREFIX}/reports",
+            "endpoints": [
+                "GET /sales?granularity=day|week|month"
+            ]
+        },
+        "promotion_routes": {
+            "prefix": f"{APIConfig.API_VERSION_PREFIX}/promotions",
+            "endpoints": [
+                "POST /", "GET /", "GET /cart/{cart_id}", "GET /{promotion_id}",
+                "PUT /{promotion_id}", "DELETE /{promotion_id}"
+            ]
+        },
+        "product_routes": {
+            "prefix": f"{APIConfig.API_VERSION_PREFIX}/products",
+            "endpoints": [
+                "POST /events", "GET /replica/metrics"
+            ]
         }
     }
@@ -30,6 +30,14 @@ class APIConfig:
             "name": "receipts",
             "description": "Operations with receipts. Generate and manage purchase receipts.",
         },
+        {
+            "name": "jobs",
+            "description": "Background maintenance jobs. Inspect metrics and trigger runs.",
+        },
+        {
+            "name": "reports",
+            "description": "Sales reports served from incrementally maintained daily rollups.",
+        },
     ]
 
     @classmethod
@@ -52,5 +60,7 @@ class APIConfig:
             "carts": f"{cls.API_VERSION_PREFIX}/carts",
             "cart_items": f"{cls.API_VERSION_PREFIX}/cart-items",
             "purchases": f"{cls.API_VERSION_PREFIX}/purchases",
-            "receipts": f"{cls.API_VERSION_PREFIX}/receipts"
+            "receipts": f"{cls.API_VERSION_PREFIX}/receipts",
+            "jobs": f"{cls.API_VERSION_PREFIX}/jobs",
+            "reports": f"{cls.API_VERSION_PREFIX}/reports"
         }
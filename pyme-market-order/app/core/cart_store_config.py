@@ -0,0 +1,24 @@
+from decouple import config
+
+
+class CartStoreConfig():
+    # Mantener los carritos activos en memoria y escribir sus cambios a Postgres por lotes.
+    # Requiere un solo proceso o enrutamiento con afinidad por carrito (ver cart_store.py)
+    CART_WRITE_BEHIND_ENABLED = config(
+        'CART_WRITE_BEHIND_ENABLED', default=False, cast=bool)
+    # Cada cuánto se escriben los cambios pendientes; es también la ventana máxima de pérdida
+    CART_WRITE_BEHIND_FLUSH_INTERVAL_MS = config(
+        'CART_WRITE_BEHIND_FLUSH_INTERVAL_MS', default=250, cast=int)
+    # Carritos residentes; al superarse se descartan los más antiguos ya escritos
+    CART_WRITE_BEHIND_MAX_CARTS = config(
+        'CART_WRITE_BEHIND_MAX_CARTS', default=10000, cast=int)
+    # Inactividad tras la cual un carrito ya escrito deja la memoria
+    CART_WRITE_BEHIND_IDLE_SECONDS = config(
+        'CART_WRITE_BEHIND_IDLE_SECONDS', default=300, cast=int)
+
+    # Escrituras individuales fallidas seguidas tras las que un carrito se pone en cuarentena
+    CART_WRITE_BEHIND_MAX_FLUSH_FAILURES = config(
+        'CART_WRITE_BEHIND_MAX_FLUSH_FAILURES', default=3, cast=int)
+
+
+cart_store_settings = CartStoreConfig()
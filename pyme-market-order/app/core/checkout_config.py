@@ -0,0 +1,10 @@
+from decouple import config
+
+
+class CheckoutConfig():
+    # Máximo de carritos por checkout en lote (POST /purchases/batch)
+    CHECKOUT_BATCH_MAX_CARTS = config(
+        'CHECKOUT_BATCH_MAX_CARTS', default=100, cast=int)
+
+
+checkout_settings = CheckoutConfig()
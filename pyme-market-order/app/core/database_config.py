@@ -8,11 +8,27 @@ class DataBaseConfig():
     DB_NAME = config('DB_NAME')
     DB_USER = config('DB_USER')
     DB_PASSWORD = config('DB_PASSWORD')
+    # Réplica de lectura (mismo usuario y base): las peticiones GET leen de ella
+    DB_REPLICA_ENABLED = config('DB_REPLICA_ENABLED', default=False, cast=bool)
+    DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+    DB_REPLICA_PORT = config('DB_REPLICA_PORT', default='5432')
+    # Segundos tras una escritura en que las lecturas del mismo cliente siguen yendo al primario.
+    # Es una ventana fija: si la réplica se atrasa más que esto, el cliente puede no ver su escritura
+    DB_READ_YOUR_WRITES_SECONDS = config(
+        'DB_READ_YOUR_WRITES_SECONDS', default=5.0, cast=float)
 
     @property
     def async_database_url_constructed(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def async_replica_url_constructed(self):
+        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_REPLICA_HOST}:{self.DB_REPLICA_PORT}/{self.DB_NAME}"
+
+    @property
+    def replica_enabled(self) -> bool:
+        return self.DB_REPLICA_ENABLED and bool(self.DB_REPLICA_HOST)
+
 
 database_settings = DataBaseConfig()
 
@@ -27,3 +43,16 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
     autocommit=False
 )
+
+replica_engine = create_async_engine(
+    database_settings.async_replica_url_constructed,
+    echo=True
+) if database_settings.replica_enabled else None
+
+# Sesiones de sólo lectura: usan el primario si la réplica está deshabilitada
+AsyncReplicaSessionLocal = async_sessionmaker(
+    bind=replica_engine or engine,
+    class_=AsyncSession,
+    autoflush=False,
+    autocommit=False
+)
@@ -0,0 +1,101 @@
+from decouple import config
+
+
+class JobsConfig():
+    CART_SWEEPER_ENABLED = config(
+        'CART_SWEEPER_ENABLED', default=True, cast=bool)
+    CART_SWEEPER_INTERVAL_SECONDS = config(
+        'CART_SWEEPER_INTERVAL_SECONDS', default=300, cast=int)
+    CART_SWEEPER_IDLE_TTL_HOURS = config(
+        'CART_SWEEPER_IDLE_TTL_HOURS', default=72, cast=int)
+    CART_SWEEPER_BATCH_SIZE = config(
+        'CART_SWEEPER_BATCH_SIZE', default=500, cast=int)
+    # none | purge | archive
+    CART_SWEEPER_ITEMS_ACTION = config(
+        'CART_SWEEPER_ITEMS_ACTION', default='none')
+
+    RECEIPT_WORKER_ENABLED = config(
+        'RECEIPT_WORKER_ENABLED', default=True, cast=bool)
+    RECEIPT_WORKER_INTERVAL_SECONDS = config(
+        'RECEIPT_WORKER_INTERVAL_SECONDS', default=2, cast=int)
+    RECEIPT_WORKER_BATCH_SIZE = config(
+        'RECEIPT_WORKER_BATCH_SIZE', default=20, cast=int)
+    RECEIPT_WORKER_MAX_ATTEMPTS = config(
+        'RECEIPT_WORKER_MAX_ATTEMPTS', default=5, cast=int)
+    RECEIPT_WORKER_BACKOFF_SECONDS = config(
+        'RECEIPT_WORKER_BACKOFF_SECONDS', default=5, cast=int)
+    RECEIPT_WORKER_LEASE_SECONDS = config(
+        'RECEIPT_WORKER_LEASE_SECONDS', default=60, cast=int)
+
+    SALES_ROLLUP_ENABLED = config(
+        'SALES_ROLLUP_ENABLED', default=True, cast=bool)
+    SALES_ROLLUP_INTERVAL_SECONDS = config(
+        'SALES_ROLLUP_INTERVAL_SECONDS', default=60, cast=int)
+    SALES_ROLLUP_BATCH_SIZE = config(
+        'SALES_ROLLUP_BATCH_SIZE', default=1000, cast=int)
+    SALES_ROLLUP_SETTLE_SECONDS = config(
+        'SALES_ROLLUP_SETTLE_SECONDS', default=120, cast=int)
+    SALES_ROLLUP_TIMEZONE = config(
+        'SALES_ROLLUP_TIMEZONE', default='UTC')
+
+    CHECKOUT_RECOVERY_ENABLED = config(
+        'CHECKOUT_RECOVERY_ENABLED', default=True, cast=bool)
+    CHECKOUT_RECOVERY_INTERVAL_SECONDS = config(
+        'CHECKOUT_RECOVERY_INTERVAL_SECONDS', default=30, cast=int)
+    CHECKOUT_RECOVERY_BATCH_SIZE = config(
+        'CHECKOUT_RECOVERY_BATCH_SIZE', default=50, cast=int)
+    # Antigüedad mínima sin avance para considerar interrumpido un checkout
+    CHECKOUT_RECOVERY_STALE_SECONDS = config(
+        'CHECKOUT_RECOVERY_STALE_SECONDS', default=60, cast=int)
+
+    OUTBOX_RELAY_ENABLED = config(
+        'OUTBOX_RELAY_ENABLED', default=True, cast=bool)
+    OUTBOX_RELAY_INTERVAL_SECONDS = config(
+        'OUTBOX_RELAY_INTERVAL_SECONDS', default=1, cast=int)
+    OUTBOX_RELAY_BATCH_SIZE = config(
+        'OUTBOX_RELAY_BATCH_SIZE', default=100, cast=int)
+    OUTBOX_RELAY_LEASE_SECONDS = config(
+        'OUTBOX_RELAY_LEASE_SECONDS', default=30, cast=int)
+    OUTBOX_RELAY_BACKOFF_SECONDS = config(
+        'OUTBOX_RELAY_BACKOFF_SECONDS', default=2, cast=int)
+    OUTBOX_RELAY_MAX_BACKOFF_SECONDS = config(
+        'OUTBOX_RELAY_MAX_BACKOFF_SECONDS', default=300, cast=int)
+    OUTBOX_RETENTION_DAYS = config(
+        'OUTBOX_RETENTION_DAYS', default=7, cast=int)
+
+    # Convierte los recibos existentes al formato de RECEIPT_STORAGE_FORMAT
+    RECEIPT_STORAGE_MIGRATION_ENABLED = config(
+        'RECEIPT_STORAGE_MIGRATION_ENABLED', default=False, cast=bool)
+    RECEIPT_STORAGE_MIGRATION_INTERVAL_SECONDS = config(
+        'RECEIPT_STORAGE_MIGRATION_INTERVAL_SECONDS', default=60, cast=int)
+    RECEIPT_STORAGE_MIGRATION_BATCH_SIZE = config(
+        'RECEIPT_STORAGE_MIGRATION_BATCH_SIZE', default=500, cast=int)
+
+    PURCHASE_COUNTERS_BACKFILL_ENABLED = config(
+        'PURCHASE_COUNTERS_BACKFILL_ENABLED', default=True, cast=bool)
+    PURCHASE_COUNTERS_BACKFILL_INTERVAL_SECONDS = config(
+        'PURCHASE_COUNTERS_BACKFILL_INTERVAL_SECONDS', default=300, cast=int)
+    PURCHASE_COUNTERS_BACKFILL_BATCH_SIZE = config(
+        'PURCHASE_COUNTERS_BACKFILL_BATCH_SIZE', default=1000, cast=int)
+
+    # Crea por adelantado las particiones mensuales, desengancha las vencidas y archiva carritos cerrados
+    PARTITION_MAINTENANCE_ENABLED = config(
+        'PARTITION_MAINTENANCE_ENABLED', default=True, cast=bool)
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS = config(
+        'PARTITION_MAINTENANCE_INTERVAL_SECONDS', default=3600, cast=int)
+    PARTITION_MONTHS_AHEAD = config(
+        'PARTITION_MONTHS_AHEAD', default=3, cast=int)
+    # Meses de compras que quedan enganchados a purchases; 0 = nunca desenganchar
+    PURCHASE_PARTITION_RETENTION_MONTHS = config(
+        'PURCHASE_PARTITION_RETENTION_MONTHS', default=0, cast=int)
+    # Días desde que un carrito se completa o abandona hasta que pasa a carts_archive
+    CART_ARCHIVE_AFTER_DAYS = config(
+        'CART_ARCHIVE_AFTER_DAYS', default=90, cast=int)
+    CART_ARCHIVE_BATCH_SIZE = config(
+        'CART_ARCHIVE_BATCH_SIZE', default=500, cast=int)
+    # Meses de archivo que quedan enganchados; 0 = nunca desenganchar
+    CART_ARCHIVE_RETENTION_MONTHS = config(
+        'CART_ARCHIVE_RETENTION_MONTHS', default=24, cast=int)
+
+
+jobs_settings = JobsConfig()
@@ -0,0 +1,15 @@
+from decouple import config, Csv
+
+
+class OutboxConfig():
+    # none | webhook | notify
+    OUTBOX_PUBLISHER = config('OUTBOX_PUBLISHER', default='none')
+    OUTBOX_WEBHOOK_URLS = config('OUTBOX_WEBHOOK_URLS', default='', cast=Csv())
+    OUTBOX_WEBHOOK_SECRET = config('OUTBOX_WEBHOOK_SECRET', default='')
+    OUTBOX_WEBHOOK_TIMEOUT_SECONDS = config(
+        'OUTBOX_WEBHOOK_TIMEOUT_SECONDS', default=5.0, cast=float)
+    OUTBOX_NOTIFY_CHANNEL = config(
+        'OUTBOX_NOTIFY_CHANNEL', default='order_events')
+
+
+outbox_settings = OutboxConfig()
@@ -0,0 +1,14 @@
+from decouple import config
+
+
+class PricingConfig():
+    # Precisión de los montos guardados (Numeric(10, 2))
+    PRICING_QUANTUM = config('PRICING_QUANTUM', default='0.01')
+    # Modo de redondeo de decimal: ROUND_HALF_UP, ROUND_HALF_EVEN, ROUND_DOWN, ...
+    PRICING_ROUNDING = config('PRICING_ROUNDING', default='ROUND_HALF_UP')
+    # Máximo de compras por operación de recálculo masivo
+    PRICING_REPRICE_MAX_PURCHASES = config(
+        'PRICING_REPRICE_MAX_PURCHASES', default=5000, cast=int)
+
+
+pricing_settings = PricingConfig()
@@ -0,0 +1,40 @@
+from decouple import config
+
+
+class ProductsServiceConfig():
+    PRODUCTS_SERVICE_URL = config(
+        'PRODUCTS_SERVICE_URL', default='http://localhost:8001')
+    PRODUCTS_VALIDATION_ENABLED = config(
+        'PRODUCTS_VALIDATION_ENABLED', default=False, cast=bool)
+    PRODUCTS_SERVICE_TIMEOUT_SECONDS = config(
+        'PRODUCTS_SERVICE_TIMEOUT_SECONDS', default=2.0, cast=float)
+    PRODUCTS_SERVICE_CONNECT_TIMEOUT_SECONDS = config(
+        'PRODUCTS_SERVICE_CONNECT_TIMEOUT_SECONDS', default=0.5, cast=float)
+    PRODUCTS_SERVICE_MAX_CONNECTIONS = config(
+        'PRODUCTS_SERVICE_MAX_CONNECTIONS', default=50, cast=int)
+    PRODUCTS_SERVICE_MAX_KEEPALIVE = config(
+        'PRODUCTS_SERVICE_MAX_KEEPALIVE', default=20, cast=int)
+    PRODUCTS_SERVICE_RETRIES = config(
+        'PRODUCTS_SERVICE_RETRIES', default=2, cast=int)
+    PRODUCTS_SERVICE_RETRY_BACKOFF_SECONDS = config(
+        'PRODUCTS_SERVICE_RETRY_BACKOFF_SECONDS', default=0.1, cast=float)
+    PRODUCTS_SERVICE_BREAKER_THRESHOLD = config(
+        'PRODUCTS_SERVICE_BREAKER_THRESHOLD', default=5, cast=int)
+    PRODUCTS_SERVICE_BREAKER_RESET_SECONDS = config(
+        'PRODUCTS_SERVICE_BREAKER_RESET_SECONDS', default=30.0, cast=float)
+
+    # Réplica local de productos: validar carritos y checkout sin llamar al servicio
+    PRODUCTS_REPLICA_ENABLED = config(
+        'PRODUCTS_REPLICA_ENABLED', default=False, cast=bool)
+    PRODUCTS_REPLICA_RECONCILE_INTERVAL_SECONDS = config(
+        'PRODUCTS_REPLICA_RECONCILE_INTERVAL_SECONDS', default=900, cast=int)
+    # Antigüedad máxima de la confirmación más vieja antes de reportar la réplica como desactualizada
+    PRODUCTS_REPLICA_MAX_STALENESS_SECONDS = config(
+        'PRODUCTS_REPLICA_MAX_STALENESS_SECONDS', default=1800, cast=int)
+    # Secreto HMAC de los eventos de cambio recibidos; vacío = POST /products/events rechaza todo (503)
+    PRODUCTS_EVENTS_SECRET = config('PRODUCTS_EVENTS_SECRET', default='')
+    PRODUCTS_EVENTS_MAX_BATCH = config(
+        'PRODUCTS_EVENTS_MAX_BATCH', default=1000, cast=int)
+
+
+products_service_settings = ProductsServiceConfig()
@@ -0,0 +1,12 @@
+from decouple import config
+
+
+class PromotionConfig():
+    # Aplicar automáticamente las promociones vigentes en el checkout
+    PROMOTIONS_ENABLED = config('PROMOTIONS_ENABLED', default=True, cast=bool)
+    # Cada cuánto se consulta la versión del conjunto de reglas para recargarlo si cambió
+    PROMOTIONS_RELOAD_INTERVAL_SECONDS = config(
+        'PROMOTIONS_RELOAD_INTERVAL_SECONDS', default=5.0, cast=float)
+
+
+promotion_settings = PromotionConfig()
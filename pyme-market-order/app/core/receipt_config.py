@@ -0,0 +1,11 @@
+from decouple import config
+
+
+class ReceiptConfig():
+    # json | compact: formato con el que se guardan los recibos nuevos o regenerados
+    RECEIPT_STORAGE_FORMAT = config('RECEIPT_STORAGE_FORMAT', default='json')
+    RECEIPT_LINES_CACHE_MAX_ENTRIES = config(
+        'RECEIPT_LINES_CACHE_MAX_ENTRIES', default=5000, cast=int)
+
+
+receipt_settings = ReceiptConfig()
@@ -4,6 +4,7 @@ from .cart import Cart
 from .cart_item import CartItem
 from .purchase import Purchase
 from .receipt import Receipt
+from .promotion import Promotion
 
 Cart.model_rebuild()
 Purchase.model_rebuild()
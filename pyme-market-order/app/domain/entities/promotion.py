@@ -0,0 +1,34 @@
+from typing import Optional
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+from app.core.camel_case_config import CamelBaseModel
+
+
+class Promotion(CamelBaseModel):
+    promotion_id: Optional[UUID] = None
+    name: str
+    rule_type: str
+    product_sku: Optional[str] = None
+    value: Optional[Decimal] = None
+    buy_quantity: Optional[int] = None
+    get_quantity: Optional[int] = None
+    min_subtotal: Optional[Decimal] = None
+    min_quantity: Optional[int] = None
+    stackable: bool = False
+    priority: int = 0
+    is_active: bool = True
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    def is_current(self, now: datetime) -> bool:
+        """Verificar si la promoción está activa y dentro de su vigencia"""
+        if not self.is_active:
+            return False
+        if self.starts_at and self.starts_at > now:
+            return False
+        if self.ends_at and self.ends_at <= now:
+            return False
+        return True
@@ -21,6 +21,8 @@ class Purchase(CamelBaseModel):
     payment_method: Optional[str] = None
     status: str = "completed"
     purchased_at: Optional[datetime] = None
+    items_count: Optional[int] = None
+    total_quantity: Optional[int] = None
 
     cart: Optional['Cart'] = None
     receipt: Optional['Receipt'] = None
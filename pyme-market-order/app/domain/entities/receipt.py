@@ -1,5 +1,8 @@
 from typing import Optional, Dict, Any, List, TYPE_CHECKING
 from datetime import datetime, timezone
+import hashlib
+import html
+import json
 from decimal import Decimal
 from uuid import UUID
 from app.core.camel_case_config import CamelBaseModel
@@ -9,6 +12,10 @@ if TYPE_CHECKING:
     from .cart_item import CartItem
 
 
+RECEIPT_RENDER_FORMATS = ("text", "html", "thermal")
+RECEIPT_RENDER_VERSION = "1"
+
+
 class Receipt(CamelBaseModel):
     receipt_id: Optional[UUID] = None
     purchase_id: UUID
@@ -90,6 +97,106 @@ class Receipt(CamelBaseModel):
 
         return "\n".join(lines)
 
+    def get_html_receipt(self) -> str:
+        """Generar comprobante en HTML"""
+        if not self.receipt_data:
+            return "<p>No receipt data available</p>"
+
+        def esc(value) -> str:
+            return html.escape(str(value))
+
+        summary = self.receipt_data.get('summary', {})
+        rows = "".join(
+            f"<tr><td>{esc(item['product_name'])}<br><small>{esc(item['product_sku'])}</small></td>"
+            f"<td class=\"num\">{item['quantity']}</td>"
+            f"<td class=\"num\">${item['unit_price']:.2f}</td>"
+            f"<td class=\"num\">${item['subtotal']:.2f}</td></tr>"
+            for item in self.receipt_data.get('items', [])
+        )
+
+        totals = [f"<tr><td colspan=\"3\">Subtotal</td><td class=\"num\">${summary.get('subtotal', 0):.2f}</td></tr>"]
+        if summary.get('discount', 0) > 0:
+            totals.append(
+                f"<tr><td colspan=\"3\">Descuento</td><td class=\"num\">-${summary.get('discount', 0):.2f}</td></tr>")
+        if summary.get('tax', 0) > 0:
+            totals.append(
+                f"<tr><td colspan=\"3\">Impuestos</td><td class=\"num\">${summary.get('tax', 0):.2f}</td></tr>")
+        totals.append(
+            f"<tr class=\"total\"><td colspan=\"3\">TOTAL</td><td class=\"num\">${summary.get('final_total', 0):.2f}</td></tr>")
+
+        return (
+            "<!DOCTYPE html><html lang=\"es\"><head><meta charset=\"utf-8\">"
+            f"<title>Comprobante {esc(self.receipt_data.get('purchase_number', ''))}</title>"
+            "<style>body{font-family:sans-serif;max-width:640px;margin:auto}"
+            "table{width:100%;border-collapse:collapse}td,th{padding:4px;border-bottom:1px solid #ddd}"
+            ".num{text-align:right}.total td{font-weight:bold}</style></head><body>"
+            "<h1>PYME MARKET</h1><h2>Comprobante de compra</h2>"
+            f"<p>Número: {esc(self.receipt_data.get('purchase_number', 'N/A'))}<br>"
+            f"Fecha: {esc(self.receipt_data.get('purchase_date', 'N/A'))}<br>"
+            f"Cliente: {esc(self.receipt_data.get('user_id', 'N/A'))}</p>"
+            "<table><thead><tr><th>Producto</th><th class=\"num\">Cant.</th>"
+            "<th class=\"num\">Precio</th><th class=\"num\">Subtotal</th></tr></thead>"
+            f"<tbody>{rows}</tbody><tfoot>{''.join(totals)}</tfoot></table>"
+            f"<p>Método de pago: {esc(self.receipt_data.get('payment_method', 'N/A'))}</p>"
+            "<p>¡Gracias por su compra!</p></body></html>"
+        )
+
+    def get_thermal_receipt(self, width: int = 32) -> str:
+        """Generar comprobante para impresora térmica (ancho fijo en columnas)"""
+        if not self.receipt_data:
+            return "No receipt data available"
+
+        def line(left: str, right: str = "") -> str:
+            if not right:
+                return left[:width]
+            left = left[:max(width - len(right) - 1, 0)]
+            return left + " " * (width - len(left) - len(right)) + right
+
+        lines = [
+            "=" * width,
+            "PYME MARKET".center(width),
+            "COMPROBANTE DE COMPRA".center(width),
+            "=" * width,
+            line(f"Nro: {self.receipt_data.get('purchase_number', 'N/A')}"),
+            line(f"Fecha: {str(self.receipt_data.get('purchase_date', 'N/A'))[:19]}"),
+            line(f"Cliente: {self.receipt_data.get('user_id', 'N/A')}"),
+            "-" * width
+        ]
+
+        for item in self.receipt_data.get('items', []):
+            lines.append(line(item['product_name']))
+            lines.append(line(f" {item['quantity']} x {item['unit_price']:.2f}",
+                              f"{item['subtotal']:.2f}"))
+
+        summary = self.receipt_data.get('summary', {})
+        lines.append("-" * width)
+        lines.append(line("Subtotal", f"{summary.get('subtotal', 0):.2f}"))
+        if summary.get('discount', 0) > 0:
+            lines.append(line("Descuento", f"-{summary.get('discount', 0):.2f}"))
+        if summary.get('tax', 0) > 0:
+            lines.append(line("Impuestos", f"{summary.get('tax', 0):.2f}"))
+        lines.append(line("TOTAL", f"{summary.get('final_total', 0):.2f}"))
+        lines.append(line(f"Pago: {self.receipt_data.get('payment_method', 'N/A')}"))
+        lines.append("=" * width)
+        lines.append("¡Gracias por su compra!".center(width))
+
+        return "\n".join(lines) + "\n"
+
+    def render(self, render_format: str) -> str:
+        """Renderizar el comprobante en el formato indicado (text, html, thermal)"""
+        if render_format == "html":
+            return self.get_html_receipt()
+        if render_format == "thermal":
+            return self.get_thermal_receipt()
+        return self.get_formatted_receipt()
+
+    def get_content_hash(self) -> str:
+        """Hash estable del contenido del comprobante (incluye la versión de los renderizadores)"""
+        payload = json.dumps(self.receipt_data, sort_keys=True,
+                             separators=(",", ":"), default=str)
+        return hashlib.sha256(
+            f"{RECEIPT_RENDER_VERSION}:{payload}".encode("utf-8")).hexdigest()[:32]
+
     def get_total_amount(self) -> Decimal:
         """Obtener el monto total del recibo"""
         summary = self.receipt_data.get('summary', {})
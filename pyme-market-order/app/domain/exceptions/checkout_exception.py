@@ -0,0 +1,31 @@
+from typing import List
+from app.domain.exceptions.status_exception import StatusException
+from app.domain.entities.status import Status
+
+
+class CheckoutInProgressException(StatusException):
+    def __init__(self, cart_id: str):
+        message = f"A checkout is already in progress for cart {cart_id}"
+        status = Status(code="CHK001", description=message)
+        super().__init__(status_code=409, status=status)
+
+
+class CheckoutSagaNotFoundException(StatusException):
+    def __init__(self, cart_id: str):
+        message = f"No checkout found for cart {cart_id}"
+        status = Status(code="CHK002", description=message)
+        super().__init__(status_code=404, status=status)
+
+
+class StockReservationException(StatusException):
+    def __init__(self, product_skus: List[str]):
+        message = f"Stock could not be reserved for: {', '.join(product_skus)}"
+        status = Status(code="CHK003", description=message)
+        super().__init__(status_code=409, status=status)
+
+
+class InvalidBatchCheckoutException(StatusException):
+    def __init__(self, reason: str):
+        message = f"Invalid batch checkout: {reason}"
+        status = Status(code="CHK004", description=message)
+        super().__init__(status_code=400, status=status)
@@ -0,0 +1,39 @@
+from app.domain.exceptions.status_exception import StatusException
+from app.domain.entities.status import Status
+
+
+class ProductNotFoundException(StatusException):
+    def __init__(self, product_id: str):
+        message = f"Product {product_id} not found in products service"
+        status = Status(code="PROD001", description=message)
+        super().__init__(status_code=404, status=status)
+
+
+class ProductInactiveException(StatusException):
+    def __init__(self, product_id: str):
+        message = f"Product {product_id} is not active"
+        status = Status(code="PROD002", description=message)
+        super().__init__(status_code=400, status=status)
+
+
+class ProductsServiceUnavailableException(StatusException):
+    def __init__(self, reason: str = None):
+        if reason:
+            message = f"Products service unavailable: {reason}"
+        else:
+            message = "Products service unavailable"
+
+        status = Status(code="PROD003", description=message)
+        super().__init__(status_code=503, status=status)
+
+
+class ProductsCircuitOpenException(ProductsServiceUnavailableException):
+    def __init__(self):
+        super().__init__("circuit breaker open")
+
+
+class ProductChangedException(StatusException):
+    def __init__(self, product_id: str, field: str):
+        message = f"Product {product_id} changed its {field} since it was added to the cart"
+        status = Status(code="PROD004", description=message)
+        super().__init__(status_code=409, status=status)
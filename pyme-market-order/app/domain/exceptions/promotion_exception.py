@@ -0,0 +1,16 @@
+from app.domain.exceptions.status_exception import StatusException
+from app.domain.entities.status import Status
+
+
+class PromotionNotFoundException(StatusException):
+    def __init__(self, promotion_id: str):
+        message = f"Promotion with ID {promotion_id} not found"
+        status = Status(code="PROMO001", description=message)
+        super().__init__(status_code=404, status=status)
+
+
+class InvalidPromotionException(StatusException):
+    def __init__(self, reason: str):
+        message = f"Invalid promotion: {reason}"
+        status = Status(code="PROMO002", description=message)
+        super().__init__(status_code=400, status=status)
@@ -81,3 +81,24 @@ class InsufficientStockException(StatusException):
         message = f"Insufficient stock for product {product_sku}. Available: {available_stock}, Requested: {requested_quantity}"
         status = Status(code="PURCH007", description=message)
         super().__init__(status_code=400, status=status)
+
+
+class InvalidHistoryCursorException(StatusException):
+    def __init__(self, cursor: str):
+        message = f"Invalid purchase history cursor: '{cursor}'"
+        status = Status(code="PURCH008", description=message)
+        super().__init__(status_code=400, status=status)
+
+
+class InvalidExportRangeException(StatusException):
+    def __init__(self, reason: str):
+        message = f"Invalid export date range: {reason}"
+        status = Status(code="PURCH009", description=message)
+        super().__init__(status_code=400, status=status)
+
+
+class InvalidRepriceRequestException(StatusException):
+    def __init__(self, reason: str):
+        message = f"Invalid repricing request: {reason}"
+        status = Status(code="PURCH010", description=message)
+        super().__init__(status_code=400, status=status)
@@ -52,3 +52,17 @@ class InvalidReceiptDataException(StatusException):
 
         status = Status(code="RCPT004", description=message)
         super().__init__(status_code=400, status=status)
+
+
+class ReceiptPendingException(StatusException):
+    def __init__(self, purchase_id: str):
+        message = f"Receipt for purchase {purchase_id} is being generated"
+        status = Status(code="RCPT005", description=message)
+        super().__init__(status_code=202, status=status)
+
+
+class InvalidReceiptSearchException(StatusException):
+    def __init__(self, reason: str):
+        message = f"Invalid receipt search: {reason}"
+        status = Status(code="RCPT006", description=message)
+        super().__init__(status_code=400, status=status)
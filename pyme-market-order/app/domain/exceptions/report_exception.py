@@ -0,0 +1,9 @@
+from app.domain.exceptions.status_exception import StatusException
+from app.domain.entities.status import Status
+
+
+class InvalidReportRangeException(StatusException):
+    def __init__(self, reason: str):
+        message = f"Invalid report date range: {reason}"
+        status = Status(code="RPT001", description=message)
+        super().__init__(status_code=400, status=status)
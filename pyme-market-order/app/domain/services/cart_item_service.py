@@ -5,6 +5,9 @@ from app.domain.entities.cart_item import CartItem
 from app.schemas.cart_item_schema import CartItemCreate, CartItemUpdate
 from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
 from app.infrastructure.db.repositories.cart_repository import CartRepository
+from app.infrastructure.clients.products_client import ProductsClient
+from app.infrastructure.db.repositories.product_replica_repository import ProductReplicaRepository
+from app.infrastructure.cache.cart_store import WriteBehindCartStore, CartStoreEntry
 from app.domain.exceptions.cart_item_exception import (
     CartItemNotFoundException,
     InvalidQuantityException,
@@ -17,24 +20,50 @@ from app.domain.exceptions.cart_exception import (
     CartInactiveException,
     CartAlreadyCompletedException
 )
+from app.domain.exceptions.product_exception import ProductNotFoundException, ProductInactiveException
+from app.domain.exceptions.purchase_exception import InsufficientStockException
 
 
 class CartItemService:
-    def __init__(self, cart_item_repository: CartItemRepository, cart_repository: CartRepository):
+    """Mutaciones de items del carrito. Con cart_store los cambios se aplican en memoria y se
+    escriben a Postgres de forma diferida (ver app/infrastructure/cache/cart_store.py). Con
+    product_replica el catálogo (nombre, precio, activo) se lee de la réplica local en lugar del
+    servicio de productos; el stock siempre se consulta al servicio"""
+
+    def __init__(self, cart_item_repository: CartItemRepository, cart_repository: CartRepository,
+                 products_client: Optional[ProductsClient] = None,
+                 cart_store: Optional[WriteBehindCartStore] = None,
+                 product_replica: Optional[ProductReplicaRepository] = None):
         self.cart_item_repository = cart_item_repository
         self.cart_repository = cart_repository
+        self.products_client = products_client
+        self.cart_store = cart_store
+        self.product_catalog = product_replica or products_client
 
     async def add_item_to_cart(self, cart_id: UUID, item_data: CartItemCreate) -> CartItem:
         """Agregar item al carrito con validaciones de negocio"""
         cart = await self._get_and_validate_cart(cart_id)
 
+        if self.product_catalog:
+            item_data = await self._apply_catalog_data(item_data)
+
         self._validate_product_data(item_data)
 
-        existing_item = await self.cart_item_repository.get_cart_item_by_product(cart_id, item_data.product_id)
+        existing_item = await self._get_item_by_product(cart_id, item_data.product_id)
         if existing_item:
             new_quantity = existing_item.quantity + item_data.quantity
             return await self.update_item_quantity(existing_item.cart_item_id, new_quantity)
 
+        await self._validate_stock(item_data.product_id, item_data.quantity)
+
+        if self.cart_store:
+            entry = await self._get_store_entry(cart)
+            cart_item = self.cart_store.add_item(
+                entry, cart_id, item_data.product_id, item_data.product_name, item_data.product_sku,
+                item_data.unit_price, item_data.quantity)
+            await self._after_store_mutation()
+            return cart_item
+
         cart_item = await self.cart_item_repository.create_cart_item(cart_id, item_data)
 
         await self._refresh_cart_totals(cart_id)
@@ -43,6 +72,13 @@ class CartItemService:
 
     async def get_cart_item_by_id(self, cart_item_id: UUID) -> CartItem:
         """Obtener item del carrito por ID"""
+        entry = self.cart_store.get_by_item(cart_item_id) if self.cart_store else None
+        if entry:
+            cart_item = entry.items.get(cart_item_id)
+            if not cart_item:
+                raise CartItemNotFoundException(cart_item_id=str(cart_item_id))
+            return cart_item.model_copy()
+
         cart_item = await self.cart_item_repository.get_cart_item_by_id(cart_item_id)
         if not cart_item:
             raise CartItemNotFoundException(cart_item_id=str(cart_item_id))
@@ -52,6 +88,10 @@ class CartItemService:
         """Obtener todos los items de un carrito"""
         await self._get_and_validate_cart(cart_id, check_modifiable=False)
 
+        entry = self.cart_store.get(cart_id) if self.cart_store else None
+        if entry:
+            return entry.get_items()
+
         return await self.cart_item_repository.get_cart_items_by_cart(cart_id)
 
     async def update_item_quantity(self, cart_item_id: UUID, new_quantity: int) -> CartItem:
@@ -60,7 +100,12 @@ class CartItemService:
 
         cart_item = await self.get_cart_item_by_id(cart_item_id)
 
-        await self._get_and_validate_cart(cart_item.cart_id)
+        cart = await self._get_and_validate_cart(cart_item.cart_id)
+
+        await self._validate_stock(cart_item.product_id, new_quantity)
+
+        if self.cart_store:
+            return await self._update_store_item(cart, cart_item_id, new_quantity)
 
         updated_item = await self.cart_item_repository.update_cart_item_quantity(cart_item_id, new_quantity)
 
@@ -72,10 +117,16 @@ class CartItemService:
         """Actualizar un item del carrito"""
         cart_item = await self.get_cart_item_by_id(cart_item_id)
 
-        await self._get_and_validate_cart(cart_item.cart_id)
+        cart = await self._get_and_validate_cart(cart_item.cart_id)
 
         if update_data.quantity is not None:
             self._validate_quantity(update_data.quantity)
+            await self._validate_stock(cart_item.product_id, update_data.quantity)
+
+        if self.cart_store:
+            if update_data.quantity is None:
+                return cart_item
+            return await self._update_store_item(cart, cart_item_id, update_data.quantity)
 
         updated_item = await self.cart_item_repository.update_cart_item(cart_item_id, update_data)
 
@@ -87,7 +138,10 @@ class CartItemService:
         """Eliminar item del carrito"""
         cart_item = await self.get_cart_item_by_id(cart_item_id)
 
-        await self._get_and_validate_cart(cart_item.cart_id)
+        cart = await self._get_and_validate_cart(cart_item.cart_id)
+
+        if self.cart_store:
+            return await self._remove_store_item(cart, cart_item_id)
 
         success = await self.cart_item_repository.delete_cart_item(cart_item_id)
 
@@ -98,12 +152,15 @@ class CartItemService:
 
     async def remove_product_from_cart(self, cart_id: UUID, product_id: UUID) -> bool:
         """Eliminar producto específico del carrito"""
-        await self._get_and_validate_cart(cart_id)
+        cart = await self._get_and_validate_cart(cart_id)
 
-        cart_item = await self.cart_item_repository.get_cart_item_by_product(cart_id, product_id)
+        cart_item = await self._get_item_by_product(cart_id, product_id)
         if not cart_item:
             raise CartItemNotFoundException(product_id=str(product_id))
 
+        if self.cart_store:
+            return await self._remove_store_item(cart, cart_item.cart_item_id)
+
         success = await self.cart_item_repository.delete_cart_item(cart_item.cart_item_id)
 
         if success:
@@ -113,33 +170,33 @@ class CartItemService:
 
     async def clear_cart_items(self, cart_id: UUID) -> bool:
         """Eliminar todos los items de un carrito"""
-        await self._get_and_validate_cart(cart_id)
+        cart = await self._get_and_validate_cart(cart_id)
 
-        success = await self.cart_item_repository.delete_cart_items_by_cart(cart_id)
+        if self.cart_store:
+            self.cart_store.clear(await self._get_store_entry(cart))
+            await self._after_store_mutation()
+            return True
 
-        if success:
-            await self.cart_repository.update_cart_totals(cart_id, 0.0, 0)
+        cart = await self.cart_repository.clear_cart(cart_id)
 
-        return success
+        return cart is not None
 
     async def get_cart_summary(self, cart_id: UUID) -> dict:
         """Obtener resumen del carrito"""
-        await self._get_and_validate_cart(cart_id, check_modifiable=False)
+        entry = self.cart_store.get(cart_id) if self.cart_store else None
+        if entry:
+            return entry.summary()
 
-        total_amount, total_items = await self.cart_item_repository.calculate_cart_totals(cart_id)
-        items_count = await self.cart_item_repository.count_cart_items(cart_id)
+        summary = await self.cart_item_repository.get_cart_summary(cart_id)
+        if summary is None:
+            raise CartNotFoundException(cart_id=str(cart_id))
 
-        return {
-            "cart_id": str(cart_id),
-            "total_amount": total_amount,
-            "total_items": total_items,
-            "items_count": items_count,
-            "is_empty": total_items == 0
-        }
+        return summary
 
     async def _get_and_validate_cart(self, cart_id: UUID, check_modifiable: bool = True):
-        """Obtener y validar carrito"""
-        cart = await self.cart_repository.get_cart_by_id(cart_id)
+        """Obtener y validar carrito (la copia en memoria si está en el store)"""
+        entry = self.cart_store.get(cart_id) if self.cart_store else None
+        cart = entry.get_cart() if entry else await self.cart_repository.get_cart_by_id(cart_id)
         if not cart:
             raise CartNotFoundException(cart_id=str(cart_id))
 
@@ -153,6 +210,73 @@ class CartItemService:
         total_amount, total_items = await self.cart_item_repository.calculate_cart_totals(cart_id)
         await self.cart_repository.update_cart_totals(cart_id, total_amount, total_items)
 
+    async def _get_item_by_product(self, cart_id: UUID, product_id: UUID) -> Optional[CartItem]:
+        """Buscar el item de un producto en el carrito (en memoria si está en el store)"""
+        entry = self.cart_store.get(cart_id) if self.cart_store else None
+        if entry:
+            return entry.find_by_product(product_id)
+
+        return await self.cart_item_repository.get_cart_item_by_product(cart_id, product_id)
+
+    async def _get_store_entry(self, cart) -> CartStoreEntry:
+        """Carrito en el store, cargándolo de la base de datos si no está residente"""
+        entry = self.cart_store.get(cart.cart_id)
+        if entry:
+            return entry
+
+        cart_items = await self.cart_item_repository.get_cart_items_by_cart(cart.cart_id)
+        return self.cart_store.load(cart, cart_items)
+
+    async def _update_store_item(self, cart, cart_item_id: UUID, quantity: int) -> CartItem:
+        """Cambiar la cantidad de un item en el store"""
+        entry = await self._get_store_entry(cart)
+        updated_item = self.cart_store.update_quantity(entry, cart_item_id, quantity)
+        if not updated_item:
+            raise CartItemNotFoundException(cart_item_id=str(cart_item_id))
+
+        await self._after_store_mutation()
+        return updated_item
+
+    async def _remove_store_item(self, cart, cart_item_id: UUID) -> bool:
+        """Eliminar un item en el store"""
+        entry = await self._get_store_entry(cart)
+        success = self.cart_store.remove_item(entry, cart_item_id)
+
+        await self._after_store_mutation()
+        return success
+
+    async def _after_store_mutation(self) -> None:
+        """Con el store lleno, escribir de inmediato para poder liberar memoria"""
+        if self.cart_store.over_capacity:
+            await self.cart_store.flush()
+
+    async def _apply_catalog_data(self, item_data: CartItemCreate) -> CartItemCreate:
+        """Reemplazar nombre, SKU y precio enviados por el cliente con los del servicio de productos"""
+        product = await self.product_catalog.get_product(item_data.product_id)
+        if not product:
+            raise ProductNotFoundException(str(item_data.product_id))
+        if not product.is_active:
+            raise ProductInactiveException(str(item_data.product_id))
+
+        return item_data.model_copy(update={
+            "product_name": product.name,
+            "product_sku": product.sku,
+            "unit_price": product.price
+        })
+
+    async def _validate_stock(self, product_id: UUID, quantity: int) -> None:
+        """Validar stock disponible contra el servicio de productos (si está habilitado). No usa la
+        réplica: su stock puede tener el retraso de los eventos"""
+        if not self.products_client:
+            return
+
+        product = await self.products_client.get_product(product_id)
+        if not product:
+            raise ProductNotFoundException(str(product_id))
+        if quantity > product.stock_quantity:
+            raise InsufficientStockException(
+                product.sku, product.stock_quantity, quantity)
+
     def _validate_product_data(self, item_data: CartItemCreate) -> None:
         """Validar datos del producto"""
         missing_fields = []
@@ -189,6 +313,10 @@ class CartItemService:
             raise CartInactiveException(str(cart.cart_id))
 
 
-def get_cart_item_service(cart_item_repository: CartItemRepository, cart_repository: CartRepository) -> CartItemService:
+def get_cart_item_service(cart_item_repository: CartItemRepository, cart_repository: CartRepository,
+                          products_client: Optional[ProductsClient] = None,
+                          cart_store: Optional[WriteBehindCartStore] = None,
+                          product_replica: Optional[ProductReplicaRepository] = None) -> CartItemService:
     """Factory function para obtener instancia del servicio"""
-    return CartItemService(cart_item_repository, cart_repository)
+    return CartItemService(cart_item_repository, cart_repository, products_client, cart_store,
+                           product_replica)
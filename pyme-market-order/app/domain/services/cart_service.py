@@ -1,10 +1,12 @@
 from typing import List, Optional
 from uuid import UUID
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from app.domain.entities.cart import Cart
 from app.schemas.cart_schema import CartCreate, CartUpdate
 from app.infrastructure.db.repositories.cart_repository import CartRepository
 from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.infrastructure.cache.cart_store import WriteBehindCartStore
 from app.domain.exceptions.cart_exception import (
     CartNotFoundException,
     CartAlreadyCompletedException,
@@ -16,9 +18,11 @@ from app.domain.exceptions.cart_exception import (
 
 
 class CartService:
-    def __init__(self, cart_repository: CartRepository, cart_item_repository: CartItemRepository):
+    def __init__(self, cart_repository: CartRepository, cart_item_repository: CartItemRepository,
+                 cart_store: Optional[WriteBehindCartStore] = None):
         self.cart_repository = cart_repository
         self.cart_item_repository = cart_item_repository
+        self.cart_store = cart_store
 
     async def create_cart(self, cart_data: CartCreate) -> Cart:
         """Crear un nuevo carrito con validaciones de negocio"""
@@ -26,9 +30,9 @@ class CartService:
             self._validate_user_id(cart_data.user_id)
             self._validate_cart_status(cart_data.status)
 
-            existing_cart = await self.cart_repository.get_active_cart_by_user(cart_data.user_id)
-            if existing_cart:
-                return existing_cart
+            if cart_data.status == "active":
+                return self._with_store_state(
+                    await self.cart_repository.get_or_create_active_cart(cart_data.user_id))
 
             return await self.cart_repository.create_cart(cart_data)
 
@@ -41,35 +45,43 @@ class CartService:
         cart = await self.cart_repository.get_cart_by_id(cart_id)
         if not cart:
             raise CartNotFoundException(cart_id=str(cart_id))
-        return cart
+        return self._with_store_state(cart)
 
-    async def get_or_create_active_cart(self, user_id: str) -> Cart:
+    async def get_or_create_active_cart(self, user_id: str, include_items: bool = False) -> Cart:
         """Obtener carrito activo del usuario o crear uno nuevo"""
-        cart = await self.cart_repository.get_active_cart_by_user(user_id)
+        if not include_items:
+            return self._with_store_state(
+                await self.cart_repository.get_or_create_active_cart(user_id))
 
+        cart = await self.cart_repository.get_active_cart_with_items_by_user(user_id)
         if cart:
+            return self._with_store_state(cart)
+
+        cart = await self.cart_repository.get_or_create_active_cart(user_id)
+        if self.cart_store and self.cart_store.get(cart.cart_id):
+            return self._with_store_state(cart)
+        if cart.is_empty():
+            cart.cart_items = []
             return cart
 
-        cart_data = CartCreate(user_id=user_id, status="active")
-        return await self.create_cart(cart_data)
+        return await self.cart_repository.get_cart_with_items_by_id(cart.cart_id)
 
     async def get_cart_with_items(self, cart_id: UUID) -> Cart:
-        """Obtener carrito con sus items incluidos"""
-        cart = await self.get_cart_by_id(cart_id)
-
-        cart_items = await self.cart_item_repository.get_cart_items_by_cart(cart_id)
-        cart.cart_items = cart_items
-
-        cart.calculate_totals()
-
-        return cart
+        """Obtener carrito con sus items incluidos (totales tomados de las columnas almacenadas)"""
+        cart = await self.cart_repository.get_cart_with_items_by_id(cart_id)
+        if not cart:
+            raise CartNotFoundException(cart_id=str(cart_id))
+        return self._with_store_state(cart)
 
     async def get_carts_by_user(self, user_id: str, include_inactive: bool = False) -> List[Cart]:
         """Obtener todos los carritos de un usuario"""
-        return await self.cart_repository.get_carts_by_user(user_id, include_inactive)
+        carts = await self.cart_repository.get_carts_by_user(user_id, include_inactive)
+        return [self._with_store_state(cart) for cart in carts]
 
     async def update_cart(self, cart_id: UUID, update_data: CartUpdate) -> Cart:
         """Actualizar un carrito con validaciones"""
+        await self._release_from_store(cart_id)
+
         existing_cart = await self.get_cart_by_id(cart_id)
 
         self._validate_cart_can_be_modified(existing_cart)
@@ -82,6 +94,8 @@ class CartService:
 
     async def refresh_cart_totals(self, cart_id: UUID) -> Cart:
         """Recalcular y actualizar totales del carrito"""
+        await self._release_from_store(cart_id)
+
         cart = await self.get_cart_by_id(cart_id)
 
         total_amount, total_items = await self.cart_item_repository.calculate_cart_totals(cart_id)
@@ -90,16 +104,53 @@ class CartService:
 
     async def clear_cart(self, cart_id: UUID) -> Cart:
         """Vaciar carrito eliminando todos sus items"""
+        await self._release_from_store(cart_id)
+
         cart = await self.get_cart_by_id(cart_id)
 
         self._validate_cart_can_be_modified(cart)
 
-        await self.cart_item_repository.delete_cart_items_by_cart(cart_id)
+        cleared_cart = await self.cart_repository.clear_cart(cart_id)
+        if not cleared_cart:
+            raise CartNotFoundException(cart_id=str(cart_id))
 
-        return await self.cart_repository.update_cart_totals(cart_id, 0.0, 0)
+        return cleared_cart
+
+    async def purge_abandoned_cart_items(self, older_than_days: int = 0, chunk_size: int = 500,
+                                         max_chunks: int = 10) -> dict:
+        """Eliminar por lotes los items de carritos abandonados, como máximo max_chunks lotes por
+        llamada; has_more indica que conviene volver a llamar"""
+        updated_before = None
+        if older_than_days > 0:
+            updated_before = datetime.now(
+                timezone.utc) - timedelta(days=older_than_days)
+
+        carts_processed = 0
+        items_deleted = 0
+        has_more = False
+
+        for _ in range(max_chunks):
+            cart_ids = await self.cart_repository.get_abandoned_cart_ids_with_items(
+                chunk_size, updated_before)
+            if not cart_ids:
+                break
+
+            items_deleted += await self.cart_item_repository.delete_items_for_carts(cart_ids)
+            carts_processed += len(cart_ids)
+            has_more = len(cart_ids) == chunk_size
+            if not has_more:
+                break
+
+        return {
+            "carts_processed": carts_processed,
+            "items_deleted": items_deleted,
+            "has_more": has_more
+        }
 
     async def complete_cart(self, cart_id: UUID) -> Cart:
         """Marcar carrito como completado"""
+        await self._release_from_store(cart_id)
+
         cart = await self.get_cart_by_id(cart_id)
 
         if not cart.can_be_purchased():
@@ -114,6 +165,8 @@ class CartService:
 
     async def abandon_cart(self, cart_id: UUID) -> Cart:
         """Marcar carrito como abandonado"""
+        await self._release_from_store(cart_id)
+
         cart = await self.get_cart_by_id(cart_id)
 
         if cart.status == "completed":
@@ -123,6 +176,8 @@ class CartService:
 
     async def delete_cart(self, cart_id: UUID) -> bool:
         """Eliminar carrito (soft delete)"""
+        await self._release_from_store(cart_id)
+
         cart = await self.get_cart_by_id(cart_id)
 
         if cart.status == "completed":
@@ -130,6 +185,19 @@ class CartService:
 
         return await self.cart_repository.delete_cart(cart_id)
 
+    def _with_store_state(self, cart: Cart) -> Cart:
+        """Reemplazar totales e items por los del store si el carrito tiene cambios en memoria"""
+        entry = self.cart_store.get(cart.cart_id) if self.cart_store else None
+        if not entry:
+            return cart
+
+        return entry.get_cart(include_items=cart.cart_items is not None)
+
+    async def _release_from_store(self, cart_id: UUID) -> None:
+        """Escribir los cambios en memoria del carrito y sacarlo del store antes de cambiarlo en la base de datos"""
+        if self.cart_store:
+            await self.cart_store.flush([cart_id], evict=True)
+
     def _validate_user_id(self, user_id: str) -> None:
         """Validar ID de usuario"""
         if not user_id or not user_id.strip():
@@ -168,6 +236,7 @@ class CartService:
             raise InvalidCartStatusException(current_status, new_status)
 
 
-def get_cart_service(cart_repository: CartRepository, cart_item_repository: CartItemRepository) -> CartService:
+def get_cart_service(cart_repository: CartRepository, cart_item_repository: CartItemRepository,
+                     cart_store: Optional[WriteBehindCartStore] = None) -> CartService:
     """Factory function para obtener instancia del servicio"""
-    return CartService(cart_repository, cart_item_repository)
+    return CartService(cart_repository, cart_item_repository, cart_store)
@@ -0,0 +1,505 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+from decimal import Decimal
+from app.domain.entities.purchase import Purchase
+from app.domain.entities.cart_item import CartItem
+from app.schemas.purchase_schema import PurchaseCreate
+from app.infrastructure.db.repositories.purchase_repository import PurchaseRepository
+from app.infrastructure.db.repositories.cart_repository import CartRepository
+from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.infrastructure.db.repositories.checkout_saga_repository import CheckoutSagaRepository
+from app.infrastructure.clients.products_client import ProductsClient
+from app.infrastructure.db.repositories.product_replica_repository import ProductReplicaRepository
+from app.infrastructure.cache.cart_store import get_cart_store
+from app.domain.services.purchase_service import PurchaseService
+from app.domain.services.pricing_engine import pricing_engine
+from app.domain.services.promotion_service import PromotionService
+from app.core.checkout_config import checkout_settings
+from app.domain.exceptions.status_exception import StatusException
+from app.domain.exceptions.checkout_exception import (
+    CheckoutInProgressException,
+    CheckoutSagaNotFoundException,
+    StockReservationException,
+    InvalidBatchCheckoutException
+)
+from app.domain.exceptions.purchase_exception import (
+    InvalidPaymentMethodException,
+    PurchaseProcessingException
+)
+from app.domain.exceptions.cart_exception import (
+    CartNotFoundException,
+    CartIsEmptyException,
+    CartInactiveException,
+    InvalidCartStatusException
+)
+from app.domain.exceptions.product_exception import (
+    ProductsServiceUnavailableException,
+    ProductsCircuitOpenException
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CheckoutService:
+    """Checkout como saga: reservar stock de todas las líneas, crear la compra y completar el carrito
+    en una transacción local y, si algo falla, devolver el stock reservado. Con product_replica los
+    carritos se validan antes contra la réplica local de productos (la reserva sigue siendo remota)"""
+
+    def __init__(self, purchase_repository: PurchaseRepository, cart_repository: CartRepository,
+                 cart_item_repository: CartItemRepository, checkout_saga_repository: CheckoutSagaRepository,
+                 products_client: Optional[ProductsClient] = None,
+                 promotion_service: Optional[PromotionService] = None,
+                 product_replica: Optional[ProductReplicaRepository] = None):
+        self.purchase_repository = purchase_repository
+        self.cart_repository = cart_repository
+        self.cart_item_repository = cart_item_repository
+        self.checkout_saga_repository = checkout_saga_repository
+        self.products_client = products_client
+        self.promotion_service = promotion_service
+        self.product_replica = product_replica
+        self.cart_store = get_cart_store()
+        self.purchase_service = PurchaseService(
+            purchase_repository, cart_repository, cart_item_repository, products_client, product_replica)
+
+    async def checkout(self, cart_id: UUID, payment_method: str = None,
+                       discount_percentage: Decimal = None, tax_percentage: Decimal = None) -> Purchase:
+        """Procesar la compra de un carrito reservando stock en el servicio de productos"""
+        if await self.purchase_repository.purchase_exists_for_cart(cart_id):
+            return await self.purchase_service.process_cart_purchase(
+                cart_id, payment_method, discount_percentage, tax_percentage)
+
+        await self._flush_cart_store([cart_id])
+
+        cart = await self._validate_cart_for_checkout(cart_id)
+
+        if payment_method:
+            self._validate_payment_method(payment_method)
+
+        cart_items = await self.cart_item_repository.get_cart_items_by_cart(cart_id)
+        if not cart_items:
+            raise CartIsEmptyException(str(cart_id))
+
+        if self.product_replica:
+            products = await self.product_replica.get_products(item.product_id for item in cart_items)
+            self.purchase_service.validate_items_against_catalog(cart_items, products)
+
+        discount_amount, promotion_ids = await self._evaluate_promotions(cart_items, discount_percentage)
+        purchase_id, purchase_data = self._build_purchase_data(
+            cart_id, cart.user_id, cart_items, payment_method, discount_percentage, tax_percentage,
+            discount_amount)
+
+        saga = await self.checkout_saga_repository.create_saga(
+            cart_id, cart.user_id, self._build_lines(cart_items),
+            payment_method, discount_percentage, tax_percentage, discount_amount, promotion_ids)
+        if not saga:
+            raise CheckoutInProgressException(str(cart_id))
+
+        await self._reserve_stock(saga)
+
+        return await self._complete_checkout(saga, purchase_id, purchase_data)
+
+    async def checkout_batch(self, cart_ids: List[UUID], payment_method: str = None,
+                             discount_percentage: Decimal = None, tax_percentage: Decimal = None) -> dict:
+        """Procesar la compra de muchos carritos con el mismo flujo que checkout, pero por lotes: una
+        consulta por tabla para validar, un INSERT para las sagas, una sola llamada de reserva de stock
+        y una transacción para todas las compras. Un carrito que falla no detiene a los demás"""
+        cart_ids = list(dict.fromkeys(cart_ids))
+        if not cart_ids or len(cart_ids) > checkout_settings.CHECKOUT_BATCH_MAX_CARTS:
+            raise InvalidBatchCheckoutException(
+                f"between 1 and {checkout_settings.CHECKOUT_BATCH_MAX_CARTS} carts are required")
+
+        if payment_method:
+            self._validate_payment_method(payment_method)
+
+        results: Dict[UUID, dict] = {}
+
+        existing = await self.purchase_repository.get_purchases_by_cart_ids(cart_ids)
+        for cart_id, purchase in existing.items():
+            results[cart_id] = self._batch_result(
+                cart_id, "already_purchased", purchase=purchase)
+
+        pending = [cart_id for cart_id in cart_ids if cart_id not in results]
+        await self._flush_cart_store(pending)
+        carts = {cart.cart_id: cart for cart in await self.cart_repository.get_carts_by_ids(pending)}
+        items_by_cart = await self.cart_item_repository.get_cart_items_by_carts(pending)
+        products = {}
+        if self.product_replica:
+            products = await self.product_replica.get_products(
+                item.product_id for cart_items in items_by_cart.values() for item in cart_items)
+
+        checkouts: Dict[UUID, dict] = {}
+        for cart_id in pending:
+            cart_items = items_by_cart.get(cart_id, [])
+            try:
+                cart = self._check_cart_for_checkout(cart_id, carts.get(cart_id))
+                if not cart_items:
+                    raise CartIsEmptyException(str(cart_id))
+                if self.product_replica:
+                    self.purchase_service.validate_items_against_catalog(cart_items, products)
+
+                discount_amount, promotion_ids = await self._evaluate_promotions(
+                    cart_items, discount_percentage)
+                purchase_id, purchase_data = self._build_purchase_data(
+                    cart_id, cart.user_id, cart_items, payment_method, discount_percentage, tax_percentage,
+                    discount_amount)
+            except StatusException as e:
+                results[cart_id] = self._batch_result(cart_id, "failed", error=e)
+                continue
+
+            checkouts[cart_id] = {
+                "purchase_id": purchase_id,
+                "purchase_data": purchase_data,
+                "items_count": len(cart_items),
+                "total_quantity": sum(item.quantity for item in cart_items),
+                "lines": self._build_lines(cart_items),
+                "discount_amount": discount_amount,
+                "promotion_ids": promotion_ids
+            }
+
+        sagas = await self.checkout_saga_repository.create_sagas([
+            {
+                "cart_id": cart_id,
+                "user_id": checkout["purchase_data"].user_id,
+                "lines": checkout["lines"],
+                "payment_method": payment_method,
+                "discount_percentage": discount_percentage,
+                "tax_percentage": tax_percentage,
+                "discount_amount": checkout["discount_amount"],
+                "promotion_ids": checkout["promotion_ids"]
+            }
+            for cart_id, checkout in checkouts.items()
+        ])
+        started = {saga["cart_id"] for saga in sagas}
+        for cart_id in checkouts:
+            if cart_id not in started:
+                results[cart_id] = self._batch_result(
+                    cart_id, "failed", error=CheckoutInProgressException(str(cart_id)))
+
+        reserved = await self._reserve_stock_batch(sagas, results)
+        await self._complete_batch_checkout(reserved, checkouts, results)
+
+        ordered = [results[cart_id] for cart_id in cart_ids]
+        return {
+            "requested": len(cart_ids),
+            "completed": sum(1 for result in ordered if result["status"] == "completed"),
+            "already_purchased": sum(1 for result in ordered if result["status"] == "already_purchased"),
+            "failed": sum(1 for result in ordered if result["status"] == "failed"),
+            "results": ordered
+        }
+
+    async def get_cart_checkout(self, cart_id: UUID) -> dict:
+        """Obtener el estado del último checkout de un carrito"""
+        saga = await self.checkout_saga_repository.get_latest_saga_by_cart(cart_id)
+        if not saga:
+            raise CheckoutSagaNotFoundException(str(cart_id))
+        return saga
+
+    async def recover_saga(self, saga: dict) -> str:
+        """Retomar un checkout interrumpido: completarlo si el stock ya está reservado y el carrito
+        no cambió; si no, devolver el stock reservado"""
+        if saga["status"] == "reserved":
+            rebuilt = await self._rebuild_purchase_data(saga)
+            if rebuilt:
+                try:
+                    await self._complete_checkout(saga, *rebuilt)
+                    return "completed"
+                except Exception:
+                    return "compensated" if saga["status"] == "failed" else "compensating"
+
+            compensated = await self._compensate(
+                saga, "cart changed or is no longer purchasable after stock was reserved")
+            return "compensated" if compensated else "compensating"
+
+        if saga["status"] == "started":
+            # El proceso se detuvo durante la reserva: las líneas sin resultado pueden o no
+            # haberse descontado, por lo que no se devuelven automáticamente
+            for line in saga["lines"]:
+                if line["state"] == "pending":
+                    line["state"] = "unknown"
+            compensated = await self._compensate(
+                saga, "checkout interrupted while reserving stock")
+            return "compensated" if compensated else "compensating"
+
+        compensated = await self._compensate(saga, saga["last_error"] or "compensation retry")
+        return "compensated" if compensated else "compensating"
+
+    async def _reserve_stock(self, saga: dict) -> None:
+        """Descontar en paralelo el stock de todas las líneas; compensar si alguna falla"""
+        lines = saga["lines"]
+
+        if self.products_client:
+            results = await self.products_client.reserve_stock(
+                [(UUID(line["product_id"]), line["quantity"]) for line in lines])
+            self._apply_reservation_results(lines, results)
+
+        failure = self._reservation_failure(lines)
+        if failure is None:
+            await self.checkout_saga_repository.update_saga(
+                saga["saga_id"], status="reserved", lines=lines)
+            saga["status"] = "reserved"
+            return
+
+        error, exception = failure
+        await self._compensate(saga, error)
+        raise exception
+
+    async def _reserve_stock_batch(self, sagas: List[dict], results: Dict[UUID, dict]) -> List[dict]:
+        """Reservar el stock de las líneas de todos los checkouts con una sola llamada al servicio de
+        productos. Los checkouts con alguna línea rechazada se compensan y quedan como fallidos;
+        devuelve los reservados"""
+        lines = [line for saga in sagas for line in saga["lines"]]
+
+        if self.products_client and lines:
+            reservations = await self.products_client.reserve_stock(
+                [(UUID(line["product_id"]), line["quantity"]) for line in lines])
+            self._apply_reservation_results(lines, reservations)
+
+        reserved = []
+        for saga in sagas:
+            failure = self._reservation_failure(saga["lines"])
+            if failure is None:
+                reserved.append(saga)
+                continue
+
+            error, exception = failure
+            await self._compensate(saga, error)
+            results[saga["cart_id"]] = self._batch_result(
+                saga["cart_id"], "failed", error=exception)
+
+        await self.checkout_saga_repository.mark_sagas_reserved(reserved)
+        for saga in reserved:
+            saga["status"] = "reserved"
+
+        return reserved
+
+    def _apply_reservation_results(self, lines: List[dict], results: list) -> None:
+        for line, result in zip(lines, results):
+            if isinstance(result, ProductsCircuitOpenException):
+                # No se envió: el stock no se descontó y no hay nada que devolver ni revisar
+                line["state"] = "unsent"
+            elif isinstance(result, Exception):
+                line["state"] = "unknown"
+            else:
+                line["state"] = "reserved" if result else "failed"
+
+    def _reservation_failure(self, lines: List[dict]) -> Optional[Tuple[str, StatusException]]:
+        """Error de la reserva (mensaje para la saga y excepción) o None si todas las líneas se reservaron"""
+        rejected = [line["product_sku"]
+                    for line in lines if line["state"] == "failed"]
+        unreachable = [line["product_sku"]
+                       for line in lines if line["state"] in ("unsent", "unknown")]
+
+        if rejected:
+            return f"stock rejected for: {', '.join(rejected)}", StockReservationException(rejected)
+        if unreachable:
+            error = f"products service unreachable for: {', '.join(unreachable)}"
+            return error, ProductsServiceUnavailableException(error)
+        return None
+
+    async def _complete_checkout(self, saga: dict, purchase_id: UUID, purchase_data: PurchaseCreate) -> Purchase:
+        """Crear la compra y completar el carrito en una transacción local; compensar si no se puede"""
+        try:
+            purchase = await self.purchase_repository.create_checkout_purchase(
+                purchase_id, purchase_data, saga["saga_id"])
+        except Exception as e:
+            await self._compensate(saga, f"local transaction failed: {str(e)}")
+            raise
+
+        if not purchase:
+            await self._compensate(saga, "cart is no longer active")
+            raise PurchaseProcessingException(
+                str(purchase_data.cart_id), "cart is no longer active")
+
+        return purchase
+
+    async def _complete_batch_checkout(self, sagas: List[dict], checkouts: Dict[UUID, dict],
+                                       results: Dict[UUID, dict]) -> None:
+        """Crear las compras de los checkouts reservados en una transacción; compensar los que no se pudieron"""
+        if not sagas:
+            return
+
+        try:
+            purchases = await self.purchase_repository.create_batch_checkout_purchases(
+                [{"saga_id": saga["saga_id"], **checkouts[saga["cart_id"]]} for saga in sagas])
+            error = "cart is no longer active"
+        except Exception as e:
+            purchases = []
+            error = f"local transaction failed: {str(e)}"
+
+        purchases_by_cart = {purchase.cart_id: purchase for purchase in purchases}
+        for saga in sagas:
+            cart_id = saga["cart_id"]
+            purchase = purchases_by_cart.get(cart_id)
+            if purchase:
+                results[cart_id] = self._batch_result(
+                    cart_id, "completed", purchase=purchase)
+                continue
+
+            await self._compensate(saga, error)
+            results[cart_id] = self._batch_result(
+                cart_id, "failed", error=PurchaseProcessingException(str(cart_id), error))
+
+    def _batch_result(self, cart_id: UUID, status: str, purchase: Optional[Purchase] = None,
+                      error: Optional[StatusException] = None) -> dict:
+        """Resultado del checkout de un carrito del lote"""
+        return {
+            "cart_id": cart_id,
+            "status": status,
+            "purchase": purchase,
+            "error_code": error.status.code if error else None,
+            "error": error.status.description if error else None
+        }
+
+    async def _compensate(self, saga: dict, error: str) -> bool:
+        """Devolver el stock de las líneas reservadas. Si alguna devolución falla el checkout queda
+        en 'compensating' para que el job de recuperación la reintente"""
+        lines = saga["lines"]
+        to_release = [line for line in lines if line["state"] == "reserved"]
+
+        if to_release and self.products_client:
+            try:
+                results = await self.products_client.release_stock(
+                    [(UUID(line["product_id"]), line["quantity"]) for line in to_release])
+            except Exception as e:
+                results = [e] * len(to_release)
+
+            for line, result in zip(to_release, results):
+                if result is True:
+                    line["state"] = "released"
+
+        pending_release = [line["product_sku"]
+                           for line in lines if line["state"] == "reserved"]
+        unknown = [line["product_sku"]
+                   for line in lines if line["state"] == "unknown"]
+
+        if unknown:
+            error = f"{error}; manual stock review required for: {', '.join(unknown)}"
+
+        status = "compensating" if pending_release else "failed"
+        try:
+            await self.checkout_saga_repository.update_saga(
+                saga["saga_id"], status=status, lines=lines, last_error=error)
+        except Exception as e:
+            logger.error(
+                f"No se pudo registrar la compensación del checkout {saga['saga_id']}: {str(e)}")
+            return False
+
+        saga["status"] = status
+        if pending_release:
+            logger.warning(
+                f"Checkout {saga['saga_id']}: stock pendiente de devolver para {', '.join(pending_release)}")
+        return not pending_release
+
+    async def _rebuild_purchase_data(self, saga: dict) -> Optional[Tuple[UUID, PurchaseCreate]]:
+        """Reconstruir la compra de un checkout reservado si el carrito sigue activo y con las mismas líneas.
+        Se usa el descuento de promociones guardado en la saga: las promociones pueden haber cambiado"""
+        cart = await self.cart_repository.get_cart_by_id(saga["cart_id"])
+        if not cart or not cart.can_be_purchased():
+            return None
+
+        cart_items = await self.cart_item_repository.get_cart_items_by_cart(saga["cart_id"])
+        reserved = {(line["product_id"], line["quantity"])
+                    for line in saga["lines"]}
+        if {(str(item.product_id), item.quantity) for item in cart_items} != reserved:
+            return None
+
+        discount_amount = saga["discount_amount"]
+        if saga["promotion_ids"] is None:
+            # Checkout iniciado antes de guardar el descuento en la saga
+            discount_amount, _ = await self._evaluate_promotions(cart_items, saga["discount_percentage"])
+
+        return self._build_purchase_data(
+            saga["cart_id"], cart.user_id, cart_items, saga["payment_method"],
+            saga["discount_percentage"], saga["tax_percentage"], discount_amount)
+
+    async def _flush_cart_store(self, cart_ids: List[UUID]) -> None:
+        """Escribir los cambios en memoria de los carritos y sacarlos del store antes de leer sus items"""
+        if self.cart_store and cart_ids:
+            await self.cart_store.flush(cart_ids, evict=True)
+
+    def _build_lines(self, cart_items: List[CartItem]) -> List[dict]:
+        """Líneas de la saga (JSONB) a partir de los items del carrito"""
+        return [
+            {
+                "product_id": str(item.product_id),
+                "product_sku": item.product_sku,
+                "quantity": item.quantity,
+                "state": "pending"
+            }
+            for item in cart_items
+        ]
+
+    async def _evaluate_promotions(self, cart_items: List[CartItem], discount_percentage: Optional[Decimal]
+                                   ) -> Tuple[Optional[Decimal], List[UUID]]:
+        """Descuento de las promociones vigentes y sus IDs; sin promociones si hay porcentaje de descuento explícito"""
+        if discount_percentage or not self.promotion_service:
+            return None, []
+
+        evaluation = await self.promotion_service.evaluate_items(cart_items)
+        return (evaluation.discount_amount or None,
+                list(dict.fromkeys(applied.promotion_id for applied in evaluation.applied)))
+
+    def _build_purchase_data(self, cart_id: UUID, user_id: str, cart_items: List[CartItem],
+                             payment_method: Optional[str], discount_percentage: Optional[Decimal],
+                             tax_percentage: Optional[Decimal],
+                             discount_amount: Optional[Decimal] = None) -> Tuple[UUID, PurchaseCreate]:
+        """Calcular montos finales (descuento e impuesto incluidos) con el motor de precios y el número de compra.
+        discount_amount es el descuento de promociones ya evaluado (ver _evaluate_promotions).
+        El ID se asigna aquí para que el número de compra lo incluya y no colisione en el mismo segundo."""
+        amounts = pricing_engine.price_lines(
+            (item.subtotal for item in cart_items),
+            discount_percentage=discount_percentage or None,
+            tax_percentage=tax_percentage or None,
+            discount_amount=discount_amount
+        )
+
+        purchase = Purchase(purchase_id=uuid4(), cart_id=cart_id, user_id=user_id,
+                            total_amount=amounts.total_amount, payment_method=payment_method)
+        purchase.generate_purchase_number()
+
+        return purchase.purchase_id, PurchaseCreate(
+            cart_id=cart_id,
+            user_id=user_id,
+            total_amount=amounts.total_amount,
+            tax_amount=amounts.tax_amount,
+            discount_amount=amounts.discount_amount,
+            payment_method=payment_method,
+            purchase_number=purchase.purchase_number
+        )
+
+    async def _validate_cart_for_checkout(self, cart_id: UUID):
+        """Validar que el carrito puede ser comprado"""
+        cart = await self.cart_repository.get_cart_by_id(cart_id)
+        return self._check_cart_for_checkout(cart_id, cart)
+
+    def _check_cart_for_checkout(self, cart_id: UUID, cart):
+        """Validar un carrito ya cargado (None si no existe)"""
+        if not cart:
+            raise CartNotFoundException(cart_id=str(cart_id))
+
+        if not cart.can_be_purchased():
+            if cart.status != "active":
+                raise InvalidCartStatusException(cart.status, "active")
+            if not cart.is_active:
+                raise CartInactiveException(str(cart_id))
+            if cart.is_empty():
+                raise CartIsEmptyException(str(cart_id))
+
+        return cart
+
+    def _validate_payment_method(self, payment_method: str) -> None:
+        """Validar método de pago"""
+        allowed_methods = ['cash', 'card', 'transfer']
+        if payment_method not in allowed_methods:
+            raise InvalidPaymentMethodException(payment_method)
+
+
+def get_checkout_service(purchase_repository: PurchaseRepository, cart_repository: CartRepository,
+                         cart_item_repository: CartItemRepository, checkout_saga_repository: CheckoutSagaRepository,
+                         products_client: Optional[ProductsClient] = None,
+                         promotion_service: Optional[PromotionService] = None,
+                         product_replica: Optional[ProductReplicaRepository] = None) -> CheckoutService:
+    """Factory function para obtener instancia del servicio"""
+    return CheckoutService(purchase_repository, cart_repository, cart_item_repository,
+                           checkout_saga_repository, products_client, promotion_service, product_replica)
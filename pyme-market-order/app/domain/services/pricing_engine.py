@@ -0,0 +1,115 @@
+import decimal
+from decimal import Decimal
+from typing import Iterable, List, NamedTuple, Optional, Union
+from uuid import UUID
+from app.core.pricing_config import pricing_settings
+from app.domain.exceptions.purchase_exception import InvalidAmountException, InvalidDiscountException
+
+Amount = Union[Decimal, int, str]
+
+HUNDRED = Decimal(100)
+
+
+class PriceBreakdown(NamedTuple):
+    """Montos de una compra ya redondeados: final = total - descuento + impuesto"""
+    total_amount: Decimal
+    discount_amount: Decimal
+    tax_amount: Decimal
+    final_amount: Decimal
+
+
+class RepricedPurchase(NamedTuple):
+    """Resultado del recálculo de una compra, con los montos que se leyeron para calcularlo"""
+    purchase_id: UUID
+    total_amount: Decimal
+    discount_amount: Decimal
+    tax_amount: Decimal
+    final_amount: Decimal
+
+
+class PricingEngine:
+    """Cálculo exacto de montos con Decimal: subtotal, descuento, impuesto y final en una pasada,
+    redondeando cada componente una sola vez al quantum configurado"""
+
+    def __init__(self, quantum: Amount = Decimal('0.01'), rounding: str = decimal.ROUND_HALF_UP):
+        if rounding not in (decimal.ROUND_HALF_UP, decimal.ROUND_HALF_EVEN, decimal.ROUND_HALF_DOWN,
+                            decimal.ROUND_UP, decimal.ROUND_DOWN, decimal.ROUND_CEILING,
+                            decimal.ROUND_FLOOR, decimal.ROUND_05UP):
+            raise ValueError(f"Unknown rounding mode: {rounding}")
+
+        self.quantum = Decimal(str(quantum))
+        self.rounding = rounding
+
+    def quantize(self, amount: Amount) -> Decimal:
+        """Redondear un monto al quantum configurado (float se convierte por su texto, no por su binario)"""
+        if isinstance(amount, float):
+            amount = str(amount)
+        return Decimal(amount).quantize(self.quantum, rounding=self.rounding)
+
+    def price(self, total_amount: Amount, discount_percentage: Optional[Amount] = None,
+              discount_amount: Optional[Amount] = None, tax_percentage: Optional[Amount] = None,
+              tax_amount: Optional[Amount] = None) -> PriceBreakdown:
+        """Calcular los montos de una compra. El descuento se da en porcentaje o monto fijo; el impuesto
+        en porcentaje (sobre total - descuento) o como monto ya calculado"""
+        total = self.quantize(total_amount)
+        if total <= 0:
+            raise InvalidAmountException("total amount", float(total))
+
+        if discount_percentage is not None:
+            discount_percentage = Decimal(str(discount_percentage))
+            if discount_percentage < 0 or discount_percentage > HUNDRED:
+                raise InvalidDiscountException(float(discount_percentage))
+            discount = self.quantize(total * discount_percentage / HUNDRED)
+        elif discount_amount is not None:
+            discount = self.quantize(discount_amount)
+            if discount < 0 or discount > total:
+                raise InvalidDiscountException(float(discount), float(total))
+        else:
+            discount = Decimal('0').quantize(self.quantum)
+
+        if tax_percentage is not None:
+            tax = self._tax(total, discount, Decimal(str(tax_percentage)))
+        elif tax_amount is not None:
+            tax = self.quantize(tax_amount)
+            if tax < 0:
+                raise InvalidAmountException("tax amount", float(tax))
+        else:
+            tax = Decimal('0').quantize(self.quantum)
+
+        return PriceBreakdown(total, discount, tax, total - discount + tax)
+
+    def price_lines(self, subtotals: Iterable[Amount], discount_percentage: Optional[Amount] = None,
+                    tax_percentage: Optional[Amount] = None,
+                    discount_amount: Optional[Amount] = None) -> PriceBreakdown:
+        """Calcular los montos de un carrito a partir de los subtotales de sus líneas"""
+        total = sum((Decimal(str(subtotal)) for subtotal in subtotals), Decimal('0'))
+        return self.price(total, discount_percentage=discount_percentage,
+                          discount_amount=discount_amount, tax_percentage=tax_percentage)
+
+    def reprice_tax(self, purchases: Iterable[dict], tax_percentage: Amount) -> List[RepricedPurchase]:
+        """Recalcular impuesto y monto final de muchas compras para una nueva tasa.
+        Cada compra es un dict con purchase_id, total_amount y discount_amount"""
+        tax_percentage = Decimal(str(tax_percentage))
+        if tax_percentage < 0:
+            raise InvalidAmountException("tax percentage", float(tax_percentage))
+
+        repriced = []
+        for purchase in purchases:
+            total = purchase["total_amount"]
+            discount = purchase["discount_amount"]
+            tax = self._tax(total, discount, tax_percentage)
+            repriced.append(RepricedPurchase(
+                purchase["purchase_id"], total, discount, tax, total - discount + tax))
+
+        return repriced
+
+    def _tax(self, total: Decimal, discount: Decimal, tax_percentage: Decimal) -> Decimal:
+        if tax_percentage < 0:
+            raise InvalidAmountException("tax percentage", float(tax_percentage))
+        return self.quantize((total - discount) * tax_percentage / HUNDRED)
+
+
+pricing_engine = PricingEngine(
+    quantum=pricing_settings.PRICING_QUANTUM,
+    rounding=pricing_settings.PRICING_ROUNDING
+)
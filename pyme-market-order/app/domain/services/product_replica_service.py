@@ -0,0 +1,126 @@
+from typing import Dict, List, Optional
+from uuid import UUID
+from datetime import datetime, timezone
+from app.core.products_service_config import products_service_settings
+from app.domain.entities.product import Product
+from app.schemas.product_schema import ProductChangeEvent
+from app.infrastructure.db.repositories.product_replica_repository import ProductReplicaRepository
+
+
+class ProductReplicaMetrics:
+    """Contadores en memoria (por proceso) de la sincronización de la réplica de productos"""
+
+    def __init__(self):
+        self.events_received = 0
+        self.events_applied = 0
+        self.events_ignored = 0
+        self.last_event_received_at: Optional[datetime] = None
+        self.last_event_lag_ms: Optional[float] = None
+        self.max_event_lag_ms: Optional[float] = None
+        self.reconciles = 0
+        self.last_reconcile_at: Optional[datetime] = None
+        self.last_reconcile_drifted: Optional[int] = None
+        self.last_reconcile_deactivated: Optional[int] = None
+
+    def record_events(self, received: int, applied: int, latest_occurred_at: datetime) -> None:
+        """Registrar un lote de eventos aplicado; el retraso es recepción menos el cambio más reciente"""
+        now = datetime.now(timezone.utc)
+        lag_ms = round(max((now - latest_occurred_at).total_seconds(), 0) * 1000, 2)
+
+        self.events_received += received
+        self.events_applied += applied
+        self.events_ignored += received - applied
+        self.last_event_received_at = now
+        self.last_event_lag_ms = lag_ms
+        self.max_event_lag_ms = max(self.max_event_lag_ms or 0, lag_ms)
+
+    def record_reconcile(self, drifted: int, deactivated: int) -> None:
+        """Registrar una reconciliación completa. drifted cuenta productos que faltaban o estaban
+        atrasados, es decir, cambios cuyos eventos no llegaron"""
+        self.reconciles += 1
+        self.last_reconcile_at = datetime.now(timezone.utc)
+        self.last_reconcile_drifted = drifted
+        self.last_reconcile_deactivated = deactivated
+
+    def get_metrics(self) -> dict:
+        return {
+            "events_received": self.events_received,
+            "events_applied": self.events_applied,
+            "events_ignored": self.events_ignored,
+            "last_event_received_at": self._isoformat(self.last_event_received_at),
+            "last_event_lag_ms": self.last_event_lag_ms,
+            "max_event_lag_ms": self.max_event_lag_ms,
+            "reconciles": self.reconciles,
+            "last_reconcile_at": self._isoformat(self.last_reconcile_at),
+            "last_reconcile_drifted": self.last_reconcile_drifted,
+            "last_reconcile_deactivated": self.last_reconcile_deactivated
+        }
+
+    def _isoformat(self, moment: Optional[datetime]) -> Optional[str]:
+        return moment.isoformat() if moment else None
+
+
+product_replica_metrics = ProductReplicaMetrics()
+
+
+class ProductReplicaService:
+    """Mantiene la réplica local de productos con los cambios publicados por el servicio de productos.
+    La reconciliación periódica completa (PRODUCTS_REPLICA_RECONCILE_INTERVAL_SECONDS) corrige los
+    eventos perdidos"""
+
+    def __init__(self, product_replica_repository: ProductReplicaRepository):
+        self.product_replica_repository = product_replica_repository
+
+    async def apply_events(self, events: List[ProductChangeEvent]) -> dict:
+        """Aplicar un lote de cambios en una transacción. Dentro del lote sólo cuenta la versión más
+        nueva de cada producto; contra la réplica, un cambio más viejo que el guardado se ignora"""
+        latest: Dict[UUID, ProductChangeEvent] = {}
+        for event in events:
+            current = latest.get(event.product_id)
+            if current is None or self._version(event) >= self._version(current):
+                latest[event.product_id] = event
+
+        products = [
+            Product.model_validate(event.product.model_dump())
+            for event in latest.values() if event.event_type != "product.deleted"
+        ]
+        deletions = [
+            (event.product_id, self._version(event))
+            for event in latest.values() if event.event_type == "product.deleted"
+        ]
+
+        applied = await self.product_replica_repository.apply_changes(products, deletions)
+        product_replica_metrics.record_events(
+            len(events), applied, max(event.occurred_at for event in events))
+
+        return {"received": len(events), "applied": applied, "ignored": len(events) - applied}
+
+    async def get_sync_metrics(self) -> dict:
+        """Métricas de retraso de la réplica: compartidas (base de datos) y de este proceso (eventos)"""
+        state = await self.product_replica_repository.get_sync_state()
+        now = state["now"]
+        oldest = state["oldest_synced_at"]
+        last = state["last_synced_at"]
+
+        staleness_seconds = round((now - oldest).total_seconds(), 3) if oldest else None
+        return {
+            "enabled": products_service_settings.PRODUCTS_REPLICA_ENABLED,
+            "products": state["products"],
+            "last_synced_at": last.isoformat() if last else None,
+            "seconds_since_last_sync": round((now - last).total_seconds(), 3) if last else None,
+            "oldest_synced_at": oldest.isoformat() if oldest else None,
+            "staleness_seconds": staleness_seconds,
+            "max_staleness_seconds": products_service_settings.PRODUCTS_REPLICA_MAX_STALENESS_SECONDS,
+            "stale": staleness_seconds is None or
+            staleness_seconds > products_service_settings.PRODUCTS_REPLICA_MAX_STALENESS_SECONDS,
+            **product_replica_metrics.get_metrics()
+        }
+
+    def _version(self, event: ProductChangeEvent) -> datetime:
+        """Versión del cambio: updated_at de la foto del producto o, en las bajas, el momento del evento"""
+        return event.product.updated_at if event.product else event.occurred_at
+
+
+def get_product_replica_service(product_replica_repository: ProductReplicaRepository) -> ProductReplicaService:
+    """Factory function para obtener instancia del servicio"""
+    return ProductReplicaService(product_replica_repository)
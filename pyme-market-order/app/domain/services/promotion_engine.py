@@ -0,0 +1,241 @@
+import bisect
+from decimal import Decimal
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+from app.domain.entities.promotion import Promotion
+from app.domain.services.pricing_engine import PricingEngine, pricing_engine
+
+HUNDRED = Decimal(100)
+ZERO = Decimal('0')
+
+# (precio unitario, cantidad, subtotal de la línea) -> descuento sin redondear
+LineEvaluator = Callable[[Decimal, int, Decimal], Decimal]
+
+
+class AppliedPromotion(NamedTuple):
+    promotion_id: UUID
+    name: str
+    product_sku: Optional[str]
+    discount_amount: Decimal
+
+
+class PromotionEvaluation(NamedTuple):
+    subtotal: Decimal
+    discount_amount: Decimal
+    applied: List[AppliedPromotion]
+    rule_set_version: str
+
+
+class _LineRules(NamedTuple):
+    exclusive: List[Tuple[LineEvaluator, Promotion]]
+    stackable: List[Tuple[LineEvaluator, Promotion]]
+
+
+class CompiledRuleSet:
+    """Promociones vigentes compiladas para evaluar carritos sin recorrer todas las reglas:
+    las de SKU quedan indexadas por SKU y las de carrito ordenadas por umbral, con el mejor
+    porcentaje y el mejor monto fijo acumulados, de modo que cada subtotal se resuelve con
+    una búsqueda binaria"""
+
+    def __init__(self, promotions: Iterable[Promotion], version: str, now: datetime,
+                 engine: PricingEngine = pricing_engine):
+        self.version = version
+        self.compiled_at = now
+        self.engine = engine
+        self.valid_until: Optional[datetime] = None
+        self.rule_count = 0
+
+        self._line_rules: Dict[str, _LineRules] = {}
+        exclusive_cart: List[Promotion] = []
+        stackable_cart: List[Promotion] = []
+
+        for promotion in promotions:
+            self._track_boundary(promotion, now)
+            if not promotion.is_current(now):
+                continue
+
+            self.rule_count += 1
+            if promotion.product_sku:
+                rules = self._line_rules.setdefault(
+                    promotion.product_sku, _LineRules([], []))
+                target = rules.stackable if promotion.stackable else rules.exclusive
+                target.append((self._compile_line_rule(promotion), promotion))
+            elif promotion.stackable:
+                stackable_cart.append(promotion)
+            else:
+                exclusive_cart.append(promotion)
+
+        # A igual descuento gana la de mayor prioridad (la primera encontrada)
+        for rules in self._line_rules.values():
+            rules.exclusive.sort(key=lambda rule: -rule[1].priority)
+            rules.stackable.sort(key=lambda rule: -rule[1].priority)
+
+        self._compile_exclusive_cart_rules(exclusive_cart)
+        self._compile_stackable_cart_rules(stackable_cart)
+
+    def is_expired(self, now: datetime) -> bool:
+        """El conjunto deja de ser válido cuando empieza o termina alguna promoción"""
+        return self.valid_until is not None and now >= self.valid_until
+
+    def evaluate(self, lines: Iterable) -> PromotionEvaluation:
+        """Evaluar las líneas de un carrito (objetos con product_sku, unit_price, quantity y subtotal).
+        Primero las promociones de SKU por línea y después las de carrito sobre el resto"""
+        quantize = self.engine.quantize
+        applied: List[AppliedPromotion] = []
+        subtotal = ZERO
+        line_discount = ZERO
+
+        for line in lines:
+            line_subtotal = Decimal(line.subtotal)
+            subtotal += line_subtotal
+
+            rules = self._line_rules.get(line.product_sku)
+            if rules is None:
+                continue
+
+            unit_price = Decimal(line.unit_price)
+            candidates = []
+
+            best_amount, best_promotion = ZERO, None
+            for evaluate, promotion in rules.exclusive:
+                amount = evaluate(unit_price, line.quantity, line_subtotal)
+                if amount > best_amount:
+                    best_amount, best_promotion = amount, promotion
+            if best_promotion is not None:
+                candidates.append((best_promotion, best_amount))
+
+            for evaluate, promotion in rules.stackable:
+                amount = evaluate(unit_price, line.quantity, line_subtotal)
+                if amount > 0:
+                    candidates.append((promotion, amount))
+
+            remaining = line_subtotal
+            for promotion, amount in candidates:
+                amount = min(quantize(amount), remaining)
+                if amount <= 0:
+                    continue
+                remaining -= amount
+                applied.append(AppliedPromotion(
+                    promotion.promotion_id, promotion.name, promotion.product_sku, amount))
+            line_discount += line_subtotal - remaining
+
+        cart_discount = self._evaluate_cart_rules(
+            subtotal, subtotal - line_discount, applied)
+
+        return PromotionEvaluation(
+            subtotal, line_discount + cart_discount, applied, self.version)
+
+    def _evaluate_cart_rules(self, subtotal: Decimal, remaining: Decimal,
+                             applied: List[AppliedPromotion]) -> Decimal:
+        """Aplicar las promociones de carrito cuyo umbral alcanza el subtotal, sobre lo que quedó
+        tras los descuentos por línea"""
+        quantize = self.engine.quantize
+        candidates = []
+
+        index = bisect.bisect_right(self._exclusive_thresholds, subtotal)
+        if index:
+            rate, rate_promotion = self._best_rate[index - 1]
+            fixed, fixed_promotion = self._best_fixed[index - 1]
+            rate_amount = remaining * rate
+            fixed_amount = min(fixed, remaining)
+            if rate_promotion is not None and (fixed_promotion is None or rate_amount >= fixed_amount):
+                candidates.append((rate_promotion, rate_amount))
+            elif fixed_promotion is not None:
+                candidates.append((fixed_promotion, fixed_amount))
+
+        index = bisect.bisect_right(self._stackable_thresholds, subtotal)
+        for rate, fixed, promotion in self._stackable_cart[:index]:
+            candidates.append(
+                (promotion, remaining * rate if rate is not None else fixed))
+
+        discount = ZERO
+        for promotion, amount in candidates:
+            amount = min(quantize(amount), remaining - discount)
+            if amount <= 0:
+                continue
+            discount += amount
+            applied.append(AppliedPromotion(
+                promotion.promotion_id, promotion.name, None, amount))
+
+        return discount
+
+    def _compile_exclusive_cart_rules(self, promotions: List[Promotion]) -> None:
+        """Ordenar por umbral y precalcular el mejor porcentaje y el mejor monto fijo
+        entre todas las reglas con umbral menor o igual"""
+        promotions.sort(key=lambda promotion: (
+            promotion.min_subtotal or ZERO, -promotion.priority))
+        self._exclusive_thresholds = [
+            promotion.min_subtotal or ZERO for promotion in promotions]
+        self._best_rate: List[Tuple[Decimal, Optional[Promotion]]] = []
+        self._best_fixed: List[Tuple[Decimal, Optional[Promotion]]] = []
+
+        best_rate, best_fixed = (ZERO, None), (ZERO, None)
+        for promotion in promotions:
+            if promotion.rule_type == "percentage_off":
+                rate = promotion.value / HUNDRED
+                if best_rate[1] is None or rate > best_rate[0]:
+                    best_rate = (rate, promotion)
+            elif promotion.rule_type == "fixed_off":
+                if best_fixed[1] is None or promotion.value > best_fixed[0]:
+                    best_fixed = (promotion.value, promotion)
+            self._best_rate.append(best_rate)
+            self._best_fixed.append(best_fixed)
+
+    def _compile_stackable_cart_rules(self, promotions: List[Promotion]) -> None:
+        promotions = [promotion for promotion in promotions
+                      if promotion.rule_type in ("percentage_off", "fixed_off")]
+        promotions.sort(key=lambda promotion: (
+            promotion.min_subtotal or ZERO, -promotion.priority))
+        self._stackable_thresholds = [
+            promotion.min_subtotal or ZERO for promotion in promotions]
+        self._stackable_cart = [
+            (promotion.value / HUNDRED if promotion.rule_type == "percentage_off" else None,
+             promotion.value if promotion.rule_type == "fixed_off" else None,
+             promotion)
+            for promotion in promotions
+        ]
+
+    def _compile_line_rule(self, promotion: Promotion) -> LineEvaluator:
+        """Compilar una regla de SKU en una función con sus constantes ya resueltas"""
+        min_quantity = promotion.min_quantity or 0
+        min_subtotal = promotion.min_subtotal or ZERO
+
+        if promotion.rule_type == "percentage_off":
+            rate = promotion.value / HUNDRED
+
+            def evaluate(unit_price: Decimal, quantity: int, subtotal: Decimal) -> Decimal:
+                if quantity < min_quantity or subtotal < min_subtotal:
+                    return ZERO
+                return subtotal * rate
+
+        elif promotion.rule_type == "fixed_off":
+            amount = promotion.value
+
+            def evaluate(unit_price: Decimal, quantity: int, subtotal: Decimal) -> Decimal:
+                if quantity < min_quantity or subtotal < min_subtotal:
+                    return ZERO
+                return min(amount, subtotal)
+
+        else:
+            group_size = promotion.buy_quantity + promotion.get_quantity
+            free_per_group = promotion.get_quantity
+
+            def evaluate(unit_price: Decimal, quantity: int, subtotal: Decimal) -> Decimal:
+                if quantity < min_quantity or subtotal < min_subtotal:
+                    return ZERO
+                return unit_price * (quantity // group_size * free_per_group)
+
+        return evaluate
+
+    def _track_boundary(self, promotion: Promotion, now: datetime) -> None:
+        """Registrar el próximo inicio o fin de vigencia para recompilar en ese momento"""
+        for boundary in (promotion.starts_at, promotion.ends_at):
+            if boundary is not None and boundary > now and \
+                    (self.valid_until is None or boundary < self.valid_until):
+                self.valid_until = boundary
+
+
+def compile_rule_set(promotions: Iterable[Promotion], version: str, now: datetime) -> CompiledRuleSet:
+    """Compilar las promociones vigentes en now"""
+    return CompiledRuleSet(promotions, version, now)
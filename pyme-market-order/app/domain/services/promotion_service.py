@@ -0,0 +1,138 @@
+from typing import Iterable, List, Optional
+from uuid import UUID
+from datetime import datetime, timezone
+from app.domain.entities.promotion import Promotion
+from app.schemas.promotion_schema import PromotionCreate, PromotionUpdate
+from app.infrastructure.db.repositories.promotion_repository import PromotionRepository
+from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.infrastructure.cache.promotion_rules_cache import promotion_rules_cache
+from app.domain.services.promotion_engine import CompiledRuleSet, PromotionEvaluation, compile_rule_set
+from app.domain.exceptions.not_found_exception import NotFoundException
+from app.domain.exceptions.promotion_exception import (
+    PromotionNotFoundException,
+    InvalidPromotionException
+)
+
+
+class PromotionService:
+    def __init__(self, promotion_repository: PromotionRepository,
+                 cart_item_repository: Optional[CartItemRepository] = None):
+        self.promotion_repository = promotion_repository
+        self.cart_item_repository = cart_item_repository
+
+    async def create_promotion(self, promotion_data: PromotionCreate) -> Promotion:
+        """Crear una promoción validando los campos que exige su tipo de regla"""
+        self._validate_promotion(promotion_data)
+
+        promotion = await self.promotion_repository.create_promotion(promotion_data)
+        promotion_rules_cache.invalidate()
+
+        return promotion
+
+    async def get_promotion_by_id(self, promotion_id: UUID) -> Promotion:
+        """Obtener promoción por ID"""
+        promotion = await self.promotion_repository.get_promotion_by_id(promotion_id)
+        if not promotion:
+            raise PromotionNotFoundException(str(promotion_id))
+        return promotion
+
+    async def get_promotions(self, active_only: bool = False) -> List[Promotion]:
+        """Obtener todas las promociones"""
+        return await self.promotion_repository.get_promotions(active_only)
+
+    async def update_promotion(self, promotion_id: UUID, promotion_data: PromotionUpdate) -> Promotion:
+        """Reemplazar una promoción"""
+        self._validate_promotion(promotion_data)
+
+        try:
+            promotion = await self.promotion_repository.update_promotion(promotion_id, promotion_data)
+        except NotFoundException:
+            raise PromotionNotFoundException(str(promotion_id))
+
+        promotion_rules_cache.invalidate()
+        return promotion
+
+    async def delete_promotion(self, promotion_id: UUID) -> bool:
+        """Eliminar una promoción"""
+        deleted = await self.promotion_repository.delete_promotion(promotion_id)
+        if not deleted:
+            raise PromotionNotFoundException(str(promotion_id))
+
+        promotion_rules_cache.invalidate()
+        return deleted
+
+    async def get_rule_set(self) -> CompiledRuleSet:
+        """Obtener el conjunto de reglas compilado. Se reutiliza mientras su versión no cambie en la
+        base de datos y no empiece ni termine ninguna promoción; si no, se recompila una sola vez"""
+        now = datetime.now(timezone.utc)
+        rule_set = promotion_rules_cache.get_fresh()
+        if rule_set is not None and not rule_set.is_expired(now):
+            return rule_set
+
+        async with promotion_rules_cache.lock:
+            # Otra corrutina pudo recargarlo mientras se esperaba el lock
+            rule_set = promotion_rules_cache.get_fresh()
+            if rule_set is not None and not rule_set.is_expired(now):
+                return rule_set
+
+            version = await self.promotion_repository.get_rule_set_version()
+            rule_set = promotion_rules_cache.rule_set
+            if rule_set is not None and rule_set.version == version and not rule_set.is_expired(now):
+                promotion_rules_cache.mark_checked()
+                return rule_set
+
+            promotions = await self.promotion_repository.get_rule_set_promotions(now)
+            rule_set = compile_rule_set(promotions, version, now)
+            promotion_rules_cache.set(rule_set)
+
+            return rule_set
+
+    async def evaluate_items(self, cart_items: Iterable) -> PromotionEvaluation:
+        """Evaluar las promociones vigentes sobre las líneas de un carrito"""
+        rule_set = await self.get_rule_set()
+        return rule_set.evaluate(cart_items)
+
+    async def evaluate_cart(self, cart_id: UUID) -> PromotionEvaluation:
+        """Evaluar las promociones vigentes sobre el contenido actual de un carrito"""
+        cart_items = await self.cart_item_repository.get_cart_items_by_cart(cart_id)
+        return await self.evaluate_items(cart_items)
+
+    def _validate_promotion(self, promotion_data: PromotionCreate) -> None:
+        """Validar los campos requeridos por cada tipo de regla y la vigencia"""
+        if promotion_data.rule_type == "percentage_off":
+            if promotion_data.value is None or promotion_data.value > 100:
+                raise InvalidPromotionException(
+                    "percentage_off requires a value between 0 and 100")
+
+        elif promotion_data.rule_type == "fixed_off":
+            if promotion_data.value is None:
+                raise InvalidPromotionException("fixed_off requires a value")
+
+        elif promotion_data.rule_type == "buy_x_get_y":
+            if not promotion_data.product_sku:
+                raise InvalidPromotionException(
+                    "buy_x_get_y requires a product SKU")
+            if promotion_data.buy_quantity is None or promotion_data.get_quantity is None:
+                raise InvalidPromotionException(
+                    "buy_x_get_y requires buy quantity and get quantity")
+
+        if promotion_data.min_quantity is not None and not promotion_data.product_sku:
+            raise InvalidPromotionException(
+                "minimum quantity only applies to SKU promotions")
+
+        starts_at = self._as_utc(promotion_data.starts_at)
+        ends_at = self._as_utc(promotion_data.ends_at)
+        if starts_at and ends_at and ends_at <= starts_at:
+            raise InvalidPromotionException("end date must be after start date")
+
+    def _as_utc(self, value: Optional[datetime]) -> Optional[datetime]:
+        """Las fechas sin zona horaria se interpretan en UTC"""
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+
+def get_promotion_service(promotion_repository: PromotionRepository,
+                          cart_item_repository: Optional[CartItemRepository] = None) -> PromotionService:
+    """Factory function para obtener instancia del servicio"""
+    return PromotionService(promotion_repository, cart_item_repository)
@@ -1,11 +1,24 @@
-from typing import List, Optional
+import base64
+import binascii
+import csv
+import io
+import json
+from typing import Dict, List, Optional, Tuple, AsyncIterator
 from uuid import UUID
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from app.domain.entities.purchase import Purchase
+from app.domain.entities.cart_item import CartItem
+from app.domain.entities.product import Product
 from app.schemas.purchase_schema import PurchaseCreate
 from app.infrastructure.db.repositories.purchase_repository import PurchaseRepository
 from app.infrastructure.db.repositories.cart_repository import CartRepository
 from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.infrastructure.clients.products_client import ProductsClient
+from app.infrastructure.db.repositories.product_replica_repository import ProductReplicaRepository
+from app.infrastructure.cache.cart_store import get_cart_store
+from app.domain.services.pricing_engine import pricing_engine, PriceBreakdown
+from app.core.pricing_config import pricing_settings
 from app.domain.exceptions.purchase_exception import (
     PurchaseNotFoundException,
     PurchaseAlreadyExistsException,
@@ -13,7 +26,10 @@ from app.domain.exceptions.purchase_exception import (
     InvalidDiscountException,
     InvalidPaymentMethodException,
     PurchaseProcessingException,
-    InsufficientStockException
+    InsufficientStockException,
+    InvalidHistoryCursorException,
+    InvalidExportRangeException,
+    InvalidRepriceRequestException
 )
 from app.domain.exceptions.cart_exception import (
     CartNotFoundException,
@@ -21,17 +37,39 @@ from app.domain.exceptions.cart_exception import (
     CartInactiveException,
     InvalidCartStatusException
 )
+from app.domain.exceptions.product_exception import (
+    ProductNotFoundException,
+    ProductInactiveException,
+    ProductChangedException
+)
+
+EXPORT_MAX_RANGE_DAYS = 366
+EXPORT_FLUSH_ROWS = 500
+EXPORT_PURCHASE_FIELDS = [
+    "purchase_id", "purchase_number", "purchased_at", "user_id", "status", "payment_method",
+    "total_amount", "discount_amount", "tax_amount", "final_amount",
+    "receipt_id", "receipt_generated_at"
+]
+EXPORT_ITEM_FIELDS = [
+    "product_id", "product_sku", "product_name", "unit_price", "quantity", "subtotal"
+]
 
 
 class PurchaseService:
     def __init__(self, purchase_repository: PurchaseRepository, cart_repository: CartRepository,
-                 cart_item_repository: CartItemRepository):
+                 cart_item_repository: CartItemRepository, products_client: Optional[ProductsClient] = None,
+                 product_replica: Optional[ProductReplicaRepository] = None):
         self.purchase_repository = purchase_repository
         self.cart_repository = cart_repository
         self.cart_item_repository = cart_item_repository
+        self.products_client = products_client
+        self.product_catalog = product_replica or products_client
+        self.cart_store = get_cart_store()
 
     async def create_purchase(self, purchase_data: PurchaseCreate) -> Purchase:
         """Crear una nueva compra con validaciones de negocio"""
+        await self._flush_cart_store(purchase_data.cart_id)
+
         cart = await self._validate_cart_for_purchase(purchase_data.cart_id)
 
         if await self.purchase_repository.purchase_exists_for_cart(purchase_data.cart_id):
@@ -39,6 +77,8 @@ class PurchaseService:
 
         self._validate_financial_data(purchase_data)
 
+        await self._validate_cart_stock(purchase_data.cart_id)
+
         from app.domain.entities.purchase import Purchase as PurchaseEntity
         temp_purchase = PurchaseEntity(
             purchase_id=None,
@@ -77,22 +117,19 @@ class PurchaseService:
         """Procesar compra completa de un carrito"""
         existing_purchase = await self.purchase_repository.get_purchase_by_cart_id(cart_id)
         if existing_purchase:
-            if discount_percentage:
-                existing_purchase.apply_discount(discount_percentage)
-
-            if tax_percentage:
-                existing_purchase.apply_tax(tax_percentage)
-
-            if discount_percentage or tax_percentage:
-                await self.purchase_repository.update_purchase_amounts(
-                    existing_purchase.purchase_id,
-                    float(existing_purchase.total_amount),
-                    float(existing_purchase.tax_amount),
-                    float(existing_purchase.discount_amount),
-                    float(existing_purchase.final_amount)
-                )
+            if not discount_percentage and not tax_percentage:
+                return existing_purchase
+
+            amounts = pricing_engine.price(
+                existing_purchase.total_amount,
+                discount_percentage=discount_percentage or None,
+                discount_amount=None if discount_percentage else existing_purchase.discount_amount,
+                tax_percentage=tax_percentage or None,
+                tax_amount=None if tax_percentage else existing_purchase.tax_amount
+            )
+            return await self._update_amounts(existing_purchase.purchase_id, amounts)
 
-            return existing_purchase
+        await self._flush_cart_store(cart_id)
 
         cart = await self._validate_cart_for_purchase(cart_id)
 
@@ -100,35 +137,47 @@ class PurchaseService:
         if not cart_items:
             raise CartIsEmptyException(str(cart_id))
 
-        total_amount = sum(float(item.subtotal) for item in cart_items)
+        # Descuento e impuesto se calculan antes de crear la compra: una sola escritura
+        amounts = pricing_engine.price_lines(
+            (item.subtotal for item in cart_items),
+            discount_percentage=discount_percentage or None,
+            tax_percentage=tax_percentage or None
+        )
 
         purchase_data = PurchaseCreate(
             cart_id=cart_id,
             user_id=cart.user_id,
-            total_amount=Decimal(str(total_amount)),
-            tax_amount=Decimal('0.00'),
-            discount_amount=Decimal('0.00'),
+            total_amount=amounts.total_amount,
+            tax_amount=amounts.tax_amount,
+            discount_amount=amounts.discount_amount,
             payment_method=payment_method
         )
 
-        purchase = await self.create_purchase(purchase_data)
+        return await self.create_purchase(purchase_data)
 
-        if discount_percentage:
-            purchase.apply_discount(discount_percentage)
+    async def reprice_purchases_tax(self, purchase_ids: List[UUID], tax_percentage: Decimal) -> dict:
+        """Recalcular el impuesto de muchas compras para una nueva tasa (una lectura y un UPDATE masivo)"""
+        purchase_ids = list(dict.fromkeys(purchase_ids))
+        if not purchase_ids or len(purchase_ids) > pricing_settings.PRICING_REPRICE_MAX_PURCHASES:
+            raise InvalidRepriceRequestException(
+                f"between 1 and {pricing_settings.PRICING_REPRICE_MAX_PURCHASES} purchases are required")
 
-        if tax_percentage:
-            purchase.apply_tax(tax_percentage)
+        purchases = await self.purchase_repository.get_purchase_amounts(purchase_ids)
+        repriced = pricing_engine.reprice_tax(purchases, tax_percentage)
+        updated = await self.purchase_repository.bulk_update_tax_amounts(repriced)
 
-        if discount_percentage or tax_percentage:
-            await self.purchase_repository.update_purchase_amounts(
-                purchase.purchase_id,
-                float(purchase.total_amount),
-                float(purchase.tax_amount),
-                float(purchase.discount_amount),
-                float(purchase.final_amount)
-            )
+        found = {purchase["purchase_id"] for purchase in purchases}
+        updated_ids = set(updated)
 
-        return purchase
+        return {
+            "tax_percentage": tax_percentage,
+            "requested": len(purchase_ids),
+            "repriced": len(updated),
+            "not_found": [purchase_id for purchase_id in purchase_ids if purchase_id not in found],
+            # Compras cuyo total o descuento cambió entre la lectura y el UPDATE
+            "conflicts": [purchase_id for purchase_id in purchase_ids
+                          if purchase_id in found and purchase_id not in updated_ids]
+        }
 
     async def get_purchase_by_id(self, purchase_id: UUID) -> Purchase:
         """Obtener compra por ID"""
@@ -155,39 +204,141 @@ class PurchaseService:
         """Obtener todas las compras de un usuario"""
         return await self.purchase_repository.get_purchases_by_user(user_id)
 
+    async def get_user_order_stats(self, user_id: str) -> dict:
+        """Obtener pedidos realizados, total gastado y última compra de un usuario (ceros si nunca compró)"""
+        stats = await self.purchase_repository.get_user_order_stats(user_id)
+        if stats is None:
+            return {"user_id": user_id, "orders_count": 0, "total_spent": Decimal("0.00")}
+        return stats
+
+    async def get_purchase_history(self, user_id: str, limit: int = 20,
+                                   cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Obtener una página del historial de compras de un usuario (paginación por cursor)"""
+        after_purchased_at, after_purchase_id = self._decode_history_cursor(
+            cursor) if cursor else (None, None)
+
+        rows = await self.purchase_repository.get_purchase_history_by_user(
+            user_id, limit + 1, after_purchased_at, after_purchase_id
+        )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_purchase = rows[-1]["purchase"]
+            next_cursor = self._encode_history_cursor(
+                last_purchase.purchased_at, last_purchase.purchase_id)
+
+        return rows, next_cursor
+
+    def validate_export_range(self, date_from: datetime, date_to: datetime) -> Tuple[datetime, datetime]:
+        """Validar el rango de exportación; fechas sin zona horaria se interpretan en UTC"""
+        if date_from.tzinfo is None:
+            date_from = date_from.replace(tzinfo=timezone.utc)
+        if date_to.tzinfo is None:
+            date_to = date_to.replace(tzinfo=timezone.utc)
+
+        if date_to <= date_from:
+            raise InvalidExportRangeException("'to' must be after 'from'")
+
+        if date_to - date_from > timedelta(days=EXPORT_MAX_RANGE_DAYS):
+            raise InvalidExportRangeException(
+                f"range cannot exceed {EXPORT_MAX_RANGE_DAYS} days")
+
+        return date_from, date_to
+
+    async def export_purchases(self, date_from: datetime, date_to: datetime,
+                               export_format: str = "csv") -> AsyncIterator[str]:
+        """Exportar compras con sus items y recibo como CSV (una fila por item) o NDJSON (una línea por compra)"""
+        rows = self.purchase_repository.stream_purchase_export_rows(
+            date_from, date_to)
+
+        if export_format == "ndjson":
+            async for chunk in self._export_ndjson(rows):
+                yield chunk
+        else:
+            async for chunk in self._export_csv(rows):
+                yield chunk
+
+    async def _export_csv(self, rows: AsyncIterator[dict]) -> AsyncIterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_PURCHASE_FIELDS + EXPORT_ITEM_FIELDS)
+        pending = 0
+
+        async for row in rows:
+            writer.writerow([self._export_value(row[field])
+                            for field in EXPORT_PURCHASE_FIELDS + EXPORT_ITEM_FIELDS])
+            pending += 1
+            if pending >= EXPORT_FLUSH_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
+
+        yield buffer.getvalue()
+
+    async def _export_ndjson(self, rows: AsyncIterator[dict]) -> AsyncIterator[str]:
+        lines = []
+        current = None
+
+        async for row in rows:
+            if current is None or current["purchase_id"] != self._export_value(row["purchase_id"]):
+                if current is not None:
+                    lines.append(json.dumps(current))
+                current = {field: self._export_value(row[field])
+                           for field in EXPORT_PURCHASE_FIELDS}
+                current["items"] = []
+
+            if row["product_id"] is not None:
+                current["items"].append({field: self._export_value(row[field])
+                                         for field in EXPORT_ITEM_FIELDS})
+
+            if len(lines) >= EXPORT_FLUSH_ROWS:
+                yield "\n".join(lines) + "\n"
+                lines = []
+
+        if current is not None:
+            lines.append(json.dumps(current))
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    def _export_value(self, value):
+        """Normalizar valores para exportación (montos como texto para no perder precisión)"""
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, (UUID, Decimal)):
+            return str(value)
+        return value
+
     async def apply_discount_to_purchase(self, purchase_id: UUID, discount_amount: Decimal = None,
                                          discount_percentage: Decimal = None) -> Purchase:
         """Aplicar descuento a una compra"""
         purchase = await self.get_purchase_by_id(purchase_id)
 
-        if discount_amount is not None:
-            purchase.apply_fixed_discount(discount_amount)
-        elif discount_percentage is not None:
-            purchase.apply_discount(discount_percentage)
-        else:
+        if discount_amount is None and discount_percentage is None:
             raise InvalidDiscountException(
                 0, "No discount amount or percentage provided")
 
-        return await self.purchase_repository.update_purchase_amounts(
-            purchase_id,
-            float(purchase.total_amount),
-            float(purchase.tax_amount),
-            float(purchase.discount_amount),
-            float(purchase.final_amount)
+        amounts = pricing_engine.price(
+            purchase.total_amount,
+            discount_percentage=discount_percentage,
+            discount_amount=discount_amount,
+            tax_amount=purchase.tax_amount
         )
+        return await self._update_amounts(purchase_id, amounts)
 
     async def apply_tax_to_purchase(self, purchase_id: UUID, tax_percentage: Decimal) -> Purchase:
         """Aplicar impuesto a una compra"""
         purchase = await self.get_purchase_by_id(purchase_id)
-        purchase.apply_tax(tax_percentage)
 
-        return await self.purchase_repository.update_purchase_amounts(
-            purchase_id,
-            float(purchase.total_amount),
-            float(purchase.tax_amount),
-            float(purchase.discount_amount),
-            float(purchase.final_amount)
+        amounts = pricing_engine.price(
+            purchase.total_amount,
+            discount_amount=purchase.discount_amount,
+            tax_percentage=tax_percentage
         )
+        return await self._update_amounts(purchase_id, amounts)
 
     async def update_payment_method(self, purchase_id: UUID, payment_method: str) -> Purchase:
         """Actualizar método de pago"""
@@ -201,7 +352,12 @@ class PurchaseService:
         """Obtener resumen completo de la compra"""
         purchase = await self.get_purchase_by_id(purchase_id)
 
-        cart_items = await self.cart_item_repository.get_cart_items_by_cart(purchase.cart_id)
+        items_count, total_quantity = purchase.items_count, purchase.total_quantity
+        if items_count is None:
+            # Compra anterior al backfill de conteos
+            cart_items = await self.cart_item_repository.get_cart_items_by_cart(purchase.cart_id)
+            items_count = len(cart_items)
+            total_quantity = sum(item.quantity for item in cart_items)
 
         return {
             "purchase_id": str(purchase.purchase_id),
@@ -215,10 +371,25 @@ class PurchaseService:
             "payment_method": purchase.payment_method,
             "status": purchase.status,
             "purchased_at": purchase.purchased_at.isoformat() if purchase.purchased_at else None,
-            "items_count": len(cart_items),
-            "total_items": sum(item.quantity for item in cart_items)
+            "items_count": items_count,
+            "total_items": total_quantity
         }
 
+    async def _update_amounts(self, purchase_id: UUID, amounts: PriceBreakdown) -> Purchase:
+        """Guardar los montos calculados por el motor de precios"""
+        return await self.purchase_repository.update_purchase_amounts(
+            purchase_id,
+            amounts.total_amount,
+            amounts.tax_amount,
+            amounts.discount_amount,
+            amounts.final_amount
+        )
+
+    async def _flush_cart_store(self, cart_id: UUID) -> None:
+        """Escribir los cambios en memoria del carrito y sacarlo del store antes de leer sus items"""
+        if self.cart_store:
+            await self.cart_store.flush([cart_id], evict=True)
+
     async def _validate_cart_for_purchase(self, cart_id: UUID):
         """Validar que el carrito puede ser comprado"""
         cart = await self.cart_repository.get_cart_by_id(cart_id)
@@ -235,6 +406,53 @@ class PurchaseService:
 
         return cart
 
+    async def _validate_cart_stock(self, cart_id: UUID) -> None:
+        """Validar que los productos del carrito existen y están activos (catálogo, que puede ser la
+        réplica) y su stock con una consulta en lote al servicio de productos"""
+        if not self.product_catalog:
+            return
+
+        cart_items = await self.cart_item_repository.get_cart_items_by_cart(cart_id)
+        product_ids = [item.product_id for item in cart_items]
+        products = await self.product_catalog.get_products(product_ids)
+
+        for item in cart_items:
+            product = products.get(item.product_id)
+            if not product:
+                raise ProductNotFoundException(str(item.product_id))
+            if not product.is_active:
+                raise ProductInactiveException(str(item.product_id))
+
+        if not self.products_client:
+            return
+
+        # El stock de la réplica puede estar atrasado: se consulta siempre al servicio
+        if self.product_catalog is not self.products_client:
+            products = await self.products_client.get_products(product_ids)
+
+        for item in cart_items:
+            product = products.get(item.product_id)
+            if not product:
+                raise ProductNotFoundException(str(item.product_id))
+            if item.quantity > product.stock_quantity:
+                raise InsufficientStockException(
+                    product.sku, product.stock_quantity, item.quantity)
+
+    def validate_items_against_catalog(self, cart_items: List[CartItem],
+                                       products: Dict[UUID, Optional[Product]]) -> None:
+        """Validar que los productos del carrito siguen existiendo, activos y con el nombre y precio
+        con que se agregaron (products viene de una consulta en lote al catálogo)"""
+        for item in cart_items:
+            product = products.get(item.product_id)
+            if not product:
+                raise ProductNotFoundException(str(item.product_id))
+            if not product.is_active:
+                raise ProductInactiveException(str(item.product_id))
+            if product.price != item.unit_price:
+                raise ProductChangedException(str(item.product_id), "price")
+            if product.name != item.product_name:
+                raise ProductChangedException(str(item.product_id), "name")
+
     def _validate_financial_data(self, purchase_data: PurchaseCreate) -> None:
         """Validar datos financieros"""
         if purchase_data.total_amount <= 0:
@@ -258,6 +476,20 @@ class PurchaseService:
         if purchase_data.payment_method:
             self._validate_payment_method(purchase_data.payment_method)
 
+    def _encode_history_cursor(self, purchased_at: datetime, purchase_id: UUID) -> str:
+        """Codificar la posición (purchased_at, purchase_id) como cursor opaco"""
+        raw = f"{purchased_at.isoformat()}|{purchase_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def _decode_history_cursor(self, cursor: str) -> Tuple[datetime, UUID]:
+        """Decodificar un cursor del historial de compras"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            purchased_at, purchase_id = raw.split("|", 1)
+            return datetime.fromisoformat(purchased_at), UUID(purchase_id)
+        except (ValueError, binascii.Error, UnicodeDecodeError) as e:
+            raise InvalidHistoryCursorException(cursor) from e
+
     def _validate_payment_method(self, payment_method: str) -> None:
         """Validar método de pago"""
         allowed_methods = ['cash', 'card', 'transfer']
@@ -266,6 +498,9 @@ class PurchaseService:
 
 
 def get_purchase_service(purchase_repository: PurchaseRepository, cart_repository: CartRepository,
-                         cart_item_repository: CartItemRepository) -> PurchaseService:
+                         cart_item_repository: CartItemRepository,
+                         products_client: Optional[ProductsClient] = None,
+                         product_replica: Optional[ProductReplicaRepository] = None) -> PurchaseService:
     """Factory function para obtener instancia del servicio"""
-    return PurchaseService(purchase_repository, cart_repository, cart_item_repository)
+    return PurchaseService(purchase_repository, cart_repository, cart_item_repository, products_client,
+                           product_replica)
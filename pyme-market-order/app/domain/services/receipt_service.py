@@ -1,43 +1,46 @@
-from typing import Optional
+import base64
+import binascii
+from typing import List, Optional, Tuple
 from uuid import UUID
+from datetime import datetime, timezone
 from app.domain.entities.receipt import Receipt
 from app.infrastructure.db.repositories.receipt_repository import ReceiptRepository
 from app.infrastructure.db.repositories.purchase_repository import PurchaseRepository
 from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.infrastructure.db.repositories.receipt_job_repository import ReceiptJobRepository
+from app.infrastructure.cache.receipt_render_cache import receipt_render_cache
 from app.domain.exceptions.receipt_exception import (
     ReceiptNotFoundException,
     ReceiptAlreadyExistsException,
     ReceiptGenerationException,
-    InvalidReceiptDataException
+    InvalidReceiptDataException,
+    ReceiptPendingException,
+    InvalidReceiptSearchException
 )
 from app.domain.exceptions.purchase_exception import PurchaseNotFoundException
+from app.domain.exceptions.not_found_exception import NotFoundException
 
 
 class ReceiptService:
     def __init__(self, receipt_repository: ReceiptRepository, purchase_repository: PurchaseRepository,
-                 cart_item_repository: CartItemRepository):
+                 cart_item_repository: CartItemRepository,
+                 receipt_job_repository: Optional[ReceiptJobRepository] = None):
         self.receipt_repository = receipt_repository
         self.purchase_repository = purchase_repository
         self.cart_item_repository = cart_item_repository
+        self.receipt_job_repository = receipt_job_repository
 
     async def generate_receipt(self, purchase_id: UUID) -> Receipt:
-        """Generar recibo para una compra"""
+        """Generar recibo para una compra (una sola sentencia en el repositorio)"""
         try:
-            purchase = await self.purchase_repository.get_purchase_by_id(purchase_id)
-            if not purchase:
-                raise PurchaseNotFoundException(purchase_id=str(purchase_id))
-
-            if await self.receipt_repository.receipt_exists_for_purchase(purchase_id):
+            receipt = await self.receipt_repository.generate_receipt(purchase_id)
+            if not receipt:
                 raise ReceiptAlreadyExistsException(str(purchase_id))
+            return receipt
 
-            cart_items = await self.cart_item_repository.get_cart_items_by_cart(purchase.cart_id)
-
-            receipt = Receipt(purchase_id=purchase_id)
-            receipt.generate_receipt_data(purchase, cart_items)
-
-            return await self.receipt_repository.create_receipt(purchase_id, receipt.receipt_data)
-
-        except (PurchaseNotFoundException, ReceiptAlreadyExistsException):
+        except NotFoundException:
+            raise PurchaseNotFoundException(purchase_id=str(purchase_id))
+        except ReceiptAlreadyExistsException:
             raise
         except Exception as e:
             raise ReceiptGenerationException(str(purchase_id), str(e)) from e
@@ -53,35 +56,29 @@ class ReceiptService:
         """Obtener recibo por ID de compra"""
         receipt = await self.receipt_repository.get_receipt_by_purchase_id(purchase_id)
         if not receipt:
+            await self._raise_if_receipt_pending(purchase_id)
             raise ReceiptNotFoundException(purchase_id=str(purchase_id))
         return receipt
 
     async def get_or_generate_receipt(self, purchase_id: UUID) -> Receipt:
-        """Obtener recibo existente o generar uno nuevo"""
+        """Obtener recibo existente; si el worker aún lo está generando lanza ReceiptPendingException, si no hay job lo genera"""
         try:
             existing_receipt = await self.receipt_repository.get_receipt_by_purchase_id(purchase_id)
             if existing_receipt:
                 return existing_receipt
 
-            purchase = await self.purchase_repository.get_purchase_by_id(purchase_id)
-            if not purchase:
-                raise PurchaseNotFoundException(purchase_id=str(purchase_id))
-
-            cart_items = await self.cart_item_repository.get_cart_items_by_cart(purchase.cart_id)
+            await self._raise_if_receipt_pending(purchase_id)
 
-            receipt = Receipt(purchase_id=purchase_id)
-            receipt.generate_receipt_data(purchase, cart_items)
+            receipt = await self.receipt_repository.generate_receipt(purchase_id)
+            if receipt:
+                return receipt
 
-            try:
-                return await self.receipt_repository.create_receipt(purchase_id, receipt.receipt_data)
-            except Exception as e:
-                existing_receipt = await self.receipt_repository.get_receipt_by_purchase_id(purchase_id)
-                if existing_receipt:
-                    return existing_receipt
-                raise ReceiptGenerationException(
-                    str(purchase_id), str(e)) from e
+            # Otra petición lo generó entre la lectura y el INSERT
+            return await self.get_receipt_by_purchase_id(purchase_id)
 
-        except PurchaseNotFoundException:
+        except NotFoundException:
+            raise PurchaseNotFoundException(purchase_id=str(purchase_id))
+        except (PurchaseNotFoundException, ReceiptPendingException):
             raise
         except Exception as e:
             raise ReceiptGenerationException(str(purchase_id), str(e)) from e
@@ -89,42 +86,33 @@ class ReceiptService:
     async def regenerate_receipt(self, purchase_id: UUID) -> Receipt:
         """Regenerar recibo para una compra"""
         try:
-            purchase = await self.purchase_repository.get_purchase_by_id(purchase_id)
-            if not purchase:
-                raise PurchaseNotFoundException(purchase_id=str(purchase_id))
-
-            cart_items = await self.cart_item_repository.get_cart_items_by_cart(purchase.cart_id)
+            receipt = await self.receipt_repository.regenerate_receipt(purchase_id)
+            receipt_render_cache.invalidate(receipt.receipt_id)
+            return receipt
 
-            receipt = Receipt(purchase_id=purchase_id)
-            receipt.generate_receipt_data(purchase, cart_items)
-
-            existing_receipt = await self.receipt_repository.get_receipt_by_purchase_id(purchase_id)
-
-            if existing_receipt:
-                return await self.receipt_repository.update_receipt_data(
-                    existing_receipt.receipt_id,
-                    receipt.receipt_data
-                )
-            else:
-                return await self.receipt_repository.create_receipt(purchase_id, receipt.receipt_data)
-
-        except PurchaseNotFoundException:
-            raise
+        except NotFoundException:
+            raise PurchaseNotFoundException(purchase_id=str(purchase_id))
         except Exception as e:
             raise ReceiptGenerationException(str(purchase_id), str(e)) from e
 
     async def get_formatted_receipt(self, purchase_id: UUID) -> str:
         """Obtener recibo formateado como texto"""
+        rendered, _ = await self.get_rendered_receipt(purchase_id, "text")
+        return rendered
+
+    async def get_rendered_receipt(self, purchase_id: UUID, render_format: str = "text") -> Tuple[str, str]:
+        """Obtener el recibo renderizado (text, html, thermal) y su hash de contenido, usando la cache de renders"""
         receipt = await self.get_receipt_by_purchase_id(purchase_id)
+        content_hash = receipt.get_content_hash()
 
-        receipt_entity = Receipt(
-            receipt_id=receipt.receipt_id,
-            purchase_id=receipt.purchase_id,
-            receipt_data=receipt.receipt_data,
-            generated_at=receipt.generated_at
-        )
+        rendered = receipt_render_cache.get(
+            receipt.receipt_id, render_format, content_hash)
+        if rendered is None:
+            rendered = receipt.render(render_format)
+            receipt_render_cache.set(
+                receipt.receipt_id, render_format, content_hash, rendered)
 
-        return receipt_entity.get_formatted_receipt()
+        return rendered, content_hash
 
     async def get_receipt_summary(self, purchase_id: UUID) -> dict:
         """Obtener resumen del recibo"""
@@ -146,11 +134,63 @@ class ReceiptService:
             "generated_at": receipt.generated_at.isoformat() if receipt.generated_at else None
         }
 
+    async def search_receipts(self, limit: int = 50, product_sku: Optional[str] = None,
+                              product_id: Optional[UUID] = None, payment_method: Optional[str] = None,
+                              date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                              cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Buscar recibos por SKU, producto, método de pago y fecha de compra (paginación por cursor)"""
+        if date_from is not None and date_from.tzinfo is None:
+            date_from = date_from.replace(tzinfo=timezone.utc)
+        if date_to is not None and date_to.tzinfo is None:
+            date_to = date_to.replace(tzinfo=timezone.utc)
+        if date_from is not None and date_to is not None and date_to <= date_from:
+            raise InvalidReceiptSearchException("'to' must be after 'from'")
+
+        before_purchased_at, before_receipt_id = self._decode_search_cursor(
+            cursor) if cursor else (None, None)
+
+        rows = await self.receipt_repository.search_receipts(
+            limit + 1, product_sku, product_id, payment_method, date_from, date_to,
+            before_purchased_at, before_receipt_id
+        )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_search_cursor(
+                rows[-1]["purchased_at"], rows[-1]["receipt_id"])
+
+        return rows, next_cursor
+
     async def delete_receipt(self, receipt_id: UUID) -> bool:
         """Eliminar un recibo"""
         receipt = await self.get_receipt_by_id(receipt_id)
+        receipt_render_cache.invalidate(receipt_id)
         return await self.receipt_repository.delete_receipt(receipt_id)
 
+    async def _raise_if_receipt_pending(self, purchase_id: UUID) -> None:
+        """Lanzar ReceiptPendingException si el recibo está encolado o en proceso"""
+        if not self.receipt_job_repository:
+            return
+
+        job = await self.receipt_job_repository.get_job_by_purchase_id(purchase_id)
+        if job and job["status"] in ("pending", "processing"):
+            raise ReceiptPendingException(str(purchase_id))
+
+    def _encode_search_cursor(self, purchased_at: datetime, receipt_id: UUID) -> str:
+        """Codificar la posición (purchased_at, receipt_id) como cursor opaco"""
+        raw = f"{purchased_at.isoformat()}|{receipt_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def _decode_search_cursor(self, cursor: str) -> Tuple[datetime, UUID]:
+        """Decodificar un cursor de búsqueda de recibos"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            purchased_at, receipt_id = raw.split("|", 1)
+            return datetime.fromisoformat(purchased_at), UUID(receipt_id)
+        except (ValueError, binascii.Error, UnicodeDecodeError) as e:
+            raise InvalidReceiptSearchException(f"invalid cursor '{cursor}'") from e
+
     def _validate_receipt_data(self, receipt_data: dict) -> None:
         """Validar estructura de datos del recibo"""
         required_fields = [
@@ -178,6 +218,7 @@ class ReceiptService:
 
 
 def get_receipt_service(receipt_repository: ReceiptRepository, purchase_repository: PurchaseRepository,
-                        cart_item_repository: CartItemRepository) -> ReceiptService:
+                        cart_item_repository: CartItemRepository,
+                        receipt_job_repository: Optional[ReceiptJobRepository] = None) -> ReceiptService:
     """Factory function para obtener instancia del servicio"""
-    return ReceiptService(receipt_repository, purchase_repository, cart_item_repository)
+    return ReceiptService(receipt_repository, purchase_repository, cart_item_repository, receipt_job_repository)
@@ -0,0 +1,74 @@
+from typing import Optional
+from datetime import date, datetime, timedelta, timezone
+from app.infrastructure.db.repositories.sales_rollup_repository import SalesRollupRepository, ROLLUP_GRANULARITIES
+from app.domain.exceptions.report_exception import InvalidReportRangeException
+
+SALES_ROLLUP_WATERMARK = "sales_daily"
+REPORT_MAX_RANGE_DAYS = 3660
+REPORT_DEFAULT_RANGE_DAYS = {
+    "day": 30,
+    "week": 7 * 12,
+    "month": 365
+}
+
+
+class ReportService:
+    def __init__(self, sales_rollup_repository: SalesRollupRepository):
+        self.sales_rollup_repository = sales_rollup_repository
+
+    async def get_sales_report(self, granularity: str = "day", date_from: Optional[date] = None,
+                               date_to: Optional[date] = None, products_limit: int = 10) -> dict:
+        """Obtener reporte de ventas por periodo leyendo sólo las tablas de rollup"""
+        date_from, date_to = self._resolve_range(granularity, date_from, date_to)
+
+        periods = await self.sales_rollup_repository.get_sales_by_period(granularity, date_from, date_to)
+        payment_methods = await self.sales_rollup_repository.get_payment_methods_by_period(
+            granularity, date_from, date_to)
+        top_products = await self.sales_rollup_repository.get_top_products(date_from, date_to, products_limit)
+        watermark = await self.sales_rollup_repository.get_watermark(SALES_ROLLUP_WATERMARK)
+
+        breakdown = {}
+        for row in payment_methods:
+            breakdown.setdefault(row["period_start"], []).append({
+                "payment_method": row["payment_method"],
+                "purchases_count": row["purchases_count"],
+                "net_amount": row["net_amount"]
+            })
+
+        return {
+            "granularity": granularity,
+            "date_from": date_from,
+            "date_to": date_to,
+            "periods": [
+                {**period, "payment_methods": breakdown.get(period["period_start"], [])}
+                for period in periods
+            ],
+            "top_products": top_products,
+            "data_up_to": watermark["last_purchased_at"] if watermark else None
+        }
+
+    def _resolve_range(self, granularity: str, date_from: Optional[date], date_to: Optional[date]):
+        """Completar y validar el rango [date_from, date_to)"""
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise InvalidReportRangeException(
+                f"granularity must be one of: {', '.join(ROLLUP_GRANULARITIES)}")
+
+        if date_to is None:
+            date_to = datetime.now(timezone.utc).date() + timedelta(days=1)
+        if date_from is None:
+            date_from = date_to - \
+                timedelta(days=REPORT_DEFAULT_RANGE_DAYS[granularity])
+
+        if date_to <= date_from:
+            raise InvalidReportRangeException("'to' must be after 'from'")
+
+        if (date_to - date_from).days > REPORT_MAX_RANGE_DAYS:
+            raise InvalidReportRangeException(
+                f"range cannot exceed {REPORT_MAX_RANGE_DAYS} days")
+
+        return date_from, date_to
+
+
+def get_report_service(sales_rollup_repository: SalesRollupRepository) -> ReportService:
+    """Factory function para obtener instancia del servicio"""
+    return ReportService(sales_rollup_repository)
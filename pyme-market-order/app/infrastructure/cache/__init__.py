@@ -0,0 +1,4 @@
+from .receipt_render_cache import ReceiptRenderCache, receipt_render_cache
+from .receipt_lines_cache import ReceiptLinesCache, receipt_lines_cache
+from .promotion_rules_cache import PromotionRulesCache, promotion_rules_cache
+from .cart_store import WriteBehindCartStore, cart_store, get_cart_store
@@ -0,0 +1,394 @@
+"""Store write-behind de carritos activos.
+
+Las mutaciones de items se aplican sobre una copia en memoria del carrito y se escriben a
+Postgres en lotes (una transacción para todos los carritos con cambios) cada
+CART_WRITE_BEHIND_FLUSH_INTERVAL_MS, además de en cada checkout. Reglas de seguridad ante caídas:
+
+1. Si el proceso muere se pierden, como mucho, los cambios del último intervalo de escritura.
+   El apagado ordenado escribe todo lo pendiente antes de salir.
+2. Ninguna compra se calcula sobre estado no escrito: checkout, checkout por lotes y las compras
+   directas escriben y descartan el carrito del store antes de leer sus items, y los cambios de
+   estado del carrito (completar, abandonar, vaciar, eliminar) hacen lo mismo antes de aplicarse.
+3. La escritura sólo toca carritos que siguen activos (y bloquea su fila mientras escribe): un
+   cambio tardío nunca modifica un carrito comprado o abandonado; esos carritos salen del store.
+4. Si la escritura del lote falla se reintenta carrito por carrito en su propia transacción, así un
+   carrito con datos que Postgres rechaza no bloquea a los demás. Los que fallan siguen pendientes
+   y se reintentan en el siguiente intervalo, salvo que otros carritos sí se hayan escrito o que
+   acumulen max_flush_failures fallos: entonces salen del store a una cuarentena (con sus cambios
+   sin escribir, para revisión) y se registra el error. Con más de max_carts carritos residentes
+   las mutaciones escriben de inmediato.
+5. El store vive en el proceso: con varios workers hace falta afinidad por carrito (o un solo
+   worker), si no otro proceso lee items con hasta un intervalo de retraso.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID, uuid4
+from app.core.cart_store_config import cart_store_settings
+from app.core.database_config import AsyncSessionLocal
+from app.domain.entities.cart import Cart
+from app.domain.entities.cart_item import CartItem
+from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+
+logger = logging.getLogger(__name__)
+
+
+class CartStoreEntry:
+    """Copia en memoria de un carrito activo con sus items y los cambios pendientes de escribir"""
+
+    def __init__(self, cart: Cart, items: List[CartItem]):
+        self.cart = cart.model_copy(update={"cart_items": None})
+        self.items: Dict[UUID, CartItem] = {
+            item.cart_item_id: item for item in items}
+        # item -> versión del último cambio sin escribir
+        self.dirty_items: Dict[UUID, int] = {}
+        self.removed_items: Dict[UUID, int] = {}
+        self.version = 0
+        self.flushed_version = 0
+        self.touched_at = time.monotonic()
+        self.flush_failures = 0
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.version != self.flushed_version
+
+    def get_items(self) -> List[CartItem]:
+        """Copias de los items en orden de alta"""
+        return [item.model_copy() for item in self.items.values()]
+
+    def get_cart(self, include_items: bool = False) -> Cart:
+        """Copia del carrito con los totales al día"""
+        return self.cart.model_copy(update={
+            "cart_items": self.get_items() if include_items else None})
+
+    def find_by_product(self, product_id: UUID) -> Optional[CartItem]:
+        for item in self.items.values():
+            if item.is_same_product(product_id):
+                return item.model_copy()
+        return None
+
+    def summary(self) -> dict:
+        return {
+            "cart_id": str(self.cart.cart_id),
+            "total_amount": float(self.cart.total_amount),
+            "total_items": self.cart.total_items,
+            "items_count": len(self.items),
+            "is_empty": self.cart.total_items == 0
+        }
+
+    def put_item(self, item: CartItem) -> None:
+        self.version += 1
+        self.items[item.cart_item_id] = item
+        self.dirty_items[item.cart_item_id] = self.version
+        self.removed_items.pop(item.cart_item_id, None)
+        self._refresh_totals()
+
+    def pop_item(self, cart_item_id: UUID) -> Optional[CartItem]:
+        item = self.items.pop(cart_item_id, None)
+        if item is None:
+            return None
+
+        self.version += 1
+        self.dirty_items.pop(cart_item_id, None)
+        self.removed_items[cart_item_id] = self.version
+        self._refresh_totals()
+        return item
+
+    def snapshot(self) -> dict:
+        """Cambios pendientes en el formato de CartItemRepository.apply_cart_changes"""
+        return {
+            "cart_id": self.cart.cart_id,
+            "version": self.version,
+            "total_amount": self.cart.total_amount,
+            "total_items": self.cart.total_items,
+            "items": [self.items[item_id].model_copy() for item_id in self.dirty_items],
+            "removed_item_ids": list(self.removed_items),
+            "dirty_items": dict(self.dirty_items),
+            "removed_items": dict(self.removed_items)
+        }
+
+    def mark_flushed(self, snapshot: dict) -> List[UUID]:
+        """Dar por escritos los cambios del snapshot que no se modificaron después; devuelve
+        los items eliminados que ya no hace falta recordar"""
+        for item_id, version in snapshot["dirty_items"].items():
+            if self.dirty_items.get(item_id) == version:
+                del self.dirty_items[item_id]
+
+        forgotten = []
+        for item_id, version in snapshot["removed_items"].items():
+            if self.removed_items.get(item_id) == version:
+                del self.removed_items[item_id]
+                forgotten.append(item_id)
+
+        self.flushed_version = max(self.flushed_version, snapshot["version"])
+        return forgotten
+
+    def _refresh_totals(self) -> None:
+        self.cart.total_amount = sum(
+            (item.subtotal for item in self.items.values()), Decimal('0.00'))
+        self.cart.total_items = sum(item.quantity for item in self.items.values())
+        self.cart.updated_at = datetime.now(timezone.utc)
+
+
+class WriteBehindCartStore:
+    """Carritos activos del proceso indexados por cart_id (y por cart_item_id), con escritura
+    diferida y coalescida a Postgres. Las mutaciones no esperan I/O: son atómicas en el loop"""
+
+    def __init__(self, max_carts: int = 10000, idle_seconds: float = 300, max_flush_failures: int = 3):
+        self.max_carts = max_carts
+        self.idle_seconds = idle_seconds
+        self.max_flush_failures = max_flush_failures
+        self.entries: "OrderedDict[UUID, CartStoreEntry]" = OrderedDict()
+        # Carritos sacados del store por no poder escribirse: cambios pendientes y error
+        self.quarantine: "OrderedDict[UUID, dict]" = OrderedDict()
+        # Incluye los items eliminados hasta que se escribe su borrado
+        self._item_index: Dict[UUID, UUID] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.metrics = {
+            "loads": 0,
+            "mutations": 0,
+            "flushes": 0,
+            "carts_flushed": 0,
+            "flush_failures": 0,
+            "carts_dropped": 0,
+            "carts_evicted": 0,
+            "carts_quarantined": 0,
+        }
+
+    @property
+    def flush_lock(self) -> asyncio.Lock:
+        """Una sola escritura a la vez: un snapshot viejo nunca pisa a uno más nuevo"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        return self._flush_lock
+
+    @property
+    def over_capacity(self) -> bool:
+        return len(self.entries) > self.max_carts
+
+    def get(self, cart_id: UUID) -> Optional[CartStoreEntry]:
+        """Carrito residente (None si hay que leerlo de la base de datos)"""
+        entry = self.entries.get(cart_id)
+        if entry is not None:
+            entry.touched_at = time.monotonic()
+            self.entries.move_to_end(cart_id)
+        return entry
+
+    def get_by_item(self, cart_item_id: UUID) -> Optional[CartStoreEntry]:
+        """Carrito residente al que pertenece (o pertenecía, si aún no se escribió su borrado) el item"""
+        cart_id = self._item_index.get(cart_item_id)
+        return self.get(cart_id) if cart_id else None
+
+    def load(self, cart: Cart, items: List[CartItem]) -> CartStoreEntry:
+        """Registrar un carrito leído de la base de datos. Si otra corrutina lo cargó mientras
+        tanto se conserva esa copia, que puede tener cambios pendientes"""
+        entry = self.get(cart.cart_id)
+        if entry is not None:
+            return entry
+
+        entry = CartStoreEntry(cart, items)
+        self.entries[cart.cart_id] = entry
+        for item_id in entry.items:
+            self._item_index[item_id] = cart.cart_id
+        self.metrics["loads"] += 1
+
+        self._evict_clean(
+            lambda candidate: candidate is not entry and self.over_capacity)
+        return entry
+
+    def add_item(self, entry: CartStoreEntry, cart_id: UUID, product_id: UUID, product_name: str,
+                 product_sku: str, unit_price: Decimal, quantity: int) -> CartItem:
+        now = datetime.now(timezone.utc)
+        item = CartItem(
+            cart_item_id=uuid4(),
+            cart_id=cart_id,
+            product_id=product_id,
+            product_name=product_name,
+            product_sku=product_sku.upper().strip(),
+            unit_price=unit_price,
+            quantity=quantity,
+            subtotal=unit_price * quantity,
+            added_at=now,
+            updated_at=now
+        )
+        entry.put_item(item)
+        self._item_index[item.cart_item_id] = cart_id
+        self.metrics["mutations"] += 1
+        return item.model_copy()
+
+    def update_quantity(self, entry: CartStoreEntry, cart_item_id: UUID,
+                        quantity: int) -> Optional[CartItem]:
+        current = entry.items.get(cart_item_id)
+        if current is None:
+            return None
+
+        item = current.model_copy(update={"updated_at": datetime.now(timezone.utc)})
+        item.update_quantity(quantity)
+        entry.put_item(item)
+        self.metrics["mutations"] += 1
+        return item.model_copy()
+
+    def remove_item(self, entry: CartStoreEntry, cart_item_id: UUID) -> bool:
+        removed = entry.pop_item(cart_item_id) is not None
+        if removed:
+            self.metrics["mutations"] += 1
+        return removed
+
+    def clear(self, entry: CartStoreEntry) -> None:
+        for cart_item_id in list(entry.items):
+            entry.pop_item(cart_item_id)
+        self.metrics["mutations"] += 1
+
+    async def flush(self, cart_ids: Optional[Iterable[UUID]] = None, evict: bool = False) -> int:
+        """Escribir en una transacción los cambios pendientes (de todos los carritos o de cart_ids);
+        si falla, uno por uno. Con evict los carritos escritos dejan el store. Devuelve los carritos
+        escritos. Con cart_ids falla si alguno de ellos no se pudo escribir"""
+        async with self.flush_lock:
+            if cart_ids is None:
+                entries = list(self.entries.values())
+            else:
+                entries = [self.entries[cart_id]
+                           for cart_id in cart_ids if cart_id in self.entries]
+
+            snapshots = [entry.snapshot() for entry in entries if entry.is_dirty]
+            if snapshots:
+                try:
+                    written = await self._write(snapshots)
+                except Exception as e:
+                    self.metrics["flush_failures"] += 1
+                    logger.warning(
+                        f"Falló la escritura de {len(snapshots)} carritos en lote, se reintenta uno por uno: "
+                        f"{self._describe(e)}")
+                    written = await self._write_each(snapshots, raise_on_failure=cart_ids is not None)
+
+                self.metrics["flushes"] += 1
+                self.metrics["carts_flushed"] += len(written)
+                snapshots = written
+
+            if evict:
+                # Sólo los que no cambiaron mientras se escribía
+                for entry in entries:
+                    if not entry.is_dirty and entry.cart.cart_id in self.entries:
+                        self._drop(entry.cart.cart_id)
+                        self.metrics["carts_evicted"] += 1
+
+            return len(snapshots)
+
+    async def _write(self, snapshots: List[dict]) -> List[dict]:
+        """Escribir los snapshots en una transacción y aplicar el resultado; devuelve los escritos"""
+        async with AsyncSessionLocal() as session:
+            active_cart_ids = await CartItemRepository(session).apply_cart_changes(snapshots)
+
+        for snapshot in snapshots:
+            entry = self.entries.get(snapshot["cart_id"])
+            if entry is None:
+                continue
+            entry.flush_failures = 0
+            if snapshot["cart_id"] not in active_cart_ids:
+                logger.warning(
+                    f"Carrito {snapshot['cart_id']} ya no está activo: se descartan sus cambios en memoria")
+                self._drop(snapshot["cart_id"])
+                self.metrics["carts_dropped"] += 1
+                continue
+            for item_id in entry.mark_flushed(snapshot):
+                self._item_index.pop(item_id, None)
+
+        return snapshots
+
+    async def _write_each(self, snapshots: List[dict], raise_on_failure: bool) -> List[dict]:
+        """Escribir cada carrito en su propia transacción. Un carrito que falla mientras otros se
+        escriben (la base responde) o que ya acumuló max_flush_failures queda en cuarentena"""
+        written: List[dict] = []
+        failed: List[tuple] = []
+        for snapshot in snapshots:
+            try:
+                written.extend(await self._write([snapshot]))
+            except Exception as e:
+                failed.append((snapshot, e))
+
+        for snapshot, error in failed:
+            entry = self.entries.get(snapshot["cart_id"])
+            if entry is None:
+                continue
+            entry.flush_failures += 1
+            if written or entry.flush_failures >= self.max_flush_failures:
+                self._quarantine(snapshot, error)
+
+        if failed and (raise_on_failure or not written):
+            raise failed[0][1]
+        return written
+
+    def _quarantine(self, snapshot: dict, error: Exception) -> None:
+        """Sacar del store un carrito que no se puede escribir, conservando sus cambios para revisión"""
+        cart_id = snapshot["cart_id"]
+        reason = self._describe(error)
+        logger.error(
+            f"Carrito {cart_id} en cuarentena: no se pudieron escribir {len(snapshot['items'])} items "
+            f"ni {len(snapshot['removed_item_ids'])} bajas: {reason}")
+        self._drop(cart_id)
+        self.quarantine[cart_id] = {
+            "snapshot": snapshot,
+            "error": reason,
+            "quarantined_at": datetime.now(timezone.utc)
+        }
+        self.quarantine.move_to_end(cart_id)
+        while len(self.quarantine) > self.max_carts:
+            self.quarantine.popitem(last=False)
+        self.metrics["carts_quarantined"] += 1
+
+    def _describe(self, error: Exception) -> str:
+        """Error original: los repositorios lo envuelven en InternalException"""
+        cause = error.__cause__ or error
+        return f"{type(cause).__name__}: {cause}"
+
+    def evict_idle(self) -> int:
+        """Sacar de memoria los carritos ya escritos sin actividad en idle_seconds"""
+        idle_before = time.monotonic() - self.idle_seconds
+        return self._evict_clean(lambda entry: entry.touched_at < idle_before)
+
+    def get_metrics(self) -> dict:
+        return {
+            "resident_carts": len(self.entries),
+            "dirty_carts": sum(1 for entry in self.entries.values() if entry.is_dirty),
+            "quarantined_carts": len(self.quarantine),
+            **self.metrics
+        }
+
+    def _evict_clean(self, should_evict) -> int:
+        """Recorrer de menos a más reciente descartando carritos sin cambios pendientes"""
+        evicted = 0
+        for cart_id, entry in list(self.entries.items()):
+            if not should_evict(entry):
+                continue
+            if entry.is_dirty:
+                continue
+            self._drop(cart_id)
+            evicted += 1
+
+        self.metrics["carts_evicted"] += evicted
+        return evicted
+
+    def _drop(self, cart_id: UUID) -> None:
+        entry = self.entries.pop(cart_id, None)
+        if entry is None:
+            return
+        for item_id in list(entry.items) + list(entry.removed_items):
+            self._item_index.pop(item_id, None)
+
+
+cart_store = WriteBehindCartStore(
+    max_carts=cart_store_settings.CART_WRITE_BEHIND_MAX_CARTS,
+    idle_seconds=cart_store_settings.CART_WRITE_BEHIND_IDLE_SECONDS,
+    max_flush_failures=cart_store_settings.CART_WRITE_BEHIND_MAX_FLUSH_FAILURES
+)
+
+
+def get_cart_store() -> Optional[WriteBehindCartStore]:
+    """Store compartido si la escritura diferida de carritos está habilitada"""
+    if cart_store_settings.CART_WRITE_BEHIND_ENABLED:
+        return cart_store
+    return None
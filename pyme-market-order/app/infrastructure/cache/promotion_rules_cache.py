@@ -0,0 +1,52 @@
+import asyncio
+import time
+from typing import Any, Optional
+from app.core.promotion_config import promotion_settings
+
+
+class PromotionRulesCache:
+    """Conjunto de reglas de promoción compilado, compartido por el proceso. Se revalida contra
+    la versión guardada en la base de datos como mucho cada reload_interval_seconds."""
+
+    def __init__(self, reload_interval_seconds: float = 5.0):
+        self.reload_interval_seconds = reload_interval_seconds
+        self.rule_set: Optional[Any] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """Lock para que una sola corrutina recompile a la vez"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def get_fresh(self) -> Optional[Any]:
+        """Obtener el conjunto cacheado si se validó hace menos de reload_interval_seconds"""
+        if self.rule_set is None:
+            return None
+        if time.monotonic() - self._checked_at >= self.reload_interval_seconds:
+            return None
+        return self.rule_set
+
+    def set(self, rule_set: Any) -> None:
+        """Guardar un conjunto recién compilado"""
+        self.rule_set = rule_set
+        self.mark_checked()
+
+    def mark_checked(self) -> None:
+        """Registrar que el conjunto cacheado sigue vigente"""
+        self._checked_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Forzar la revalidación en el próximo uso"""
+        self._checked_at = 0.0
+
+    def clear(self) -> None:
+        """Vaciar la cache"""
+        self.rule_set = None
+        self._checked_at = 0.0
+
+
+promotion_rules_cache = PromotionRulesCache(
+    reload_interval_seconds=promotion_settings.PROMOTIONS_RELOAD_INTERVAL_SECONDS)
@@ -0,0 +1,39 @@
+from collections import OrderedDict
+from typing import Optional, List
+from uuid import UUID
+from app.core.receipt_config import receipt_settings
+
+
+class ReceiptLinesCache:
+    """Cache LRU en memoria de las líneas de recibos compactos, por receipt_id.
+    Las líneas de una compra no cambian una vez completado el carrito."""
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[UUID, List[dict]]" = OrderedDict()
+
+    def get(self, receipt_id: UUID) -> Optional[List[dict]]:
+        """Obtener las líneas cacheadas de un recibo"""
+        lines = self._entries.get(receipt_id)
+        if lines is not None:
+            self._entries.move_to_end(receipt_id)
+        return lines
+
+    def set(self, receipt_id: UUID, lines: List[dict]) -> None:
+        """Guardar las líneas de un recibo, desalojando el menos usado si se supera el máximo"""
+        self._entries[receipt_id] = lines
+        self._entries.move_to_end(receipt_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, receipt_id: UUID) -> None:
+        """Descartar las líneas de un recibo"""
+        self._entries.pop(receipt_id, None)
+
+    def clear(self) -> None:
+        """Vaciar la cache"""
+        self._entries.clear()
+
+
+receipt_lines_cache = ReceiptLinesCache(
+    max_entries=receipt_settings.RECEIPT_LINES_CACHE_MAX_ENTRIES)
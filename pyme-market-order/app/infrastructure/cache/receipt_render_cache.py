@@ -0,0 +1,37 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+from uuid import UUID
+from decouple import config
+
+
+class ReceiptRenderCache:
+    """Cache LRU en memoria de comprobantes renderizados, por (receipt_id, formato, hash de contenido)"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[UUID, str, str], str]" = OrderedDict()
+
+    def get(self, receipt_id: UUID, render_format: str, content_hash: str) -> Optional[str]:
+        """Obtener un render cacheado"""
+        key = (receipt_id, render_format, content_hash)
+        rendered = self._entries.get(key)
+        if rendered is not None:
+            self._entries.move_to_end(key)
+        return rendered
+
+    def set(self, receipt_id: UUID, render_format: str, content_hash: str, rendered: str) -> None:
+        """Guardar un render, desalojando el menos usado si se supera el máximo"""
+        key = (receipt_id, render_format, content_hash)
+        self._entries[key] = rendered
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, receipt_id: UUID) -> None:
+        """Descartar todos los renders de un comprobante"""
+        for key in [key for key in self._entries if key[0] == receipt_id]:
+            del self._entries[key]
+
+
+receipt_render_cache = ReceiptRenderCache(
+    max_entries=config('RECEIPT_RENDER_CACHE_MAX_ENTRIES', default=1000, cast=int))
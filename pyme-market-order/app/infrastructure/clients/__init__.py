@@ -0,0 +1 @@
+from .products_client import CircuitBreaker, ProductsClient, products_client, get_products_client
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Iterable, List, Tuple, Union
+from uuid import UUID
+import httpx
+from app.core.products_service_config import products_service_settings
+from app.domain.entities.product import Product
+from app.domain.exceptions.product_exception import (
+    ProductsServiceUnavailableException,
+    ProductsCircuitOpenException
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Circuit breaker simple: se abre tras failure_threshold fallos seguidos y deja pasar una prueba tras reset_timeout"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        """Indicar si se puede llamar al servicio"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    f"Circuit breaker del servicio de productos abierto tras {self.failures} fallos")
+            self.opened_at = time.monotonic()
+
+
+class ProductsClient:
+    """Cliente async del servicio de productos con pool de conexiones, coalescing de lecturas, reintentos y circuit breaker"""
+
+    def __init__(self, base_url: str, timeout: float = 2.0, connect_timeout: float = 0.5,
+                 max_connections: int = 50, max_keepalive: int = 20, retries: int = 2,
+                 retry_backoff: float = 0.1, breaker: Optional[CircuitBreaker] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker or CircuitBreaker(5, 30.0)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[UUID, asyncio.Task] = {}
+
+    async def get_product(self, product_id: UUID) -> Optional[Product]:
+        """Obtener un producto; las llamadas concurrentes por el mismo producto comparten una sola petición"""
+        task = self._inflight.get(product_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch_product(product_id))
+            self._inflight[product_id] = task
+            task.add_done_callback(
+                lambda _: self._inflight.pop(product_id, None))
+
+        return await asyncio.shield(task)
+
+    async def get_products(self, product_ids: Iterable[UUID]) -> Dict[UUID, Optional[Product]]:
+        """Obtener varios productos en paralelo sobre el pool (ids repetidos se piden una sola vez)"""
+        unique_ids = list(dict.fromkeys(product_ids))
+        products = await asyncio.gather(*(self.get_product(product_id) for product_id in unique_ids))
+        return dict(zip(unique_ids, products))
+
+    async def list_products(self, include_inactive: bool = True) -> List[Product]:
+        """Obtener el catálogo completo (foto para reconciliar la réplica local)"""
+        response = await self._request(
+            "GET", "/products/", params={"include_inactive": str(include_inactive).lower()})
+        if response.status_code != 200:
+            raise ProductsServiceUnavailableException(
+                f"unexpected HTTP {response.status_code} listing products")
+        return [Product.model_validate(product) for product in response.json()["products"]]
+
+    async def aclose(self) -> None:
+        """Cerrar el pool de conexiones"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self._transport
+            )
+        return self._client
+
+    async def reserve_stock(self, lines: List[Tuple[UUID, int]]) -> List[Union[bool, Exception]]:
+        """Descontar stock de todas las líneas en paralelo; por línea devuelve True, False (rechazada) o la excepción.
+        Con el circuit breaker abierto no se envía nada y todas las líneas devuelven ProductsCircuitOpenException"""
+        if self.breaker.state == "open":
+            return [ProductsCircuitOpenException() for _ in lines]
+        return await asyncio.gather(
+            *(self.reduce_stock(product_id, quantity) for product_id, quantity in lines),
+            return_exceptions=True
+        )
+
+    async def release_stock(self, lines: List[Tuple[UUID, int]]) -> List[Union[bool, Exception]]:
+        """Devolver stock de varias líneas en paralelo (compensación)"""
+        return await asyncio.gather(
+            *(self.increase_stock(product_id, quantity) for product_id, quantity in lines),
+            return_exceptions=True
+        )
+
+    async def reduce_stock(self, product_id: UUID, quantity: int) -> bool:
+        """Descontar stock; False si el servicio lo rechaza (sin stock, inactivo o inexistente)"""
+        response = await self._request(
+            "PATCH", f"/products/{product_id}/stock/reduce", params={"quantity": quantity}, idempotent=False)
+        return response.status_code == 200
+
+    async def increase_stock(self, product_id: UUID, quantity: int) -> bool:
+        """Devolver stock; False si el servicio lo rechaza"""
+        response = await self._request(
+            "PATCH", f"/products/{product_id}/stock/increase", params={"quantity": quantity}, idempotent=False)
+        return response.status_code == 200
+
+    async def _fetch_product(self, product_id: UUID) -> Optional[Product]:
+        response = await self._request("GET", f"/products/{product_id}")
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise ProductsServiceUnavailableException(
+                f"unexpected HTTP {response.status_code} for product {product_id}")
+        return Product.model_validate(response.json())
+
+    async def _request(self, method: str, url: str, params: Optional[dict] = None,
+                       idempotent: bool = True) -> httpx.Response:
+        """Enviar una petición pasando por el circuit breaker y con reintentos.
+        Las operaciones no idempotentes sólo se reintentan si la petición no llegó a enviarse."""
+        if not self.breaker.allow_request():
+            raise ProductsCircuitOpenException()
+
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+
+            try:
+                response = await self._get_client().request(method, url, params=params)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                last_error = f"{type(e).__name__}: {str(e)}"
+                continue
+            except httpx.TransportError as e:
+                last_error = f"{type(e).__name__}: {str(e)}"
+                if idempotent:
+                    continue
+                break
+
+            if response.status_code >= 500:
+                last_error = f"HTTP {response.status_code}"
+                if idempotent:
+                    continue
+                break
+
+            self.breaker.record_success()
+            return response
+
+        self.breaker.record_failure()
+        raise ProductsServiceUnavailableException(last_error)
+
+
+products_client = ProductsClient(
+    base_url=products_service_settings.PRODUCTS_SERVICE_URL,
+    timeout=products_service_settings.PRODUCTS_SERVICE_TIMEOUT_SECONDS,
+    connect_timeout=products_service_settings.PRODUCTS_SERVICE_CONNECT_TIMEOUT_SECONDS,
+    max_connections=products_service_settings.PRODUCTS_SERVICE_MAX_CONNECTIONS,
+    max_keepalive=products_service_settings.PRODUCTS_SERVICE_MAX_KEEPALIVE,
+    retries=products_service_settings.PRODUCTS_SERVICE_RETRIES,
+    retry_backoff=products_service_settings.PRODUCTS_SERVICE_RETRY_BACKOFF_SECONDS,
+    breaker=CircuitBreaker(
+        products_service_settings.PRODUCTS_SERVICE_BREAKER_THRESHOLD,
+        products_service_settings.PRODUCTS_SERVICE_BREAKER_RESET_SECONDS
+    )
+)
+
+
+def get_products_client() -> Optional[ProductsClient]:
+    """Cliente compartido si la validación contra el servicio de productos está habilitada"""
+    if products_service_settings.PRODUCTS_VALIDATION_ENABLED:
+        return products_client
+    return None
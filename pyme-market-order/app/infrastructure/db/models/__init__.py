@@ -3,3 +3,15 @@ from .cart_model import CartModel
 from .cart_item_model import CartItemModel
 from .purchase_model import PurchaseModel
 from .receipt_model import ReceiptModel
+from .cart_item_archive_model import CartItemArchiveModel
+from .cart_archive_model import CartArchiveModel
+from .receipt_job_model import ReceiptJobModel
+from .sales_rollup_model import (
+    SalesDailyModel, SalesDailyProductModel, SalesDailyPaymentMethodModel, RollupWatermarkModel,
+    SalesRollupDirtyDayModel
+)
+from .checkout_saga_model import CheckoutSagaModel
+from .outbox_event_model import OutboxEventModel
+from .receipt_line_model import ReceiptLineModel
+from .promotion_model import PromotionModel
+from .user_order_stats_model import UserOrderStatsModel
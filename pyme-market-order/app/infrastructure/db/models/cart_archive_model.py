@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Numeric
+from sqlalchemy.sql import func
+from app.infrastructure.db.models.models import Base
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class CartArchiveModel(Base):
+    """Carritos completados o abandonados movidos fuera de carts. Particionada por mes de
+    archived_at (ver PartitionMaintenanceJob)"""
+    __tablename__ = "carts_archive"
+
+    cart_id = Column(UUID(as_uuid=True), primary_key=True, nullable=False)
+    user_id = Column(String(255), nullable=False, index=True)
+    status = Column(String(50), nullable=False)
+    total_amount = Column(Numeric(10, 2), nullable=False)
+    total_items = Column(Integer, nullable=False)
+    is_active = Column(Boolean, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), primary_key=True,
+                         server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        {"postgresql_partition_by": "RANGE (archived_at)"},
+    )
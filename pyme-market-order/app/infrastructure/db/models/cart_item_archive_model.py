@@ -0,0 +1,42 @@
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, select, union_all
+from sqlalchemy.sql import func
+from app.infrastructure.db.models.models import Base
+from app.infrastructure.db.models.cart_item_model import CartItemModel
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class CartItemArchiveModel(Base):
+    """Particionada por mes de archived_at (ver PartitionMaintenanceJob)"""
+    __tablename__ = "cart_items_archive"
+
+    cart_item_id = Column(UUID(as_uuid=True), primary_key=True, nullable=False)
+    cart_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    product_id = Column(UUID(as_uuid=True), nullable=False)
+    product_name = Column(String(255), nullable=False)
+    product_sku = Column(String(100), nullable=False)
+    unit_price = Column(Numeric(10, 2), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    subtotal = Column(Numeric(10, 2), nullable=False)
+    added_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), primary_key=True,
+                         server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        {"postgresql_partition_by": "RANGE (archived_at)"},
+    )
+
+
+CART_ITEM_COLUMNS = [
+    "cart_item_id", "cart_id", "product_id", "product_name", "product_sku",
+    "unit_price", "quantity", "subtotal", "added_at", "updated_at"
+]
+
+
+def cart_items_with_archive(name: str = "cart_items_all"):
+    """Items vivos y archivados en una sola subconsulta, para leer los items de compras antiguas.
+    Los filtros por cart_id se aplican en ambas ramas del UNION ALL"""
+    return union_all(
+        select(*[CartItemModel.__table__.c[column] for column in CART_ITEM_COLUMNS]),
+        select(*[CartItemArchiveModel.__table__.c[column] for column in CART_ITEM_COLUMNS])
+    ).subquery(name)
@@ -12,7 +12,7 @@ class CartItemModel(Base):
     cart_item_id = Column(UUID(as_uuid=True), primary_key=True,
                           default=uuid.uuid4, unique=True, nullable=False)
     cart_id = Column(UUID(as_uuid=True), ForeignKey(
-        "carts.cart_id"), nullable=False)
+        "carts.cart_id"), nullable=False, index=True)
     product_id = Column(UUID(as_uuid=True), nullable=False)
     product_name = Column(String(255), nullable=False)
     product_sku = Column(String(100), nullable=False)
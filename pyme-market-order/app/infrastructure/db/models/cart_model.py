@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Numeric
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Numeric, Index, and_
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.infrastructure.db.models.models import Base
@@ -25,4 +25,16 @@ class CartModel(Base):
     cart_items = relationship(
         "CartItemModel", back_populates="cart", cascade="all, delete-orphan")
     purchase = relationship(
-        "PurchaseModel", back_populates="cart", uselist=False)
+        "PurchaseModel", back_populates="cart", uselist=False,
+        primaryjoin="CartModel.cart_id == foreign(PurchaseModel.cart_id)")
+
+
+Index("ix_carts_active_updated_at", CartModel.updated_at,
+      postgresql_where=CartModel.status == "active")
+
+# Carritos cerrados pendientes de archivar (ver CartMaintenanceRepository.archive_closed_carts)
+Index("ix_carts_closed_at", func.coalesce(CartModel.completed_at, CartModel.updated_at),
+      postgresql_where=CartModel.status.in_(["completed", "abandoned"]))
+
+Index("uq_carts_user_active", CartModel.user_id, unique=True,
+      postgresql_where=and_(CartModel.status == "active", CartModel.is_active == True))
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, ForeignKey, Index
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
+from app.infrastructure.db.models.models import Base
+import uuid
+
+
+class CheckoutSagaModel(Base):
+    __tablename__ = "checkout_sagas"
+
+    saga_id = Column(UUID(as_uuid=True), primary_key=True,
+                     default=uuid.uuid4, unique=True, nullable=False)
+    cart_id = Column(UUID(as_uuid=True), ForeignKey(
+        "carts.cart_id"), nullable=False, index=True)
+    user_id = Column(String(255), nullable=False)
+    # started -> reserved -> completed | compensating -> failed
+    status = Column(String(20), default="started", nullable=False)
+    payment_method = Column(String(50), nullable=True)
+    discount_percentage = Column(Numeric(5, 2), nullable=True)
+    tax_percentage = Column(Numeric(5, 2), nullable=True)
+    # Descuento de promociones evaluado al iniciar el checkout; la recuperación lo reutiliza.
+    # promotion_ids NULL sólo en checkouts anteriores a estas columnas
+    discount_amount = Column(Numeric(10, 2), nullable=True)
+    promotion_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=True)
+    # [{product_id, product_sku, quantity, state: pending|reserved|failed|unsent|unknown|released}]
+    lines = Column(JSONB, nullable=False)
+    # Sin FK: la clave de purchases (particionada) incluye purchased_at, que aquí no se guarda
+    purchase_id = Column(UUID(as_uuid=True), nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String(1000), nullable=True)
+    created_at = Column(DateTime(timezone=True),
+                        server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        onupdate=func.now(), nullable=False)
+
+
+Index("uq_checkout_sagas_cart_in_flight", CheckoutSagaModel.cart_id, unique=True,
+      postgresql_where=CheckoutSagaModel.status.in_(["started", "reserved", "compensating"]))
+Index("ix_checkout_sagas_in_flight_updated_at", CheckoutSagaModel.updated_at,
+      postgresql_where=CheckoutSagaModel.status.in_(["started", "reserved", "compensating"]))
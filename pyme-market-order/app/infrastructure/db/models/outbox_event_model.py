@@ -0,0 +1,37 @@
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, Identity, Index
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.infrastructure.db.models.models import Base
+import uuid
+
+
+class OutboxEventModel(Base):
+    __tablename__ = "outbox_events"
+
+    event_id = Column(UUID(as_uuid=True), primary_key=True,
+                      default=uuid.uuid4, unique=True, nullable=False)
+    # Orden de publicación (por agregado se respeta estrictamente)
+    sequence = Column(BigInteger, Identity(always=True),
+                      unique=True, nullable=False)
+    # cart | purchase
+    aggregate_type = Column(String(50), nullable=False)
+    aggregate_id = Column(UUID(as_uuid=True), nullable=False)
+    # cart.completed | cart.abandoned | purchase.created
+    event_type = Column(String(100), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True),
+                        server_default=func.now(), nullable=False)
+    published_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True),
+                             server_default=func.now(), nullable=False)
+    last_error = Column(String(1000), nullable=True)
+
+
+Index("ix_outbox_events_unpublished", OutboxEventModel.sequence,
+      postgresql_where=OutboxEventModel.published_at.is_(None))
+Index("ix_outbox_events_unpublished_aggregate", OutboxEventModel.aggregate_type,
+      OutboxEventModel.aggregate_id, OutboxEventModel.sequence,
+      postgresql_where=OutboxEventModel.published_at.is_(None))
+Index("ix_outbox_events_published_at", OutboxEventModel.published_at,
+      postgresql_where=OutboxEventModel.published_at.isnot(None))
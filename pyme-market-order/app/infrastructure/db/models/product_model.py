@@ -6,6 +6,8 @@ from sqlalchemy.dialects.postgresql import UUID
 
 
 class ProductModel(Base):
+    """Réplica local del catálogo del servicio de productos (ver ProductReplicaRepository).
+    updated_at es la versión del servicio de origen; synced_at, la última vez que se confirmó aquí"""
     __tablename__ = "products"
 
     product_id = Column(UUID(as_uuid=True), primary_key=True,
@@ -14,9 +16,12 @@ class ProductModel(Base):
     description = Column(String(1000), nullable=True)
     price = Column(Numeric(10, 2), nullable=False)
     stock_quantity = Column(Integer, default=0, nullable=False)
-    sku = Column(String(100), unique=True, index=True, nullable=False)
+    # Sin unique: la réplica no debe rechazar un cambio del origen por el orden de llegada
+    sku = Column(String(100), index=True, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True),
                         server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(),
                         onupdate=func.now(), nullable=False)
+    synced_at = Column(DateTime(timezone=True),
+                       server_default=func.now(), nullable=False)
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, Boolean, CheckConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+from app.infrastructure.db.models.models import Base
+import uuid
+
+
+class PromotionModel(Base):
+    """Regla de promoción a nivel carrito (product_sku NULL) o de una línea (product_sku)"""
+    __tablename__ = "promotions"
+
+    promotion_id = Column(UUID(as_uuid=True), primary_key=True,
+                          default=uuid.uuid4, unique=True, nullable=False)
+    name = Column(String(255), nullable=False)
+    # percentage_off | fixed_off | buy_x_get_y
+    rule_type = Column(String(20), nullable=False)
+    product_sku = Column(String(100), nullable=True)
+    # percentage_off: porcentaje; fixed_off: monto fijo; buy_x_get_y: no se usa
+    value = Column(Numeric(10, 2), nullable=True)
+    buy_quantity = Column(Integer, nullable=True)
+    get_quantity = Column(Integer, nullable=True)
+    # Umbrales: subtotal mínimo del carrito (o de la línea) y cantidad mínima de la línea
+    min_subtotal = Column(Numeric(10, 2), nullable=True)
+    min_quantity = Column(Integer, nullable=True)
+    # Las promociones acumulables se suman; de las exclusivas se aplica la de mayor descuento
+    stackable = Column(Boolean, default=False, nullable=False)
+    priority = Column(Integer, default=0, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+    starts_at = Column(DateTime(timezone=True), nullable=True)
+    ends_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True),
+                        server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        CheckConstraint(
+            "rule_type IN ('percentage_off', 'fixed_off', 'buy_x_get_y')",
+            name="ck_promotions_rule_type"),
+    )
+
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.infrastructure.db.models.models import Base
@@ -7,23 +7,54 @@ from sqlalchemy.dialects.postgresql import UUID
 
 
 class PurchaseModel(Base):
+    """Particionada por mes de purchased_at (ver PartitionMaintenanceJob). Las claves únicas
+    deben incluir purchased_at, así que las tablas que guardan sólo purchase_id no tienen FK hacia
+    purchases y la aplicación es la que garantiza que la compra exista. purchase_number es único
+    sólo junto con purchased_at: globalmente lo es porque incluye la fecha y parte del purchase_id"""
     __tablename__ = "purchases"
 
     purchase_id = Column(UUID(as_uuid=True), primary_key=True,
-                         default=uuid.uuid4, unique=True, nullable=False)
-    cart_id = Column(UUID(as_uuid=True), ForeignKey(
-        "carts.cart_id"), nullable=False)
+                         default=uuid.uuid4, nullable=False)
+    # Sin FK: el carrito se archiva (carts_archive) tiempo después de la compra
+    cart_id = Column(UUID(as_uuid=True), nullable=False)
     user_id = Column(String(255), nullable=False)
-    purchase_number = Column(String(100), unique=True, nullable=False)
+    purchase_number = Column(String(100), nullable=False)
     total_amount = Column(Numeric(10, 2), nullable=False)
     tax_amount = Column(Numeric(10, 2), default=0.00, nullable=False)
     discount_amount = Column(Numeric(10, 2), default=0.00, nullable=False)
     final_amount = Column(Numeric(10, 2), nullable=False)
     payment_method = Column(String(50), nullable=True)
     status = Column(String(50), default="completed", nullable=False)
-    purchased_at = Column(DateTime(timezone=True),
+    # Conteos de items fijados al comprar; NULL en compras anteriores hasta el backfill
+    items_count = Column(Integer, nullable=True)
+    total_quantity = Column(Integer, nullable=True)
+    purchased_at = Column(DateTime(timezone=True), primary_key=True,
                           server_default=func.now(), nullable=False)
 
-    cart = relationship("CartModel", back_populates="purchase")
+    cart = relationship(
+        "CartModel", back_populates="purchase",
+        primaryjoin="foreign(PurchaseModel.cart_id) == CartModel.cart_id")
     receipt = relationship(
-        "ReceiptModel", back_populates="purchase", uselist=False)
+        "ReceiptModel", back_populates="purchase", uselist=False,
+        primaryjoin="PurchaseModel.purchase_id == foreign(ReceiptModel.purchase_id)")
+
+    __table_args__ = (
+        UniqueConstraint('purchase_number', 'purchased_at',
+                         name='uq_purchases_purchase_number'),
+        {"postgresql_partition_by": "RANGE (purchased_at)"},
+    )
+
+
+Index("ix_purchases_user_id_purchased_at",
+      PurchaseModel.user_id, PurchaseModel.purchased_at.desc(),
+      PurchaseModel.purchase_id.desc())
+
+Index("ix_purchases_purchased_at",
+      PurchaseModel.purchased_at, PurchaseModel.purchase_id)
+
+# Búsquedas por carrito: cart_id no permite pruning, así cada partición responde por índice
+Index("ix_purchases_cart_id", PurchaseModel.cart_id)
+
+# Compras pendientes del backfill de conteos de items
+Index("ix_purchases_item_counters_pending", PurchaseModel.purchase_id,
+      postgresql_where=PurchaseModel.items_count.is_(None))
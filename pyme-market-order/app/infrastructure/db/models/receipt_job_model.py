@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, DateTime, Integer, Index
+from sqlalchemy.sql import func
+from app.infrastructure.db.models.models import Base
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class ReceiptJobModel(Base):
+    __tablename__ = "receipt_jobs"
+
+    job_id = Column(UUID(as_uuid=True), primary_key=True,
+                    default=uuid.uuid4, unique=True, nullable=False)
+    # Sin FK: la clave de purchases (particionada) incluye purchased_at, que aquí no se guarda
+    purchase_id = Column(UUID(as_uuid=True), unique=True, nullable=False)
+    status = Column(String(20), default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True),
+                             server_default=func.now(), nullable=False)
+    last_error = Column(String(1000), nullable=True)
+    # Momento del último encolado: completar o fallar un job sólo aplica si no se reencoló mientras
+    # se procesaba
+    enqueued_at = Column(DateTime(timezone=True),
+                         server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True),
+                        server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        onupdate=func.now(), nullable=False)
+
+
+Index("ix_receipt_jobs_claimable", ReceiptJobModel.next_attempt_at,
+      postgresql_where=ReceiptJobModel.status.in_(["pending", "processing"]))
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, SmallInteger, Numeric, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.infrastructure.db.models.models import Base
+
+
+class ReceiptLineModel(Base):
+    """Líneas congeladas de un recibo en formato compacto (receipts.storage_format = 'compact')"""
+    __tablename__ = "receipt_lines"
+
+    receipt_id = Column(UUID(as_uuid=True), ForeignKey(
+        "receipts.receipt_id", ondelete="CASCADE"), primary_key=True)
+    line_no = Column(SmallInteger, primary_key=True)
+    product_id = Column(UUID(as_uuid=True), nullable=False)
+    product_sku = Column(String(100), nullable=False)
+    product_name = Column(String(255), nullable=False)
+    unit_price = Column(Numeric(10, 2), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    subtotal = Column(Numeric(10, 2), nullable=False)
+
+
+Index("ix_receipt_lines_product_sku", ReceiptLineModel.product_sku)
+Index("ix_receipt_lines_product_id", ReceiptLineModel.product_id)
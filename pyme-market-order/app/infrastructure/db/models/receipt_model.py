@@ -1,7 +1,7 @@
-from sqlalchemy import Column, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, UniqueConstraint, Index, literal_column, type_coerce, Text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID, JSON
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.infrastructure.db.models.models import Base
 import uuid
 
@@ -11,14 +11,30 @@ class ReceiptModel(Base):
 
     receipt_id = Column(UUID(as_uuid=True), primary_key=True,
                         default=uuid.uuid4, unique=True, nullable=False)
-    purchase_id = Column(UUID(as_uuid=True), ForeignKey(
-        "purchases.purchase_id"), nullable=False)
-    receipt_data = Column(JSON, nullable=False)
+    # Sin FK: la clave de purchases (particionada) incluye purchased_at, que aquí no se guarda
+    purchase_id = Column(UUID(as_uuid=True), nullable=False)
+    # json: documento completo en receipt_data | compact: cabecera en receipt_data + receipt_lines
+    storage_format = Column(String(10), default="json",
+                            server_default="json", nullable=False)
+    receipt_data = Column(JSONB, nullable=False)
     generated_at = Column(DateTime(timezone=True),
                           server_default=func.now(), nullable=False)
 
-    purchase = relationship("PurchaseModel", back_populates="receipt")
+    purchase = relationship(
+        "PurchaseModel", back_populates="receipt",
+        primaryjoin="foreign(ReceiptModel.purchase_id) == PurchaseModel.purchase_id")
 
     __table_args__ = (
         UniqueConstraint('purchase_id', name='uq_receipt_purchase_id'),
     )
+
+
+# Claves en línea (no parámetros) para que las consultas coincidan con las expresiones indexadas
+receipt_items_expr = type_coerce(
+    ReceiptModel.receipt_data.op("->")(literal_column("'items'")), JSONB)
+receipt_payment_method_expr = type_coerce(
+    ReceiptModel.receipt_data.op("->>")(literal_column("'payment_method'")), Text)
+
+Index("ix_receipts_items", receipt_items_expr.label("items"),
+      postgresql_using="gin", postgresql_ops={"items": "jsonb_path_ops"})
+Index("ix_receipts_payment_method", receipt_payment_method_expr.self_group())
@@ -0,0 +1,57 @@
+from sqlalchemy import Column, String, Date, DateTime, Integer, Numeric
+from sqlalchemy.sql import func
+from app.infrastructure.db.models.models import Base
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class SalesDailyModel(Base):
+    __tablename__ = "sales_daily"
+
+    sales_date = Column(Date, primary_key=True, nullable=False)
+    purchases_count = Column(Integer, default=0, nullable=False)
+    units_sold = Column(Integer, default=0, nullable=False)
+    gross_amount = Column(Numeric(14, 2), default=0.00, nullable=False)
+    discount_amount = Column(Numeric(14, 2), default=0.00, nullable=False)
+    tax_amount = Column(Numeric(14, 2), default=0.00, nullable=False)
+    net_amount = Column(Numeric(14, 2), default=0.00, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        onupdate=func.now(), nullable=False)
+
+
+class SalesDailyProductModel(Base):
+    __tablename__ = "sales_daily_products"
+
+    sales_date = Column(Date, primary_key=True, nullable=False)
+    product_sku = Column(String(100), primary_key=True, nullable=False)
+    product_name = Column(String(255), nullable=False)
+    units_sold = Column(Integer, default=0, nullable=False)
+    revenue = Column(Numeric(14, 2), default=0.00, nullable=False)
+
+
+class SalesDailyPaymentMethodModel(Base):
+    __tablename__ = "sales_daily_payment_methods"
+
+    sales_date = Column(Date, primary_key=True, nullable=False)
+    payment_method = Column(String(50), primary_key=True, nullable=False)
+    purchases_count = Column(Integer, default=0, nullable=False)
+    net_amount = Column(Numeric(14, 2), default=0.00, nullable=False)
+
+
+class RollupWatermarkModel(Base):
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(100), primary_key=True, nullable=False)
+    last_purchased_at = Column(DateTime(timezone=True), nullable=True)
+    last_purchase_id = Column(UUID(as_uuid=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        onupdate=func.now(), nullable=False)
+
+
+class SalesRollupDirtyDayModel(Base):
+    """Días con compras ya agregadas que cambiaron después (montos, método de pago): el job de
+    rollups los recalcula desde purchases"""
+    __tablename__ = "sales_rollup_dirty_days"
+
+    sales_date = Column(Date, primary_key=True, nullable=False)
+    marked_at = Column(DateTime(timezone=True),
+                       server_default=func.now(), nullable=False)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, Integer, Numeric
+from sqlalchemy.sql import func
+from app.infrastructure.db.models.models import Base
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class UserOrderStatsModel(Base):
+    """Totales históricos de compras por usuario, actualizados en la misma transacción que la compra
+    (ver UserOrderStatsRepository)"""
+    __tablename__ = "user_order_stats"
+
+    user_id = Column(String(255), primary_key=True, nullable=False)
+    orders_count = Column(Integer, default=0, nullable=False)
+    total_spent = Column(Numeric(14, 2), default=0.00, nullable=False)
+    first_order_at = Column(DateTime(timezone=True), nullable=True)
+    last_order_at = Column(DateTime(timezone=True), nullable=True)
+    last_purchase_id = Column(UUID(as_uuid=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        onupdate=func.now(), nullable=False)
@@ -2,3 +2,10 @@ from .cart_repository import CartRepository
 from .cart_item_repository import CartItemRepository
 from .purchase_repository import PurchaseRepository
 from .receipt_repository import ReceiptRepository
+from .cart_maintenance_repository import CartMaintenanceRepository
+from .receipt_job_repository import ReceiptJobRepository
+from .sales_rollup_repository import SalesRollupRepository
+from .checkout_saga_repository import CheckoutSagaRepository
+from .outbox_repository import OutboxRepository
+from .promotion_repository import PromotionRepository
+from .user_order_stats_repository import UserOrderStatsRepository
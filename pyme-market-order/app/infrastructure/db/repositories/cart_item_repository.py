@@ -1,14 +1,19 @@
-from typing import Optional, List
+from typing import Dict, Optional, List, Set
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func, delete, update, bindparam, Numeric, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert, ARRAY, UUID as PG_UUID
 from sqlalchemy.exc import IntegrityError
 from app.domain.entities.cart_item import CartItem
 from app.infrastructure.db.models.cart_item_model import CartItemModel
+from app.infrastructure.db.models.cart_model import CartModel
 from app.schemas.cart_item_schema import CartItemCreate, CartItemUpdate
 from app.domain.exceptions.not_found_exception import NotFoundException
 from app.domain.exceptions.internal_exception import InternalException
 
+# Filas por sentencia al escribir cambios acumulados (límite de parámetros de asyncpg)
+APPLY_CHANGES_CHUNK_ROWS = 1000
+
 
 class CartItemRepository:
     def __init__(self, session: AsyncSession):
@@ -72,6 +77,27 @@ class CartItemRepository:
         except Exception as e:
             raise InternalException() from e
 
+    async def get_cart_items_by_carts(self, cart_ids: List[UUID]) -> Dict[UUID, List[CartItem]]:
+        """Obtener los items de muchos carritos con una sola consulta, agrupados por carrito"""
+        if not cart_ids:
+            return {}
+
+        try:
+            stmt = select(CartItemModel).where(
+                CartItemModel.cart_id.in_(cart_ids)
+            ).order_by(CartItemModel.cart_id, CartItemModel.added_at.asc())
+
+            result = await self.session.execute(stmt)
+            items_by_cart: Dict[UUID, List[CartItem]] = {}
+            for model in result.scalars().all():
+                items_by_cart.setdefault(model.cart_id, []).append(
+                    self._model_to_entity(model))
+
+            return items_by_cart
+
+        except Exception as e:
+            raise InternalException() from e
+
     async def get_cart_item_by_product(self, cart_id: UUID, product_id: UUID) -> Optional[CartItem]:
         """Obtener item específico por producto en un carrito"""
         try:
@@ -165,13 +191,9 @@ class CartItemRepository:
     async def delete_cart_items_by_cart(self, cart_id: UUID) -> bool:
         """Eliminar todos los items de un carrito"""
         try:
-            stmt = select(CartItemModel).where(
+            stmt = delete(CartItemModel).where(
                 CartItemModel.cart_id == cart_id)
-            result = await self.session.execute(stmt)
-            cart_items = result.scalars().all()
-
-            for item in cart_items:
-                await self.session.delete(item)
+            await self.session.execute(stmt)
 
             await self.session.commit()
             return True
@@ -180,15 +202,115 @@ class CartItemRepository:
             await self.session.rollback()
             raise InternalException() from e
 
+    async def delete_items_for_carts(self, cart_ids: List[UUID]) -> int:
+        """Eliminar los items de varios carritos y reiniciar sus totales en una transacción"""
+        if not cart_ids:
+            return 0
+
+        try:
+            delete_stmt = delete(CartItemModel).where(
+                CartItemModel.cart_id.in_(cart_ids)
+            ).returning(CartItemModel.cart_item_id)
+            result = await self.session.execute(delete_stmt)
+            deleted_items = len(result.all())
+
+            reset_stmt = update(CartModel).where(
+                CartModel.cart_id.in_(cart_ids)
+            ).values(total_amount=0, total_items=0)
+            await self.session.execute(reset_stmt)
+
+            await self.session.commit()
+            return deleted_items
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def apply_cart_changes(self, changes: List[dict]) -> Set[UUID]:
+        """Escribir en una transacción los cambios acumulados de muchos carritos. Cada dict lleva
+        cart_id, total_amount, total_items, items (a insertar o actualizar) y removed_item_ids.
+        Sólo se tocan los carritos que siguen activos; devuelve sus IDs"""
+        if not changes:
+            return set()
+
+        try:
+            # El UPDATE bloquea las filas de los carritos: nadie los completa a mitad de la escritura
+            totals = func.unnest(
+                bindparam("cart_ids", [change["cart_id"] for change in changes],
+                          type_=ARRAY(PG_UUID(as_uuid=True))),
+                bindparam("total_amounts", [change["total_amount"] for change in changes],
+                          type_=ARRAY(Numeric(10, 2))),
+                bindparam("total_items", [change["total_items"] for change in changes],
+                          type_=ARRAY(Integer))
+            ).table_valued("cart_id", "total_amount", "total_items").render_derived(name="totals")
+
+            totals_stmt = update(CartModel).where(
+                and_(
+                    CartModel.cart_id == totals.c.cart_id,
+                    CartModel.status == "active",
+                    CartModel.is_active.is_(True)
+                )
+            ).values(
+                total_amount=totals.c.total_amount,
+                total_items=totals.c.total_items,
+                updated_at=func.now()
+            ).returning(CartModel.cart_id)
+            result = await self.session.execute(
+                totals_stmt, execution_options={"synchronize_session": False})
+            active_cart_ids = set(result.scalars().all())
+
+            active_changes = [
+                change for change in changes if change["cart_id"] in active_cart_ids]
+
+            removed_item_ids = [item_id for change in active_changes
+                                for item_id in change["removed_item_ids"]]
+            for start in range(0, len(removed_item_ids), APPLY_CHANGES_CHUNK_ROWS):
+                await self.session.execute(delete(CartItemModel).where(
+                    CartItemModel.cart_item_id.in_(
+                        removed_item_ids[start:start + APPLY_CHANGES_CHUNK_ROWS])))
+
+            items = [item for change in active_changes for item in change["items"]]
+            for start in range(0, len(items), APPLY_CHANGES_CHUNK_ROWS):
+                upsert_stmt = pg_insert(CartItemModel).values([
+                    {
+                        "cart_item_id": item.cart_item_id,
+                        "cart_id": item.cart_id,
+                        "product_id": item.product_id,
+                        "product_name": item.product_name,
+                        "product_sku": item.product_sku,
+                        "unit_price": item.unit_price,
+                        "quantity": item.quantity,
+                        "subtotal": item.subtotal,
+                        "added_at": item.added_at,
+                        "updated_at": item.updated_at
+                    }
+                    for item in items[start:start + APPLY_CHANGES_CHUNK_ROWS]
+                ])
+                upsert_stmt = upsert_stmt.on_conflict_do_update(
+                    index_elements=[CartItemModel.cart_item_id],
+                    set_={
+                        "quantity": upsert_stmt.excluded.quantity,
+                        "subtotal": upsert_stmt.excluded.subtotal,
+                        "updated_at": upsert_stmt.excluded.updated_at
+                    }
+                )
+                await self.session.execute(upsert_stmt)
+
+            await self.session.commit()
+            return active_cart_ids
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
     async def count_cart_items(self, cart_id: UUID) -> int:
         """Contar items en un carrito"""
         try:
-            stmt = select(CartItemModel).where(
+            stmt = select(func.count(CartItemModel.cart_item_id)).where(
                 CartItemModel.cart_id == cart_id)
             result = await self.session.execute(stmt)
-            cart_items = result.scalars().all()
 
-            return len(cart_items)
+            return result.scalar_one()
 
         except Exception as e:
             raise InternalException() from e
@@ -196,15 +318,47 @@ class CartItemRepository:
     async def calculate_cart_totals(self, cart_id: UUID) -> tuple[float, int]:
         """Calcular totales del carrito (amount, items)"""
         try:
-            stmt = select(CartItemModel).where(
-                CartItemModel.cart_id == cart_id)
+            stmt = select(
+                func.coalesce(func.sum(CartItemModel.subtotal), 0),
+                func.coalesce(func.sum(CartItemModel.quantity), 0)
+            ).where(CartItemModel.cart_id == cart_id)
             result = await self.session.execute(stmt)
-            cart_items = result.scalars().all()
+            total_amount, total_items = result.one()
 
-            total_amount = sum(float(item.subtotal) for item in cart_items)
-            total_items = sum(item.quantity for item in cart_items)
+            return float(total_amount), int(total_items)
 
-            return total_amount, total_items
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_cart_summary(self, cart_id: UUID) -> Optional[dict]:
+        """Obtener resumen agregado del carrito en una sola consulta (None si no existe)"""
+        try:
+            stmt = select(
+                CartModel.cart_id,
+                func.count(CartItemModel.cart_item_id).label("items_count"),
+                func.coalesce(func.sum(CartItemModel.quantity),
+                              0).label("total_items"),
+                func.coalesce(func.sum(CartItemModel.subtotal),
+                              0).label("total_amount")
+            ).outerjoin(
+                CartItemModel, CartItemModel.cart_id == CartModel.cart_id
+            ).where(
+                CartModel.cart_id == cart_id
+            ).group_by(CartModel.cart_id)
+
+            result = await self.session.execute(stmt)
+            row = result.one_or_none()
+
+            if not row:
+                return None
+
+            return {
+                "cart_id": str(row.cart_id),
+                "total_amount": float(row.total_amount),
+                "total_items": int(row.total_items),
+                "items_count": row.items_count,
+                "is_empty": row.total_items == 0
+            }
 
         except Exception as e:
             raise InternalException() from e
@@ -0,0 +1,174 @@
+from typing import List, Tuple
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, insert, func, and_, exists, text
+from app.infrastructure.db.models.cart_model import CartModel
+from app.infrastructure.db.models.cart_item_model import CartItemModel
+from app.infrastructure.db.models.cart_item_archive_model import CartItemArchiveModel, CART_ITEM_COLUMNS
+from app.infrastructure.db.models.cart_archive_model import CartArchiveModel
+from app.infrastructure.db.models.purchase_model import PurchaseModel
+from app.infrastructure.db.models.checkout_saga_model import CheckoutSagaModel
+from app.infrastructure.db.repositories.checkout_saga_repository import IN_FLIGHT_SAGA_STATUSES
+from app.infrastructure.db.repositories.outbox_repository import OutboxRepository
+from app.domain.exceptions.internal_exception import InternalException
+
+
+class CartMaintenanceRepository:
+    """Operaciones masivas de mantenimiento. No confirman la transacción: el llamador decide cuándo hacer commit."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def try_advisory_xact_lock(self, lock_key: int) -> bool:
+        """Intentar tomar un advisory lock ligado a la transacción actual"""
+        try:
+            result = await self.session.execute(
+                select(func.pg_try_advisory_xact_lock(lock_key)))
+            return bool(result.scalar_one())
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def mark_idle_carts_as_abandoned(self, idle_before: datetime, limit: int) -> List[UUID]:
+        """Marcar como abandonado un lote de carritos activos inactivos desde idle_before (FOR UPDATE SKIP LOCKED)"""
+        try:
+            stale_carts = select(CartModel.cart_id).where(
+                and_(
+                    CartModel.status == "active",
+                    CartModel.updated_at < idle_before
+                )
+            ).order_by(
+                CartModel.updated_at.asc()
+            ).limit(limit).with_for_update(skip_locked=True).cte("stale_carts")
+
+            stmt = update(CartModel).where(
+                CartModel.cart_id == stale_carts.c.cart_id
+            ).values(
+                status="abandoned"
+            ).returning(CartModel.cart_id)
+
+            result = await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            cart_ids = list(result.scalars().all())
+
+            await OutboxRepository(self.session).add_cart_abandoned_events(cart_ids)
+            return cart_ids
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def purge_items_for_carts(self, cart_ids: List[UUID]) -> int:
+        """Eliminar los items de los carritos dados y reiniciar sus totales"""
+        if not cart_ids:
+            return 0
+
+        try:
+            result = await self.session.execute(
+                delete(CartItemModel).where(
+                    CartItemModel.cart_id.in_(cart_ids)
+                ).returning(CartItemModel.cart_item_id)
+            )
+            purged_items = len(result.all())
+
+            await self._reset_cart_totals(cart_ids)
+            return purged_items
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def archive_items_for_carts(self, cart_ids: List[UUID]) -> int:
+        """Mover los items de los carritos dados a cart_items_archive en una sola sentencia"""
+        if not cart_ids:
+            return 0
+
+        try:
+            archived_items = await self._move_items_to_archive(cart_ids)
+
+            await self._reset_cart_totals(cart_ids)
+            return archived_items
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def archive_closed_carts(self, closed_before: datetime, limit: int) -> Tuple[int, int]:
+        """Mover a carts_archive y cart_items_archive un lote de carritos completados o abandonados
+        antes de closed_before (FOR UPDATE SKIP LOCKED); devuelve (carritos, items). Un carrito
+        completado sólo se archiva cuando su compra ya tiene los conteos de items, así el historial
+        nunca vuelve a leer sus items. Las sagas terminadas del carrito se eliminan"""
+        try:
+            closed_at = func.coalesce(CartModel.completed_at, CartModel.updated_at)
+            counters_pending = exists().where(
+                PurchaseModel.cart_id == CartModel.cart_id,
+                PurchaseModel.items_count.is_(None)
+            )
+            checkout_in_flight = exists().where(
+                CheckoutSagaModel.cart_id == CartModel.cart_id,
+                CheckoutSagaModel.status.in_(IN_FLIGHT_SAGA_STATUSES)
+            )
+
+            result = await self.session.execute(
+                select(CartModel.cart_id).where(
+                    # Predicado literal para que coincida con el índice parcial ix_carts_closed_at
+                    text("carts.status IN ('completed', 'abandoned')"),
+                    closed_at < closed_before,
+                    ~counters_pending,
+                    ~checkout_in_flight
+                ).order_by(closed_at).limit(limit).with_for_update(skip_locked=True)
+            )
+            cart_ids = list(result.scalars().all())
+            if not cart_ids:
+                return 0, 0
+
+            archived_items = await self._move_items_to_archive(cart_ids)
+
+            await self.session.execute(delete(CheckoutSagaModel).where(
+                CheckoutSagaModel.cart_id.in_(cart_ids)))
+
+            cart_columns = [
+                "cart_id", "user_id", "status", "total_amount", "total_items", "is_active",
+                "created_at", "updated_at", "completed_at"
+            ]
+            moved_carts = delete(CartModel).where(
+                CartModel.cart_id.in_(cart_ids)
+            ).returning(
+                *[CartModel.__table__.c[column] for column in cart_columns]
+            ).cte("moved_carts")
+
+            result = await self.session.execute(
+                insert(CartArchiveModel).from_select(
+                    cart_columns, select(
+                        *[moved_carts.c[column] for column in cart_columns])
+                ).returning(CartArchiveModel.cart_id)
+            )
+            archived_carts = len(result.all())
+
+            return archived_carts, archived_items
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def _move_items_to_archive(self, cart_ids: List[UUID]) -> int:
+        """Mover los items de los carritos dados a cart_items_archive en una sola sentencia"""
+        moved_items = delete(CartItemModel).where(
+            CartItemModel.cart_id.in_(cart_ids)
+        ).returning(
+            *[CartItemModel.__table__.c[column] for column in CART_ITEM_COLUMNS]
+        ).cte("moved_items")
+
+        stmt = insert(CartItemArchiveModel).from_select(
+            CART_ITEM_COLUMNS, select(
+                *[moved_items.c[column] for column in CART_ITEM_COLUMNS])
+        ).returning(CartItemArchiveModel.cart_item_id)
+
+        result = await self.session.execute(stmt)
+        return len(result.all())
+
+    async def _reset_cart_totals(self, cart_ids: List[UUID]) -> None:
+        """Reiniciar totales de los carritos dados"""
+        await self.session.execute(
+            update(CartModel).where(
+                CartModel.cart_id.in_(cart_ids)
+            ).values(total_amount=0, total_items=0),
+            execution_options={"synchronize_session": False}
+        )
@@ -1,10 +1,16 @@
 from typing import Optional, List
-from uuid import UUID
+from uuid import UUID, uuid4
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, delete, update, exists, union_all, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
 from app.domain.entities.cart import Cart
+from app.domain.entities.cart_item import CartItem
 from app.infrastructure.db.models.cart_model import CartModel
+from app.infrastructure.db.models.cart_item_model import CartItemModel
+from app.infrastructure.db.repositories.outbox_repository import OutboxRepository
 from app.schemas.cart_schema import CartCreate, CartUpdate
 from app.domain.exceptions.not_found_exception import NotFoundException
 from app.domain.exceptions.internal_exception import InternalException
@@ -55,6 +61,20 @@ class CartRepository:
         except Exception as e:
             raise InternalException() from e
 
+    async def get_carts_by_ids(self, cart_ids: List[UUID]) -> List[Cart]:
+        """Obtener muchos carritos (sin items) con una sola consulta"""
+        if not cart_ids:
+            return []
+
+        try:
+            stmt = select(CartModel).where(CartModel.cart_id.in_(cart_ids))
+            result = await self.session.execute(stmt)
+
+            return [self._model_to_entity(cart_model) for cart_model in result.scalars().all()]
+
+        except Exception as e:
+            raise InternalException() from e
+
     async def get_active_cart_by_user(self, user_id: str) -> Optional[Cart]:
         """Obtener carrito activo de un usuario"""
         try:
@@ -67,7 +87,7 @@ class CartRepository:
             ).order_by(CartModel.created_at.desc())
 
             result = await self.session.execute(stmt)
-            cart_model = result.scalar_one_or_none()
+            cart_model = result.scalars().first()
 
             if cart_model:
                 return self._model_to_entity(cart_model)
@@ -77,6 +97,92 @@ class CartRepository:
             error_msg = f"Error getting active cart for user {user_id}: {type(e).__name__}: {str(e)}"
             raise Exception(error_msg) from e
 
+    async def get_or_create_active_cart(self, user_id: str) -> Cart:
+        """Obtener o crear el carrito activo del usuario con INSERT ... ON CONFLICT DO NOTHING en una sola consulta"""
+        try:
+            active_condition = and_(
+                CartModel.status == "active",
+                CartModel.is_active == True
+            )
+            carts = CartModel.__table__
+
+            inserted_cart = pg_insert(CartModel).values(
+                cart_id=uuid4(),
+                user_id=user_id,
+                status="active",
+                total_amount=0,
+                total_items=0,
+                is_active=True
+            ).on_conflict_do_nothing(
+                index_elements=[CartModel.user_id],
+                index_where=text("status = 'active' AND is_active = true")
+            ).returning(*carts.c).cte("inserted_cart")
+
+            existing_cart = select(*carts.c).where(
+                and_(
+                    CartModel.user_id == user_id,
+                    active_condition,
+                    ~exists(select(inserted_cart.c.cart_id))
+                )
+            )
+
+            stmt = union_all(select(*inserted_cart.c), existing_cart)
+            result = await self.session.execute(stmt)
+            row = result.first()
+            await self.session.commit()
+
+            if row:
+                return Cart.model_validate(dict(row._mapping))
+
+            # La fila en conflicto se confirmó después de tomar el snapshot de la sentencia
+            cart = await self.get_active_cart_by_user(user_id)
+            if not cart:
+                raise InternalException(
+                    f"Active cart for user {user_id} could not be created")
+            return cart
+
+        except InternalException:
+            raise
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException(
+                f"Database error when getting or creating active cart: {type(e).__name__}: {str(e)}") from e
+
+    async def get_cart_with_items_by_id(self, cart_id: UUID) -> Optional[Cart]:
+        """Obtener carrito por ID junto con sus items en una sola consulta"""
+        try:
+            stmt = self._select_cart_with_items().where(
+                CartModel.cart_id == cart_id)
+            result = await self.session.execute(stmt)
+            cart_models = result.unique().scalars().all()
+
+            if cart_models:
+                return self._model_to_entity(cart_models[0], include_items=True)
+            return None
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_active_cart_with_items_by_user(self, user_id: str) -> Optional[Cart]:
+        """Obtener carrito activo de un usuario junto con sus items en una sola consulta"""
+        try:
+            stmt = self._select_cart_with_items().where(
+                and_(
+                    CartModel.user_id == user_id,
+                    CartModel.status == "active",
+                    CartModel.is_active == True
+                )
+            )
+            result = await self.session.execute(stmt)
+            cart_models = result.unique().scalars().all()
+
+            if cart_models:
+                return self._model_to_entity(cart_models[0], include_items=True)
+            return None
+
+        except Exception as e:
+            raise InternalException() from e
+
     async def get_carts_by_user(self, user_id: str, include_inactive: bool = False) -> List[Cart]:
         """Obtener todos los carritos de un usuario"""
         try:
@@ -151,6 +257,58 @@ class CartRepository:
             await self.session.rollback()
             raise InternalException() from e
 
+    async def clear_cart(self, cart_id: UUID) -> Optional[Cart]:
+        """Vaciar carrito en una sola sentencia: DELETE ... RETURNING de sus items como CTE y
+        reinicio de totales que devuelve el carrito"""
+        try:
+            deleted_items = delete(CartItemModel).where(
+                CartItemModel.cart_id == cart_id
+            ).returning(CartItemModel.cart_item_id).cte("deleted_items")
+
+            reset_stmt = update(CartModel).where(
+                CartModel.cart_id == cart_id
+            ).values(
+                total_amount=0, total_items=0
+            ).returning(CartModel).add_cte(deleted_items).execution_options(populate_existing=True)
+            result = await self.session.execute(reset_stmt)
+            cart_model = result.scalar_one_or_none()
+
+            if not cart_model:
+                await self.session.rollback()
+                return None
+
+            cart = self._model_to_entity(cart_model)
+            await self.session.commit()
+
+            return cart
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def get_abandoned_cart_ids_with_items(self, limit: int,
+                                                updated_before: Optional[datetime] = None) -> List[UUID]:
+        """Obtener un lote de IDs de carritos abandonados que aún tienen items"""
+        try:
+            conditions = [
+                CartModel.status == "abandoned",
+                select(CartItemModel.cart_item_id).where(
+                    CartItemModel.cart_id == CartModel.cart_id
+                ).exists()
+            ]
+            if updated_before is not None:
+                conditions.append(CartModel.updated_at < updated_before)
+
+            stmt = select(CartModel.cart_id).where(
+                and_(*conditions)
+            ).limit(limit)
+
+            result = await self.session.execute(stmt)
+            return list(result.scalars().all())
+
+        except Exception as e:
+            raise InternalException() from e
+
     async def mark_cart_as_completed(self, cart_id: UUID) -> Cart:
         """Marcar carrito como completado"""
         try:
@@ -165,6 +323,9 @@ class CartRepository:
             from datetime import datetime, timezone
             cart_model.completed_at = datetime.now(timezone.utc)
 
+            await OutboxRepository(self.session).add_cart_event(
+                "cart.completed", cart_model.cart_id, cart_model.user_id,
+                cart_model.total_amount, cart_model.total_items)
             await self.session.commit()
             await self.session.refresh(cart_model)
 
@@ -188,6 +349,9 @@ class CartRepository:
 
             cart_model.status = "abandoned"
 
+            await OutboxRepository(self.session).add_cart_event(
+                "cart.abandoned", cart_model.cart_id, cart_model.user_id,
+                cart_model.total_amount, cart_model.total_items)
             await self.session.commit()
             await self.session.refresh(cart_model)
 
@@ -218,7 +382,18 @@ class CartRepository:
             await self.session.rollback()
             raise InternalException() from e
 
-    def _model_to_entity(self, cart_model: CartModel) -> Cart:
+    def _select_cart_with_items(self):
+        """Consulta base: carrito con sus items cargados por LEFT JOIN"""
+        return select(CartModel).outerjoin(
+            CartModel.cart_items
+        ).options(
+            contains_eager(CartModel.cart_items)
+        ).order_by(
+            CartModel.created_at.desc(),
+            CartItemModel.added_at.asc()
+        )
+
+    def _model_to_entity(self, cart_model: CartModel, include_items: bool = False) -> Cart:
         """Convertir modelo SQLAlchemy a entidad de dominio"""
         return Cart(
             cart_id=cart_model.cart_id,
@@ -229,5 +404,20 @@ class CartRepository:
             is_active=cart_model.is_active,
             created_at=cart_model.created_at,
             updated_at=cart_model.updated_at,
-            completed_at=cart_model.completed_at
+            completed_at=cart_model.completed_at,
+            cart_items=[
+                CartItem(
+                    cart_item_id=item.cart_item_id,
+                    cart_id=item.cart_id,
+                    product_id=item.product_id,
+                    product_name=item.product_name,
+                    product_sku=item.product_sku,
+                    unit_price=item.unit_price,
+                    quantity=item.quantity,
+                    subtotal=item.subtotal,
+                    added_at=item.added_at,
+                    updated_at=item.updated_at
+                )
+                for item in cart_model.cart_items
+            ] if include_items else None
         )
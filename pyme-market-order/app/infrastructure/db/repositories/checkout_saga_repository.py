@@ -0,0 +1,209 @@
+from typing import Optional, List
+from uuid import UUID, uuid4
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_, func, bindparam, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert, ARRAY, JSONB, UUID as PG_UUID
+from sqlalchemy.exc import IntegrityError
+from app.infrastructure.db.models.checkout_saga_model import CheckoutSagaModel
+from app.domain.exceptions.internal_exception import InternalException
+
+IN_FLIGHT_SAGA_STATUSES = ["started", "reserved", "compensating"]
+
+
+class CheckoutSagaRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_saga(self, cart_id: UUID, user_id: str, lines: List[dict],
+                          payment_method: Optional[str] = None,
+                          discount_percentage: Optional[Decimal] = None,
+                          tax_percentage: Optional[Decimal] = None,
+                          discount_amount: Optional[Decimal] = None,
+                          promotion_ids: Optional[List[UUID]] = None) -> Optional[dict]:
+        """Registrar el inicio de un checkout; None si el carrito ya tiene otro checkout en curso"""
+        try:
+            saga_model = CheckoutSagaModel(
+                saga_id=uuid4(),
+                cart_id=cart_id,
+                user_id=user_id,
+                status="started",
+                payment_method=payment_method,
+                discount_percentage=discount_percentage,
+                tax_percentage=tax_percentage,
+                discount_amount=discount_amount,
+                promotion_ids=promotion_ids,
+                lines=lines,
+                attempts=0
+            )
+
+            self.session.add(saga_model)
+            await self.session.commit()
+            await self.session.refresh(saga_model)
+
+            return self._model_to_dict(saga_model)
+
+        except IntegrityError:
+            # uq_checkout_sagas_cart_in_flight: sólo un checkout en curso por carrito
+            await self.session.rollback()
+            return None
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def create_sagas(self, sagas: List[dict]) -> List[dict]:
+        """Registrar el inicio de muchos checkouts con un solo INSERT. Cada dict lleva cart_id, user_id,
+        lines, payment_method, discount_percentage, tax_percentage, discount_amount y promotion_ids;
+        se omiten los carritos que ya tienen otro checkout en curso"""
+        if not sagas:
+            return []
+
+        try:
+            stmt = pg_insert(CheckoutSagaModel).values([
+                {"saga_id": uuid4(), "status": "started", "attempts": 0, **saga}
+                for saga in sagas
+            ]).on_conflict_do_nothing(
+                # Predicado literal: la inferencia del índice parcial no admite parámetros
+                index_elements=[CheckoutSagaModel.cart_id],
+                index_where=text("status IN ('started', 'reserved', 'compensating')")
+            ).returning(CheckoutSagaModel)
+
+            result = await self.session.execute(stmt)
+            created = [self._model_to_dict(saga_model)
+                       for saga_model in result.scalars().all()]
+            await self.session.commit()
+
+            return created
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def get_saga_by_id(self, saga_id: UUID) -> Optional[dict]:
+        """Obtener el estado de un checkout"""
+        try:
+            stmt = select(CheckoutSagaModel).where(
+                CheckoutSagaModel.saga_id == saga_id)
+            result = await self.session.execute(stmt)
+            saga_model = result.scalar_one_or_none()
+
+            if saga_model:
+                return self._model_to_dict(saga_model)
+            return None
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_latest_saga_by_cart(self, cart_id: UUID) -> Optional[dict]:
+        """Obtener el checkout más reciente de un carrito"""
+        try:
+            stmt = select(CheckoutSagaModel).where(
+                CheckoutSagaModel.cart_id == cart_id
+            ).order_by(CheckoutSagaModel.created_at.desc()).limit(1)
+            result = await self.session.execute(stmt)
+            saga_model = result.scalar_one_or_none()
+
+            if saga_model:
+                return self._model_to_dict(saga_model)
+            return None
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def update_saga(self, saga_id: UUID, **values) -> None:
+        """Persistir un paso del checkout (estado, líneas, error)"""
+        try:
+            if "last_error" in values and values["last_error"]:
+                values["last_error"] = values["last_error"][:1000]
+
+            stmt = update(CheckoutSagaModel).where(
+                CheckoutSagaModel.saga_id == saga_id
+            ).values(updated_at=func.now(), **values)
+            await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            await self.session.commit()
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def mark_sagas_reserved(self, sagas: List[dict]) -> None:
+        """Pasar muchos checkouts a 'reserved' con sus líneas en un solo UPDATE ... FROM unnest(...)"""
+        if not sagas:
+            return
+
+        try:
+            reserved = func.unnest(
+                bindparam("saga_ids", [saga["saga_id"] for saga in sagas],
+                          type_=ARRAY(PG_UUID(as_uuid=True))),
+                bindparam("lines", [saga["lines"] for saga in sagas],
+                          type_=ARRAY(JSONB))
+            ).table_valued("saga_id", "lines").render_derived(name="reserved")
+
+            stmt = update(CheckoutSagaModel).where(
+                CheckoutSagaModel.saga_id == reserved.c.saga_id
+            ).values(
+                status="reserved",
+                lines=reserved.c.lines,
+                updated_at=func.now()
+            )
+            await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            await self.session.commit()
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def claim_stale_sagas(self, stale_before: datetime, limit: int) -> List[dict]:
+        """Reservar checkouts en curso sin avance desde stale_before (FOR UPDATE SKIP LOCKED).
+        Al tocar updated_at el checkout queda fuera de la siguiente búsqueda mientras se recupera."""
+        try:
+            claimable = select(CheckoutSagaModel.saga_id).where(
+                and_(
+                    CheckoutSagaModel.status.in_(IN_FLIGHT_SAGA_STATUSES),
+                    CheckoutSagaModel.updated_at < stale_before
+                )
+            ).order_by(
+                CheckoutSagaModel.updated_at.asc()
+            ).limit(limit).with_for_update(skip_locked=True).cte("claimable_sagas")
+
+            stmt = update(CheckoutSagaModel).where(
+                CheckoutSagaModel.saga_id == claimable.c.saga_id
+            ).values(
+                attempts=CheckoutSagaModel.attempts + 1,
+                updated_at=func.now()
+            ).returning(CheckoutSagaModel)
+
+            result = await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            sagas = [self._model_to_dict(saga_model)
+                     for saga_model in result.scalars().all()]
+            await self.session.commit()
+
+            return sagas
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    def _model_to_dict(self, saga_model: CheckoutSagaModel) -> dict:
+        """Convertir modelo SQLAlchemy a diccionario"""
+        return {
+            "saga_id": saga_model.saga_id,
+            "cart_id": saga_model.cart_id,
+            "user_id": saga_model.user_id,
+            "status": saga_model.status,
+            "payment_method": saga_model.payment_method,
+            "discount_percentage": saga_model.discount_percentage,
+            "tax_percentage": saga_model.tax_percentage,
+            "discount_amount": saga_model.discount_amount,
+            "promotion_ids": saga_model.promotion_ids,
+            "lines": saga_model.lines,
+            "purchase_id": saga_model.purchase_id,
+            "attempts": saga_model.attempts,
+            "last_error": saga_model.last_error,
+            "created_at": saga_model.created_at,
+            "updated_at": saga_model.updated_at
+        }
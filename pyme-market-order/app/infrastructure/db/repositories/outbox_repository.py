@@ -0,0 +1,231 @@
+from typing import List, Optional
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from decimal import Decimal
+from sqlalchemy import select, update, delete, insert, and_, exists, func, literal_column, cast, String
+from sqlalchemy.orm import aliased
+from app.infrastructure.db.models.outbox_event_model import OutboxEventModel
+from app.infrastructure.db.models.cart_model import CartModel
+from app.domain.exceptions.internal_exception import InternalException
+
+
+class OutboxRepository:
+    """Eventos de dominio pendientes de publicar. add_* no confirma: el evento viaja en la
+    transacción del cambio que lo origina."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_event(self, aggregate_type: str, aggregate_id: UUID, event_type: str, payload: dict) -> None:
+        """Registrar un evento en la transacción en curso"""
+        try:
+            await self.session.execute(
+                insert(OutboxEventModel).values(
+                    event_id=uuid4(),
+                    aggregate_type=aggregate_type,
+                    aggregate_id=aggregate_id,
+                    event_type=event_type,
+                    payload=payload,
+                    attempts=0
+                )
+            )
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def add_events(self, events: List[dict]) -> None:
+        """Registrar muchos eventos con un solo INSERT (dicts de cart_event / purchase_created_event),
+        en el orden recibido"""
+        if not events:
+            return
+
+        try:
+            await self.session.execute(
+                insert(OutboxEventModel).values([
+                    {"event_id": uuid4(), "attempts": 0, **event} for event in events
+                ])
+            )
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def add_cart_event(self, event_type: str, cart_id: UUID, user_id: str,
+                             total_amount: Decimal, total_items: int) -> None:
+        """Registrar cart.completed / cart.abandoned"""
+        await self.add_event(**self.cart_event(event_type, cart_id, user_id, total_amount, total_items))
+
+    async def add_purchase_created_event(self, purchase_id: UUID, purchase_number: str, cart_id: UUID,
+                                         user_id: str, total_amount: Decimal, discount_amount: Decimal,
+                                         tax_amount: Decimal, final_amount: Decimal,
+                                         payment_method: Optional[str]) -> None:
+        """Registrar purchase.created"""
+        await self.add_event(**self.purchase_created_event(
+            purchase_id, purchase_number, cart_id, user_id, total_amount, discount_amount,
+            tax_amount, final_amount, payment_method))
+
+    def cart_event(self, event_type: str, cart_id: UUID, user_id: str,
+                   total_amount: Decimal, total_items: int) -> dict:
+        """Evento cart.completed / cart.abandoned"""
+        return {
+            "aggregate_type": "cart",
+            "aggregate_id": cart_id,
+            "event_type": event_type,
+            "payload": {
+                "cartId": str(cart_id),
+                "userId": user_id,
+                "totalAmount": str(total_amount),
+                "totalItems": total_items
+            }
+        }
+
+    def purchase_created_event(self, purchase_id: UUID, purchase_number: str, cart_id: UUID,
+                               user_id: str, total_amount: Decimal, discount_amount: Decimal,
+                               tax_amount: Decimal, final_amount: Decimal,
+                               payment_method: Optional[str]) -> dict:
+        """Evento purchase.created"""
+        return {
+            "aggregate_type": "purchase",
+            "aggregate_id": purchase_id,
+            "event_type": "purchase.created",
+            "payload": {
+                "purchaseId": str(purchase_id),
+                "purchaseNumber": purchase_number,
+                "cartId": str(cart_id),
+                "userId": user_id,
+                "totalAmount": str(total_amount),
+                "discountAmount": str(discount_amount),
+                "taxAmount": str(tax_amount),
+                "finalAmount": str(final_amount),
+                "paymentMethod": payment_method
+            }
+        }
+
+    async def add_cart_abandoned_events(self, cart_ids: List[UUID]) -> None:
+        """Registrar cart.abandoned para un lote de carritos con una sola sentencia INSERT ... SELECT"""
+        if not cart_ids:
+            return
+
+        try:
+            # Constantes en línea: jsonb_build_object es polimórfico y no admite parámetros sin tipo
+            events = select(
+                func.gen_random_uuid(),
+                literal_column("'cart'"),
+                CartModel.cart_id,
+                literal_column("'cart.abandoned'"),
+                func.jsonb_build_object(
+                    literal_column("'cartId'"), CartModel.cart_id,
+                    literal_column("'userId'"), CartModel.user_id,
+                    literal_column("'totalAmount'"), cast(
+                        CartModel.total_amount, String),
+                    literal_column("'totalItems'"), CartModel.total_items
+                ),
+                literal_column("0")
+            ).where(CartModel.cart_id.in_(cart_ids))
+
+            await self.session.execute(
+                insert(OutboxEventModel).from_select(
+                    ["event_id", "aggregate_type", "aggregate_id",
+                        "event_type", "payload", "attempts"],
+                    events
+                )
+            )
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def claim_events(self, limit: int, lease_seconds: int) -> List[dict]:
+        """Reservar un lote de eventos listos, a lo sumo el más antiguo pendiente de cada agregado,
+        para que ningún evento se publique antes que otro anterior del mismo agregado"""
+        try:
+            earlier = aliased(OutboxEventModel)
+            has_earlier_pending = exists().where(
+                and_(
+                    earlier.aggregate_type == OutboxEventModel.aggregate_type,
+                    earlier.aggregate_id == OutboxEventModel.aggregate_id,
+                    earlier.published_at.is_(None),
+                    earlier.sequence < OutboxEventModel.sequence
+                )
+            )
+
+            claimable = select(OutboxEventModel.event_id).where(
+                and_(
+                    OutboxEventModel.published_at.is_(None),
+                    OutboxEventModel.next_attempt_at <= func.now(),
+                    ~has_earlier_pending
+                )
+            ).order_by(
+                OutboxEventModel.sequence.asc()
+            ).limit(limit).with_for_update(skip_locked=True, of=OutboxEventModel).cte("claimable_events")
+
+            stmt = update(OutboxEventModel).where(
+                OutboxEventModel.event_id == claimable.c.event_id
+            ).values(
+                attempts=OutboxEventModel.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=lease_seconds)
+            ).returning(
+                OutboxEventModel.event_id, OutboxEventModel.sequence, OutboxEventModel.aggregate_type,
+                OutboxEventModel.aggregate_id, OutboxEventModel.event_type, OutboxEventModel.payload,
+                OutboxEventModel.created_at, OutboxEventModel.attempts
+            )
+
+            result = await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            events = sorted((dict(row._mapping) for row in result.all()),
+                            key=lambda event: event["sequence"])
+            await self.session.commit()
+
+            return events
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def mark_published(self, event_ids: List[UUID]) -> None:
+        """Marcar eventos como publicados"""
+        await self._update_events(event_ids, published_at=func.now(), last_error=None)
+
+    async def mark_failed(self, event_ids: List[UUID], error: str, retry_in_seconds: int) -> None:
+        """Reprogramar la publicación de eventos fallidos"""
+        await self._update_events(
+            event_ids,
+            last_error=error[:1000],
+            next_attempt_at=datetime.now(
+                timezone.utc) + timedelta(seconds=retry_in_seconds)
+        )
+
+    async def delete_published_before(self, published_before: datetime, limit: int) -> int:
+        """Eliminar un lote de eventos publicados antes de published_before"""
+        try:
+            expired = select(OutboxEventModel.event_id).where(
+                OutboxEventModel.published_at < published_before
+            ).limit(limit).with_for_update(skip_locked=True).scalar_subquery()
+
+            result = await self.session.execute(
+                delete(OutboxEventModel).where(
+                    OutboxEventModel.event_id.in_(expired)
+                ).returning(OutboxEventModel.event_id)
+            )
+            deleted = len(result.all())
+            await self.session.commit()
+
+            return deleted
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def _update_events(self, event_ids: List[UUID], **values) -> None:
+        if not event_ids:
+            return
+
+        try:
+            stmt = update(OutboxEventModel).where(
+                OutboxEventModel.event_id.in_(event_ids)).values(**values)
+            await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            await self.session.commit()
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
@@ -0,0 +1,93 @@
+import re
+from typing import List, Tuple
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text, func
+from app.domain.exceptions.internal_exception import InternalException
+
+# <tabla>_pYYYY_MM: partición del mes (UTC) que empieza el día 1 a las 00:00
+MONTHLY_PARTITION_PATTERN = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def month_start(moment: datetime, months: int = 0) -> datetime:
+    """Inicio (UTC) del mes de moment desplazado months meses"""
+    moment = moment.astimezone(timezone.utc)
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def monthly_partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+class PartitionRepository:
+    """DDL de particiones mensuales de tablas RANGE por un timestamptz. Los nombres de tabla vienen
+    del código, nunca de la entrada del usuario. No confirma la transacción: el llamador decide"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def try_advisory_xact_lock(self, lock_key: int) -> bool:
+        """Intentar tomar un advisory lock ligado a la transacción actual"""
+        try:
+            result = await self.session.execute(
+                select(func.pg_try_advisory_xact_lock(lock_key)))
+            return bool(result.scalar_one())
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def create_monthly_partition(self, table: str, month: datetime) -> bool:
+        """Crear y enganchar la partición del mes; False si ya existía. Se crea aparte y se engancha
+        con ATTACH PARTITION para no bloquear las lecturas y escrituras sobre la tabla padre"""
+        name = monthly_partition_name(table, month)
+        try:
+            result = await self.session.execute(
+                text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+            if result.scalar_one():
+                return False
+
+            upper = month_start(month, 1)
+            async with self.session.begin_nested():
+                await self.session.execute(text(
+                    f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+                await self.session.execute(text(
+                    f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"))
+            return True
+
+        except Exception as e:
+            raise InternalException(
+                f"Error creating partition {name}: {type(e).__name__}: {str(e)}") from e
+
+    async def get_monthly_partitions(self, table: str) -> List[Tuple[str, datetime]]:
+        """Particiones mensuales enganchadas a la tabla con el mes que cubren, de la más antigua a la más nueva"""
+        try:
+            result = await self.session.execute(text("""
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE pg_inherits.inhparent = to_regclass(:table)
+            """), {"table": table})
+
+            partitions = []
+            for name in result.scalars().all():
+                match = MONTHLY_PARTITION_PATTERN.search(name)
+                if match:
+                    partitions.append((name, datetime(
+                        int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)))
+
+            return sorted(partitions, key=lambda partition: partition[1])
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def detach_partition(self, table: str, partition: str) -> None:
+        """Desenganchar una partición: deja de verse desde la tabla padre pero conserva sus datos"""
+        try:
+            await self.session.execute(text(
+                f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+
+        except Exception as e:
+            raise InternalException(
+                f"Error detaching partition {partition}: {type(e).__name__}: {str(e)}") from e
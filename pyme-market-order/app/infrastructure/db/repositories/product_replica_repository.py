@@ -0,0 +1,229 @@
+from typing import Dict, Optional, List, Iterable, Tuple
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert, ARRAY, UUID as PG_UUID
+from app.core.products_service_config import products_service_settings
+from app.domain.entities.product import Product
+from app.infrastructure.db.models.product_model import ProductModel
+from app.domain.exceptions.internal_exception import InternalException
+
+UPSERT_CHUNK_ROWS = 1000
+
+
+class ProductReplicaRepository:
+    """Lecturas y escrituras de la réplica local de productos. Las lecturas tienen la misma forma que
+    las de ProductsClient (get_product / get_products). apply_changes confirma su transacción; el
+    resto de las escrituras no, para que la reconciliación completa sea una sola transacción"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_product(self, product_id: UUID) -> Optional[Product]:
+        """Obtener un producto de la réplica"""
+        try:
+            stmt = select(ProductModel).where(ProductModel.product_id == product_id)
+            result = await self.session.execute(stmt)
+            product_model = result.scalar_one_or_none()
+
+            if product_model:
+                return self._model_to_entity(product_model)
+            return None
+
+        except Exception as e:
+            raise InternalException(
+                f"Error getting replicated product {product_id}: {type(e).__name__}: {str(e)}") from e
+
+    async def get_products(self, product_ids: Iterable[UUID]) -> Dict[UUID, Optional[Product]]:
+        """Obtener varios productos con una sola consulta (None para los que no están en la réplica)"""
+        unique_ids = list(dict.fromkeys(product_ids))
+        if not unique_ids:
+            return {}
+
+        try:
+            stmt = select(ProductModel).where(ProductModel.product_id.in_(unique_ids))
+            result = await self.session.execute(stmt)
+            found = {model.product_id: self._model_to_entity(model)
+                     for model in result.scalars().all()}
+
+            return {product_id: found.get(product_id) for product_id in unique_ids}
+
+        except Exception as e:
+            raise InternalException(
+                f"Error getting replicated products: {type(e).__name__}: {str(e)}") from e
+
+    async def get_versions(self) -> Dict[UUID, datetime]:
+        """Versión (updated_at del origen) de cada producto replicado"""
+        try:
+            result = await self.session.execute(
+                select(ProductModel.product_id, ProductModel.updated_at))
+            return dict(result.all())
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def apply_changes(self, products: List[Product],
+                            deletions: List[Tuple[UUID, datetime]]) -> int:
+        """Aplicar en una transacción un lote de cambios del origen: fotos de productos y bajas
+        (product_id, momento de la baja); devuelve cuántos cambios se escribieron"""
+        try:
+            applied = await self.upsert_products(products)
+            for product_id, deleted_at in deletions:
+                applied += await self.deactivate_products([product_id], deleted_at)
+
+            await self.session.commit()
+            return applied
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException(
+                f"Error applying product changes: {type(e).__name__}: {str(e)}") from e
+
+    async def upsert_products(self, products: List[Product]) -> int:
+        """Insertar o actualizar productos del origen por lotes. Sólo se aplica una versión igual o
+        más nueva que la guardada, así un evento atrasado no pisa uno posterior; devuelve las filas escritas"""
+        applied = 0
+        try:
+            for start in range(0, len(products), UPSERT_CHUNK_ROWS):
+                stmt = pg_insert(ProductModel).values([
+                    {
+                        "product_id": product.product_id,
+                        "name": product.name,
+                        "description": product.description,
+                        "price": product.price,
+                        "stock_quantity": product.stock_quantity,
+                        "sku": product.sku,
+                        "is_active": product.is_active,
+                        "created_at": product.created_at or func.now(),
+                        "updated_at": product.updated_at or func.now()
+                    }
+                    for product in products[start:start + UPSERT_CHUNK_ROWS]
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[ProductModel.product_id],
+                    set_={
+                        "name": stmt.excluded.name,
+                        "description": stmt.excluded.description,
+                        "price": stmt.excluded.price,
+                        "stock_quantity": stmt.excluded.stock_quantity,
+                        "sku": stmt.excluded.sku,
+                        "is_active": stmt.excluded.is_active,
+                        "updated_at": stmt.excluded.updated_at,
+                        "synced_at": func.now()
+                    },
+                    where=ProductModel.updated_at <= stmt.excluded.updated_at
+                ).returning(ProductModel.product_id)
+
+                result = await self.session.execute(stmt)
+                applied += len(result.all())
+
+            return applied
+
+        except Exception as e:
+            raise InternalException(
+                f"Error upserting replicated products: {type(e).__name__}: {str(e)}") from e
+
+    async def deactivate_products(self, product_ids: List[UUID], updated_at: datetime) -> int:
+        """Marcar como inactivos productos eliminados en el origen (salvo que ya tengan una versión posterior)"""
+        if not product_ids:
+            return 0
+
+        try:
+            stmt = update(ProductModel).where(
+                ProductModel.product_id.in_(product_ids),
+                ProductModel.updated_at <= updated_at
+            ).values(
+                is_active=False,
+                updated_at=updated_at,
+                synced_at=func.now()
+            ).returning(ProductModel.product_id)
+
+            result = await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            return len(result.all())
+
+        except Exception as e:
+            raise InternalException(
+                f"Error deactivating replicated products: {type(e).__name__}: {str(e)}") from e
+
+    async def deactivate_missing(self, seen_product_ids: List[UUID], synced_before: datetime) -> int:
+        """Desactivar los productos activos que no vinieron en la foto completa del origen. synced_before
+        protege a los que llegaron por evento después de pedir la foto"""
+        try:
+            stmt = update(ProductModel).where(
+                ProductModel.is_active.is_(True),
+                ProductModel.synced_at < synced_before,
+                ProductModel.product_id != func.all(
+                    bindparam("seen_product_ids", seen_product_ids,
+                              type_=ARRAY(PG_UUID(as_uuid=True))))
+            ).values(
+                is_active=False,
+                # Conserva la versión del origen (evita el onupdate de la columna)
+                updated_at=ProductModel.updated_at,
+                synced_at=func.now()
+            ).returning(ProductModel.product_id)
+
+            result = await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            return len(result.all())
+
+        except Exception as e:
+            raise InternalException(
+                f"Error deactivating missing replicated products: {type(e).__name__}: {str(e)}") from e
+
+    async def get_sync_state(self) -> dict:
+        """Tamaño de la réplica y confirmaciones más vieja (entre los activos, que son los que se validan)
+        y más reciente; sirven para medir su retraso"""
+        try:
+            result = await self.session.execute(select(
+                func.count(ProductModel.product_id).label("products"),
+                func.min(ProductModel.synced_at).filter(
+                    ProductModel.is_active.is_(True)).label("oldest_synced_at"),
+                func.max(ProductModel.synced_at).label("last_synced_at"),
+                func.now().label("now")
+            ))
+            return dict(result.one()._mapping)
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def try_advisory_xact_lock(self, lock_key: int) -> bool:
+        """Intentar tomar un advisory lock ligado a la transacción actual"""
+        try:
+            result = await self.session.execute(
+                select(func.pg_try_advisory_xact_lock(lock_key)))
+            return bool(result.scalar_one())
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_database_time(self) -> datetime:
+        """Hora actual del servidor de base de datos (no la del inicio de la transacción)"""
+        try:
+            result = await self.session.execute(select(func.clock_timestamp()))
+            return result.scalar_one()
+
+        except Exception as e:
+            raise InternalException() from e
+
+    def _model_to_entity(self, product_model: ProductModel) -> Product:
+        """Convertir modelo SQLAlchemy a entidad de dominio"""
+        return Product(
+            product_id=product_model.product_id,
+            name=product_model.name,
+            description=product_model.description,
+            price=product_model.price,
+            stock_quantity=product_model.stock_quantity,
+            sku=product_model.sku,
+            is_active=product_model.is_active,
+            created_at=product_model.created_at,
+            updated_at=product_model.updated_at
+        )
+
+
+def get_product_replica(session: AsyncSession) -> Optional[ProductReplicaRepository]:
+    """Réplica local de productos sobre la sesión dada si está habilitada"""
+    if products_service_settings.PRODUCTS_REPLICA_ENABLED:
+        return ProductReplicaRepository(session)
+    return None
@@ -0,0 +1,154 @@
+from typing import Optional, List
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, or_
+from app.domain.entities.promotion import Promotion
+from app.infrastructure.db.models.promotion_model import PromotionModel
+from app.schemas.promotion_schema import PromotionCreate, PromotionUpdate
+from app.domain.exceptions.not_found_exception import NotFoundException
+from app.domain.exceptions.internal_exception import InternalException
+
+
+class PromotionRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_promotion(self, promotion_data: PromotionCreate) -> Promotion:
+        """Crear una nueva promoción"""
+        try:
+            promotion_model = PromotionModel(**promotion_data.model_dump())
+
+            self.session.add(promotion_model)
+            await self.session.commit()
+            await self.session.refresh(promotion_model)
+
+            return self._model_to_entity(promotion_model)
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def get_promotion_by_id(self, promotion_id: UUID) -> Optional[Promotion]:
+        """Obtener promoción por ID"""
+        try:
+            stmt = select(PromotionModel).where(
+                PromotionModel.promotion_id == promotion_id)
+            result = await self.session.execute(stmt)
+            promotion_model = result.scalar_one_or_none()
+
+            if promotion_model:
+                return self._model_to_entity(promotion_model)
+            return None
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_promotions(self, active_only: bool = False) -> List[Promotion]:
+        """Obtener todas las promociones"""
+        try:
+            stmt = select(PromotionModel)
+            if active_only:
+                stmt = stmt.where(PromotionModel.is_active.is_(True))
+            stmt = stmt.order_by(PromotionModel.priority.desc(),
+                                 PromotionModel.created_at.asc())
+
+            result = await self.session.execute(stmt)
+            return [self._model_to_entity(model) for model in result.scalars().all()]
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_rule_set_promotions(self, now: datetime) -> List[Promotion]:
+        """Obtener las promociones activas no vencidas (incluye las que aún no empiezan, para
+        saber hasta cuándo es válido el conjunto compilado)"""
+        try:
+            stmt = select(PromotionModel).where(
+                PromotionModel.is_active.is_(True),
+                or_(PromotionModel.ends_at.is_(None), PromotionModel.ends_at > now)
+            )
+
+            result = await self.session.execute(stmt)
+            return [self._model_to_entity(model) for model in result.scalars().all()]
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_rule_set_version(self) -> str:
+        """Versión del conjunto de promociones: cambia con cada alta, modificación o baja"""
+        try:
+            stmt = select(func.count(PromotionModel.promotion_id),
+                          func.max(PromotionModel.updated_at))
+            result = await self.session.execute(stmt)
+            count, last_updated_at = result.one()
+
+            return f"{count}:{last_updated_at.isoformat() if last_updated_at else '-'}"
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def update_promotion(self, promotion_id: UUID, promotion_data: PromotionUpdate) -> Promotion:
+        """Reemplazar los datos de una promoción"""
+        try:
+            stmt = select(PromotionModel).where(
+                PromotionModel.promotion_id == promotion_id)
+            result = await self.session.execute(stmt)
+            promotion_model = result.scalar_one_or_none()
+
+            if not promotion_model:
+                raise NotFoundException()
+
+            for field, value in promotion_data.model_dump().items():
+                setattr(promotion_model, field, value)
+
+            await self.session.commit()
+            await self.session.refresh(promotion_model)
+
+            return self._model_to_entity(promotion_model)
+
+        except NotFoundException:
+            raise
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def delete_promotion(self, promotion_id: UUID) -> bool:
+        """Eliminar una promoción"""
+        try:
+            stmt = select(PromotionModel).where(
+                PromotionModel.promotion_id == promotion_id)
+            result = await self.session.execute(stmt)
+            promotion_model = result.scalar_one_or_none()
+
+            if not promotion_model:
+                return False
+
+            await self.session.delete(promotion_model)
+            await self.session.commit()
+
+            return True
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    def _model_to_entity(self, promotion_model: PromotionModel) -> Promotion:
+        """Convertir modelo SQLAlchemy a entidad de dominio"""
+        return Promotion(
+            promotion_id=promotion_model.promotion_id,
+            name=promotion_model.name,
+            rule_type=promotion_model.rule_type,
+            product_sku=promotion_model.product_sku,
+            value=promotion_model.value,
+            buy_quantity=promotion_model.buy_quantity,
+            get_quantity=promotion_model.get_quantity,
+            min_subtotal=promotion_model.min_subtotal,
+            min_quantity=promotion_model.min_quantity,
+            stackable=promotion_model.stackable,
+            priority=promotion_model.priority,
+            is_active=promotion_model.is_active,
+            starts_at=promotion_model.starts_at,
+            ends_at=promotion_model.ends_at,
+            created_at=promotion_model.created_at,
+            updated_at=promotion_model.updated_at
+        )
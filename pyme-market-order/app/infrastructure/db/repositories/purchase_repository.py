@@ -1,26 +1,42 @@
-from typing import Optional, List
-from uuid import UUID
+from typing import Dict, Optional, List, AsyncIterator, TYPE_CHECKING
+from uuid import UUID, uuid4
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from decimal import Decimal
+from sqlalchemy import select, update, insert, func, tuple_, bindparam, Numeric
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.exc import IntegrityError
 from app.domain.entities.purchase import Purchase
 from app.infrastructure.db.models.purchase_model import PurchaseModel
+from app.infrastructure.db.models.cart_model import CartModel
+from app.infrastructure.db.models.cart_item_model import CartItemModel
+from app.infrastructure.db.models.cart_item_archive_model import cart_items_with_archive
+from app.infrastructure.db.models.receipt_model import ReceiptModel
+from app.infrastructure.db.models.checkout_saga_model import CheckoutSagaModel
+from app.infrastructure.db.repositories.receipt_job_repository import ReceiptJobRepository
+from app.infrastructure.db.repositories.outbox_repository import OutboxRepository
+from app.infrastructure.db.repositories.user_order_stats_repository import UserOrderStatsRepository
+from app.infrastructure.db.repositories.sales_rollup_repository import SalesRollupRepository
 from app.schemas.purchase_schema import PurchaseCreate
 from app.domain.exceptions.not_found_exception import NotFoundException
 from app.domain.exceptions.internal_exception import InternalException
 
+if TYPE_CHECKING:
+    from app.domain.services.pricing_engine import RepricedPurchase
+
 
 class PurchaseRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def create_purchase(self, purchase_data: PurchaseCreate) -> Purchase:
-        """Crear una nueva compra"""
+        """Crear una nueva compra y encolar la generación de su recibo en la misma transacción"""
         try:
             final_amount = purchase_data.total_amount - \
                 purchase_data.discount_amount + purchase_data.tax_amount
 
             purchase_model = PurchaseModel(
+                purchase_id=uuid4(),
                 cart_id=purchase_data.cart_id,
                 user_id=purchase_data.user_id,
                 purchase_number=purchase_data.purchase_number,
@@ -29,10 +45,15 @@ class PurchaseRepository:
                 discount_amount=purchase_data.discount_amount,
                 final_amount=final_amount,
                 payment_method=purchase_data.payment_method,
-                status="completed"
+                status="completed",
+                **self._item_counters(purchase_data.cart_id)
             )
 
             self.session.add(purchase_model)
+            await self.session.flush()
+            await ReceiptJobRepository(self.session).enqueue_job(purchase_model.purchase_id)
+            await UserOrderStatsRepository(self.session).record_purchases([purchase_model.purchase_id])
+            await self._add_purchase_created_event(purchase_model)
             await self.session.commit()
             await self.session.refresh(purchase_model)
 
@@ -48,6 +69,166 @@ class PurchaseRepository:
             raise InternalException(
                 f"Database error when creating purchase: {type(e).__name__}: {str(e)}") from e
 
+    async def create_checkout_purchase(self, purchase_id: UUID, purchase_data: PurchaseCreate,
+                                       saga_id: UUID) -> Optional[Purchase]:
+        """Crear la compra, encolar su recibo, completar el carrito y cerrar el checkout en una sola transacción.
+        Devuelve None (sin cambios) si el carrito dejó de estar activo."""
+        try:
+            cart_result = await self.session.execute(
+                update(CartModel).where(
+                    CartModel.cart_id == purchase_data.cart_id,
+                    CartModel.status == "active",
+                    CartModel.is_active.is_(True)
+                ).values(
+                    status="completed",
+                    completed_at=func.now()
+                ).returning(CartModel.user_id, CartModel.total_amount, CartModel.total_items),
+                execution_options={"synchronize_session": False}
+            )
+            completed_cart = cart_result.one_or_none()
+            if completed_cart is None:
+                await self.session.rollback()
+                return None
+
+            purchase_model = PurchaseModel(
+                purchase_id=purchase_id,
+                cart_id=purchase_data.cart_id,
+                user_id=purchase_data.user_id,
+                purchase_number=purchase_data.purchase_number,
+                total_amount=purchase_data.total_amount,
+                tax_amount=purchase_data.tax_amount,
+                discount_amount=purchase_data.discount_amount,
+                final_amount=purchase_data.total_amount -
+                purchase_data.discount_amount + purchase_data.tax_amount,
+                payment_method=purchase_data.payment_method,
+                status="completed",
+                **self._item_counters(purchase_data.cart_id)
+            )
+
+            self.session.add(purchase_model)
+            await self.session.flush()
+            await ReceiptJobRepository(self.session).enqueue_job(purchase_model.purchase_id)
+            await UserOrderStatsRepository(self.session).record_purchases([purchase_model.purchase_id])
+            await OutboxRepository(self.session).add_cart_event(
+                "cart.completed", purchase_data.cart_id, completed_cart.user_id,
+                completed_cart.total_amount, completed_cart.total_items)
+            await self._add_purchase_created_event(purchase_model)
+            await self.session.execute(
+                update(CheckoutSagaModel).where(
+                    CheckoutSagaModel.saga_id == saga_id
+                ).values(
+                    status="completed",
+                    purchase_id=purchase_model.purchase_id,
+                    last_error=None,
+                    updated_at=func.now()
+                ),
+                execution_options={"synchronize_session": False}
+            )
+            await self.session.commit()
+            await self.session.refresh(purchase_model)
+
+            return self._model_to_entity(purchase_model)
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException(
+                f"Database error when completing checkout for cart {purchase_data.cart_id}: "
+                f"{type(e).__name__}: {str(e)}") from e
+
+    async def create_batch_checkout_purchases(self, checkouts: List[dict]) -> List[Purchase]:
+        """Completar muchos checkouts en una sola transacción: un UPDATE para los carritos, un INSERT
+        multi-fila para las compras y uno por tabla para recibos, eventos y sagas. Cada dict lleva
+        saga_id, purchase_id, purchase_data, items_count y total_quantity. Sólo se crean las compras
+        de los carritos que seguían activos"""
+        if not checkouts:
+            return []
+
+        by_cart = {checkout["purchase_data"].cart_id: checkout for checkout in checkouts}
+
+        try:
+            cart_result = await self.session.execute(
+                update(CartModel).where(
+                    CartModel.cart_id.in_(list(by_cart)),
+                    CartModel.status == "active",
+                    CartModel.is_active.is_(True)
+                ).values(
+                    status="completed",
+                    completed_at=func.now()
+                ).returning(CartModel.cart_id, CartModel.user_id, CartModel.total_amount, CartModel.total_items),
+                execution_options={"synchronize_session": False}
+            )
+            completed_carts = cart_result.all()
+            if not completed_carts:
+                await self.session.rollback()
+                return []
+
+            rows = []
+            for cart in completed_carts:
+                checkout = by_cart[cart.cart_id]
+                purchase_data = checkout["purchase_data"]
+                rows.append({
+                    "purchase_id": checkout["purchase_id"],
+                    "cart_id": purchase_data.cart_id,
+                    "user_id": purchase_data.user_id,
+                    "purchase_number": purchase_data.purchase_number,
+                    "total_amount": purchase_data.total_amount,
+                    "tax_amount": purchase_data.tax_amount,
+                    "discount_amount": purchase_data.discount_amount,
+                    "final_amount": purchase_data.total_amount -
+                    purchase_data.discount_amount + purchase_data.tax_amount,
+                    "payment_method": purchase_data.payment_method,
+                    "status": "completed",
+                    "items_count": checkout["items_count"],
+                    "total_quantity": checkout["total_quantity"]
+                })
+
+            result = await self.session.execute(
+                insert(PurchaseModel).values(rows).returning(PurchaseModel))
+            purchase_models = result.scalars().all()
+            purchase_ids = [model.purchase_id for model in purchase_models]
+
+            await ReceiptJobRepository(self.session).enqueue_jobs(purchase_ids)
+            await UserOrderStatsRepository(self.session).record_purchases(purchase_ids)
+
+            outbox_repository = OutboxRepository(self.session)
+            await outbox_repository.add_events(
+                [outbox_repository.cart_event("cart.completed", cart.cart_id, cart.user_id,
+                                              cart.total_amount, cart.total_items)
+                 for cart in completed_carts] +
+                [outbox_repository.purchase_created_event(
+                    model.purchase_id, model.purchase_number, model.cart_id, model.user_id,
+                    model.total_amount, model.discount_amount, model.tax_amount,
+                    model.final_amount, model.payment_method)
+                 for model in purchase_models]
+            )
+
+            completed_sagas = func.unnest(
+                bindparam("saga_ids", [by_cart[model.cart_id]["saga_id"] for model in purchase_models],
+                          type_=ARRAY(PG_UUID(as_uuid=True))),
+                bindparam("purchase_ids", purchase_ids,
+                          type_=ARRAY(PG_UUID(as_uuid=True)))
+            ).table_valued("saga_id", "purchase_id").render_derived(name="completed_sagas")
+
+            await self.session.execute(
+                update(CheckoutSagaModel).where(
+                    CheckoutSagaModel.saga_id == completed_sagas.c.saga_id
+                ).values(
+                    status="completed",
+                    purchase_id=completed_sagas.c.purchase_id,
+                    last_error=None,
+                    updated_at=func.now()
+                ),
+                execution_options={"synchronize_session": False}
+            )
+            await self.session.commit()
+
+            return [self._model_to_entity(model) for model in purchase_models]
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException(
+                f"Database error when completing batch checkout: {type(e).__name__}: {str(e)}") from e
+
     async def get_purchase_by_id(self, purchase_id: UUID) -> Optional[Purchase]:
         """Obtener compra por ID"""
         try:
@@ -80,6 +261,21 @@ class PurchaseRepository:
             raise InternalException(
                 f"Error getting purchase by cart ID {cart_id}: {type(e).__name__}: {str(e)}") from e
 
+    async def get_purchases_by_cart_ids(self, cart_ids: List[UUID]) -> Dict[UUID, Purchase]:
+        """Obtener las compras existentes de muchos carritos, por carrito"""
+        if not cart_ids:
+            return {}
+
+        try:
+            stmt = select(PurchaseModel).where(PurchaseModel.cart_id.in_(cart_ids))
+            result = await self.session.execute(stmt)
+
+            return {model.cart_id: self._model_to_entity(model) for model in result.scalars().all()}
+
+        except Exception as e:
+            raise InternalException(
+                f"Error getting purchases for carts: {type(e).__name__}: {str(e)}") from e
+
     async def get_purchase_by_number(self, purchase_number: str) -> Optional[Purchase]:
         """Obtener compra por número de compra"""
         try:
@@ -112,6 +308,117 @@ class PurchaseRepository:
             raise InternalException(
                 f"Error getting purchases for user {user_id}: {type(e).__name__}: {str(e)}") from e
 
+    async def get_user_order_stats(self, user_id: str) -> Optional[dict]:
+        """Obtener los totales históricos de compras de un usuario sin recorrer sus compras"""
+        return await UserOrderStatsRepository(self.session).get_stats(user_id)
+
+    async def get_purchase_history_by_user(self, user_id: str, limit: int,
+                                           after_purchased_at: Optional[datetime] = None,
+                                           after_purchase_id: Optional[UUID] = None) -> List[dict]:
+        """Obtener una página del historial de compras con conteos de items y recibo en una sola consulta"""
+        try:
+            # Compras anteriores al backfill: se cuentan los items del carrito
+            items_count = func.coalesce(
+                PurchaseModel.items_count,
+                select(func.count(CartItemModel.cart_item_id)).where(
+                    CartItemModel.cart_id == PurchaseModel.cart_id
+                ).scalar_subquery()
+            ).label("items_count")
+            total_quantity = func.coalesce(
+                PurchaseModel.total_quantity,
+                select(func.coalesce(func.sum(CartItemModel.quantity), 0)).where(
+                    CartItemModel.cart_id == PurchaseModel.cart_id
+                ).scalar_subquery()
+            ).label("total_quantity")
+
+            stmt = select(
+                PurchaseModel,
+                items_count,
+                total_quantity,
+                ReceiptModel.receipt_id,
+                ReceiptModel.generated_at
+            ).outerjoin(
+                ReceiptModel, ReceiptModel.purchase_id == PurchaseModel.purchase_id
+            ).where(
+                PurchaseModel.user_id == user_id
+            )
+
+            if after_purchased_at is not None and after_purchase_id is not None:
+                stmt = stmt.where(
+                    tuple_(PurchaseModel.purchased_at, PurchaseModel.purchase_id) <
+                    tuple_(after_purchased_at, after_purchase_id)
+                )
+
+            stmt = stmt.order_by(
+                PurchaseModel.purchased_at.desc(),
+                PurchaseModel.purchase_id.desc()
+            ).limit(limit)
+
+            result = await self.session.execute(stmt)
+
+            return [
+                {
+                    "purchase": self._model_to_entity(row.PurchaseModel),
+                    "items_count": row.items_count,
+                    "total_quantity": int(row.total_quantity),
+                    "receipt": {
+                        "receipt_id": row.receipt_id,
+                        "generated_at": row.generated_at
+                    } if row.receipt_id else None
+                }
+                for row in result.all()
+            ]
+
+        except Exception as e:
+            raise InternalException(
+                f"Error getting purchase history for user {user_id}: {type(e).__name__}: {str(e)}") from e
+
+    async def stream_purchase_export_rows(self, date_from: datetime, date_to: datetime,
+                                          batch_size: int = 1000) -> AsyncIterator[dict]:
+        """Recorrer con un cursor del servidor las compras del rango [date_from, date_to) con sus items y recibo"""
+        try:
+            # Incluye los items archivados: las compras antiguas ya no tienen items en cart_items
+            cart_items = cart_items_with_archive()
+            stmt = select(
+                PurchaseModel.purchase_id,
+                PurchaseModel.purchase_number,
+                PurchaseModel.purchased_at,
+                PurchaseModel.user_id,
+                PurchaseModel.status,
+                PurchaseModel.payment_method,
+                PurchaseModel.total_amount,
+                PurchaseModel.discount_amount,
+                PurchaseModel.tax_amount,
+                PurchaseModel.final_amount,
+                ReceiptModel.receipt_id,
+                ReceiptModel.generated_at.label("receipt_generated_at"),
+                cart_items.c.product_id,
+                cart_items.c.product_sku,
+                cart_items.c.product_name,
+                cart_items.c.unit_price,
+                cart_items.c.quantity,
+                cart_items.c.subtotal
+            ).outerjoin(
+                cart_items, cart_items.c.cart_id == PurchaseModel.cart_id
+            ).outerjoin(
+                ReceiptModel, ReceiptModel.purchase_id == PurchaseModel.purchase_id
+            ).where(
+                PurchaseModel.purchased_at >= date_from,
+                PurchaseModel.purchased_at < date_to
+            ).order_by(
+                PurchaseModel.purchased_at.asc(),
+                PurchaseModel.purchase_id.asc(),
+                cart_items.c.added_at.asc()
+            ).execution_options(yield_per=batch_size)
+
+            result = await self.session.stream(stmt)
+            async for row in result:
+                yield dict(row._mapping)
+
+        except Exception as e:
+            raise InternalException(
+                f"Error exporting purchases from {date_from} to {date_to}: {type(e).__name__}: {str(e)}") from e
+
     async def update_purchase_number(self, purchase_id: UUID, purchase_number: str) -> Purchase:
         """Actualizar número de compra"""
         try:
@@ -136,23 +443,29 @@ class PurchaseRepository:
             raise InternalException(
                 f"Error updating purchase number for {purchase_id}: {type(e).__name__}: {str(e)}") from e
 
-    async def update_purchase_amounts(self, purchase_id: UUID, total_amount: float,
-                                      tax_amount: float, discount_amount: float, final_amount: float) -> Purchase:
-        """Actualizar montos de la compra"""
+    async def update_purchase_amounts(self, purchase_id: UUID, total_amount: Decimal,
+                                      tax_amount: Decimal, discount_amount: Decimal, final_amount: Decimal) -> Purchase:
+        """Actualizar montos de la compra y el total gastado de su usuario"""
         try:
+            # FOR UPDATE: el monto anterior se usa para ajustar user_order_stats
             stmt = select(PurchaseModel).where(
-                PurchaseModel.purchase_id == purchase_id)
+                PurchaseModel.purchase_id == purchase_id).with_for_update()
             result = await self.session.execute(stmt)
             purchase_model = result.scalar_one_or_none()
 
             if not purchase_model:
                 raise NotFoundException()
 
+            previous_final_amount = purchase_model.final_amount
             purchase_model.total_amount = total_amount
             purchase_model.tax_amount = tax_amount
             purchase_model.discount_amount = discount_amount
             purchase_model.final_amount = final_amount
 
+            await ReceiptJobRepository(self.session).enqueue_job(purchase_id)
+            await UserOrderStatsRepository(self.session).record_amount_changes(
+                [(purchase_model.user_id, final_amount - previous_final_amount)])
+            await SalesRollupRepository(self.session).mark_purchases_dirty([purchase_id])
             await self.session.commit()
             await self.session.refresh(purchase_model)
 
@@ -165,6 +478,80 @@ class PurchaseRepository:
             raise InternalException(
                 f"Error updating purchase amounts for {purchase_id}: {type(e).__name__}: {str(e)}") from e
 
+    async def get_purchase_amounts(self, purchase_ids: List[UUID]) -> List[dict]:
+        """Obtener total y descuento de muchas compras (entrada del recálculo masivo)"""
+        try:
+            stmt = select(
+                PurchaseModel.purchase_id,
+                PurchaseModel.total_amount,
+                PurchaseModel.discount_amount
+            ).where(PurchaseModel.purchase_id.in_(purchase_ids))
+
+            result = await self.session.execute(stmt)
+            return [dict(row._mapping) for row in result.all()]
+
+        except Exception as e:
+            raise InternalException(
+                f"Error getting purchase amounts: {type(e).__name__}: {str(e)}") from e
+
+    async def bulk_update_tax_amounts(self, repriced: List['RepricedPurchase']) -> List[UUID]:
+        """Aplicar impuestos y montos finales recalculados con un solo UPDATE ... FROM unnest(...)
+        y reencolar sus recibos. Sólo actualiza las compras cuyo total y descuento no cambiaron
+        desde que se leyeron y ajusta el total gastado de sus usuarios; devuelve los IDs actualizados"""
+        if not repriced:
+            return []
+
+        try:
+            # Montos finales previos, bloqueados para que la diferencia aplicada a user_order_stats sea exacta
+            locked = await self.session.execute(
+                select(PurchaseModel.purchase_id, PurchaseModel.final_amount).where(
+                    PurchaseModel.purchase_id.in_([row.purchase_id for row in repriced])
+                ).order_by(PurchaseModel.purchase_id).with_for_update()
+            )
+            previous_final_amounts = dict(locked.all())
+
+            amounts = func.unnest(
+                bindparam("purchase_ids", [row.purchase_id for row in repriced],
+                          type_=ARRAY(PG_UUID(as_uuid=True))),
+                bindparam("total_amounts", [row.total_amount for row in repriced],
+                          type_=ARRAY(Numeric(10, 2))),
+                bindparam("discount_amounts", [row.discount_amount for row in repriced],
+                          type_=ARRAY(Numeric(10, 2))),
+                bindparam("tax_amounts", [row.tax_amount for row in repriced],
+                          type_=ARRAY(Numeric(10, 2))),
+                bindparam("final_amounts", [row.final_amount for row in repriced],
+                          type_=ARRAY(Numeric(10, 2)))
+            ).table_valued(
+                "purchase_id", "total_amount", "discount_amount", "tax_amount", "final_amount"
+            ).render_derived(name="repriced")
+
+            stmt = update(PurchaseModel).where(
+                PurchaseModel.purchase_id == amounts.c.purchase_id,
+                PurchaseModel.total_amount == amounts.c.total_amount,
+                PurchaseModel.discount_amount == amounts.c.discount_amount
+            ).values(
+                tax_amount=amounts.c.tax_amount,
+                final_amount=amounts.c.final_amount
+            ).returning(PurchaseModel.purchase_id, PurchaseModel.user_id, PurchaseModel.final_amount)
+
+            result = await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            rows = result.all()
+            updated = [row.purchase_id for row in rows]
+
+            await ReceiptJobRepository(self.session).enqueue_jobs(updated)
+            await UserOrderStatsRepository(self.session).record_amount_changes(
+                [(row.user_id, row.final_amount - previous_final_amounts[row.purchase_id]) for row in rows])
+            await SalesRollupRepository(self.session).mark_purchases_dirty(updated)
+            await self.session.commit()
+
+            return updated
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException(
+                f"Error applying repriced purchase amounts: {type(e).__name__}: {str(e)}") from e
+
     async def update_payment_method(self, purchase_id: UUID, payment_method: str) -> Purchase:
         """Actualizar método de pago"""
         try:
@@ -177,6 +564,8 @@ class PurchaseRepository:
                 raise NotFoundException()
 
             purchase_model.payment_method = payment_method
+            await ReceiptJobRepository(self.session).enqueue_job(purchase_id)
+            await SalesRollupRepository(self.session).mark_purchases_dirty([purchase_id])
             await self.session.commit()
             await self.session.refresh(purchase_model)
 
@@ -201,6 +590,49 @@ class PurchaseRepository:
             raise InternalException(
                 f"Error checking if purchase exists for cart {cart_id}: {type(e).__name__}: {str(e)}") from e
 
+    async def backfill_item_counters(self, limit: int) -> int:
+        """Completar items_count y total_quantity de un lote de compras anteriores (FOR UPDATE SKIP LOCKED)"""
+        try:
+            pending = select(PurchaseModel.purchase_id).where(
+                PurchaseModel.items_count.is_(None)
+            ).limit(limit).with_for_update(skip_locked=True).cte("pending_purchases")
+
+            stmt = update(PurchaseModel).where(
+                PurchaseModel.purchase_id == pending.c.purchase_id
+            ).values(
+                **self._item_counters(PurchaseModel.cart_id)
+            ).returning(PurchaseModel.purchase_id)
+
+            result = await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            updated = len(result.all())
+            await self.session.commit()
+
+            return updated
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException(
+                f"Error backfilling purchase item counters: {type(e).__name__}: {str(e)}") from e
+
+    def _item_counters(self, cart_id) -> dict:
+        """Subconsultas con la cantidad de líneas y de unidades del carrito (inmutables tras la compra)"""
+        return {
+            "items_count": select(func.count(CartItemModel.cart_item_id)).where(
+                CartItemModel.cart_id == cart_id
+            ).scalar_subquery(),
+            "total_quantity": select(func.coalesce(func.sum(CartItemModel.quantity), 0)).where(
+                CartItemModel.cart_id == cart_id
+            ).scalar_subquery()
+        }
+
+    async def _add_purchase_created_event(self, purchase_model: PurchaseModel) -> None:
+        """Registrar purchase.created en la transacción de la compra"""
+        await OutboxRepository(self.session).add_purchase_created_event(
+            purchase_model.purchase_id, purchase_model.purchase_number, purchase_model.cart_id,
+            purchase_model.user_id, purchase_model.total_amount, purchase_model.discount_amount,
+            purchase_model.tax_amount, purchase_model.final_amount, purchase_model.payment_method)
+
     def _model_to_entity(self, purchase_model: PurchaseModel) -> Purchase:
         """Convertir modelo SQLAlchemy a entidad de dominio"""
         return Purchase(
@@ -214,5 +646,7 @@ class PurchaseRepository:
             final_amount=purchase_model.final_amount,
             payment_method=purchase_model.payment_method,
             status=purchase_model.status,
-            purchased_at=purchase_model.purchased_at
+            purchased_at=purchase_model.purchased_at,
+            items_count=purchase_model.items_count,
+            total_quantity=purchase_model.total_quantity
         )
@@ -0,0 +1,189 @@
+from typing import Optional, List
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.infrastructure.db.models.receipt_job_model import ReceiptJobModel
+from app.domain.exceptions.internal_exception import InternalException
+
+
+class ReceiptJobRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def enqueue_job(self, purchase_id: UUID) -> None:
+        """Encolar (o reencolar) la generación del recibo sin confirmar: viaja en la transacción del llamador"""
+        try:
+            stmt = pg_insert(ReceiptJobModel).values(
+                job_id=uuid4(),
+                purchase_id=purchase_id,
+                status="pending",
+                attempts=0,
+                enqueued_at=func.clock_timestamp()
+            ).on_conflict_do_update(
+                index_elements=[ReceiptJobModel.purchase_id],
+                set_={
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": func.now(),
+                    "enqueued_at": func.clock_timestamp(),
+                    "last_error": None,
+                    "updated_at": func.now()
+                }
+            )
+            await self.session.execute(stmt)
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def enqueue_jobs(self, purchase_ids: List[UUID]) -> None:
+        """Encolar (o reencolar) los recibos de muchas compras con una sola sentencia, sin confirmar"""
+        if not purchase_ids:
+            return
+
+        try:
+            stmt = pg_insert(ReceiptJobModel).values([
+                {"job_id": uuid4(), "purchase_id": purchase_id,
+                    "status": "pending", "attempts": 0, "enqueued_at": func.clock_timestamp()}
+                for purchase_id in purchase_ids
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ReceiptJobModel.purchase_id],
+                set_={
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": func.now(),
+                    "enqueued_at": func.clock_timestamp(),
+                    "last_error": None,
+                    "updated_at": func.now()
+                }
+            )
+            await self.session.execute(stmt)
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_job_by_purchase_id(self, purchase_id: UUID) -> Optional[dict]:
+        """Obtener el job de generación de recibo de una compra"""
+        try:
+            stmt = select(ReceiptJobModel).where(
+                ReceiptJobModel.purchase_id == purchase_id)
+            result = await self.session.execute(stmt)
+            job_model = result.scalar_one_or_none()
+
+            if job_model:
+                return self._model_to_dict(job_model)
+            return None
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def fail_exhausted_jobs(self, max_attempts: int) -> int:
+        """Marcar como fallidos los jobs cuyo último intento venció sin resultado (el worker se
+        detuvo) y ya agotaron max_attempts; devuelve cuántos"""
+        try:
+            stmt = update(ReceiptJobModel).where(
+                and_(
+                    ReceiptJobModel.status == "processing",
+                    ReceiptJobModel.next_attempt_at <= func.now(),
+                    ReceiptJobModel.attempts >= max_attempts
+                )
+            ).values(
+                status="failed",
+                last_error=f"lease expired after {max_attempts} attempts"
+            ).returning(ReceiptJobModel.job_id)
+
+            result = await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            failed = len(result.all())
+            await self.session.commit()
+
+            return failed
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def claim_jobs(self, limit: int, lease_seconds: int, max_attempts: int) -> List[dict]:
+        """Reservar un lote de jobs listos (FOR UPDATE SKIP LOCKED) con intentos disponibles y
+        marcarlos en proceso"""
+        try:
+            claimable = select(ReceiptJobModel.job_id).where(
+                and_(
+                    ReceiptJobModel.status.in_(["pending", "processing"]),
+                    ReceiptJobModel.next_attempt_at <= func.now(),
+                    ReceiptJobModel.attempts < max_attempts
+                )
+            ).order_by(
+                ReceiptJobModel.next_attempt_at.asc()
+            ).limit(limit).with_for_update(skip_locked=True).cte("claimable_jobs")
+
+            stmt = update(ReceiptJobModel).where(
+                ReceiptJobModel.job_id == claimable.c.job_id
+            ).values(
+                status="processing",
+                attempts=ReceiptJobModel.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=lease_seconds)
+            ).returning(
+                ReceiptJobModel.job_id, ReceiptJobModel.purchase_id, ReceiptJobModel.attempts,
+                ReceiptJobModel.enqueued_at
+            )
+
+            result = await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            jobs = [dict(row._mapping) for row in result.all()]
+            await self.session.commit()
+
+            return jobs
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def mark_job_done(self, job_id: UUID, enqueued_at: datetime) -> None:
+        """Marcar job como completado, salvo que se haya reencolado después de reservarlo"""
+        await self._update_job(job_id, enqueued_at, status="done", last_error=None)
+
+    async def mark_job_failed(self, job_id: UUID, enqueued_at: datetime, error: str,
+                              retry_in_seconds: Optional[int]) -> None:
+        """Registrar fallo: reprogramar con backoff o marcar como fallido definitivamente (salvo
+        que se haya reencolado después de reservarlo)"""
+        if retry_in_seconds is None:
+            await self._update_job(job_id, enqueued_at, status="failed", last_error=error[:1000])
+        else:
+            await self._update_job(
+                job_id,
+                enqueued_at,
+                status="pending",
+                last_error=error[:1000],
+                next_attempt_at=datetime.now(
+                    timezone.utc) + timedelta(seconds=retry_in_seconds)
+            )
+
+    async def _update_job(self, job_id: UUID, enqueued_at: datetime, **values) -> None:
+        """Actualizar el job reservado; un reencolado posterior cambió enqueued_at y se conserva"""
+        try:
+            stmt = update(ReceiptJobModel).where(
+                ReceiptJobModel.job_id == job_id,
+                ReceiptJobModel.enqueued_at == enqueued_at
+            ).values(**values)
+            await self.session.execute(
+                stmt, execution_options={"synchronize_session": False})
+            await self.session.commit()
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    def _model_to_dict(self, job_model: ReceiptJobModel) -> dict:
+        """Convertir modelo SQLAlchemy a diccionario"""
+        return {
+            "job_id": job_model.job_id,
+            "purchase_id": job_model.purchase_id,
+            "status": job_model.status,
+            "attempts": job_model.attempts,
+            "next_attempt_at": job_model.next_attempt_at,
+            "last_error": job_model.last_error,
+            "enqueued_at": job_model.enqueued_at
+        }
@@ -1,31 +1,109 @@
-from typing import Optional, List
-from uuid import UUID
+from typing import Optional, List, Tuple
+from uuid import UUID, uuid4
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import (
+    select, delete, insert, union, tuple_, cast, literal_column, text,
+    Integer, Numeric, Boolean, String, DateTime
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
 from sqlalchemy.exc import IntegrityError
 from app.domain.entities.receipt import Receipt
-from app.infrastructure.db.models.receipt_model import ReceiptModel
+from app.infrastructure.db.models.receipt_model import (
+    ReceiptModel, receipt_items_expr, receipt_payment_method_expr
+)
+from app.infrastructure.db.models.receipt_line_model import ReceiptLineModel
+from app.infrastructure.db.models.purchase_model import PurchaseModel
+from app.infrastructure.cache.receipt_lines_cache import receipt_lines_cache
+from app.core.receipt_config import receipt_settings
 from app.domain.exceptions.not_found_exception import NotFoundException
 from app.domain.exceptions.internal_exception import InternalException
 
+RECEIPT_STORAGE_FORMATS = ("json", "compact")
+
+# Compra, items del carrito (vivos o archivados) y documento del recibo armado en el servidor. Debe producir
+# el mismo documento que Receipt.generate_receipt_data
+RECEIPT_DOCUMENT_CTES = """
+    purchase AS (
+        SELECT purchase_id, cart_id, user_id, purchase_number, total_amount, tax_amount,
+               discount_amount, final_amount, payment_method, purchased_at
+        FROM purchases
+        WHERE purchase_id = :purchase_id
+    ), items AS (
+        SELECT cart_items.product_id, cart_items.product_name, cart_items.product_sku,
+               cart_items.unit_price, cart_items.quantity, cart_items.subtotal,
+               row_number() OVER (ORDER BY cart_items.added_at, cart_items.cart_item_id) AS line_no
+        FROM (
+            SELECT cart_item_id, cart_id, product_id, product_name, product_sku,
+                   unit_price, quantity, subtotal, added_at
+            FROM cart_items
+            UNION ALL
+            SELECT cart_item_id, cart_id, product_id, product_name, product_sku,
+                   unit_price, quantity, subtotal, added_at
+            FROM cart_items_archive
+        ) cart_items
+        JOIN purchase ON cart_items.cart_id = purchase.cart_id
+    ), document AS (
+        SELECT jsonb_build_object(
+                   'purchase_number', purchase.purchase_number,
+                   'user_id', purchase.user_id,
+                   'purchase_date', to_char(purchase.purchased_at AT TIME ZONE 'UTC',
+                                            'YYYY-MM-DD"T"HH24:MI:SS.US') || '+00:00',
+                   'total_amount', purchase.total_amount,
+                   'tax_amount', purchase.tax_amount,
+                   'discount_amount', purchase.discount_amount,
+                   'final_amount', purchase.final_amount,
+                   'payment_method', COALESCE(purchase.payment_method, 'not_specified'),
+                   'summary', jsonb_build_object(
+                       'total_items', lines.total_items,
+                       'total_quantity', lines.total_quantity,
+                       'subtotal', purchase.total_amount,
+                       'discount', purchase.discount_amount,
+                       'tax', purchase.tax_amount,
+                       'final_total', purchase.final_amount
+                   )
+               ) AS header,
+               lines.items
+        FROM purchase
+        CROSS JOIN (
+            SELECT count(*) AS total_items,
+                   COALESCE(sum(quantity), 0) AS total_quantity,
+                   COALESCE(jsonb_agg(jsonb_build_object(
+                       'product_id', product_id::text,
+                       'product_name', product_name,
+                       'product_sku', product_sku,
+                       'unit_price', unit_price,
+                       'quantity', quantity,
+                       'subtotal', subtotal
+                   ) ORDER BY line_no), '[]'::jsonb) AS items
+            FROM items
+        ) AS lines
+    )
+"""
+
 
 class ReceiptRepository:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, storage_format: Optional[str] = None):
         self.session = session
+        self.storage_format = storage_format or receipt_settings.RECEIPT_STORAGE_FORMAT
 
     async def create_receipt(self, purchase_id: UUID, receipt_data: dict) -> Receipt:
         """Crear un nuevo recibo"""
         try:
+            header, lines = self._split_receipt_data(receipt_data)
             receipt_model = ReceiptModel(
                 purchase_id=purchase_id,
-                receipt_data=receipt_data
+                storage_format=self.storage_format,
+                receipt_data=header
             )
 
             self.session.add(receipt_model)
+            await self.session.flush()
+            await self._insert_lines(receipt_model.receipt_id, lines)
             await self.session.commit()
             await self.session.refresh(receipt_model)
 
-            return self._model_to_entity(receipt_model)
+            return await self._model_to_entity(receipt_model)
 
         except IntegrityError as e:
             await self.session.rollback()
@@ -36,6 +114,16 @@ class ReceiptRepository:
             await self.session.rollback()
             raise InternalException() from e
 
+    async def generate_receipt(self, purchase_id: UUID) -> Optional[Receipt]:
+        """Generar el recibo de una compra con una sola sentencia (documento armado en SQL e
+        INSERT ... ON CONFLICT DO NOTHING). Devuelve None si la compra ya tiene recibo"""
+        return await self._store_generated_receipt(purchase_id, regenerate=False)
+
+    async def regenerate_receipt(self, purchase_id: UUID) -> Receipt:
+        """Generar o reemplazar el recibo de una compra con una sola sentencia
+        (INSERT ... ON CONFLICT DO UPDATE); conserva receipt_id y generated_at"""
+        return await self._store_generated_receipt(purchase_id, regenerate=True)
+
     async def get_receipt_by_id(self, receipt_id: UUID) -> Optional[Receipt]:
         """Obtener recibo por ID"""
         try:
@@ -45,7 +133,7 @@ class ReceiptRepository:
             receipt_model = result.scalar_one_or_none()
 
             if receipt_model:
-                return self._model_to_entity(receipt_model)
+                return await self._model_to_entity(receipt_model)
             return None
 
         except Exception as e:
@@ -60,14 +148,68 @@ class ReceiptRepository:
             receipt_model = result.scalar_one_or_none()
 
             if receipt_model:
-                return self._model_to_entity(receipt_model)
+                return await self._model_to_entity(receipt_model)
             return None
 
         except Exception as e:
             raise InternalException() from e
 
+    async def search_receipts(self, limit: int, product_sku: Optional[str] = None,
+                              product_id: Optional[UUID] = None, payment_method: Optional[str] = None,
+                              date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                              before_purchased_at: Optional[datetime] = None,
+                              before_receipt_id: Optional[UUID] = None) -> List[dict]:
+        """Buscar recibos filtrando en SQL (contención JSONB sobre items, método de pago indexado y
+        fecha de compra) y devolver sólo una proyección, sin cargar el documento completo"""
+        try:
+            stmt = select(
+                ReceiptModel.receipt_id,
+                ReceiptModel.purchase_id,
+                ReceiptModel.generated_at,
+                PurchaseModel.purchased_at,
+                ReceiptModel.receipt_data.op("->>")(
+                    literal_column("'purchase_number'")).label("purchase_number"),
+                receipt_payment_method_expr.label("payment_method"),
+                cast(ReceiptModel.receipt_data.op("->>")(
+                    literal_column("'final_amount'")), Numeric(10, 2)).label("final_amount"),
+                # summary.total_items existe en ambos formatos de almacenamiento
+                cast(ReceiptModel.receipt_data.op("#>>")(
+                    literal_column("'{summary,total_items}'")), Integer).label("items_count")
+            ).join(
+                PurchaseModel, PurchaseModel.purchase_id == ReceiptModel.purchase_id
+            )
+
+            if product_sku is not None:
+                stmt = stmt.where(ReceiptModel.receipt_id.in_(self._receipts_with_line(
+                    {"product_sku": product_sku}, ReceiptLineModel.product_sku == product_sku)))
+            if product_id is not None:
+                stmt = stmt.where(ReceiptModel.receipt_id.in_(self._receipts_with_line(
+                    {"product_id": str(product_id)}, ReceiptLineModel.product_id == product_id)))
+            if payment_method is not None:
+                stmt = stmt.where(receipt_payment_method_expr == payment_method)
+            if date_from is not None:
+                stmt = stmt.where(PurchaseModel.purchased_at >= date_from)
+            if date_to is not None:
+                stmt = stmt.where(PurchaseModel.purchased_at < date_to)
+            if before_purchased_at is not None and before_receipt_id is not None:
+                stmt = stmt.where(
+                    tuple_(PurchaseModel.purchased_at, ReceiptModel.receipt_id) <
+                    tuple_(before_purchased_at, before_receipt_id)
+                )
+
+            stmt = stmt.order_by(
+                PurchaseModel.purchased_at.desc(),
+                ReceiptModel.receipt_id.desc()
+            ).limit(limit)
+
+            result = await self.session.execute(stmt)
+            return [dict(row._mapping) for row in result.all()]
+
+        except Exception as e:
+            raise InternalException() from e
+
     async def update_receipt_data(self, receipt_id: UUID, receipt_data: dict) -> Receipt:
-        """Actualizar datos del recibo"""
+        """Actualizar datos del recibo (se reescribe en el formato de almacenamiento configurado)"""
         try:
             stmt = select(ReceiptModel).where(
                 ReceiptModel.receipt_id == receipt_id)
@@ -77,11 +219,18 @@ class ReceiptRepository:
             if not receipt_model:
                 raise NotFoundException()
 
-            receipt_model.receipt_data = receipt_data
+            header, lines = self._split_receipt_data(receipt_data)
+            await self.session.execute(
+                delete(ReceiptLineModel).where(ReceiptLineModel.receipt_id == receipt_id))
+            await self._insert_lines(receipt_id, lines)
+
+            receipt_model.storage_format = self.storage_format
+            receipt_model.receipt_data = header
             await self.session.commit()
             await self.session.refresh(receipt_model)
+            receipt_lines_cache.invalidate(receipt_id)
 
-            return self._model_to_entity(receipt_model)
+            return await self._model_to_entity(receipt_model)
 
         except NotFoundException:
             raise
@@ -101,7 +250,7 @@ class ReceiptRepository:
             raise InternalException() from e
 
     async def delete_receipt(self, receipt_id: UUID) -> bool:
-        """Eliminar un recibo"""
+        """Eliminar un recibo (sus líneas se eliminan en cascada)"""
         try:
             stmt = select(ReceiptModel).where(
                 ReceiptModel.receipt_id == receipt_id)
@@ -113,6 +262,7 @@ class ReceiptRepository:
 
             await self.session.delete(receipt_model)
             await self.session.commit()
+            receipt_lines_cache.invalidate(receipt_id)
 
             return True
 
@@ -120,11 +270,240 @@ class ReceiptRepository:
             await self.session.rollback()
             raise InternalException() from e
 
-    def _model_to_entity(self, receipt_model: ReceiptModel) -> Receipt:
-        """Convertir modelo SQLAlchemy a entidad de dominio"""
+    async def convert_storage_format(self, target_format: str, limit: int) -> int:
+        """Convertir un lote de recibos al formato dado con una sola sentencia (FOR UPDATE SKIP LOCKED).
+        compact: mueve receipt_data->'items' a receipt_lines; json: reconstruye items desde receipt_lines."""
+        try:
+            if target_format == "compact":
+                stmt = text("""
+                    WITH batch AS (
+                        SELECT receipt_id, receipt_data FROM receipts
+                        WHERE storage_format = 'json'
+                        LIMIT :limit
+                        FOR UPDATE SKIP LOCKED
+                    ), moved_lines AS (
+                        INSERT INTO receipt_lines (receipt_id, line_no, product_id, product_sku,
+                                                   product_name, unit_price, quantity, subtotal)
+                        SELECT batch.receipt_id, line.line_no, (line.item ->> 'product_id')::uuid,
+                               line.item ->> 'product_sku', line.item ->> 'product_name',
+                               (line.item ->> 'unit_price')::numeric, (line.item ->> 'quantity')::int,
+                               (line.item ->> 'subtotal')::numeric
+                        FROM batch
+                        CROSS JOIN LATERAL jsonb_array_elements(
+                            COALESCE(batch.receipt_data -> 'items', '[]'::jsonb)
+                        ) WITH ORDINALITY AS line(item, line_no)
+                    )
+                    UPDATE receipts SET receipt_data = receipts.receipt_data - 'items',
+                                        storage_format = 'compact'
+                    FROM batch
+                    WHERE receipts.receipt_id = batch.receipt_id
+                    RETURNING receipts.receipt_id
+                """)
+            else:
+                stmt = text("""
+                    WITH batch AS (
+                        SELECT receipt_id FROM receipts
+                        WHERE storage_format = 'compact'
+                        LIMIT :limit
+                        FOR UPDATE SKIP LOCKED
+                    ), removed_lines AS (
+                        DELETE FROM receipt_lines
+                        USING batch
+                        WHERE receipt_lines.receipt_id = batch.receipt_id
+                        RETURNING receipt_lines.*
+                    ), items AS (
+                        SELECT receipt_id, jsonb_agg(jsonb_build_object(
+                            'product_id', product_id::text,
+                            'product_name', product_name,
+                            'product_sku', product_sku,
+                            'unit_price', unit_price::float8,
+                            'quantity', quantity,
+                            'subtotal', subtotal::float8
+                        ) ORDER BY line_no) AS items
+                        FROM removed_lines
+                        GROUP BY receipt_id
+                    )
+                    UPDATE receipts SET receipt_data = receipts.receipt_data ||
+                                            jsonb_build_object('items', COALESCE(items.items, '[]'::jsonb)),
+                                        storage_format = 'json'
+                    FROM batch LEFT JOIN items ON items.receipt_id = batch.receipt_id
+                    WHERE receipts.receipt_id = batch.receipt_id
+                    RETURNING receipts.receipt_id
+                """)
+
+            result = await self.session.execute(stmt, {"limit": limit})
+            converted = result.scalars().all()
+            await self.session.commit()
+
+            for receipt_id in converted:
+                receipt_lines_cache.invalidate(receipt_id)
+            return len(converted)
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+    async def _store_generated_receipt(self, purchase_id: UUID, regenerate: bool) -> Optional[Receipt]:
+        try:
+            result = await self.session.execute(
+                self._generate_receipt_statement(regenerate),
+                {"purchase_id": purchase_id, "receipt_id": uuid4(),
+                 "storage_format": self.storage_format}
+            )
+            row = result.one()
+            await self.session.commit()
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException() from e
+
+        if not row.purchase_found:
+            raise NotFoundException()
+        if row.receipt_id is None:
+            return None
+
+        if row.storage_format == "compact":
+            receipt_lines_cache.set(row.receipt_id, row.receipt_data["items"])
+        else:
+            receipt_lines_cache.invalidate(row.receipt_id)
+
+        return Receipt(
+            receipt_id=row.receipt_id,
+            purchase_id=purchase_id,
+            receipt_data=row.receipt_data,
+            generated_at=row.generated_at
+        )
+
+    def _generate_receipt_statement(self, regenerate: bool):
+        """INSERT del recibo armado en SQL; en formato compacto las líneas se escriben en la
+        misma sentencia. Siempre devuelve una fila para distinguir compra inexistente de conflicto"""
+        compact = self.storage_format == "compact"
+        receipt_data = "document.header" if compact else \
+            "document.header || jsonb_build_object('items', document.items)"
+
+        if regenerate:
+            on_conflict = """DO UPDATE SET storage_format = EXCLUDED.storage_format,
+                                        receipt_data = EXCLUDED.receipt_data"""
+        else:
+            on_conflict = "DO NOTHING"
+
+        statements = [f"""
+            stored AS (
+                INSERT INTO receipts (receipt_id, purchase_id, storage_format, receipt_data)
+                SELECT CAST(:receipt_id AS uuid), purchase.purchase_id,
+                       CAST(:storage_format AS varchar), {receipt_data}
+                FROM purchase CROSS JOIN document
+                ON CONFLICT (purchase_id) {on_conflict}
+                RETURNING receipt_id, storage_format, generated_at
+            )"""]
+
+        if compact:
+            # Las líneas nuevas reemplazan a las anteriores por (receipt_id, line_no); las que
+            # sobran se eliminan aparte, así ninguna fila se toca dos veces en la sentencia
+            statements.append("""
+            stored_lines AS (
+                INSERT INTO receipt_lines (receipt_id, line_no, product_id, product_sku,
+                                           product_name, unit_price, quantity, subtotal)
+                SELECT stored.receipt_id, items.line_no, items.product_id, items.product_sku,
+                       items.product_name, items.unit_price, items.quantity, items.subtotal
+                FROM stored CROSS JOIN items
+                ON CONFLICT (receipt_id, line_no) DO UPDATE SET
+                    product_id = EXCLUDED.product_id, product_sku = EXCLUDED.product_sku,
+                    product_name = EXCLUDED.product_name, unit_price = EXCLUDED.unit_price,
+                    quantity = EXCLUDED.quantity, subtotal = EXCLUDED.subtotal
+            )""")
+
+        if regenerate:
+            stale_lines = "receipt_lines.line_no > (SELECT count(*) FROM items)" if compact else "true"
+            statements.append(f"""
+            stale_lines AS (
+                DELETE FROM receipt_lines
+                USING stored
+                WHERE receipt_lines.receipt_id = stored.receipt_id AND {stale_lines}
+            )""")
+
+        return text(f"""
+            WITH {RECEIPT_DOCUMENT_CTES}, {", ".join(statements)}
+            SELECT EXISTS (SELECT 1 FROM purchase) AS purchase_found,
+                   stored.receipt_id, stored.storage_format, stored.generated_at,
+                   document.header || jsonb_build_object('items', document.items) AS receipt_data
+            FROM (SELECT 1) AS single_row
+            LEFT JOIN stored ON true
+            LEFT JOIN document ON true
+        """).columns(
+            purchase_found=Boolean, receipt_id=PG_UUID(as_uuid=True), storage_format=String,
+            generated_at=DateTime(timezone=True), receipt_data=JSONB
+        )
+
+    def _receipts_with_line(self, json_item: dict, line_condition):
+        """IDs de recibos con una línea que cumple el filtro, en ambos formatos; cada rama usa su índice"""
+        return union(
+            select(ReceiptModel.receipt_id).where(
+                receipt_items_expr.contains([json_item])),
+            select(ReceiptLineModel.receipt_id).where(line_condition)
+        )
+
+    def _split_receipt_data(self, receipt_data: dict) -> Tuple[dict, List[dict]]:
+        """Separar cabecera e items según el formato de almacenamiento configurado"""
+        if self.storage_format != "compact":
+            return receipt_data, []
+
+        header = {key: value for key,
+                  value in receipt_data.items() if key != "items"}
+        return header, receipt_data.get("items", [])
+
+    async def _insert_lines(self, receipt_id: UUID, lines: List[dict]) -> None:
+        if not lines:
+            return
+
+        await self.session.execute(insert(ReceiptLineModel), [
+            {
+                "receipt_id": receipt_id,
+                "line_no": line_no,
+                "product_id": UUID(str(item["product_id"])),
+                "product_sku": item["product_sku"],
+                "product_name": item["product_name"],
+                "unit_price": item["unit_price"],
+                "quantity": item["quantity"],
+                "subtotal": item["subtotal"]
+            }
+            for line_no, item in enumerate(lines, start=1)
+        ])
+
+    async def _get_lines(self, receipt_id: UUID) -> List[dict]:
+        """Líneas de un recibo compacto, desde la cache o la base de datos"""
+        lines = receipt_lines_cache.get(receipt_id)
+        if lines is not None:
+            return lines
+
+        result = await self.session.execute(
+            select(ReceiptLineModel).where(
+                ReceiptLineModel.receipt_id == receipt_id
+            ).order_by(ReceiptLineModel.line_no)
+        )
+        lines = [
+            {
+                "product_id": str(line.product_id),
+                "product_name": line.product_name,
+                "product_sku": line.product_sku,
+                "unit_price": float(line.unit_price),
+                "quantity": line.quantity,
+                "subtotal": float(line.subtotal)
+            }
+            for line in result.scalars().all()
+        ]
+        receipt_lines_cache.set(receipt_id, lines)
+        return lines
+
+    async def _model_to_entity(self, receipt_model: ReceiptModel) -> Receipt:
+        """Convertir modelo SQLAlchemy a entidad de dominio, reensamblando los recibos compactos"""
+        receipt_data = receipt_model.receipt_data
+        if receipt_model.storage_format == "compact":
+            receipt_data = {**receipt_data, "items": await self._get_lines(receipt_model.receipt_id)}
+
         return Receipt(
             receipt_id=receipt_model.receipt_id,
             purchase_id=receipt_model.purchase_id,
-            receipt_data=receipt_model.receipt_data,
+            receipt_data=receipt_data,
             generated_at=receipt_model.generated_at
         )
@@ -0,0 +1,372 @@
+from typing import Optional, List, Tuple
+from uuid import UUID
+from datetime import datetime, date, time, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, and_, tuple_, true, cast, literal, Date, DateTime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.core.jobs_config import jobs_settings
+from app.infrastructure.db.models.purchase_model import PurchaseModel
+from app.infrastructure.db.models.cart_item_archive_model import cart_items_with_archive
+from app.infrastructure.db.models.sales_rollup_model import (
+    SalesDailyModel, SalesDailyProductModel, SalesDailyPaymentMethodModel, RollupWatermarkModel,
+    SalesRollupDirtyDayModel
+)
+from app.domain.exceptions.internal_exception import InternalException
+
+ROLLUP_GRANULARITIES = ("day", "week", "month")
+
+
+class SalesRollupRepository:
+    """Tablas de rollup de ventas. Los métodos de actualización no confirman la transacción: el job decide cuándo hacer commit.
+    mark_purchases_dirty corre dentro de la transacción que modifica las compras."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def try_advisory_xact_lock(self, lock_key: int) -> bool:
+        """Intentar tomar un advisory lock ligado a la transacción actual"""
+        try:
+            result = await self.session.execute(
+                select(func.pg_try_advisory_xact_lock(lock_key)))
+            return bool(result.scalar_one())
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def lock_watermark(self, name: str) -> Tuple[Optional[datetime], Optional[UUID]]:
+        """Obtener (creando si no existe) y bloquear la marca de agua de un rollup"""
+        try:
+            await self.session.execute(
+                pg_insert(RollupWatermarkModel).values(
+                    name=name).on_conflict_do_nothing(index_elements=[RollupWatermarkModel.name])
+            )
+            result = await self.session.execute(
+                select(RollupWatermarkModel.last_purchased_at, RollupWatermarkModel.last_purchase_id).where(
+                    RollupWatermarkModel.name == name
+                ).with_for_update()
+            )
+            row = result.one()
+            return row.last_purchased_at, row.last_purchase_id
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_batch_upper_bound(self, after_purchased_at: Optional[datetime], after_purchase_id: Optional[UUID],
+                                    cutoff: datetime, limit: int) -> Tuple[int, Optional[datetime], Optional[UUID]]:
+        """Calcular el final del próximo lote de compras posteriores a la marca de agua y anteriores a cutoff"""
+        try:
+            batch = select(
+                PurchaseModel.purchased_at, PurchaseModel.purchase_id
+            ).where(
+                self._after_watermark(after_purchased_at, after_purchase_id),
+                PurchaseModel.purchased_at < cutoff
+            ).order_by(
+                PurchaseModel.purchased_at.asc(), PurchaseModel.purchase_id.asc()
+            ).limit(limit).subquery("batch")
+
+            result = await self.session.execute(
+                select(batch.c.purchased_at, batch.c.purchase_id, func.count().over().label("batch_size")).order_by(
+                    batch.c.purchased_at.desc(), batch.c.purchase_id.desc()
+                ).limit(1)
+            )
+            row = result.first()
+            if not row:
+                return 0, None, None
+            return row.batch_size, row.purchased_at, row.purchase_id
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def apply_purchases_to_rollups(self, after_purchased_at: Optional[datetime], after_purchase_id: Optional[UUID],
+                                         upper_purchased_at: datetime, upper_purchase_id: UUID, timezone: str) -> None:
+        """Sumar a los rollups diarios las compras del intervalo (marca de agua, límite superior]"""
+        try:
+            window = and_(
+                self._after_watermark(after_purchased_at, after_purchase_id),
+                tuple_(PurchaseModel.purchased_at, PurchaseModel.purchase_id) <=
+                tuple_(upper_purchased_at, upper_purchase_id),
+                PurchaseModel.status == "completed"
+            )
+            sales_date = func.date(func.timezone(
+                timezone, PurchaseModel.purchased_at))
+
+            await self._upsert_daily(window, sales_date)
+            await self._upsert_daily_products(window, sales_date)
+            await self._upsert_daily_payment_methods(window, sales_date)
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def mark_purchases_dirty(self, purchase_ids: List[UUID],
+                                   timezone: str = jobs_settings.SALES_ROLLUP_TIMEZONE) -> None:
+        """Marcar para recalcular los días de compras modificadas (sin confirmar: viaja en la
+        transacción del llamador, así ningún cambio queda sin marcar)"""
+        if not purchase_ids:
+            return
+
+        try:
+            sales_date = func.date(func.timezone(timezone, PurchaseModel.purchased_at))
+            days = select(sales_date).where(
+                PurchaseModel.purchase_id.in_(purchase_ids)).distinct()
+
+            stmt = pg_insert(SalesRollupDirtyDayModel).from_select(["sales_date"], days)
+            await self.session.execute(stmt.on_conflict_do_nothing(
+                index_elements=[SalesRollupDirtyDayModel.sales_date]))
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def take_dirty_days(self, limit: int) -> List[date]:
+        """Quitar y devolver un lote de días marcados. Si la transacción se deshace vuelven a quedar
+        marcados; un cambio confirmado después de tomarlos los vuelve a marcar"""
+        try:
+            batch = select(SalesRollupDirtyDayModel.sales_date).order_by(
+                SalesRollupDirtyDayModel.sales_date
+            ).limit(limit).with_for_update(skip_locked=True).scalar_subquery()
+
+            result = await self.session.execute(
+                delete(SalesRollupDirtyDayModel).where(
+                    SalesRollupDirtyDayModel.sales_date.in_(batch)
+                ).returning(SalesRollupDirtyDayModel.sales_date),
+                execution_options={"synchronize_session": False}
+            )
+            return sorted(result.scalars().all())
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def recompute_days(self, days: List[date], upto_purchased_at: datetime, upto_purchase_id: UUID,
+                             timezone: str) -> None:
+        """Rehacer desde purchases los rollups de los días dados con las compras hasta la marca de
+        agua (las posteriores las suma el job cuando la marca avance)"""
+        if not days:
+            return
+
+        try:
+            sales_date = func.date(func.timezone(timezone, PurchaseModel.purchased_at))
+            # Rango de purchased_at de los días (hora local) para aprovechar índice y particiones
+            first_start = func.timezone(timezone, literal(
+                datetime.combine(min(days), time.min), DateTime()))
+            last_end = func.timezone(timezone, literal(
+                datetime.combine(max(days) + timedelta(days=1), time.min), DateTime()))
+            window = and_(
+                PurchaseModel.purchased_at >= first_start,
+                PurchaseModel.purchased_at < last_end,
+                sales_date.in_(days),
+                tuple_(PurchaseModel.purchased_at, PurchaseModel.purchase_id) <=
+                tuple_(upto_purchased_at, upto_purchase_id),
+                PurchaseModel.status == "completed"
+            )
+
+            for model in (SalesDailyModel, SalesDailyProductModel, SalesDailyPaymentMethodModel):
+                await self.session.execute(
+                    delete(model).where(model.sales_date.in_(days)),
+                    execution_options={"synchronize_session": False})
+
+            await self._upsert_daily(window, sales_date)
+            await self._upsert_daily_products(window, sales_date)
+            await self._upsert_daily_payment_methods(window, sales_date)
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def set_watermark(self, name: str, purchased_at: datetime, purchase_id: UUID) -> None:
+        """Avanzar la marca de agua de un rollup"""
+        try:
+            await self.session.execute(
+                update(RollupWatermarkModel).where(RollupWatermarkModel.name == name).values(
+                    last_purchased_at=purchased_at, last_purchase_id=purchase_id, updated_at=func.now()
+                ),
+                execution_options={"synchronize_session": False}
+            )
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_watermark(self, name: str) -> Optional[dict]:
+        """Obtener la marca de agua de un rollup sin bloquearla"""
+        try:
+            result = await self.session.execute(
+                select(RollupWatermarkModel.last_purchased_at, RollupWatermarkModel.updated_at).where(
+                    RollupWatermarkModel.name == name)
+            )
+            row = result.first()
+            return dict(row._mapping) if row else None
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_sales_by_period(self, granularity: str, date_from: date, date_to: date) -> List[dict]:
+        """Totales de ventas agrupados por día, semana o mes en [date_from, date_to)"""
+        try:
+            period = self._period(granularity, SalesDailyModel.sales_date)
+            stmt = select(
+                period,
+                func.sum(SalesDailyModel.purchases_count).label(
+                    "purchases_count"),
+                func.sum(SalesDailyModel.units_sold).label("units_sold"),
+                func.sum(SalesDailyModel.gross_amount).label("gross_amount"),
+                func.sum(SalesDailyModel.discount_amount).label(
+                    "discount_amount"),
+                func.sum(SalesDailyModel.tax_amount).label("tax_amount"),
+                func.sum(SalesDailyModel.net_amount).label("net_amount")
+            ).where(
+                SalesDailyModel.sales_date >= date_from,
+                SalesDailyModel.sales_date < date_to
+            ).group_by(period).order_by(period)
+
+            result = await self.session.execute(stmt)
+            return [dict(row._mapping) for row in result.all()]
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_payment_methods_by_period(self, granularity: str, date_from: date, date_to: date) -> List[dict]:
+        """Compras e importe neto por método de pago y periodo en [date_from, date_to)"""
+        try:
+            period = self._period(
+                granularity, SalesDailyPaymentMethodModel.sales_date)
+            stmt = select(
+                period,
+                SalesDailyPaymentMethodModel.payment_method,
+                func.sum(SalesDailyPaymentMethodModel.purchases_count).label(
+                    "purchases_count"),
+                func.sum(SalesDailyPaymentMethodModel.net_amount).label(
+                    "net_amount")
+            ).where(
+                SalesDailyPaymentMethodModel.sales_date >= date_from,
+                SalesDailyPaymentMethodModel.sales_date < date_to
+            ).group_by(
+                period, SalesDailyPaymentMethodModel.payment_method
+            ).order_by(period, SalesDailyPaymentMethodModel.payment_method)
+
+            result = await self.session.execute(stmt)
+            return [dict(row._mapping) for row in result.all()]
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def get_top_products(self, date_from: date, date_to: date, limit: int) -> List[dict]:
+        """Productos (SKU) más vendidos en [date_from, date_to)"""
+        try:
+            units_sold = func.sum(
+                SalesDailyProductModel.units_sold).label("units_sold")
+            stmt = select(
+                SalesDailyProductModel.product_sku,
+                func.max(SalesDailyProductModel.product_name).label(
+                    "product_name"),
+                units_sold,
+                func.sum(SalesDailyProductModel.revenue).label("revenue")
+            ).where(
+                SalesDailyProductModel.sales_date >= date_from,
+                SalesDailyProductModel.sales_date < date_to
+            ).group_by(
+                SalesDailyProductModel.product_sku
+            ).order_by(units_sold.desc(), SalesDailyProductModel.product_sku).limit(limit)
+
+            result = await self.session.execute(stmt)
+            return [dict(row._mapping) for row in result.all()]
+
+        except Exception as e:
+            raise InternalException() from e
+
+    async def _upsert_daily(self, window, sales_date) -> None:
+        # Incluye los items archivados para que reconstruir días antiguos dé las mismas unidades
+        cart_items = cart_items_with_archive()
+        items_agg = select(
+            func.coalesce(func.sum(cart_items.c.quantity), 0).label("units")
+        ).where(
+            cart_items.c.cart_id == PurchaseModel.cart_id
+        ).lateral("items_agg")
+
+        rows = select(
+            sales_date.label("sales_date"),
+            func.count(PurchaseModel.purchase_id),
+            func.sum(items_agg.c.units),
+            func.sum(PurchaseModel.total_amount),
+            func.sum(PurchaseModel.discount_amount),
+            func.sum(PurchaseModel.tax_amount),
+            func.sum(PurchaseModel.final_amount)
+        ).select_from(PurchaseModel).join(items_agg, true()).where(window).group_by(sales_date)
+
+        stmt = pg_insert(SalesDailyModel).from_select(
+            ["sales_date", "purchases_count", "units_sold", "gross_amount",
+             "discount_amount", "tax_amount", "net_amount"],
+            rows
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SalesDailyModel.sales_date],
+            set_={
+                "purchases_count": SalesDailyModel.purchases_count + stmt.excluded.purchases_count,
+                "units_sold": SalesDailyModel.units_sold + stmt.excluded.units_sold,
+                "gross_amount": SalesDailyModel.gross_amount + stmt.excluded.gross_amount,
+                "discount_amount": SalesDailyModel.discount_amount + stmt.excluded.discount_amount,
+                "tax_amount": SalesDailyModel.tax_amount + stmt.excluded.tax_amount,
+                "net_amount": SalesDailyModel.net_amount + stmt.excluded.net_amount,
+                "updated_at": func.now()
+            }
+        )
+        await self.session.execute(stmt)
+
+    async def _upsert_daily_products(self, window, sales_date) -> None:
+        cart_items = cart_items_with_archive()
+        rows = select(
+            sales_date.label("sales_date"),
+            cart_items.c.product_sku,
+            func.max(cart_items.c.product_name),
+            func.sum(cart_items.c.quantity),
+            func.sum(cart_items.c.subtotal)
+        ).select_from(PurchaseModel).join(
+            cart_items, cart_items.c.cart_id == PurchaseModel.cart_id
+        ).where(window).group_by(sales_date, cart_items.c.product_sku)
+
+        stmt = pg_insert(SalesDailyProductModel).from_select(
+            ["sales_date", "product_sku", "product_name", "units_sold", "revenue"],
+            rows
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SalesDailyProductModel.sales_date,
+                            SalesDailyProductModel.product_sku],
+            set_={
+                "product_name": stmt.excluded.product_name,
+                "units_sold": SalesDailyProductModel.units_sold + stmt.excluded.units_sold,
+                "revenue": SalesDailyProductModel.revenue + stmt.excluded.revenue
+            }
+        )
+        await self.session.execute(stmt)
+
+    async def _upsert_daily_payment_methods(self, window, sales_date) -> None:
+        payment_method = func.coalesce(
+            PurchaseModel.payment_method, "not_specified")
+        rows = select(
+            sales_date.label("sales_date"),
+            payment_method.label("payment_method"),
+            func.count(PurchaseModel.purchase_id),
+            func.sum(PurchaseModel.final_amount)
+        ).where(window).group_by(sales_date, payment_method)
+
+        stmt = pg_insert(SalesDailyPaymentMethodModel).from_select(
+            ["sales_date", "payment_method", "purchases_count", "net_amount"],
+            rows
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SalesDailyPaymentMethodModel.sales_date,
+                            SalesDailyPaymentMethodModel.payment_method],
+            set_={
+                "purchases_count": SalesDailyPaymentMethodModel.purchases_count + stmt.excluded.purchases_count,
+                "net_amount": SalesDailyPaymentMethodModel.net_amount + stmt.excluded.net_amount
+            }
+        )
+        await self.session.execute(stmt)
+
+    def _after_watermark(self, after_purchased_at: Optional[datetime], after_purchase_id: Optional[UUID]):
+        if after_purchased_at is None or after_purchase_id is None:
+            return true()
+        return tuple_(PurchaseModel.purchased_at, PurchaseModel.purchase_id) > \
+            tuple_(after_purchased_at, after_purchase_id)
+
+    def _period(self, granularity: str, sales_date):
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise ValueError(
+                f"Granularity must be one of: {', '.join(ROLLUP_GRANULARITIES)}")
+        return cast(func.date_trunc(granularity, sales_date), Date).label("period_start")
@@ -0,0 +1,140 @@
+from typing import Optional, List, Tuple
+from uuid import UUID
+from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, case, or_, bindparam, text, String, Numeric
+from sqlalchemy.dialects.postgresql import insert as pg_insert, array_agg, aggregate_order_by, ARRAY
+from app.infrastructure.db.models.purchase_model import PurchaseModel
+from app.infrastructure.db.models.user_order_stats_model import UserOrderStatsModel
+from app.domain.exceptions.internal_exception import InternalException
+
+STATS_COLUMNS = [
+    "user_id", "orders_count", "total_spent", "first_order_at", "last_order_at", "last_purchase_id"
+]
+
+
+class UserOrderStatsRepository:
+    """Totales históricos por usuario. record_purchases y record_amount_changes no confirman: corren
+    dentro de la transacción que crea o modifica la compra, así los totales nunca se desfasan"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_stats(self, user_id: str) -> Optional[dict]:
+        """Obtener los totales de un usuario; None si nunca compró"""
+        try:
+            stmt = select(UserOrderStatsModel).where(
+                UserOrderStatsModel.user_id == user_id)
+            result = await self.session.execute(stmt)
+            stats_model = result.scalar_one_or_none()
+
+            if stats_model:
+                return self._model_to_dict(stats_model)
+            return None
+
+        except Exception as e:
+            raise InternalException(
+                f"Error getting order stats for user {user_id}: {type(e).__name__}: {str(e)}") from e
+
+    async def record_purchases(self, purchase_ids: List[UUID]) -> None:
+        """Sumar a los totales de sus usuarios compras creadas en la transacción actual (un solo upsert)"""
+        if not purchase_ids:
+            return
+
+        new_orders = self._aggregate_purchases().where(
+            PurchaseModel.purchase_id.in_(purchase_ids))
+
+        stmt = pg_insert(UserOrderStatsModel).from_select(STATS_COLUMNS, new_orders)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserOrderStatsModel.user_id],
+            set_={
+                "orders_count": UserOrderStatsModel.orders_count + stmt.excluded.orders_count,
+                "total_spent": UserOrderStatsModel.total_spent + stmt.excluded.total_spent,
+                "first_order_at": func.least(
+                    UserOrderStatsModel.first_order_at, stmt.excluded.first_order_at),
+                "last_order_at": func.greatest(
+                    UserOrderStatsModel.last_order_at, stmt.excluded.last_order_at),
+                "last_purchase_id": case(
+                    (or_(UserOrderStatsModel.last_order_at.is_(None),
+                         stmt.excluded.last_order_at >= UserOrderStatsModel.last_order_at),
+                     stmt.excluded.last_purchase_id),
+                    else_=UserOrderStatsModel.last_purchase_id
+                ),
+                "updated_at": func.now()
+            }
+        )
+        await self.session.execute(stmt)
+
+    async def record_amount_changes(self, changes: List[Tuple[str, Decimal]]) -> None:
+        """Aplicar cambios del monto final de compras ya contadas, como pares (user_id, diferencia)"""
+        deltas = {}
+        for user_id, delta in changes:
+            deltas[user_id] = deltas.get(user_id, Decimal("0")) + delta
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        # Orden estable de usuarios para que dos transacciones no se bloqueen en orden inverso
+        user_ids = sorted(deltas)
+        changed = func.unnest(
+            bindparam("user_ids", user_ids, type_=ARRAY(String(255))),
+            bindparam("deltas", [deltas[user_id] for user_id in user_ids],
+                      type_=ARRAY(Numeric(14, 2)))
+        ).table_valued("user_id", "delta").render_derived(name="changed")
+
+        stmt = update(UserOrderStatsModel).where(
+            UserOrderStatsModel.user_id == changed.c.user_id
+        ).values(
+            total_spent=UserOrderStatsModel.total_spent + changed.c.delta,
+            updated_at=func.now()
+        )
+        await self.session.execute(
+            stmt, execution_options={"synchronize_session": False})
+
+    async def rebuild(self) -> int:
+        """Recalcular desde cero todos los totales con un solo INSERT ... SELECT sobre purchases.
+        Bloquea las escrituras de la tabla mientras dura (las compras en curso esperan y luego suman
+        sobre el resultado) pero no las lecturas; devuelve la cantidad de usuarios"""
+        try:
+            await self.session.execute(text(
+                "LOCK TABLE user_order_stats IN SHARE ROW EXCLUSIVE MODE"))
+            await self.session.execute(delete(UserOrderStatsModel))
+
+            stmt = pg_insert(UserOrderStatsModel).from_select(
+                STATS_COLUMNS, self._aggregate_purchases()
+            ).returning(UserOrderStatsModel.user_id)
+
+            result = await self.session.execute(stmt)
+            users = len(result.all())
+            await self.session.commit()
+
+            return users
+
+        except Exception as e:
+            await self.session.rollback()
+            raise InternalException(
+                f"Error rebuilding user order stats: {type(e).__name__}: {str(e)}") from e
+
+    def _aggregate_purchases(self):
+        """Totales por usuario de las compras que cumplan el filtro que agregue el llamador"""
+        return select(
+            PurchaseModel.user_id,
+            func.count(PurchaseModel.purchase_id),
+            func.sum(PurchaseModel.final_amount),
+            func.min(PurchaseModel.purchased_at),
+            func.max(PurchaseModel.purchased_at),
+            array_agg(aggregate_order_by(
+                PurchaseModel.purchase_id,
+                PurchaseModel.purchased_at.desc(), PurchaseModel.purchase_id.desc()))[1]
+        ).group_by(PurchaseModel.user_id).order_by(PurchaseModel.user_id)
+
+    def _model_to_dict(self, stats_model: UserOrderStatsModel) -> dict:
+        """Convertir modelo SQLAlchemy a diccionario"""
+        return {
+            "user_id": stats_model.user_id,
+            "orders_count": stats_model.orders_count,
+            "total_spent": stats_model.total_spent,
+            "first_order_at": stats_model.first_order_at,
+            "last_order_at": stats_model.last_order_at,
+            "last_purchase_id": stats_model.last_purchase_id
+        }
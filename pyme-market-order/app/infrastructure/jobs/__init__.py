@@ -0,0 +1,24 @@
+from .periodic_job import PeriodicJob
+from .abandoned_cart_sweeper import AbandonedCartSweeper, abandoned_cart_sweeper
+from .receipt_generation_worker import ReceiptGenerationWorker, receipt_generation_worker
+from .sales_rollup_job import SalesRollupJob, sales_rollup_job
+from .checkout_recovery_job import CheckoutRecoveryJob, checkout_recovery_job
+from .outbox_relay_job import OutboxRelayJob, outbox_relay_job
+from .receipt_storage_migration_job import ReceiptStorageMigrationJob, receipt_storage_migration_job
+from .purchase_counters_backfill_job import PurchaseCountersBackfillJob, purchase_counters_backfill_job
+from .cart_store_flush_job import CartStoreFlushJob, cart_store_flush_job
+from .partition_maintenance_job import PartitionMaintenanceJob, partition_maintenance_job
+from .product_replica_reconcile_job import ProductReplicaReconcileJob, product_replica_reconcile_job
+
+background_jobs = [
+    abandoned_cart_sweeper,
+    receipt_generation_worker,
+    sales_rollup_job,
+    checkout_recovery_job,
+    outbox_relay_job,
+    receipt_storage_migration_job,
+    purchase_counters_backfill_job,
+    cart_store_flush_job,
+    partition_maintenance_job,
+    product_replica_reconcile_job,
+]
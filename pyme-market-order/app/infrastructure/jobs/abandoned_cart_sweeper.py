@@ -0,0 +1,75 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+from app.core.database_config import AsyncSessionLocal
+from app.core.jobs_config import jobs_settings
+from app.infrastructure.db.repositories.cart_maintenance_repository import CartMaintenanceRepository
+from app.infrastructure.jobs.periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+CART_SWEEPER_LOCK_KEY = 73010001
+
+
+class AbandonedCartSweeper(PeriodicJob):
+    """Marca como abandonados los carritos activos sin actividad por más de idle_ttl_hours"""
+
+    name = "abandoned-cart-sweeper"
+
+    def __init__(self, interval_seconds: int, idle_ttl_hours: int, batch_size: int,
+                 items_action: str = "none", enabled: bool = True):
+        super().__init__(interval_seconds, enabled)
+        if items_action not in ("none", "purge", "archive"):
+            raise ValueError(
+                "Items action must be one of: none, purge, archive")
+
+        self.idle_ttl_hours = idle_ttl_hours
+        self.batch_size = batch_size
+        self.items_action = items_action
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Procesar lotes hasta que no queden carritos inactivos o otro worker tenga el lock"""
+        idle_before = datetime.now(timezone.utc) - \
+            timedelta(hours=self.idle_ttl_hours)
+        carts_abandoned = 0
+        items_removed = 0
+
+        while True:
+            async with AsyncSessionLocal() as session:
+                repository = CartMaintenanceRepository(session)
+
+                if not await repository.try_advisory_xact_lock(CART_SWEEPER_LOCK_KEY):
+                    await session.rollback()
+                    break
+
+                cart_ids = await repository.mark_idle_carts_as_abandoned(
+                    idle_before, self.batch_size)
+
+                if self.items_action == "purge":
+                    items_removed += await repository.purge_items_for_carts(cart_ids)
+                elif self.items_action == "archive":
+                    items_removed += await repository.archive_items_for_carts(cart_ids)
+
+                await session.commit()
+
+            carts_abandoned += len(cart_ids)
+            if len(cart_ids) < self.batch_size:
+                break
+
+        if carts_abandoned:
+            logger.info(
+                f"Carritos marcados como abandonados: {carts_abandoned}, items removidos: {items_removed}")
+
+        return {
+            "carts_abandoned": carts_abandoned,
+            "items_removed": items_removed
+        }
+
+
+abandoned_cart_sweeper = AbandonedCartSweeper(
+    interval_seconds=jobs_settings.CART_SWEEPER_INTERVAL_SECONDS,
+    idle_ttl_hours=jobs_settings.CART_SWEEPER_IDLE_TTL_HOURS,
+    batch_size=jobs_settings.CART_SWEEPER_BATCH_SIZE,
+    items_action=jobs_settings.CART_SWEEPER_ITEMS_ACTION,
+    enabled=jobs_settings.CART_SWEEPER_ENABLED
+)
@@ -0,0 +1,48 @@
+import logging
+from typing import Dict, Any
+from app.core.cart_store_config import cart_store_settings
+from app.infrastructure.cache.cart_store import WriteBehindCartStore, cart_store
+from app.infrastructure.jobs.periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+
+class CartStoreFlushJob(PeriodicJob):
+    """Escribe en Postgres, en una transacción por pasada, los cambios de carritos acumulados en el
+    store write-behind y saca de memoria los carritos inactivos ya escritos"""
+
+    name = "cart-store-flush"
+
+    def __init__(self, store: WriteBehindCartStore, interval_seconds: float, enabled: bool = True):
+        super().__init__(interval_seconds, enabled)
+        self.store = store
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Escribir los carritos con cambios pendientes y descartar los inactivos"""
+        flushed = await self.store.flush()
+        evicted = self.store.evict_idle()
+
+        return {"carts_flushed": flushed, "carts_evicted": evicted}
+
+    async def stop(self) -> None:
+        """Detener el loop del job y escribir lo pendiente antes de salir"""
+        await super().stop()
+        if not self.enabled:
+            return
+
+        try:
+            flushed = await self.store.flush()
+            logger.info(f"Store de carritos: {flushed} carritos escritos al apagar")
+        except Exception as e:
+            logger.error(f"Error escribiendo el store de carritos al apagar: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Obtener métricas del job y del store"""
+        return {**super().get_metrics(), "store": self.store.get_metrics()}
+
+
+cart_store_flush_job = CartStoreFlushJob(
+    store=cart_store,
+    interval_seconds=cart_store_settings.CART_WRITE_BEHIND_FLUSH_INTERVAL_MS / 1000,
+    enabled=cart_store_settings.CART_WRITE_BEHIND_ENABLED
+)
@@ -0,0 +1,70 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+from app.core.database_config import AsyncSessionLocal
+from app.core.jobs_config import jobs_settings
+from app.core.promotion_config import promotion_settings
+from app.infrastructure.db.repositories.purchase_repository import PurchaseRepository
+from app.infrastructure.db.repositories.cart_repository import CartRepository
+from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.infrastructure.db.repositories.checkout_saga_repository import CheckoutSagaRepository
+from app.infrastructure.db.repositories.promotion_repository import PromotionRepository
+from app.infrastructure.clients.products_client import get_products_client
+from app.domain.services.checkout_service import get_checkout_service
+from app.domain.services.promotion_service import get_promotion_service
+from app.infrastructure.jobs.periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+
+class CheckoutRecoveryJob(PeriodicJob):
+    """Retoma los checkouts interrumpidos (caída del proceso a mitad de la saga)"""
+
+    name = "checkout-recovery"
+
+    def __init__(self, interval_seconds: int, batch_size: int, stale_seconds: int, enabled: bool = True):
+        super().__init__(interval_seconds, enabled)
+        self.batch_size = batch_size
+        self.stale_seconds = stale_seconds
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Reservar lotes de checkouts sin avance y completarlos o compensarlos"""
+        stale_before = datetime.now(timezone.utc) - \
+            timedelta(seconds=self.stale_seconds)
+        outcomes = {"completed": 0, "compensated": 0, "compensating": 0, "errors": 0}
+
+        while True:
+            async with AsyncSessionLocal() as session:
+                sagas = await CheckoutSagaRepository(session).claim_stale_sagas(
+                    stale_before, self.batch_size)
+
+            for saga in sagas:
+                try:
+                    async with AsyncSessionLocal() as session:
+                        promotion_service = get_promotion_service(
+                            PromotionRepository(session)) if promotion_settings.PROMOTIONS_ENABLED else None
+                        checkout_service = get_checkout_service(
+                            PurchaseRepository(session), CartRepository(session),
+                            CartItemRepository(session), CheckoutSagaRepository(session),
+                            get_products_client(), promotion_service)
+                        outcomes[await checkout_service.recover_saga(saga)] += 1
+                except Exception as e:
+                    outcomes["errors"] += 1
+                    logger.error(
+                        f"Error recuperando el checkout {saga['saga_id']}: {type(e).__name__}: {str(e)}")
+
+            if len(sagas) < self.batch_size:
+                break
+
+        if any(outcomes.values()):
+            logger.info(f"Checkouts recuperados: {outcomes}")
+
+        return outcomes
+
+
+checkout_recovery_job = CheckoutRecoveryJob(
+    interval_seconds=jobs_settings.CHECKOUT_RECOVERY_INTERVAL_SECONDS,
+    batch_size=jobs_settings.CHECKOUT_RECOVERY_BATCH_SIZE,
+    stale_seconds=jobs_settings.CHECKOUT_RECOVERY_STALE_SECONDS,
+    enabled=jobs_settings.CHECKOUT_RECOVERY_ENABLED
+)
@@ -0,0 +1,105 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+from app.core.database_config import AsyncSessionLocal
+from app.core.jobs_config import jobs_settings
+from app.infrastructure.db.repositories.outbox_repository import OutboxRepository
+from app.infrastructure.messaging.outbox_publishers import get_outbox_publisher
+from app.infrastructure.jobs.periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_CLEANUP_CHUNK_SIZE = 1000
+
+
+class OutboxRelayJob(PeriodicJob):
+    """Publica por lotes los eventos del outbox (entrega al menos una vez, en orden por agregado)
+    y elimina los publicados que superan la retención"""
+
+    name = "outbox-relay"
+
+    def __init__(self, interval_seconds: int, batch_size: int, lease_seconds: int, backoff_seconds: int,
+                 max_backoff_seconds: int, retention_days: int, publisher=None, enabled: bool = True):
+        super().__init__(interval_seconds, enabled)
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.retention_days = retention_days
+        self.publisher = publisher
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Publicar lotes hasta vaciar los eventos listos y luego aplicar la retención"""
+        published = 0
+        failed = 0
+
+        while self.publisher is not None:
+            async with AsyncSessionLocal() as session:
+                events = await OutboxRepository(session).claim_events(
+                    self.batch_size, self.lease_seconds)
+            if not events:
+                break
+
+            event_ids = [event["event_id"] for event in events]
+            try:
+                await self.publisher.publish(events)
+            except Exception as e:
+                attempts = max(event["attempts"] for event in events)
+                retry_in = min(self.backoff_seconds * (2 ** (attempts - 1)),
+                               self.max_backoff_seconds)
+                async with AsyncSessionLocal() as session:
+                    await OutboxRepository(session).mark_failed(
+                        event_ids, f"{type(e).__name__}: {str(e)}", retry_in)
+                failed += len(events)
+                logger.warning(
+                    f"Fallo publicando {len(events)} eventos del outbox, reintento en {retry_in}s: {str(e)}")
+                break
+
+            async with AsyncSessionLocal() as session:
+                await OutboxRepository(session).mark_published(event_ids)
+            published += len(events)
+
+            if len(events) < self.batch_size:
+                break
+
+        deleted = await self._delete_expired_events()
+
+        if published or deleted:
+            logger.info(
+                f"Outbox: {published} eventos publicados, {deleted} eliminados por retención")
+
+        return {"events_published": published, "events_failed": failed, "events_deleted": deleted}
+
+    async def _delete_expired_events(self) -> int:
+        """Eliminar por lotes los eventos publicados hace más de retention_days"""
+        published_before = datetime.now(timezone.utc) - \
+            timedelta(days=self.retention_days)
+        deleted = 0
+
+        while True:
+            async with AsyncSessionLocal() as session:
+                chunk = await OutboxRepository(session).delete_published_before(
+                    published_before, OUTBOX_CLEANUP_CHUNK_SIZE)
+            deleted += chunk
+            if chunk < OUTBOX_CLEANUP_CHUNK_SIZE:
+                break
+
+        return deleted
+
+    async def stop(self) -> None:
+        """Detener el loop del job y cerrar el publicador"""
+        await super().stop()
+        if self.publisher is not None:
+            await self.publisher.aclose()
+
+
+outbox_relay_job = OutboxRelayJob(
+    interval_seconds=jobs_settings.OUTBOX_RELAY_INTERVAL_SECONDS,
+    batch_size=jobs_settings.OUTBOX_RELAY_BATCH_SIZE,
+    lease_seconds=jobs_settings.OUTBOX_RELAY_LEASE_SECONDS,
+    backoff_seconds=jobs_settings.OUTBOX_RELAY_BACKOFF_SECONDS,
+    max_backoff_seconds=jobs_settings.OUTBOX_RELAY_MAX_BACKOFF_SECONDS,
+    retention_days=jobs_settings.OUTBOX_RETENTION_DAYS,
+    publisher=get_outbox_publisher(),
+    enabled=jobs_settings.OUTBOX_RELAY_ENABLED
+)
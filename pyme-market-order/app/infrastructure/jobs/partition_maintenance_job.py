@@ -0,0 +1,124 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+from app.core.database_config import AsyncSessionLocal
+from app.core.jobs_config import jobs_settings
+from app.infrastructure.db.repositories.cart_maintenance_repository import CartMaintenanceRepository
+from app.infrastructure.db.repositories.partition_repository import PartitionRepository, month_start
+from app.infrastructure.jobs.periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+PARTITION_MAINTENANCE_LOCK_KEY = 73010004
+
+PURCHASES_TABLE = "purchases"
+ARCHIVE_TABLES = ("carts_archive", "cart_items_archive")
+
+
+class PartitionMaintenanceJob(PeriodicJob):
+    """Crea las particiones mensuales de los próximos meses, desengancha las que superan la
+    retención y archiva por lotes los carritos cerrados hace más de archive_after_days"""
+
+    name = "partition-maintenance"
+
+    def __init__(self, interval_seconds: int, months_ahead: int, purchase_retention_months: int,
+                 archive_after_days: int, archive_batch_size: int, archive_retention_months: int,
+                 enabled: bool = True):
+        super().__init__(interval_seconds, enabled)
+        if months_ahead < 1:
+            raise ValueError("Months ahead must be at least 1")
+
+        self.months_ahead = months_ahead
+        self.purchase_retention_months = purchase_retention_months
+        self.archive_after_days = archive_after_days
+        self.archive_batch_size = archive_batch_size
+        self.archive_retention_months = archive_retention_months
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Mantener las particiones y luego archivar; otro worker con el lock salta la ejecución"""
+        now = datetime.now(timezone.utc)
+        partitions_created = 0
+        partitions_detached = 0
+
+        async with AsyncSessionLocal() as session:
+            repository = PartitionRepository(session)
+
+            if not await repository.try_advisory_xact_lock(PARTITION_MAINTENANCE_LOCK_KEY):
+                await session.rollback()
+                return {
+                    "partitions_created": 0,
+                    "partitions_detached": 0,
+                    "carts_archived": 0,
+                    "items_archived": 0
+                }
+
+            retention = {PURCHASES_TABLE: self.purchase_retention_months}
+            retention.update({table: self.archive_retention_months for table in ARCHIVE_TABLES})
+
+            for table, retention_months in retention.items():
+                for months in range(self.months_ahead + 1):
+                    try:
+                        if await repository.create_monthly_partition(table, month_start(now, months)):
+                            partitions_created += 1
+                    except Exception as e:
+                        logger.error(f"Error creando partición de {table}: {e}")
+
+                if retention_months > 0:
+                    cutoff = month_start(now, -retention_months)
+                    for partition, month in await repository.get_monthly_partitions(table):
+                        if month >= cutoff:
+                            break
+                        await repository.detach_partition(table, partition)
+                        partitions_detached += 1
+
+            await session.commit()
+
+        carts_archived, items_archived = await self._archive_closed_carts(now)
+
+        if partitions_created or partitions_detached or carts_archived:
+            logger.info(
+                f"Particiones creadas: {partitions_created}, desenganchadas: {partitions_detached}, "
+                f"carritos archivados: {carts_archived}, items archivados: {items_archived}")
+
+        return {
+            "partitions_created": partitions_created,
+            "partitions_detached": partitions_detached,
+            "carts_archived": carts_archived,
+            "items_archived": items_archived
+        }
+
+    async def _archive_closed_carts(self, now: datetime):
+        """Mover lotes de carritos cerrados a las tablas de archivo hasta agotar los pendientes"""
+        closed_before = now - timedelta(days=self.archive_after_days)
+        carts_archived = 0
+        items_archived = 0
+
+        while True:
+            async with AsyncSessionLocal() as session:
+                repository = CartMaintenanceRepository(session)
+
+                if not await repository.try_advisory_xact_lock(PARTITION_MAINTENANCE_LOCK_KEY):
+                    await session.rollback()
+                    break
+
+                carts, items = await repository.archive_closed_carts(
+                    closed_before, self.archive_batch_size)
+                await session.commit()
+
+            carts_archived += carts
+            items_archived += items
+            if carts < self.archive_batch_size:
+                break
+
+        return carts_archived, items_archived
+
+
+partition_maintenance_job = PartitionMaintenanceJob(
+    interval_seconds=jobs_settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+    months_ahead=jobs_settings.PARTITION_MONTHS_AHEAD,
+    purchase_retention_months=jobs_settings.PURCHASE_PARTITION_RETENTION_MONTHS,
+    archive_after_days=jobs_settings.CART_ARCHIVE_AFTER_DAYS,
+    archive_batch_size=jobs_settings.CART_ARCHIVE_BATCH_SIZE,
+    archive_retention_months=jobs_settings.CART_ARCHIVE_RETENTION_MONTHS,
+    enabled=jobs_settings.PARTITION_MAINTENANCE_ENABLED
+)
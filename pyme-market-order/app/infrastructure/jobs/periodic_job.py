@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob(ABC):
+    """Tarea en segundo plano que ejecuta run_once() cada interval_seconds y acumula métricas"""
+
+    name = "periodic-job"
+
+    def __init__(self, interval_seconds: int, enabled: bool = True):
+        self.interval_seconds = interval_seconds
+        self.enabled = enabled
+        self._task: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, Any] = {
+            "runs": 0,
+            "failures": 0,
+            "last_run_at": None,
+            "last_duration_ms": None,
+            "last_error": None,
+        }
+
+    @abstractmethod
+    async def run_once(self) -> Dict[str, Any]:
+        """Ejecutar una pasada del job; devuelve contadores para sumar a las métricas"""
+
+    def start(self) -> None:
+        """Iniciar el loop del job si está habilitado"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self) -> None:
+        """Detener el loop del job"""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_and_record(self) -> Dict[str, Any]:
+        """Ejecutar run_once() registrando métricas"""
+        started = time.perf_counter()
+        self.metrics["runs"] += 1
+        self.metrics["last_run_at"] = datetime.now(timezone.utc).isoformat()
+
+        try:
+            counters = await self.run_once()
+            self.metrics["last_error"] = None
+        except Exception as e:
+            self.metrics["failures"] += 1
+            self.metrics["last_error"] = f"{type(e).__name__}: {str(e)}"
+            logger.error(f"Error ejecutando job {self.name}: {e}")
+            counters = {}
+        finally:
+            self.metrics["last_duration_ms"] = round(
+                (time.perf_counter() - started) * 1000, 2)
+
+        for key, value in counters.items():
+            self.metrics[f"{key}_total"] = self.metrics.get(
+                f"{key}_total", 0) + value
+            self.metrics[f"last_{key}"] = value
+
+        return counters
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Obtener métricas del job"""
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval_seconds,
+            **self.metrics
+        }
+
+    async def _run_loop(self) -> None:
+        while True:
+            await self.run_and_record()
+            await asyncio.sleep(self.interval_seconds)
@@ -0,0 +1,73 @@
+import logging
+from typing import Dict, Any
+from app.core.database_config import AsyncSessionLocal
+from app.core.products_service_config import products_service_settings
+from app.domain.services.product_replica_service import product_replica_metrics
+from app.infrastructure.clients.products_client import ProductsClient, products_client
+from app.infrastructure.db.repositories.product_replica_repository import ProductReplicaRepository
+from app.infrastructure.jobs.periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_REPLICA_RECONCILE_LOCK_KEY = 73010003
+
+
+class ProductReplicaReconcileJob(PeriodicJob):
+    """Compara la réplica local de productos con el catálogo completo del servicio de productos y
+    corrige lo que no llegó por eventos: altas y cambios perdidos y productos eliminados"""
+
+    name = "product-replica-reconcile"
+
+    def __init__(self, client: ProductsClient, interval_seconds: int, enabled: bool = True):
+        super().__init__(interval_seconds, enabled)
+        self.client = client
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Reconciliar en una transacción; otro worker con el lock salta la ejecución"""
+        async with AsyncSessionLocal() as session:
+            repository = ProductReplicaRepository(session)
+
+            if not await repository.try_advisory_xact_lock(PRODUCT_REPLICA_RECONCILE_LOCK_KEY):
+                await session.rollback()
+                return {
+                    "products_seen": 0,
+                    "products_drifted": 0,
+                    "products_upserted": 0,
+                    "products_deactivated": 0
+                }
+
+            # Lo confirmado por eventos después de este momento es más nuevo que la foto
+            synced_before = await repository.get_database_time()
+            products = await self.client.list_products(include_inactive=True)
+
+            versions = await repository.get_versions()
+            drifted = sum(
+                1 for product in products
+                if product.product_id not in versions or
+                (product.updated_at is not None and versions[product.product_id] < product.updated_at)
+            )
+
+            upserted = await repository.upsert_products(products)
+            deactivated = await repository.deactivate_missing(
+                [product.product_id for product in products], synced_before)
+            await session.commit()
+
+        product_replica_metrics.record_reconcile(drifted, deactivated)
+        if drifted or deactivated:
+            logger.warning(
+                f"Réplica de productos desfasada: {drifted} productos corregidos, "
+                f"{deactivated} desactivados")
+
+        return {
+            "products_seen": len(products),
+            "products_drifted": drifted,
+            "products_upserted": upserted,
+            "products_deactivated": deactivated
+        }
+
+
+product_replica_reconcile_job = ProductReplicaReconcileJob(
+    client=products_client,
+    interval_seconds=products_service_settings.PRODUCTS_REPLICA_RECONCILE_INTERVAL_SECONDS,
+    enabled=products_service_settings.PRODUCTS_REPLICA_ENABLED
+)
@@ -0,0 +1,43 @@
+import logging
+from typing import Dict, Any
+from app.core.database_config import AsyncSessionLocal
+from app.core.jobs_config import jobs_settings
+from app.infrastructure.db.repositories.purchase_repository import PurchaseRepository
+from app.infrastructure.jobs.periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+
+class PurchaseCountersBackfillJob(PeriodicJob):
+    """Completa por lotes los conteos de items de las compras creadas antes de guardarlos en la compra"""
+
+    name = "purchase-counters-backfill"
+
+    def __init__(self, interval_seconds: int, batch_size: int, enabled: bool = True):
+        super().__init__(interval_seconds, enabled)
+        self.batch_size = batch_size
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Procesar lotes hasta que no queden compras sin conteos"""
+        purchases_backfilled = 0
+
+        while True:
+            async with AsyncSessionLocal() as session:
+                updated = await PurchaseRepository(session).backfill_item_counters(self.batch_size)
+
+            purchases_backfilled += updated
+            if updated < self.batch_size:
+                break
+
+        if purchases_backfilled:
+            logger.info(
+                f"Conteos de items completados en compras: {purchases_backfilled}")
+
+        return {"purchases_backfilled": purchases_backfilled}
+
+
+purchase_counters_backfill_job = PurchaseCountersBackfillJob(
+    interval_seconds=jobs_settings.PURCHASE_COUNTERS_BACKFILL_INTERVAL_SECONDS,
+    batch_size=jobs_settings.PURCHASE_COUNTERS_BACKFILL_BATCH_SIZE,
+    enabled=jobs_settings.PURCHASE_COUNTERS_BACKFILL_ENABLED
+)
@@ -0,0 +1,103 @@
+import logging
+from typing import Dict, Any, Optional
+from app.core.database_config import AsyncSessionLocal
+from app.core.jobs_config import jobs_settings
+from app.infrastructure.db.repositories.receipt_job_repository import ReceiptJobRepository
+from app.infrastructure.db.repositories.receipt_repository import ReceiptRepository
+from app.infrastructure.db.repositories.purchase_repository import PurchaseRepository
+from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.domain.services.receipt_service import get_receipt_service
+from app.domain.exceptions.purchase_exception import PurchaseNotFoundException
+from app.infrastructure.jobs.periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiptGenerationWorker(PeriodicJob):
+    """Genera los recibos encolados por las compras, con reintentos y backoff exponencial"""
+
+    name = "receipt-generation-worker"
+
+    def __init__(self, interval_seconds: int, batch_size: int, max_attempts: int,
+                 backoff_seconds: int, lease_seconds: int, enabled: bool = True):
+        super().__init__(interval_seconds, enabled)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Reservar y procesar lotes de jobs hasta vaciar la cola de jobs listos"""
+        generated = 0
+        retried = 0
+
+        async with AsyncSessionLocal() as session:
+            failed = await ReceiptJobRepository(session).fail_exhausted_jobs(self.max_attempts)
+        if failed:
+            logger.error(f"{failed} recibos fallidos: intentos agotados sin resultado del worker")
+
+        while True:
+            async with AsyncSessionLocal() as session:
+                jobs = await ReceiptJobRepository(session).claim_jobs(
+                    self.batch_size, self.lease_seconds, self.max_attempts)
+
+            for job in jobs:
+                outcome = await self._process_job(job)
+                if outcome == "done":
+                    generated += 1
+                elif outcome == "retry":
+                    retried += 1
+                else:
+                    failed += 1
+
+            if len(jobs) < self.batch_size:
+                break
+
+        return {
+            "receipts_generated": generated,
+            "jobs_retried": retried,
+            "jobs_failed": failed
+        }
+
+    async def _process_job(self, job: dict) -> str:
+        """Generar el recibo de un job en su propia sesión y registrar el resultado"""
+        async with AsyncSessionLocal() as session:
+            job_repository = ReceiptJobRepository(session)
+            receipt_service = get_receipt_service(
+                ReceiptRepository(session), PurchaseRepository(session), CartItemRepository(session))
+
+            try:
+                await receipt_service.regenerate_receipt(job["purchase_id"])
+                await job_repository.mark_job_done(job["job_id"], job["enqueued_at"])
+                return "done"
+
+            except PurchaseNotFoundException as e:
+                await job_repository.mark_job_failed(
+                    job["job_id"], job["enqueued_at"], e.status.description, None)
+                return "failed"
+            except Exception as e:
+                retry_in = self._retry_delay(job["attempts"])
+                await job_repository.mark_job_failed(
+                    job["job_id"], job["enqueued_at"], f"{type(e).__name__}: {str(e)}", retry_in)
+
+                if retry_in is None:
+                    logger.error(
+                        f"Recibo de la compra {job['purchase_id']} fallido tras {job['attempts']} intentos: {e}")
+                    return "failed"
+                return "retry"
+
+    def _retry_delay(self, attempts: int) -> Optional[int]:
+        """Backoff exponencial; None cuando se agotaron los intentos"""
+        if attempts >= self.max_attempts:
+            return None
+        return self.backoff_seconds * (2 ** (attempts - 1))
+
+
+receipt_generation_worker = ReceiptGenerationWorker(
+    interval_seconds=jobs_settings.RECEIPT_WORKER_INTERVAL_SECONDS,
+    batch_size=jobs_settings.RECEIPT_WORKER_BATCH_SIZE,
+    max_attempts=jobs_settings.RECEIPT_WORKER_MAX_ATTEMPTS,
+    backoff_seconds=jobs_settings.RECEIPT_WORKER_BACKOFF_SECONDS,
+    lease_seconds=jobs_settings.RECEIPT_WORKER_LEASE_SECONDS,
+    enabled=jobs_settings.RECEIPT_WORKER_ENABLED
+)
@@ -0,0 +1,52 @@
+import logging
+from typing import Dict, Any
+from app.core.database_config import AsyncSessionLocal
+from app.core.jobs_config import jobs_settings
+from app.core.receipt_config import receipt_settings
+from app.infrastructure.db.repositories.receipt_repository import ReceiptRepository, RECEIPT_STORAGE_FORMATS
+from app.infrastructure.jobs.periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiptStorageMigrationJob(PeriodicJob):
+    """Convierte por lotes los recibos existentes al formato de almacenamiento configurado"""
+
+    name = "receipt-storage-migration"
+
+    def __init__(self, interval_seconds: int, batch_size: int, target_format: str, enabled: bool = True):
+        super().__init__(interval_seconds, enabled)
+        self.batch_size = batch_size
+        self.target_format = target_format
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Convertir lotes hasta que no queden recibos en el otro formato"""
+        if self.target_format not in RECEIPT_STORAGE_FORMATS:
+            logger.error(
+                f"Formato de almacenamiento de recibos desconocido: {self.target_format}")
+            return {"receipts_converted": 0}
+
+        receipts_converted = 0
+
+        while True:
+            async with AsyncSessionLocal() as session:
+                converted = await ReceiptRepository(session).convert_storage_format(
+                    self.target_format, self.batch_size)
+
+            receipts_converted += converted
+            if converted < self.batch_size:
+                break
+
+        if receipts_converted:
+            logger.info(
+                f"Recibos convertidos a formato {self.target_format}: {receipts_converted}")
+
+        return {"receipts_converted": receipts_converted, "target_format": self.target_format}
+
+
+receipt_storage_migration_job = ReceiptStorageMigrationJob(
+    interval_seconds=jobs_settings.RECEIPT_STORAGE_MIGRATION_INTERVAL_SECONDS,
+    batch_size=jobs_settings.RECEIPT_STORAGE_MIGRATION_BATCH_SIZE,
+    target_format=receipt_settings.RECEIPT_STORAGE_FORMAT,
+    enabled=jobs_settings.RECEIPT_STORAGE_MIGRATION_ENABLED
+)
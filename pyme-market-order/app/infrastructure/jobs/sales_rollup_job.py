@@ -0,0 +1,102 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+from app.core.database_config import AsyncSessionLocal
+from app.core.jobs_config import jobs_settings
+from app.infrastructure.db.repositories.sales_rollup_repository import SalesRollupRepository
+from app.domain.services.report_service import SALES_ROLLUP_WATERMARK
+from app.infrastructure.jobs.periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+SALES_ROLLUP_LOCK_KEY = 73010002
+DIRTY_DAYS_BATCH_SIZE = 31
+
+
+class SalesRollupJob(PeriodicJob):
+    """Suma a los rollups diarios las compras posteriores a la marca de agua, por lotes, y
+    recalcula los días marcados porque una compra ya agregada cambió"""
+
+    name = "sales-rollup"
+
+    def __init__(self, interval_seconds: int, batch_size: int, settle_seconds: int,
+                 timezone_name: str = "UTC", enabled: bool = True):
+        super().__init__(interval_seconds, enabled)
+        self.batch_size = batch_size
+        self.settle_seconds = settle_seconds
+        self.timezone_name = timezone_name
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Procesar lotes hasta alcanzar el corte (ahora - settle_seconds) o perder el lock"""
+        # Las compras se procesan con un margen para que las transacciones aún abiertas
+        # (purchased_at se fija al iniciar la transacción) no queden detrás de la marca de agua
+        cutoff = datetime.now(timezone.utc) - \
+            timedelta(seconds=self.settle_seconds)
+        purchases_processed = 0
+
+        while True:
+            async with AsyncSessionLocal() as session:
+                repository = SalesRollupRepository(session)
+
+                if not await repository.try_advisory_xact_lock(SALES_ROLLUP_LOCK_KEY):
+                    await session.rollback()
+                    break
+
+                after_at, after_id = await repository.lock_watermark(SALES_ROLLUP_WATERMARK)
+                batch_size, upper_at, upper_id = await repository.get_batch_upper_bound(
+                    after_at, after_id, cutoff, self.batch_size)
+
+                if batch_size == 0:
+                    await session.commit()
+                    break
+
+                await repository.apply_purchases_to_rollups(
+                    after_at, after_id, upper_at, upper_id, self.timezone_name)
+                await repository.set_watermark(SALES_ROLLUP_WATERMARK, upper_at, upper_id)
+                await session.commit()
+
+            purchases_processed += batch_size
+            if batch_size < self.batch_size:
+                break
+
+        days_recomputed = await self._recompute_dirty_days()
+
+        if purchases_processed or days_recomputed:
+            logger.info(
+                f"Compras agregadas a los rollups de ventas: {purchases_processed}, "
+                f"días recalculados: {days_recomputed}")
+
+        return {"purchases_processed": purchases_processed, "days_recomputed": days_recomputed}
+
+    async def _recompute_dirty_days(self) -> int:
+        """Recalcular por lotes los días marcados, cada lote en su transacción"""
+        days_recomputed = 0
+
+        while True:
+            async with AsyncSessionLocal() as session:
+                repository = SalesRollupRepository(session)
+
+                if not await repository.try_advisory_xact_lock(SALES_ROLLUP_LOCK_KEY):
+                    await session.rollback()
+                    break
+
+                upto_at, upto_id = await repository.lock_watermark(SALES_ROLLUP_WATERMARK)
+                days = await repository.take_dirty_days(DIRTY_DAYS_BATCH_SIZE)
+                if days and upto_at is not None:
+                    await repository.recompute_days(days, upto_at, upto_id, self.timezone_name)
+                await session.commit()
+
+            days_recomputed += len(days)
+            if len(days) < DIRTY_DAYS_BATCH_SIZE:
+                break
+
+        return days_recomputed
+
+
+sales_rollup_job = SalesRollupJob(
+    interval_seconds=jobs_settings.SALES_ROLLUP_INTERVAL_SECONDS,
+    batch_size=jobs_settings.SALES_ROLLUP_BATCH_SIZE,
+    settle_seconds=jobs_settings.SALES_ROLLUP_SETTLE_SECONDS,
+    timezone_name=jobs_settings.SALES_ROLLUP_TIMEZONE,
+    enabled=jobs_settings.SALES_ROLLUP_ENABLED
+)
@@ -0,0 +1,3 @@
+from .outbox_publishers import (
+    WebhookPublisher, PgNotifyPublisher, build_event_envelope, get_outbox_publisher
+)
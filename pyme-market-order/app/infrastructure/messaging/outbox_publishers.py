@@ -0,0 +1,93 @@
+import hashlib
+import hmac
+import json
+from typing import List, Optional
+import httpx
+from sqlalchemy import text
+from app.core.database_config import AsyncSessionLocal
+from app.core.outbox_config import outbox_settings
+
+
+def build_event_envelope(event: dict) -> dict:
+    """Formato público de un evento del outbox"""
+    return {
+        "eventId": str(event["event_id"]),
+        "sequence": event["sequence"],
+        "aggregateType": event["aggregate_type"],
+        "aggregateId": str(event["aggregate_id"]),
+        "eventType": event["event_type"],
+        "occurredAt": event["created_at"].isoformat(),
+        "payload": event["payload"]
+    }
+
+
+class WebhookPublisher:
+    """Publica cada lote como un único POST JSON {"events": [...]} a todos los webhooks configurados.
+    Un lote se considera entregado sólo si todos los webhooks responden 2xx."""
+
+    def __init__(self, urls: List[str], secret: str = "", timeout: float = 5.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.urls = urls
+        self.secret = secret.encode() if secret else None
+        self.timeout = timeout
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def publish(self, events: List[dict]) -> None:
+        body = json.dumps(
+            {"events": [build_event_envelope(event) for event in events]}).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            headers["X-Outbox-Signature"] = "sha256=" + \
+                hmac.new(self.secret, body, hashlib.sha256).hexdigest()
+
+        client = self._get_client()
+        for url in self.urls:
+            response = await client.post(url, content=body, headers=headers)
+            response.raise_for_status()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, transport=self.transport)
+        return self._client
+
+
+class PgNotifyPublisher:
+    """Publica cada evento con NOTIFY en un canal de Postgres; todo el lote en una sola sentencia.
+    NOTIFY no es durable: sólo lo reciben los listeners conectados en ese momento."""
+
+    def __init__(self, channel: str):
+        self.channel = channel
+
+    async def publish(self, events: List[dict]) -> None:
+        payloads = [json.dumps(build_event_envelope(event)) for event in events]
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                text("SELECT pg_notify(:channel, payload) "
+                     "FROM unnest(CAST(:payloads AS text[])) WITH ORDINALITY AS p(payload, n) ORDER BY n"),
+                {"channel": self.channel, "payloads": payloads}
+            )
+            await session.commit()
+
+    async def aclose(self) -> None:
+        return None
+
+
+def get_outbox_publisher():
+    """Publicador configurado (OUTBOX_PUBLISHER) o None si la publicación está deshabilitada"""
+    if outbox_settings.OUTBOX_PUBLISHER == "webhook" and outbox_settings.OUTBOX_WEBHOOK_URLS:
+        return WebhookPublisher(
+            outbox_settings.OUTBOX_WEBHOOK_URLS,
+            outbox_settings.OUTBOX_WEBHOOK_SECRET,
+            outbox_settings.OUTBOX_WEBHOOK_TIMEOUT_SECONDS
+        )
+    if outbox_settings.OUTBOX_PUBLISHER == "notify":
+        return PgNotifyPublisher(outbox_settings.OUTBOX_NOTIFY_CHANNEL)
+    return None
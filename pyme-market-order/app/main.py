@@ -8,8 +8,13 @@ from app.core.api_config import APIConfig
 from app.api.routes import register_routes, get_registered_routes
 from app.infrastructure.db.models.models import Base
 from app.infrastructure.db.models import (
-    product_model, cart_model, cart_item_model, purchase_model, receipt_model
+    product_model, cart_model, cart_item_model, purchase_model, receipt_model,
+    cart_item_archive_model, receipt_job_model, sales_rollup_model, checkout_saga_model,
+    outbox_event_model, receipt_line_model, promotion_model, cart_archive_model,
+    user_order_stats_model
 )
+from app.infrastructure.jobs import background_jobs
+from app.infrastructure.clients.products_client import products_client
 
 
 @asynccontextmanager
@@ -17,8 +22,17 @@ async def lifespan(_: FastAPI):
     """Gestionar el ciclo de vida de la aplicación"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+    for job in background_jobs:
+        job.start()
+
     yield
 
+    for job in background_jobs:
+        await job.stop()
+
+    await products_client.aclose()
+
 
 app = FastAPI(
     lifespan=lifespan,
@@ -36,6 +50,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Last-Write-At"],
 )
 
 app.add_exception_handler(StatusException, status_exception_handler)
@@ -72,6 +87,6 @@ async def get_routes():
     """Endpoint para obtener información detallada de todas las rutas"""
     return {
         "api_version": APIConfig.API_VERSION_PREFIX,
-        "total_route_groups": 4,
+        "total_route_groups": 6,
         "routes": get_registered_routes()
     }
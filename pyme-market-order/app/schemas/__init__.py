@@ -1,5 +1,6 @@
 from .product_schema import (
-    ProductBase, ProductCreate, ProductUpdate, ProductResponse, ProductListResponse
+    ProductBase, ProductCreate, ProductUpdate, ProductResponse, ProductListResponse,
+    ProductChangeEvent, ProductChangeEventBatch, ProductChangeEventsResult
 )
 from .cart_item_schema import (
     CartItemBase, CartItemCreate, CartItemUpdate, CartItemResponse, CartItemListResponse
@@ -8,10 +9,23 @@ from .cart_schema import (
     CartBase, CartCreate, CartUpdate, CartResponse, CartWithItemsResponse, CartListResponse
 )
 from .purchase_schema import (
-    PurchaseBase, PurchaseCreate, PurchaseResponse, PurchaseWithReceiptResponse, PurchaseListResponse
+    PurchaseBase, PurchaseCreate, PurchaseResponse, PurchaseWithReceiptResponse, PurchaseListResponse,
+    PurchaseReceiptSummary, PurchaseHistoryItem, PurchaseHistoryResponse,
+    PurchaseTaxRepriceRequest, PurchaseTaxRepriceResponse, UserOrderStatsResponse
 )
 from .receipt_schema import (
-    ReceiptResponse, ReceiptDataSchema
+    ReceiptResponse, ReceiptDataSchema, ReceiptSearchItem, ReceiptSearchResponse
+)
+from .report_schema import (
+    SalesPaymentMethodBreakdown, SalesPeriodResponse, SalesProductResponse, SalesReportResponse
+)
+from .checkout_schema import (
+    CheckoutLineResponse, CheckoutSagaResponse,
+    BatchCheckoutRequest, BatchCheckoutResult, BatchCheckoutResponse
+)
+from .promotion_schema import (
+    PromotionBase, PromotionCreate, PromotionUpdate, PromotionResponse, PromotionListResponse,
+    AppliedPromotionResponse, CartPromotionsResponse
 )
 
 CartWithItemsResponse.model_rebuild()
@@ -0,0 +1,65 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+from uuid import UUID
+from pydantic import Field
+from app.core.camel_case_config import CamelBaseModel
+from app.schemas.purchase_schema import PurchaseResponse
+
+
+class CheckoutLineResponse(CamelBaseModel):
+    """Schema para una línea reservada por el checkout"""
+    product_id: UUID
+    product_sku: str
+    quantity: int
+    state: str
+
+
+class CheckoutSagaResponse(CamelBaseModel):
+    """Schema para el estado de un checkout"""
+    saga_id: UUID
+    cart_id: UUID
+    user_id: str
+    status: str
+    payment_method: Optional[str] = None
+    discount_percentage: Optional[Decimal] = None
+    tax_percentage: Optional[Decimal] = None
+    discount_amount: Optional[Decimal] = None
+    promotion_ids: Optional[List[UUID]] = None
+    lines: List[CheckoutLineResponse]
+    purchase_id: Optional[UUID] = None
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class BatchCheckoutRequest(CamelBaseModel):
+    """Schema para procesar la compra de muchos carritos a la vez"""
+    cart_ids: List[UUID] = Field(..., min_length=1,
+                                 description="Carts to purchase")
+    payment_method: Optional[str] = Field(None, pattern="^(cash|card|transfer)$",
+                                          description="Payment method: cash, card, transfer")
+    discount_percentage: Optional[Decimal] = Field(None, ge=0, le=100,
+                                                   description="Discount percentage (0-100)")
+    tax_percentage: Optional[Decimal] = Field(None, ge=0,
+                                              description="Tax percentage")
+
+
+class BatchCheckoutResult(CamelBaseModel):
+    """Schema con el resultado del checkout de un carrito del lote"""
+    cart_id: UUID
+    # completed | already_purchased | failed
+    status: str
+    purchase: Optional[PurchaseResponse] = None
+    error_code: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchCheckoutResponse(CamelBaseModel):
+    """Schema con el resultado de un checkout en lote, en el orden de los carritos pedidos"""
+    requested: int
+    completed: int
+    already_purchased: int
+    failed: int
+    results: List[BatchCheckoutResult]
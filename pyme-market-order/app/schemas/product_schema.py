@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
@@ -81,3 +81,34 @@ class ProductListResponse(CamelBaseModel):
     """Schema para lista de productos"""
     products: list[ProductResponse]
     total: int
+
+
+class ProductChangeEvent(CamelBaseModel):
+    """Schema de un cambio publicado por el servicio de productos. product trae la foto completa
+    del producto tras el cambio y es obligatorio salvo en product.deleted"""
+    event_id: Optional[UUID] = None
+    event_type: str = Field(..., pattern=r"^product\.(created|updated|deleted)$",
+                            description="product.created, product.updated or product.deleted")
+    occurred_at: datetime
+    product_id: UUID
+    product: Optional[ProductResponse] = None
+
+    @validator('product', always=True)
+    def validate_product(cls, v, values):
+        if v is None and values.get('event_type') in ('product.created', 'product.updated'):
+            raise ValueError('Product snapshot is required for created and updated events')
+        if v is not None and 'product_id' in values and v.product_id != values['product_id']:
+            raise ValueError('Product snapshot does not match productId')
+        return v
+
+
+class ProductChangeEventBatch(CamelBaseModel):
+    """Schema de un lote de cambios de productos"""
+    events: List[ProductChangeEvent] = Field(..., min_length=1)
+
+
+class ProductChangeEventsResult(CamelBaseModel):
+    """Schema con el resultado de aplicar un lote de cambios a la réplica"""
+    received: int
+    applied: int
+    ignored: int
@@ -0,0 +1,84 @@
+from typing import Optional, List
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+from pydantic import Field, validator
+from app.core.camel_case_config import CamelBaseModel
+
+PROMOTION_RULE_TYPES = ['percentage_off', 'fixed_off', 'buy_x_get_y']
+
+
+class PromotionBase(CamelBaseModel):
+    """Base schema con campos comunes de la promoción"""
+    name: str = Field(..., min_length=1, max_length=255,
+                      description="Promotion name")
+    rule_type: str = Field(...,
+                           description="Rule type: percentage_off, fixed_off, buy_x_get_y")
+    product_sku: Optional[str] = Field(None, max_length=100,
+                                       description="SKU the rule applies to (cart-level if omitted)")
+    value: Optional[Decimal] = Field(None, gt=0,
+                                     description="Percentage (percentage_off) or amount (fixed_off)")
+    buy_quantity: Optional[int] = Field(None, ge=1,
+                                        description="Units to buy (buy_x_get_y)")
+    get_quantity: Optional[int] = Field(None, ge=1,
+                                        description="Units free (buy_x_get_y)")
+    min_subtotal: Optional[Decimal] = Field(None, ge=0,
+                                            description="Minimum cart (or line) subtotal")
+    min_quantity: Optional[int] = Field(None, ge=1,
+                                        description="Minimum line quantity (SKU rules)")
+    stackable: bool = Field(default=False,
+                            description="Combine with other promotions instead of competing")
+    priority: int = Field(default=0, description="Tie-breaker, higher wins")
+    is_active: bool = True
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+
+    @validator('rule_type')
+    def validate_rule_type(cls, v):
+        if v not in PROMOTION_RULE_TYPES:
+            raise ValueError(
+                f'Rule type must be one of: {", ".join(PROMOTION_RULE_TYPES)}')
+        return v
+
+
+class PromotionCreate(PromotionBase):
+    """Schema para crear una promoción"""
+    pass
+
+
+class PromotionUpdate(PromotionBase):
+    """Schema para reemplazar una promoción"""
+    pass
+
+
+class PromotionResponse(PromotionBase):
+    """Schema para respuesta de promoción"""
+    promotion_id: UUID
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PromotionListResponse(CamelBaseModel):
+    """Schema para lista de promociones"""
+    promotions: List[PromotionResponse]
+    total: int
+
+
+class AppliedPromotionResponse(CamelBaseModel):
+    """Schema con una promoción aplicada al carrito"""
+    promotion_id: UUID
+    name: str
+    product_sku: Optional[str] = None
+    discount_amount: Decimal
+
+
+class CartPromotionsResponse(CamelBaseModel):
+    """Schema con la evaluación de promociones de un carrito"""
+    cart_id: UUID
+    subtotal: Decimal
+    discount_amount: Decimal
+    applied: List[AppliedPromotionResponse]
+    rule_set_version: str
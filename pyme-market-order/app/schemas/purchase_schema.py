@@ -1,4 +1,4 @@
-from typing import Optional, TYPE_CHECKING
+from typing import Optional, List, TYPE_CHECKING
 from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
@@ -62,6 +62,8 @@ class PurchaseResponse(PurchaseBase):
     final_amount: Decimal
     status: str
     purchased_at: datetime
+    items_count: Optional[int] = None
+    total_quantity: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -79,3 +81,51 @@ class PurchaseListResponse(CamelBaseModel):
     """Schema para lista de compras"""
     purchases: list[PurchaseResponse]
     total: int
+
+
+class PurchaseTaxRepriceRequest(CamelBaseModel):
+    """Schema para recalcular el impuesto de muchas compras con una nueva tasa"""
+    purchase_ids: List[UUID] = Field(..., min_length=1,
+                                     description="Purchases to reprice")
+    tax_percentage: Decimal = Field(..., ge=0, le=100,
+                                    description="New tax percentage")
+
+
+class PurchaseTaxRepriceResponse(CamelBaseModel):
+    """Schema con el resultado del recálculo masivo de impuestos"""
+    tax_percentage: Decimal
+    requested: int
+    repriced: int
+    not_found: List[UUID] = []
+    conflicts: List[UUID] = []
+
+
+class PurchaseReceiptSummary(CamelBaseModel):
+    """Schema con el resumen del recibo embebido en el historial"""
+    receipt_id: UUID
+    generated_at: datetime
+
+
+class PurchaseHistoryItem(PurchaseResponse):
+    """Schema para una compra del historial con conteos y recibo"""
+    items_count: int = 0
+    total_quantity: int = 0
+    receipt: Optional[PurchaseReceiptSummary] = None
+
+
+class PurchaseHistoryResponse(CamelBaseModel):
+    """Schema para página del historial de compras (paginación por cursor)"""
+    purchases: List[PurchaseHistoryItem]
+    limit: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+
+class UserOrderStatsResponse(CamelBaseModel):
+    """Schema con los totales históricos de compras de un usuario"""
+    user_id: str
+    orders_count: int = 0
+    total_spent: Decimal = Decimal("0.00")
+    first_order_at: Optional[datetime] = None
+    last_order_at: Optional[datetime] = None
+    last_purchase_id: Optional[UUID] = None
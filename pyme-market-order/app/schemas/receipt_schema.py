@@ -1,6 +1,7 @@
 from datetime import datetime
+from decimal import Decimal
 from uuid import UUID
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from app.core.camel_case_config import CamelBaseModel
 
 
@@ -27,3 +28,23 @@ class ReceiptDataSchema(CamelBaseModel):
     payment_method: str
     items: list[Dict[str, Any]]
     summary: Dict[str, Any]
+
+
+class ReceiptSearchItem(CamelBaseModel):
+    """Schema para un resultado de búsqueda de recibos (proyección sin el documento completo)"""
+    receipt_id: UUID
+    purchase_id: UUID
+    purchase_number: Optional[str] = None
+    purchased_at: datetime
+    generated_at: datetime
+    payment_method: Optional[str] = None
+    final_amount: Optional[Decimal] = None
+    items_count: int
+
+
+class ReceiptSearchResponse(CamelBaseModel):
+    """Schema para una página de resultados de búsqueda de recibos"""
+    receipts: List[ReceiptSearchItem]
+    limit: int
+    has_more: bool
+    next_cursor: Optional[str] = None
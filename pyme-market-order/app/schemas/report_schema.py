@@ -0,0 +1,41 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+from app.core.camel_case_config import CamelBaseModel
+
+
+class SalesPaymentMethodBreakdown(CamelBaseModel):
+    """Schema para ventas de un periodo por método de pago"""
+    payment_method: str
+    purchases_count: int
+    net_amount: Decimal
+
+
+class SalesPeriodResponse(CamelBaseModel):
+    """Schema para totales de ventas de un periodo"""
+    period_start: date
+    purchases_count: int
+    units_sold: int
+    gross_amount: Decimal
+    discount_amount: Decimal
+    tax_amount: Decimal
+    net_amount: Decimal
+    payment_methods: List[SalesPaymentMethodBreakdown] = []
+
+
+class SalesProductResponse(CamelBaseModel):
+    """Schema para ventas acumuladas de un producto (SKU)"""
+    product_sku: str
+    product_name: str
+    units_sold: int
+    revenue: Decimal
+
+
+class SalesReportResponse(CamelBaseModel):
+    """Schema para el reporte de ventas basado en rollups"""
+    granularity: str
+    date_from: date
+    date_to: date
+    periods: List[SalesPeriodResponse]
+    top_products: List[SalesProductResponse]
+    data_up_to: Optional[datetime] = None
@@ -0,0 +1,145 @@
+"""Comparar el throughput de mutaciones de carrito escribiendo directo a Postgres y con el store write-behind.
+
+Necesita la base de datos configurada en .env. Crea --carts carritos con --items items cada uno
+y ejecuta --ops cambios de cantidad repartidos entre --concurrency workers, primero con el
+servicio escribiendo cada cambio y luego con el store (escrituras coalescidas cada
+--flush-interval-ms, más una escritura final incluida en el tiempo medido). Al terminar los
+carritos quedan abandonados y sin items:
+
+    PYTHONPATH=. python benchmarks/cart_write_behind.py --carts 50 --items 10 --ops 5000
+
+Resultados con los valores por defecto (50 carritos x 10 items, 5000 cambios, 20 workers, escritura
+cada 250 ms), PostgreSQL 16 local en la misma máquina de 1 vCPU, tres corridas:
+
+    direct         114-132 ops/s   p50: 146-171 ms   p99: 233-296 ms
+    write-behind  2924-3547 ops/s  p50: 2.6-2.8 ms   p99: 57-123 ms   (3-4 escrituras, 144-189 carritos)
+
+El p99 con write-behind lo marcan las mutaciones que esperan la carga inicial del carrito o
+coinciden con una escritura. El log de SQL del engine se desactiva durante la medición.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from decimal import Decimal
+from uuid import uuid4
+
+from app.core.database_config import AsyncSessionLocal, engine
+from app.domain.services.cart_item_service import CartItemService
+from app.infrastructure.cache.cart_store import WriteBehindCartStore
+from app.infrastructure.db.repositories.cart_item_repository import CartItemRepository
+from app.infrastructure.db.repositories.cart_repository import CartRepository
+from app.schemas.cart_item_schema import CartItemCreate
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def create_carts(carts, items):
+    """Crear los carritos de prueba; devuelve (cart_ids, item_ids)"""
+    cart_ids, item_ids = [], []
+    run_id = uuid4().hex[:8]
+    async with AsyncSessionLocal() as session:
+        cart_repository = CartRepository(session)
+        service = CartItemService(CartItemRepository(session), cart_repository)
+        for c in range(carts):
+            cart = await cart_repository.get_or_create_active_cart(f"bench-{run_id}-{c}")
+            cart_ids.append(cart.cart_id)
+            for i in range(items):
+                item = await service.add_item_to_cart(cart.cart_id, CartItemCreate(
+                    product_id=uuid4(),
+                    product_name=f"Bench product {i}",
+                    product_sku=f"BENCH-{i:04d}",
+                    unit_price=Decimal("9.99"),
+                    quantity=1
+                ))
+                item_ids.append(item.cart_item_id)
+    return cart_ids, item_ids
+
+
+async def cleanup(cart_ids):
+    async with AsyncSessionLocal() as session:
+        await CartItemRepository(session).delete_items_for_carts(cart_ids)
+        cart_repository = CartRepository(session)
+        for cart_id in cart_ids:
+            await cart_repository.mark_cart_as_abandoned(cart_id)
+
+
+async def run_mutations(item_ids, ops, concurrency, seed, store=None):
+    """Ejecutar ops cambios de cantidad; devuelve latencias en ms"""
+    rng = random.Random(seed)
+    plan = [(rng.choice(item_ids), rng.randint(1, 20)) for _ in range(ops)]
+    samples = []
+
+    async def worker(chunk):
+        for item_id, quantity in chunk:
+            started = time.perf_counter()
+            async with AsyncSessionLocal() as session:
+                service = CartItemService(
+                    CartItemRepository(session), CartRepository(session), cart_store=store)
+                await service.update_item_quantity(item_id, quantity)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(worker(plan[w::concurrency]) for w in range(concurrency)))
+    return samples
+
+
+async def run_write_behind(item_ids, args):
+    store = WriteBehindCartStore(max_carts=args.carts * 2, idle_seconds=300)
+
+    async def flush_loop():
+        while True:
+            await asyncio.sleep(args.flush_interval_ms / 1000)
+            await store.flush()
+
+    flusher = asyncio.create_task(flush_loop())
+    try:
+        samples = await run_mutations(item_ids, args.ops, args.concurrency, args.seed, store)
+    finally:
+        flusher.cancel()
+        try:
+            await flusher
+        except asyncio.CancelledError:
+            pass
+    await store.flush()
+    return samples, store.get_metrics()
+
+
+def report(label, samples, elapsed):
+    print(f"{label:<13} {len(samples) / elapsed:>9.0f} ops/s  "
+          f"p50: {statistics.median(samples):.2f} ms  p99: {percentile(samples, 99):.2f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--carts", type=int, default=50)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--flush-interval-ms", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    # echo=True en la configuración: escribir cada sentencia al log distorsiona los tiempos
+    engine.echo = False
+
+    cart_ids, item_ids = await create_carts(args.carts, args.items)
+    try:
+        started = time.perf_counter()
+        samples = await run_mutations(item_ids, args.ops, args.concurrency, args.seed)
+        report("direct", samples, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        samples, metrics = await run_write_behind(item_ids, args)
+        report("write-behind", samples, time.perf_counter() - started)
+        print(f"flushes: {metrics['flushes']}  carts flushed: {metrics['carts_flushed']}  "
+              f"loads: {metrics['loads']}")
+    finally:
+        await cleanup(cart_ids)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Medir la latencia de checkout (p50/p99) contra un servicio de órdenes en ejecución.
+
+Cada iteración crea un carrito, agrega los productos indicados y lo procesa con
+POST /purchases/cart/{cart_id}/process; sólo se cronometra el procesamiento.
+
+    python benchmarks/checkout_latency.py --base-url http://localhost:8002 \\
+        --n 500 --concurrency 20 --product <uuid>:<sku>:<precio> [--product ...]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import uuid4
+
+import httpx
+
+API_PREFIX = "/api/v1"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_checkout(client, products, quantity):
+    response = await client.post(f"{API_PREFIX}/carts/", json={"userId": f"bench-{uuid4().hex[:12]}"})
+    response.raise_for_status()
+    cart_id = response.json()["cartId"]
+
+    for product_id, sku, price in products:
+        response = await client.post(f"{API_PREFIX}/cart-items/{cart_id}/items", json={
+            "productId": product_id,
+            "productName": sku,
+            "productSku": sku,
+            "unitPrice": price,
+            "quantity": quantity
+        })
+        response.raise_for_status()
+
+    started = time.perf_counter()
+    response = await client.post(
+        f"{API_PREFIX}/purchases/cart/{cart_id}/process", params={"payment_method": "card"})
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    return elapsed_ms, response.status_code
+
+
+async def main(args):
+    products = [tuple(value.split(":", 2)) for value in args.product]
+    limits = httpx.Limits(max_connections=args.concurrency,
+                          max_keepalive_connections=args.concurrency)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as client:
+        async def bounded():
+            async with semaphore:
+                return await run_checkout(client, products, args.quantity)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(bounded() for _ in range(args.n)), return_exceptions=True)
+        wall_seconds = time.perf_counter() - started
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    samples = [result for result in results if not isinstance(result, Exception)]
+    ok = [elapsed for elapsed, status_code in samples if status_code == 201]
+    status_counts = {}
+    for _, status_code in samples:
+        status_counts[status_code] = status_counts.get(status_code, 0) + 1
+
+    print(f"checkouts: {args.n}  concurrency: {args.concurrency}  lines: {len(products)}")
+    print(f"status codes: {status_counts}  setup errors: {len(errors)}")
+    if ok:
+        print(f"p50: {percentile(ok, 50):.1f} ms  p99: {percentile(ok, 99):.1f} ms  "
+              f"mean: {statistics.mean(ok):.1f} ms  max: {max(ok):.1f} ms")
+        print(f"throughput: {len(ok) / wall_seconds:.1f} checkouts/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkout latency benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8002")
+    parser.add_argument("--n", type=int, default=200, help="Number of checkouts")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--quantity", type=int, default=1, help="Units per line")
+    parser.add_argument("--product", action="append", required=True,
+                        help="product_id:sku:unit_price (repeat for more lines)")
+    asyncio.run(main(parser.parse_args()))
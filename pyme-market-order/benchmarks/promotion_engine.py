@@ -0,0 +1,93 @@
+"""Medir el tiempo de evaluación de promociones sobre un carrito con el conjunto de reglas compilado.
+
+No necesita base de datos: genera --rules promociones sintéticas (porcentaje, monto fijo y
+NxM por SKU, más reglas de carrito por umbral), las compila una vez y evalúa --iterations
+veces un carrito de --lines líneas. Imprime el tiempo de compilación y la latencia p50/p99
+de la evaluación:
+
+    PYTHONPATH=. python benchmarks/promotion_engine.py --rules 5000 --lines 50
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.domain.entities.promotion import Promotion
+from app.domain.services.promotion_engine import compile_rule_set
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def build_promotions(count, skus, rng):
+    promotions = []
+    for i in range(count):
+        rule_type = rng.choice(["percentage_off", "fixed_off", "buy_x_get_y"])
+        cart_level = rule_type != "buy_x_get_y" and rng.random() < 0.1
+        promotions.append(Promotion(
+            promotion_id=uuid4(),
+            name=f"promo-{i}",
+            rule_type=rule_type,
+            product_sku=None if cart_level else rng.choice(skus),
+            value=Decimal(rng.randint(1, 30)) if rule_type != "buy_x_get_y" else None,
+            buy_quantity=rng.randint(1, 3) if rule_type == "buy_x_get_y" else None,
+            get_quantity=1 if rule_type == "buy_x_get_y" else None,
+            min_subtotal=Decimal(rng.randint(0, 500)) if rng.random() < 0.5 else None,
+            min_quantity=rng.randint(1, 4) if not cart_level and rng.random() < 0.3 else None,
+            stackable=rng.random() < 0.2,
+            priority=rng.randint(0, 10)
+        ))
+    return promotions
+
+
+def build_cart(lines, skus, rng):
+    return [
+        SimpleNamespace(
+            product_sku=sku,
+            unit_price=Decimal(rng.randint(100, 50000)) / 100,
+            quantity=(quantity := rng.randint(1, 6)),
+            subtotal=Decimal(rng.randint(100, 50000)) / 100 * quantity
+        )
+        for sku in rng.sample(skus, lines)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=50)
+    parser.add_argument("--skus", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    skus = [f"SKU-{i:05d}" for i in range(max(args.skus, args.lines))]
+    promotions = build_promotions(args.rules, skus, rng)
+    cart = build_cart(args.lines, skus, rng)
+
+    started = time.perf_counter()
+    rule_set = compile_rule_set(promotions, "benchmark", datetime.now(timezone.utc))
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    samples = []
+    for _ in range(args.iterations):
+        started = time.perf_counter()
+        evaluation = rule_set.evaluate(cart)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    print(f"rules: {rule_set.rule_count}  lines: {args.lines}  compile: {compile_ms:.1f} ms")
+    print(f"evaluate p50: {statistics.median(samples):.3f} ms  "
+          f"p99: {percentile(samples, 99):.3f} ms  "
+          f"applied: {len(evaluation.applied)}  discount: {evaluation.discount_amount}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Comparar tamaño en disco y latencia de lectura de recibos en formato json y compact.
+
+Se conecta a la base de datos configurada en .env. Mide el tamaño de receipts y
+receipt_lines, el tamaño medio de receipt_data por formato y la latencia (p50/p99) de
+ReceiptRepository.get_receipt_by_id para una muestra de cada formato, en frío (cache de
+líneas vacía) y en caliente.
+
+Con --convert N se convierten antes N recibos json a compact (usar sobre una copia):
+
+    PYTHONPATH=. python benchmarks/receipt_storage.py --sample 500 [--convert 5000]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.core.database_config import AsyncSessionLocal
+from app.infrastructure.cache.receipt_lines_cache import receipt_lines_cache
+from app.infrastructure.db.repositories.receipt_repository import ReceiptRepository
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def print_sizes(session):
+    result = await session.execute(text("""
+        SELECT pg_total_relation_size('receipts') AS receipts_bytes,
+               pg_total_relation_size('receipt_lines') AS receipt_lines_bytes
+    """))
+    sizes = result.one()
+    print(f"receipts: {sizes.receipts_bytes / 1024:.0f} KiB  "
+          f"receipt_lines: {sizes.receipt_lines_bytes / 1024:.0f} KiB")
+
+    result = await session.execute(text("""
+        SELECT r.storage_format, count(*) AS receipts,
+               avg(pg_column_size(r.receipt_data)) AS avg_document_bytes,
+               coalesce(sum(l.lines_bytes), 0) / count(*) AS avg_lines_bytes
+        FROM receipts r
+        LEFT JOIN (
+            SELECT receipt_id, sum(pg_column_size(receipt_lines.*)) AS lines_bytes
+            FROM receipt_lines GROUP BY receipt_id
+        ) l ON l.receipt_id = r.receipt_id
+        GROUP BY r.storage_format
+    """))
+    for row in result.all():
+        print(f"  {row.storage_format:8} receipts: {row.receipts}  "
+              f"avg receipt_data: {float(row.avg_document_bytes):.0f} B  "
+              f"avg lines (tuples): {float(row.avg_lines_bytes):.0f} B")
+
+
+async def measure_reads(storage_format, receipt_ids, warm):
+    samples = []
+    async with AsyncSessionLocal() as session:
+        repository = ReceiptRepository(session)
+        if warm:
+            for receipt_id in receipt_ids:
+                await repository.get_receipt_by_id(receipt_id)
+        else:
+            receipt_lines_cache.clear()
+
+        for receipt_id in receipt_ids:
+            # Sin identity map: cada lectura va a la base de datos
+            session.expunge_all()
+            started = time.perf_counter()
+            await repository.get_receipt_by_id(receipt_id)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    label = "warm" if warm else "cold"
+    print(f"  {storage_format:8} {label}: p50 {percentile(samples, 50):.2f} ms  "
+          f"p99 {percentile(samples, 99):.2f} ms  mean {statistics.mean(samples):.2f} ms")
+
+
+async def main(args):
+    if args.convert:
+        async with AsyncSessionLocal() as session:
+            repository = ReceiptRepository(session, storage_format="compact")
+            converted = 0
+            while converted < args.convert:
+                batch = await repository.convert_storage_format(
+                    "compact", min(500, args.convert - converted))
+                if not batch:
+                    break
+                converted += batch
+        print(f"converted to compact: {converted}")
+
+    async with AsyncSessionLocal() as session:
+        await print_sizes(session)
+
+        samples_by_format = {}
+        for storage_format in ("json", "compact"):
+            result = await session.execute(text("""
+                SELECT receipt_id FROM receipts WHERE storage_format = :storage_format
+                ORDER BY random() LIMIT :sample
+            """), {"storage_format": storage_format, "sample": args.sample})
+            samples_by_format[storage_format] = result.scalars().all()
+
+    print(f"get_receipt_by_id latency (sample {args.sample}):")
+    for storage_format, receipt_ids in samples_by_format.items():
+        if not receipt_ids:
+            print(f"  {storage_format:8} no receipts")
+            continue
+        await measure_reads(storage_format, receipt_ids, warm=False)
+        await measure_reads(storage_format, receipt_ids, warm=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Receipt storage benchmark")
+    parser.add_argument("--sample", type=int, default=500, help="Receipts read per format")
+    parser.add_argument("--convert", type=int, default=0,
+                        help="Convert this many json receipts to compact before measuring")
+    asyncio.run(main(parser.parse_args()))
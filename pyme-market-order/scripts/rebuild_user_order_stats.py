@@ -0,0 +1,29 @@
+"""Recalcular desde cero la tabla user_order_stats a partir de purchases.
+
+Necesita la base de datos configurada en .env. Reemplaza todos los totales con un solo
+INSERT ... SELECT en una transacción; mientras dura, las compras nuevas esperan y al terminar
+suman sobre el resultado, así que puede ejecutarse con el servicio en marcha:
+
+    PYTHONPATH=. python scripts/rebuild_user_order_stats.py
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.database_config import AsyncSessionLocal
+from app.infrastructure.db.repositories.user_order_stats_repository import UserOrderStatsRepository
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        users = await UserOrderStatsRepository(session).rebuild()
+
+    print(f"user_order_stats rebuilt: {users} users in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
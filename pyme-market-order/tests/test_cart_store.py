@@ -0,0 +1,106 @@
+import importlib
+from decimal import Decimal
+from uuid import uuid4
+import pytest
+from app.domain.entities.cart import Cart
+from app.infrastructure.cache.cart_store import WriteBehindCartStore
+
+# El paquete reexporta la instancia cart_store con el mismo nombre que el módulo
+cart_store_module = importlib.import_module("app.infrastructure.cache.cart_store")
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeCartItemRepository:
+    """Escribe todo salvo los lotes que incluyen un carrito rechazado"""
+    rejected = set()
+    unavailable = False
+    written = []
+
+    def __init__(self, session):
+        self.session = session
+
+    async def apply_cart_changes(self, changes):
+        if self.unavailable:
+            raise ConnectionError("database unavailable")
+        cart_ids = {change["cart_id"] for change in changes}
+        if cart_ids & self.rejected:
+            raise ValueError("numeric field overflow")
+        self.written.append(cart_ids)
+        return cart_ids
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    monkeypatch.setattr(cart_store_module, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(cart_store_module, "CartItemRepository", FakeCartItemRepository)
+    monkeypatch.setattr(FakeCartItemRepository, "rejected", set())
+    monkeypatch.setattr(FakeCartItemRepository, "unavailable", False)
+    monkeypatch.setattr(FakeCartItemRepository, "written", [])
+    return FakeCartItemRepository
+
+
+def add_dirty_cart(store: WriteBehindCartStore):
+    cart_id = uuid4()
+    entry = store.load(Cart(cart_id=cart_id, user_id=f"user-{cart_id}"), [])
+    store.add_item(entry, cart_id, uuid4(), "Café 500g", "caf-500", Decimal("12.50"), 1)
+    return cart_id
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_all_carts_in_one_batch(repository):
+    store = WriteBehindCartStore()
+    cart_ids = {add_dirty_cart(store) for _ in range(3)}
+
+    assert await store.flush() == 3
+    assert repository.written == [cart_ids]
+
+
+@pytest.mark.asyncio
+async def test_failing_cart_is_quarantined_and_the_rest_are_written(repository):
+    store = WriteBehindCartStore()
+    good = {add_dirty_cart(store) for _ in range(2)}
+    poison = add_dirty_cart(store)
+    repository.rejected.add(poison)
+
+    assert await store.flush() == 2
+    assert set().union(*repository.written) == good
+    assert poison in store.quarantine
+    assert store.get(poison) is None
+    assert not any(store.get(cart_id).is_dirty for cart_id in good)
+    assert store.get_metrics()["carts_quarantined"] == 1
+
+
+@pytest.mark.asyncio
+async def test_changes_stay_pending_while_the_database_is_unavailable(repository):
+    store = WriteBehindCartStore(max_flush_failures=2)
+    cart_id = add_dirty_cart(store)
+    repository.unavailable = True
+
+    with pytest.raises(ConnectionError):
+        await store.flush()
+    assert store.get(cart_id).is_dirty
+    assert not store.quarantine
+
+    with pytest.raises(ConnectionError):
+        await store.flush()
+    assert cart_id in store.quarantine
+
+
+@pytest.mark.asyncio
+async def test_flush_of_requested_carts_fails_if_one_is_quarantined(repository):
+    store = WriteBehindCartStore()
+    good = add_dirty_cart(store)
+    poison = add_dirty_cart(store)
+    repository.rejected.add(poison)
+
+    with pytest.raises(ValueError):
+        await store.flush([good, poison], evict=True)
+    assert poison in store.quarantine
+    assert not store.get(good).is_dirty
@@ -0,0 +1,87 @@
+import time
+import pytest
+from fastapi import Request, Response
+from app.api.dependencies import database
+from app.api.dependencies.database import LAST_WRITE_COOKIE, LAST_WRITE_HEADER, get_db_session
+
+
+class FakeSession:
+    def __init__(self, target: str):
+        self.target = target
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    monkeypatch.setattr(database, "AsyncSessionLocal", lambda: FakeSession("primary"))
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocal", lambda: FakeSession("replica"))
+    monkeypatch.setattr(database.database_settings, "DB_REPLICA_ENABLED", True)
+    monkeypatch.setattr(database.database_settings, "DB_REPLICA_HOST", "replica.db")
+    monkeypatch.setattr(database.database_settings, "DB_READ_YOUR_WRITES_SECONDS", 5.0)
+    return database.database_settings
+
+
+def make_request(method: str, headers: dict = None) -> Request:
+    return Request({
+        "type": "http",
+        "method": method,
+        "path": "/purchases/",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    })
+
+
+async def session_target(request: Request, response: Response = None) -> str:
+    sessions = get_db_session(request, response or Response())
+    session = await sessions.__anext__()
+    await sessions.aclose()
+    return session.target
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_the_replica(replica):
+    assert await session_target(make_request("GET")) == "replica"
+
+
+@pytest.mark.asyncio
+async def test_writes_go_to_the_primary_and_open_the_window(replica):
+    response = Response()
+
+    assert await session_target(make_request("POST"), response) == "primary"
+    assert LAST_WRITE_HEADER in response.headers
+    assert LAST_WRITE_COOKIE in response.headers["set-cookie"]
+
+
+@pytest.mark.asyncio
+async def test_reads_after_a_write_go_to_the_primary_within_the_window(replica):
+    response = Response()
+    await session_target(make_request("POST"), response)
+    last_write_at = response.headers[LAST_WRITE_HEADER]
+
+    assert await session_target(make_request("GET", {LAST_WRITE_HEADER: last_write_at})) == "primary"
+    assert await session_target(make_request("GET", {"Cookie": f"{LAST_WRITE_COOKIE}={last_write_at}"})) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_reads_return_to_the_replica_after_the_window(replica):
+    last_write_at = f"{time.time() - replica.DB_READ_YOUR_WRITES_SECONDS - 1:.3f}"
+
+    assert await session_target(make_request("GET", {LAST_WRITE_HEADER: last_write_at})) == "replica"
+
+
+@pytest.mark.asyncio
+async def test_everything_goes_to_the_primary_without_replica(replica, monkeypatch):
+    monkeypatch.setattr(replica, "DB_REPLICA_ENABLED", False)
+    response = Response()
+
+    assert await session_target(make_request("GET")) == "primary"
+    assert await session_target(make_request("POST"), response) == "primary"
+    assert LAST_WRITE_HEADER not in response.headers
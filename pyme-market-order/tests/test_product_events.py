@@ -0,0 +1,35 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from app.api.dependencies.database import get_db_session
+from app.core.products_service_config import products_service_settings
+from app.main import app
+
+
+async def no_session():
+    yield None
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db_session] = no_session
+    yield AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_events_are_refused_without_secret(client, monkeypatch):
+    monkeypatch.setattr(products_service_settings, "PRODUCTS_EVENTS_SECRET", "")
+
+    response = await client.post("/api/v1/products/events", content=b'{"events": []}')
+
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_events_with_invalid_signature_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(products_service_settings, "PRODUCTS_EVENTS_SECRET", "s3cret")
+
+    response = await client.post("/api/v1/products/events", content=b'{"events": []}',
+                                 headers={"X-Products-Signature": "sha256=00"})
+
+    assert response.status_code == 401
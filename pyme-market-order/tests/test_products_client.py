@@ -0,0 +1,112 @@
+from uuid import uuid4
+import httpx
+import pytest
+from app.domain.exceptions.product_exception import (
+    ProductsServiceUnavailableException,
+    ProductsCircuitOpenException
+)
+from app.infrastructure.clients.products_client import CircuitBreaker, ProductsClient
+
+BASE_URL = "http://products.test"
+
+
+def make_client(retries: int = 2, breaker: CircuitBreaker = None) -> ProductsClient:
+    return ProductsClient(BASE_URL, retries=retries, retry_backoff=0,
+                          breaker=breaker or CircuitBreaker(5, 30.0))
+
+
+def product_payload(product_id) -> dict:
+    return {
+        "productId": str(product_id),
+        "name": "Café 500g",
+        "price": "12.50",
+        "stockQuantity": 7,
+        "sku": "CAF-500",
+        "isActive": True
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_product_returns_product(httpx_mock):
+    product_id = uuid4()
+    httpx_mock.add_response(
+        url=f"{BASE_URL}/products/{product_id}", json=product_payload(product_id))
+    client = make_client()
+
+    product = await client.get_product(product_id)
+
+    assert product.product_id == product_id
+    assert product.stock_quantity == 7
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_product_returns_none_on_404(httpx_mock):
+    product_id = uuid4()
+    httpx_mock.add_response(url=f"{BASE_URL}/products/{product_id}", status_code=404)
+    client = make_client()
+
+    assert await client.get_product(product_id) is None
+    assert client.breaker.state == "closed"
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_product_retries_after_timeout(httpx_mock):
+    product_id = uuid4()
+    url = f"{BASE_URL}/products/{product_id}"
+    httpx_mock.add_exception(httpx.ReadTimeout("read timed out"), url=url)
+    httpx_mock.add_response(url=url, json=product_payload(product_id))
+    client = make_client(retries=1)
+
+    product = await client.get_product(product_id)
+
+    assert product.product_id == product_id
+    assert len(httpx_mock.get_requests()) == 2
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_reduce_stock_is_not_retried_after_timeout(httpx_mock):
+    product_id = uuid4()
+    httpx_mock.add_exception(
+        httpx.ReadTimeout("read timed out"),
+        url=f"{BASE_URL}/products/{product_id}/stock/reduce?quantity=2")
+    client = make_client(retries=2)
+
+    with pytest.raises(ProductsServiceUnavailableException):
+        await client.reduce_stock(product_id, 2)
+
+    assert len(httpx_mock.get_requests()) == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_fails_fast(httpx_mock):
+    product_id = uuid4()
+    httpx_mock.add_response(
+        url=f"{BASE_URL}/products/{product_id}", status_code=503, is_reusable=True)
+    client = make_client(retries=0, breaker=CircuitBreaker(2, 30.0))
+
+    for _ in range(2):
+        with pytest.raises(ProductsServiceUnavailableException):
+            await client.get_product(product_id)
+
+    assert client.breaker.state == "open"
+    with pytest.raises(ProductsCircuitOpenException):
+        await client.get_product(product_id)
+    assert len(httpx_mock.get_requests()) == 2
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_reserve_stock_sends_nothing_while_breaker_is_open(httpx_mock):
+    breaker = CircuitBreaker(1, 30.0)
+    breaker.record_failure()
+    client = make_client(breaker=breaker)
+
+    results = await client.reserve_stock([(uuid4(), 1), (uuid4(), 2)])
+
+    assert all(isinstance(result, ProductsCircuitOpenException) for result in results)
+    assert httpx_mock.get_requests() == []
+    await client.aclose()